@@ -3,17 +3,32 @@ Configuration de l'application
 """
 import os
 import logging
+import tempfile
 from pathlib import Path
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _env_flag(name, default=False):
+    """
+    Lit une variable d'environnement booléenne (1, true, yes, on)
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
 # Chemin de base de l'application
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Dossiers de données
-DATA_DIR = BASE_DIR / "data"
+# Mode serverless (points d'entrée api/ déployés sur Vercel) : seul le dossier temporaire
+# est accessible en écriture, les données y sont placées
+SERVERLESS = _env_flag("SERVERLESS", bool(os.environ.get("VERCEL")))
+
+# Dossiers de données (DATA_DIR pour les placer ailleurs, par exemple pendant les tests)
+if os.environ.get("DATA_DIR"):
+    DATA_DIR = Path(os.environ["DATA_DIR"])
+else:
+    DATA_DIR = Path(tempfile.gettempdir()) / "doc-convert" if SERVERLESS else BASE_DIR / "data"
 UPLOADS_DIR = DATA_DIR / "uploads"
 OUTPUT_DIR = DATA_DIR / "output"
 TEMP_DIR = DATA_DIR / "temp"
@@ -30,6 +45,247 @@ os.makedirs(UPLOADS_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# Préchargement des bibliothèques lourdes au démarrage, pour les workers de longue durée
+# (par défaut elles sont importées au premier usage, ce qui réduit le démarrage à froid)
+PREWARM = _env_flag("PREWARM")
+
+# Pool de processus pour les traitements lourds exécutés en parallèle
+WORKER_POOL_CONFIG = {
+    "max_workers": int(os.environ.get("WORKER_POOL_SIZE", os.cpu_count() or 2)),
+}
+
+# Workers supervisés des traitements lourds appelés par les routes (conversions, extractions) :
+# délai et mémoire (RSS) maximaux par tâche, recyclage après max_tasks tâches
+SUPERVISOR_CONFIG = {
+    "enabled": _env_flag("SUPERVISED_WORKERS", not SERVERLESS),
+    "workers": int(os.environ.get("SUPERVISOR_WORKERS", WORKER_POOL_CONFIG["max_workers"])),
+    "timeout": float(os.environ.get("TASK_TIMEOUT", 300)),
+    # 0 : pas de limite
+    "max_memory": int(os.environ.get("TASK_MAX_MEMORY", 2 * 1024**3)),
+    "max_tasks": int(os.environ.get("WORKER_MAX_TASKS", 200)),
+    # Intervalle de vérification de la mémoire et de l'état du worker (secondes)
+    "check_interval": float(os.environ.get("SUPERVISOR_CHECK_INTERVAL", 0.25)),
+}
+
+# Contrôle d'admission : chaque route coûteuse appartient à une classe de coût, avec
+# un seau de jetons par client (rate par seconde, burst jetons au plus) et un nombre
+# maximal de requêtes simultanées par classe ; au-delà, les requêtes attendent dans
+# une file bornée, puis sont refusées (429 avec Retry-After)
+ADMISSION_CONFIG = {
+    "enabled": _env_flag("ADMISSION_CONTROL", True),
+    # En-tête identifiant le client derrière un proxy (ex: X-Forwarded-For), adresse IP sinon
+    "client_header": os.environ.get("ADMISSION_CLIENT_HEADER"),
+    # Attente maximale dans la file (secondes)
+    "queue_timeout": float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 30)),
+    "classes": {
+        "light": {"concurrency": 16, "queue": 64, "rate": 10.0, "burst": 20},
+        "office": {"concurrency": max(1, (os.cpu_count() or 2) // 2), "queue": 16, "rate": 1.0, "burst": 5},
+        "heavy": {"concurrency": max(1, (os.cpu_count() or 2) // 2), "queue": 8, "rate": 0.5, "burst": 3},
+    },
+    # Préfixes de chemins (méthode POST) et classe associée, le premier préfixe correspondant l'emporte
+    "routes": [
+        ("/api/convert/pdf-to-images/", "heavy"),
+        ("/api/pdf-to-images/", "heavy"),
+        ("/api/extract-text/batch", "heavy"),
+        ("/api/extract-text/sheets", "heavy"),
+        ("/api/pdf/", "heavy"),
+        ("/api/convert/", "office"),
+        ("/api/extract-text", "light"),
+        ("/api/extract-layout", "light"),
+        ("/api/extract-tables", "heavy"),
+        ("/api/text-to-csv", "light"),
+    ],
+}
+
+# Estimation préalable du coût des rendus et extractions : au-delà des limites, la
+# requête est refusée, le rendu est réduit ou le traitement passe en tâche asynchrone
+PREFLIGHT_CONFIG = {
+    "enabled": _env_flag("PREFLIGHT", True),
+    # Mémoire de pointe estimée au-delà de laquelle la requête est refusée (octets)
+    "max_memory": int(os.environ.get("PREFLIGHT_MAX_MEMORY", 2 * 1024 ** 3)),
+    # Durée estimée au-delà de laquelle la requête est refusée, ou traitée en tâche asynchrone (secondes)
+    "max_seconds": float(os.environ.get("PREFLIGHT_MAX_SECONDS", 900)),
+    "async_seconds": float(os.environ.get("PREFLIGHT_ASYNC_SECONDS", 20)),
+    "max_pages": int(os.environ.get("PREFLIGHT_MAX_PAGES", 5000)),
+    # Rendu PDF en images : facteur d'agrandissement et nombre maximal de pixels par page
+    "render_zoom": 2.0,
+    "min_render_zoom": 0.25,
+    "max_page_pixels": int(os.environ.get("PREFLIGHT_MAX_PAGE_PIXELS", 50_000_000)),
+    # Débits de référence pour l'estimation de la durée (par seconde)
+    "throughput": {
+        "render_pixels": 20_000_000,
+        "pdf_pages": 100,
+        "xlsx_cells": 150_000,
+        "xls_cells": 1_000_000,
+        "csv_bytes": 10 * 1024 * 1024,
+        "docx_bytes": 5 * 1024 * 1024,
+    },
+    # Mémoire estimée par unité (octets)
+    "memory": {
+        "pixel": 6,  # pixmap RGB et tampon d'encodage PNG
+        "xlsx_cell": 600,
+        "xls_cell": 150,
+        "csv_byte": 8,
+        "docx_byte": 20,
+        "pdf_byte": 3,
+    },
+}
+
+# Lanceur de production (python -m backend.server) : workers préchargés puis forkés,
+# recyclés après max_requests requêtes (plus un décalage aléatoire pour les étaler)
+SERVER_CONFIG = {
+    "host": os.environ.get("HOST", "0.0.0.0"),
+    "port": int(os.environ.get("PORT", 8000)),
+    "workers": int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2)),
+    "max_requests": int(os.environ.get("MAX_REQUESTS", 1000)),
+    "max_requests_jitter": int(os.environ.get("MAX_REQUESTS_JITTER", 100)),
+    # Délai accordé aux requêtes en cours lors de l'arrêt ou du recyclage d'un worker (secondes)
+    "graceful_timeout": int(os.environ.get("GRACEFUL_TIMEOUT", 30)),
+}
+
+# Cache partagé entre les workers (SQLite)
+CACHE_CONFIG = {
+    "db_path": Path(os.environ.get("CACHE_DB_PATH", str(DATA_DIR / "cache.db"))),
+    # Durée de vie par défaut d'une entrée (secondes)
+    "default_ttl": int(os.environ.get("CACHE_TTL", 7 * 24 * 3600)),
+}
+
+# Dossiers surveillés (python -m backend.watcher) : WATCH_FOLDERS="/srv/entree=extract,/srv/pdf=pdf-to-docx"
+WATCH_CONFIG = {
+    "folders": [
+        entry.strip() for entry in os.environ.get("WATCH_FOLDERS", "").split(",") if entry.strip()
+    ],
+    "output_dir": Path(os.environ.get("WATCH_OUTPUT_DIR", str(DATA_DIR / "watch_output"))),
+    # Délai sans nouvel événement avant de traiter un fichier (secondes)
+    "debounce": float(os.environ.get("WATCH_DEBOUNCE", 2.0)),
+    "workers": int(os.environ.get("WATCH_WORKERS", os.cpu_count() or 2)),
+    # Délai maximal de traitement d'un fichier (secondes)
+    "timeout": float(os.environ.get("WATCH_TIMEOUT", 1800)),
+    # Conserver les fichiers traités dans <dossier>/.done (sinon ils sont supprimés)
+    "keep_done": _env_flag("WATCH_KEEP_DONE", True),
+    # Intervalle de scan des dossiers lorsque inotify n'est pas disponible (secondes)
+    "poll_interval": float(os.environ.get("WATCH_POLL_INTERVAL", 5.0)),
+    # Port HTTP de /metrics (0 : non exposé)
+    "metrics_port": int(os.environ.get("WATCH_METRICS_PORT", 9101)),
+}
+
+# Cache par page des textes extraits et des rendus PDF (réutilisés entre versions d'un document)
+PAGE_CACHE_CONFIG = {
+    "enabled": _env_flag("PAGE_CACHE", not SERVERLESS),
+    "render_dir": Path(os.environ.get("PAGE_CACHE_DIR", str(DATA_DIR / "page_cache"))),
+    # Taille maximale des textes et rendus conservés (les plus anciens sont supprimés)
+    "max_render_bytes": int(os.environ.get("PAGE_CACHE_MAX_BYTES", 2 * 1024**3)),
+}
+
+# Extraction des tableaux PDF (/api/extract-tables/) : pages réparties par lots dans le pool de processus
+TABLES_CONFIG = {
+    "chunk_pages": int(os.environ.get("TABLES_CHUNK_PAGES", 8)),
+}
+
+# Tâches asynchrones (état partagé entre les workers dans une base SQLite)
+JOBS_CONFIG = {
+    "db_path": Path(os.environ.get("JOBS_DB_PATH", str(DATA_DIR / "jobs.db"))),
+    # Délai maximal d'une tâche (secondes) : au-delà, son worker est tué et la tâche échoue
+    "timeout": float(os.environ.get("JOB_TIMEOUT", 1800)),
+    # Durée de conservation d'une tâche terminée et de ses résultats (secondes)
+    "ttl": int(os.environ.get("JOB_TTL", 24 * 3600)),
+}
+
+# Configuration de l'extraction par lot (/api/extract-text/batch)
+BATCH_CONFIG = {
+    # Nombre maximal d'extractions en cours (borne aussi la mémoire utilisée)
+    "concurrency": int(os.environ.get("BATCH_CONCURRENCY", WORKER_POOL_CONFIG["max_workers"])),
+    # Nombre maximal de fichiers par lot
+    "max_files": int(os.environ.get("BATCH_MAX_FILES", 1000)),
+    # Taille décompressée maximale d'une entrée d'archive ZIP (octets)
+    "max_entry_size": int(os.environ.get("BATCH_MAX_ENTRY_SIZE", 200 * 1024 * 1024)),
+}
+
+# Extraction des classeurs feuille par feuille (/api/extract-text/sheets)
+WORKBOOK_CONFIG = {
+    # Feuilles par tâche : chaque tâche rouvre le classeur, mais ses feuilles ne sont renvoyées qu'ensemble
+    "sheets_per_task": int(os.environ.get("WORKBOOK_SHEETS_PER_TASK", 1)),
+    # Nombre maximal de tâches en cours pour un classeur
+    "concurrency": int(os.environ.get("WORKBOOK_CONCURRENCY", WORKER_POOL_CONFIG["max_workers"])),
+}
+
+# Configuration de l'OCR
+OCR_CONFIG = {
+    # Nombre de workers OCR de longue durée
+    "workers": int(os.environ.get("OCR_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+    # Langue par défaut (codes tesseract, combinables avec "+", ex: "fra+eng")
+    "default_lang": os.environ.get("OCR_LANG", "fra"),
+    # Résolution cible : les images de résolution supérieure sont réduites
+    "target_dpi": int(os.environ.get("OCR_TARGET_DPI", 300)),
+    # Plus grande dimension acceptée (pixels), pour les photos sans résolution fiable
+    "max_dimension": int(os.environ.get("OCR_MAX_DIMENSION", 3500)),
+    "binarize": _env_flag("OCR_BINARIZE", True),
+    "deskew": _env_flag("OCR_DESKEW", True),
+    # Angle maximal (degrés) recherché lors du redressement
+    "max_skew_angle": float(os.environ.get("OCR_MAX_SKEW_ANGLE", 5)),
+    # Extraction PDF hybride : OCR des seules pages sans couche texte exploitable
+    "pdf_hybrid": _env_flag("PDF_HYBRID_OCR"),
+    # Résolution de rendu des pages PDF envoyées à l'OCR
+    "pdf_dpi": int(os.environ.get("PDF_OCR_DPI", 300)),
+    # En dessous de ce nombre de caractères, la couche texte d'une page est jugée vide
+    "pdf_min_chars": int(os.environ.get("PDF_OCR_MIN_CHARS", 20)),
+    # Part de la page couverte par des images au-delà de laquelle une page peu textuelle est numérisée
+    "pdf_image_coverage": float(os.environ.get("PDF_OCR_IMAGE_COVERAGE", 0.8)),
+}
+
+# Index de recherche plein texte (SQLite FTS5) des documents extraits
+SEARCH_CONFIG = {
+    "enabled": _env_flag("SEARCH_INDEX_ENABLED", True),
+    "db_path": Path(os.environ.get("SEARCH_DB_PATH", str(DATA_DIR / "search.db"))),
+    # Nombre maximal de documents écrits par transaction
+    "batch_size": int(os.environ.get("SEARCH_BATCH_SIZE", 50)),
+    # Délai maximal (secondes) avant l'écriture d'un lot incomplet
+    "flush_interval": float(os.environ.get("SEARCH_FLUSH_INTERVAL", 1.0)),
+    # Nombre de mots des extraits renvoyés par la recherche
+    "snippet_tokens": 16,
+    # Durée de conservation d'un document dans l'index (secondes, 0 : sans limite)
+    "retention": float(os.environ.get("SEARCH_RETENTION", 30 * 24 * 3600)),
+    # Intervalle entre deux purges des documents expirés (secondes)
+    "purge_interval": float(os.environ.get("SEARCH_PURGE_INTERVAL", 3600)),
+}
+
+# Téléchargements reprenables par morceaux (/api/uploads)
+UPLOAD_CONFIG = {
+    "dir": Path(os.environ.get("RESUMABLE_UPLOADS_DIR", str(DATA_DIR / "resumable"))),
+    "max_size": int(os.environ.get("UPLOAD_MAX_SIZE", 10 * 1024 ** 3)),
+    # Durée de conservation d'un téléchargement non finalisé (secondes)
+    "expiration": int(os.environ.get("UPLOAD_EXPIRATION", 24 * 3600)),
+    # Durée de conservation d'un fichier finalisé, à partir de sa finalisation (secondes)
+    "final_expiration": int(os.environ.get("UPLOAD_FINAL_EXPIRATION", 24 * 3600)),
+    # Taille des écritures sur disque lors de la réception d'un morceau
+    "write_buffer": 1024 * 1024,
+}
+
+# Stockage paginé des résultats d'extraction volumineux (/api/results/{id})
+RESULTS_CONFIG = {
+    "dir": Path(os.environ.get("RESULTS_DIR", str(DATA_DIR / "results"))),
+    # Au-delà de cette taille (octets UTF-8), le texte n'est plus renvoyé en entier
+    "inline_limit": int(os.environ.get("RESULTS_INLINE_LIMIT", 1024 * 1024)),
+    # Taille par défaut et maximale d'une page de résultat (octets)
+    "page_size": int(os.environ.get("RESULTS_PAGE_SIZE", 256 * 1024)),
+    "max_page_size": int(os.environ.get("RESULTS_MAX_PAGE_SIZE", 4 * 1024 * 1024)),
+    # Durée de conservation d'un résultat (secondes)
+    "ttl": int(os.environ.get("RESULTS_TTL", 24 * 3600)),
+}
+
+# Limites d'une invocation serverless (voir backend/app/serverless.py)
+SERVERLESS_CONFIG = {
+    # Taille maximale du document reçu et de la réponse (corps limités à 4,5 Mo sur Vercel)
+    "max_upload": int(os.environ.get("SERVERLESS_MAX_UPLOAD", 4_500_000)),
+    "max_response": int(os.environ.get("SERVERLESS_MAX_RESPONSE", 4_500_000)),
+    # Durée maximale d'une invocation (secondes), réduite au temps restant indiqué par le contexte
+    "time_budget": float(os.environ.get("SERVERLESS_TIME_BUDGET", 10)),
+    # Temps réservé à l'envoi de la réponse (secondes)
+    "safety_margin": float(os.environ.get("SERVERLESS_SAFETY_MARGIN", 1)),
+    # Mémoire de pointe estimée au-delà de laquelle le traitement est refusé (octets)
+    "max_memory": int(os.environ.get("SERVERLESS_MAX_MEMORY", 1024 ** 3)),
+}
+
 # Configuration de l'application
 APP_CONFIG = {
     "title": "API de Conversion de Documents",
@@ -43,4 +299,21 @@ CORS_CONFIG = {
     "allow_credentials": True,
     "allow_methods": ["*"],
     "allow_headers": ["*"],
+    # En-têtes lisibles par un client navigateur (téléchargements reprenables, URL des fichiers de sortie)
+    "expose_headers": ["Location", "Content-Location", "Upload-Offset", "Upload-Length", "Upload-Checksum", "Tus-Resumable",
+                       "X-Reused-Pages", "X-Page-Count", "X-Original-Size", "X-Optimized-Size", "X-Size-Reduction",
+                       "X-Processing-Time"],
+}
+
+# Configuration du profilage à la demande
+# Le profilage n'est disponible que si PROFILING_ENABLED est activé ; une requête
+# est alors profilée si elle porte l'en-tête d'administration avec le bon jeton,
+# ou systématiquement si PROFILING_ALWAYS est activé.
+PROFILING_CONFIG = {
+    "enabled": _env_flag("PROFILING_ENABLED"),
+    "always": _env_flag("PROFILING_ALWAYS"),
+    "admin_token": os.environ.get("PROFILING_ADMIN_TOKEN", ""),
+    "request_header": "X-Profile",
+    "response_header": "X-Profile-Id",
+    "output_dir": Path(os.environ.get("PROFILING_DIR", str(DATA_DIR / "profiles"))),
 }
@@ -4,7 +4,7 @@ Point d'entrée principal de l'application FastAPI
 import os
 import logging
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, RedirectResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import traceback
@@ -18,10 +18,15 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 # Import des configurations
-from .config import APP_CONFIG, CORS_CONFIG, UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR
+from .config import APP_CONFIG, CORS_CONFIG, PROFILING_CONFIG, ADMISSION_CONFIG, PREWARM, UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR
+from .pages import home_page
 
 # Import des routes
-from .routes import convert, extract, pdf_images
+from .routes import convert, extract, jobs, pdf_images, pdf_tools, profiling, results, search, uploads
+from backend.utils.profiling import ProfilingMiddleware
+from backend.utils.download import conditional_file_response
+from backend.utils.admission import AdmissionControlMiddleware
+from backend.utils.metrics import render_metrics
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -30,6 +35,27 @@ app = FastAPI(
     version=APP_CONFIG["version"]
 )
 
+# Préchargement optionnel des bibliothèques lourdes
+@app.on_event("startup")
+async def prewarm_libraries():
+    if PREWARM:
+        from backend.services.loader import prewarm
+        prewarm()
+
+# Arrêt des pools de processus et du thread d'indexation
+@app.on_event("shutdown")
+async def shutdown_background_workers():
+    from backend.services import worker_pool, ocr_service, search_service, supervisor
+    worker_pool.shutdown_executor()
+    supervisor.shutdown_supervisor()
+    ocr_service.shutdown_executor()
+    search_service.stop_indexer()
+
+# Contrôle d'admission par classe de coût (installé avant CORS : les réponses 429
+# portent ainsi les en-têtes CORS)
+if ADMISSION_CONFIG["enabled"]:
+    app.add_middleware(AdmissionControlMiddleware, config=ADMISSION_CONFIG)
+
 # Configuration CORS
 app.add_middleware(
     CORSMiddleware,
@@ -37,8 +63,14 @@ app.add_middleware(
     allow_credentials=CORS_CONFIG["allow_credentials"],
     allow_methods=CORS_CONFIG["allow_methods"],
     allow_headers=CORS_CONFIG["allow_headers"],
+    expose_headers=CORS_CONFIG["expose_headers"],
 )
 
+# Profilage à la demande : le middleware n'est installé que si le profilage est activé,
+# afin de ne rien coûter aux requêtes lorsque le mode est désactivé
+if PROFILING_CONFIG["enabled"]:
+    app.add_middleware(ProfilingMiddleware, config=PROFILING_CONFIG)
+
 # Obtenir le chemin de base de l'application
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -60,7 +92,13 @@ app.mount("/temp", StaticFiles(directory=TEMP_DIR), name="temp")
 # Inclusion des routes
 app.include_router(convert.router)
 app.include_router(extract.router)
+app.include_router(jobs.router)
 app.include_router(pdf_images.router)
+app.include_router(pdf_tools.router)
+app.include_router(profiling.router)
+app.include_router(results.router)
+app.include_router(search.router)
+app.include_router(uploads.router)
 
 # Route pour la page d'accueil
 @app.get("/", response_class=HTMLResponse)
@@ -68,68 +106,7 @@ async def root():
     """
     Renvoie la page d'accueil de l'application
     """
-    try:
-        with open(os.path.join(FRONTEND_DIR, "index.html"), "r", encoding="utf-8") as f:
-            html_content = f.read()
-        return HTMLResponse(content=html_content)
-    except FileNotFoundError:
-        return HTMLResponse(content="""
-        <!DOCTYPE html>
-        <html lang="fr">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Conversion de Documents</title>
-            <style>
-                body {
-                    font-family: Arial, sans-serif;
-                    margin: 0;
-                    padding: 20px;
-                    background-color: #f5f5f5;
-                    text-align: center;
-                }
-                .container {
-                    max-width: 800px;
-                    margin: 0 auto;
-                    background-color: white;
-                    padding: 20px;
-                    border-radius: 8px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                }
-                h1 {
-                    color: #333;
-                }
-                .nav {
-                    margin-top: 30px;
-                }
-                .nav a {
-                    display: inline-block;
-                    margin: 10px;
-                    padding: 10px 20px;
-                    background-color: #4CAF50;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 4px;
-                }
-                .nav a:hover {
-                    background-color: #45a049;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>Application de Conversion de Documents</h1>
-                <p>Bienvenue dans notre application de conversion et d'extraction de documents.</p>
-                
-                <div class="nav">
-                    <a href="/static/pages/extract.html">Extraction de Texte</a>
-                    <a href="/static/pages/convert.html">Conversion de Documents</a>
-                    <a href="/static/pages/pdf-to-images.html">PDF vers Images</a>
-                </div>
-            </div>
-        </body>
-        </html>
-        """)
+    return HTMLResponse(content=home_page())
 
 # Route pour la vérification de santé
 @app.get("/health")
@@ -142,6 +119,14 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+# Route pour les métriques (format texte Prometheus)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Renvoie les métriques du processus
+    """
+    return PlainTextResponse(content=render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Route pour la documentation API
 @app.get("/api/docs")
 async def api_docs():
@@ -151,19 +136,22 @@ async def api_docs():
     return RedirectResponse(url="/docs")
 
 # Route pour télécharger un fichier
-@app.get("/api/download/{filename}")
-async def download_file(filename: str):
+@app.api_route("/api/download/{filename}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
     """
     Télécharge un fichier depuis le dossier de sortie
+
+    Les fichiers de sortie portent un nom unique et ne sont jamais réécrits : ils sont
+    servis avec un ETag, en cache immuable, et par plages (Range) pour les reprises.
     """
-    file_path = os.path.join(OUTPUT_DIR, filename)
+    file_path = os.path.join(OUTPUT_DIR, os.path.basename(filename))
     
-    if not os.path.exists(file_path):
+    if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
     
-    return FileResponse(path=file_path, filename=filename)
+    return await conditional_file_response(request, file_path, filename=filename)
 
 # Point d'entrée pour l'exécution directe
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("backend.app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,132 @@
+"""
+Pages HTML de l'application, partagées avec les points d'entrée serverless (api/)
+"""
+import html
+from pathlib import Path
+
+# Dossier du frontend
+FRONTEND_DIR = Path(__file__).resolve().parent.parent.parent / "frontend"
+
+# Bannière des déploiements serverless
+SERVERLESS_NOTICE = (
+    "<strong>Note:</strong> Cette version en ligne traite des documents de taille limitée. "
+    "Pour les documents volumineux, téléchargez et exécutez l'application en local."
+)
+
+_STYLE = """
+            body {
+                font-family: Arial, sans-serif;
+                margin: 0;
+                padding: 20px;
+                background-color: #f5f5f5;
+                text-align: center;
+            }
+            .container {
+                max-width: 800px;
+                margin: 0 auto;
+                background-color: white;
+                padding: 20px;
+                border-radius: 8px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            }
+            h1 {
+                color: #333;
+            }
+            .info-banner {
+                background-color: #f8f9fa;
+                padding: 10px;
+                margin-bottom: 20px;
+                border-left: 4px solid #007bff;
+                text-align: left;
+            }
+            .message {
+                margin: 20px 0;
+                padding: 15px;
+                background-color: #f8d7da;
+                border: 1px solid #f5c6cb;
+                border-radius: 4px;
+                color: #721c24;
+            }
+            .nav {
+                margin-top: 30px;
+            }
+            .nav a {
+                display: inline-block;
+                margin: 10px;
+                padding: 10px 20px;
+                background-color: #4CAF50;
+                color: white;
+                text-decoration: none;
+                border-radius: 4px;
+            }
+            .nav a:hover {
+                background-color: #45a049;
+            }
+"""
+
+_PAGE = """<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>{style}    </style>
+</head>
+<body>
+    <div class="container">
+{content}
+    </div>
+</body>
+</html>
+"""
+
+
+def _banner(notice):
+    return f'        <div class="info-banner"><p style="margin: 0;">{notice}</p></div>\n' if notice else ""
+
+
+def home_page(static_prefix="/static", notice=None):
+    """
+    Page d'accueil : frontend/index.html, ou une page de repli s'il est absent
+
+    Args:
+        static_prefix (str): Préfixe des URL du frontend ("/static" pour l'application,
+            "/frontend" pour le déploiement Vercel)
+        notice (str): Bannière d'information (HTML) insérée en tête de page
+
+    Returns:
+        str: Contenu HTML de la page
+    """
+    try:
+        with open(FRONTEND_DIR / "index.html", "r", encoding="utf-8") as f:
+            html_content = f.read()
+        if notice:
+            # Insérer la bannière après la balise <header>
+            html_content = html_content.replace("<header>", "<header>" + _banner(notice), 1)
+        return html_content
+    except FileNotFoundError:
+        content = f"""        <h1>Application de Conversion de Documents</h1>
+{_banner(notice)}        <p>Bienvenue dans notre application de conversion et d'extraction de documents.</p>
+
+        <div class="nav">
+            <a href="{static_prefix}/pages/extract.html">Extraction de Texte</a>
+            <a href="{static_prefix}/pages/convert.html">Conversion de Documents</a>
+            <a href="{static_prefix}/pages/pdf-to-images.html">PDF vers Images</a>
+        </div>"""
+        return _PAGE.format(title="Conversion de Documents", style=_STYLE, content=content)
+
+
+def error_page(message):
+    """
+    Page d'erreur avec un lien de retour à l'accueil
+
+    Args:
+        message (str): Message affiché (texte brut)
+
+    Returns:
+        str: Contenu HTML de la page
+    """
+    content = f"""        <h1>Erreur</h1>
+        <div class="message"><p>{html.escape(message)}</p></div>
+        <div class="nav"><a href="/">Retour à l'accueil</a></div>"""
+    return _PAGE.format(title="Erreur - Conversion de Documents", style=_STYLE, content=content)
@@ -3,18 +3,28 @@ Routes pour la conversion de documents
 """
 import os
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Form
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 from pathlib import Path
 import uuid
 import shutil
+import zipfile
 
 from backend.services.document_service import (
     convert_docx_to_pdf,
     convert_pdf_to_docx,
     convert_pdf_to_images
 )
-from backend.utils.file_utils import save_upload_file, clean_temp_files
+from backend.services.supervisor import supervised_call
+from backend.services.preflight import ASYNC, PreflightRejected, preflight_render
+from backend.services.job_service import submit_job, render_pdf_images_job
+from backend.app.routes.jobs import accepted_job_response
+from backend.app.routes.uploads import UploadSource, upload_source
+from backend.services.workbook_service import WORKBOOK_EXTENSIONS, list_sheets, iter_sheets_csv, csv_filenames
+from backend.utils.file_utils import DOCX_FORMAT, PDF_FORMAT, check_format, clean_temp_files, get_file_extension, iter_zip
+from backend.utils.download import content_disposition
 from backend.app.config import UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR
 
 # Configuration du logging
@@ -24,7 +34,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["conversion"])
 
 @router.post("/convert/docx-to-pdf/")
-async def convert_docx_to_pdf_endpoint(file: UploadFile = File(...)):
+async def convert_docx_to_pdf_endpoint(file: UploadSource = Depends(upload_source)):
     """
     Convertit un document DOCX en PDF
     """
@@ -32,11 +42,10 @@ async def convert_docx_to_pdf_endpoint(file: UploadFile = File(...)):
         logger.info(f"Demande de conversion DOCX vers PDF reçue pour le fichier: {file.filename}")
         
         # Vérifier l'extension du fichier
-        if not file.filename.lower().endswith(('.docx', '.doc')):
-            raise HTTPException(status_code=400, detail="Le fichier doit être au format DOCX ou DOC")
+        check_format(file.filename, DOCX_FORMAT)
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
@@ -46,7 +55,7 @@ async def convert_docx_to_pdf_endpoint(file: UploadFile = File(...)):
         output_path = os.path.join(OUTPUT_DIR, output_filename)
         
         # Convertir le fichier DOCX en PDF
-        convert_docx_to_pdf(upload_path, output_path)
+        await run_in_threadpool(supervised_call, convert_docx_to_pdf, upload_path, output_path)
         
         # Vérifier si le fichier PDF a été créé
         if not os.path.exists(output_path):
@@ -59,6 +68,7 @@ async def convert_docx_to_pdf_endpoint(file: UploadFile = File(...)):
         return FileResponse(
             path=output_path,
             filename=download_filename,
+            headers={"Content-Location": f"/api/download/{output_filename}"},
             media_type="application/pdf"
         )
     
@@ -67,7 +77,7 @@ async def convert_docx_to_pdf_endpoint(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {str(e)}")
 
 @router.post("/convert/pdf-to-docx/")
-async def convert_pdf_to_docx_endpoint(file: UploadFile = File(...)):
+async def convert_pdf_to_docx_endpoint(file: UploadSource = Depends(upload_source)):
     """
     Convertit un document PDF en DOCX
     """
@@ -75,11 +85,10 @@ async def convert_pdf_to_docx_endpoint(file: UploadFile = File(...)):
         logger.info(f"Demande de conversion PDF vers DOCX reçue pour le fichier: {file.filename}")
         
         # Vérifier l'extension du fichier
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+        check_format(file.filename, PDF_FORMAT)
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
@@ -89,7 +98,7 @@ async def convert_pdf_to_docx_endpoint(file: UploadFile = File(...)):
         output_path = os.path.join(OUTPUT_DIR, output_filename)
         
         # Convertir le fichier PDF en DOCX
-        convert_pdf_to_docx(upload_path, output_path)
+        await run_in_threadpool(supervised_call, convert_pdf_to_docx, upload_path, output_path)
         
         # Vérifier si le fichier DOCX a été créé
         if not os.path.exists(output_path):
@@ -102,6 +111,7 @@ async def convert_pdf_to_docx_endpoint(file: UploadFile = File(...)):
         return FileResponse(
             path=output_path,
             filename=download_filename,
+            headers={"Content-Location": f"/api/download/{output_filename}"},
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         )
     
@@ -110,7 +120,7 @@ async def convert_pdf_to_docx_endpoint(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {str(e)}")
 
 @router.post("/convert/pdf-to-images/")
-async def convert_pdf_to_images_endpoint(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def convert_pdf_to_images_endpoint(file: UploadSource = Depends(upload_source), background_tasks: BackgroundTasks = None):
     """
     Convertit un document PDF en images (une image par page)
     """
@@ -118,21 +128,31 @@ async def convert_pdf_to_images_endpoint(file: UploadFile = File(...), backgroun
         logger.info(f"Demande de conversion PDF vers images reçue pour le fichier: {file.filename}")
         
         # Vérifier l'extension du fichier
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+        check_format(file.filename, PDF_FORMAT)
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
         
+        # Estimer le coût du rendu : refus, rendu réduit ou tâche asynchrone
+        estimate = preflight_render(upload_path)
+        if estimate["decision"] == ASYNC:
+            job_id = submit_job("pdf-to-images", render_pdf_images_job, upload_path, original_filename,
+                                estimate["zoom"], estimate["max_pixels"])
+            return accepted_job_response(job_id, estimate)
+        
         # Créer un dossier temporaire pour les images
         temp_dir = os.path.join(TEMP_DIR, str(uuid.uuid4()))
         os.makedirs(temp_dir, exist_ok=True)
         
         # Convertir le fichier PDF en images
-        success, message, image_paths = convert_pdf_to_images(upload_path, temp_dir)
+        render_stats = {}
+        success, message, image_paths = await run_in_threadpool(
+            supervised_call, convert_pdf_to_images, upload_path, temp_dir, estimate["zoom"], estimate["max_pixels"],
+            stats=render_stats
+        )
         
         if not success or not image_paths:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {message}")
@@ -142,7 +162,7 @@ async def convert_pdf_to_images_endpoint(file: UploadFile = File(...), backgroun
         zip_path = os.path.join(OUTPUT_DIR, zip_filename)
         
         # Créer le fichier ZIP
-        with shutil.ZipFile(zip_path, 'w') as zipf:
+        with zipfile.ZipFile(zip_path, 'w') as zipf:
             for image_path in image_paths:
                 # Ajouter l'image au fichier ZIP
                 zipf.write(image_path, os.path.basename(image_path))
@@ -158,9 +178,80 @@ async def convert_pdf_to_images_endpoint(file: UploadFile = File(...), backgroun
         return FileResponse(
             path=zip_path,
             filename=download_filename,
+            headers={
+                "Content-Location": f"/api/download/{zip_filename}",
+                # Pages reprises du cache (version révisée d'un document déjà converti)
+                "X-Reused-Pages": str(render_stats.get("reused_pages", 0))
+            },
             media_type="application/zip"
         )
     
+    except PreflightRejected as e:
+        logger.warning(f"Conversion PDF vers images refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être converti: {str(e)}")
+    
     except Exception as e:
         logger.error(f"Erreur lors de la conversion PDF vers images: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {str(e)}")
+
+@router.post("/convert/spreadsheet-to-csv/")
+async def convert_spreadsheet_to_csv_endpoint(
+    file: UploadSource = Depends(upload_source),
+    sheet: Optional[str] = Form(None),
+    delimiter: str = Form(",")
+):
+    """
+    Convertit les feuilles d'un classeur Excel (XLSX, XLS) en CSV
+    
+    Sans paramètre sheet, renvoie une archive ZIP contenant un CSV par feuille ; avec sheet,
+    renvoie le CSV de cette seule feuille. Les feuilles sont lues et envoyées ligne par
+    ligne : la mémoire utilisée ne dépend pas de la taille des feuilles.
+    """
+    extension = get_file_extension(file.filename)
+    if extension not in WORKBOOK_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format XLSX ou XLS")
+    if len(delimiter) != 1:
+        raise HTTPException(status_code=400, detail="Le séparateur doit être un caractère unique")
+    
+    try:
+        logger.info(f"Demande de conversion en CSV reçue pour le fichier: {file.filename}")
+        
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+        
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+        
+        sheet_names = await run_in_threadpool(list_sheets, upload_path, extension)
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de la conversion en CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {str(e)}")
+    
+    base_name = os.path.splitext(original_filename)[0]
+    
+    if sheet is not None:
+        if sheet not in sheet_names:
+            raise HTTPException(status_code=404, detail=f"Feuille introuvable: {sheet}")
+        
+        def single_csv():
+            for _, chunks in iter_sheets_csv(upload_path, extension, [sheet], delimiter):
+                yield from chunks
+        
+        return StreamingResponse(
+            single_csv(),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": content_disposition(f"{base_name}_{csv_filenames([sheet])[sheet]}")}
+        )
+    
+    filenames = csv_filenames(sheet_names)
+    entries = (
+        (filenames[sheet_name], chunks)
+        for sheet_name, chunks in iter_sheets_csv(upload_path, extension, sheet_names, delimiter)
+    )
+    # Générateur synchrone : exécuté dans le pool de threads par StreamingResponse
+    return StreamingResponse(
+        iter_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(f"{base_name}_csv.zip")}
+    )
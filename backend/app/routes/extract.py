@@ -3,22 +3,39 @@ Routes pour l'extraction de texte des documents
 """
 import os
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Form
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.concurrency import run_in_threadpool
 import uuid
 import json
-from typing import Optional
+import asyncio
+import zipfile
+from typing import List, Optional
 
 from backend.services.document_service import (
-    extract_text_from_pdf,
+    extract_pages_from_pdf,
     extract_text_from_docx,
     extract_text_from_xlsx,
     extract_text_from_xls,
     extract_text_from_csv,
-    extract_text_from_file
+    extract_text_from_file,
+    convert_text_to_csv,
+    convert_text_to_csv_interactive
 )
-from backend.utils.file_utils import save_upload_file, get_file_extension
-from backend.app.config import UPLOADS_DIR, OUTPUT_DIR
+from backend.services.layout_service import extract_layout_from_pdf
+from backend.services.workbook_service import WORKBOOK_EXTENSIONS, list_sheets, select_sheets, iter_workbook_sheets
+from backend.services.table_service import STRATEGIES, iter_pdf_tables, table_to_csv, table_to_ndjson
+from backend.utils.profiling import profiled_call
+from backend.services.supervisor import supervised_call
+from backend.services.preflight import ASYNC, PreflightRejected, preflight_extraction
+from backend.services.job_service import submit_job, extract_text_job
+from backend.app.routes.jobs import accepted_job_response
+from backend.app.routes.uploads import UploadSource, upload_source, get_upload_source
+from backend.services.worker_pool import get_executor
+from backend.services.search_service import index_document
+from backend.services.result_store import store_result, read_slice
+from backend.utils.file_utils import PDF_FORMAT, check_format, get_file_extension, extract_zip_entry
+from backend.app.config import UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR, BATCH_CONFIG, RESULTS_CONFIG
 
 # Configuration du logging
 logger = logging.getLogger(__name__)
@@ -27,15 +44,22 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["extraction"])
 
 @router.post("/extract-text/")
-async def extract_text(file: UploadFile = File(...)):
+async def extract_text(
+    file: UploadSource = Depends(upload_source),
+    lang: Optional[str] = Form(None),
+    hybrid: Optional[bool] = Form(None)
+):
     """
     Extrait le texte d'un document (PDF, DOCX, Excel, etc.)
+    
+    Le paramètre lang choisit la langue de l'OCR (ex: "fra", "fra+eng") ; hybrid active
+    l'OCR des pages PDF sans couche texte.
     """
     try:
         logger.info(f"Demande d'extraction de texte reçue pour le fichier: {file.filename}")
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
@@ -43,20 +67,50 @@ async def extract_text(file: UploadFile = File(...)):
         # Déterminer l'extension du fichier
         file_extension = get_file_extension(original_filename)
         
+        # Estimer le coût de l'extraction : refus ou tâche asynchrone
+        estimate = preflight_extraction(upload_path, file_extension)
+        if estimate["decision"] == ASYNC:
+            job_id = submit_job("extract-text", extract_text_job, upload_path, original_filename, lang, hybrid)
+            return accepted_job_response(job_id, estimate)
+        
         # Extraire le texte en fonction du type de fichier
+        pages = None
+        pdf_stats = {}
         if file_extension == 'pdf':
-            text = extract_text_from_pdf(upload_path)
+            pages = await run_in_threadpool(supervised_call, extract_pages_from_pdf, upload_path, hybrid, lang, stats=pdf_stats)
+            text = "".join(pages)
         elif file_extension in ['docx', 'doc']:
-            text = extract_text_from_docx(upload_path)
+            text = await run_in_threadpool(supervised_call, extract_text_from_docx, upload_path)
         elif file_extension == 'xlsx':
-            text = extract_text_from_xlsx(upload_path)
+            text = await run_in_threadpool(supervised_call, extract_text_from_xlsx, upload_path)
         elif file_extension == 'xls':
-            text = extract_text_from_xls(upload_path)
+            text = await run_in_threadpool(supervised_call, extract_text_from_xls, upload_path)
         elif file_extension == 'csv':
-            text = extract_text_from_csv(upload_path)
+            text = await run_in_threadpool(supervised_call, extract_text_from_csv, upload_path)
         else:
             # Pour les autres types de fichiers, utiliser la méthode générique
-            text = extract_text_from_file(upload_path)
+            text = await run_in_threadpool(supervised_call, extract_text_from_file, upload_path, lang, hybrid)
+        
+        # Indexer le texte en arrière-plan (page par page pour les PDF)
+        index_document(upload_path, original_filename, pages if pages is not None else [text])
+        
+        # Pages PDF reprises du cache (version révisée d'un document déjà extrait)
+        reused = {"reused_pages": pdf_stats["reused_pages"]} if pdf_stats else {}
+        
+        # Les textes volumineux sont stockés et renvoyés par pages (voir /api/results/{id}) ;
+        # un caractère occupe au plus 4 octets, l'encodage n'est nécessaire que pour les textes longs
+        if len(text) * 4 > RESULTS_CONFIG["inline_limit"] and len(text.encode('utf-8')) > RESULTS_CONFIG["inline_limit"]:
+            meta = store_result(pages if pages is not None else [text], original_filename)
+            first_page = read_slice(meta["result_id"])
+            return JSONResponse(content={
+                "result_id": meta["result_id"],
+                "total_size": meta["total_size"],
+                "pages": meta["pages"],
+                "text": first_page["text"],
+                "next_cursor": first_page["next_cursor"],
+                "truncated": first_page["next_cursor"] is not None,
+                **reused
+            })
         
         # Sauvegarder le texte extrait dans un fichier JSON
         output_filename = f"texte_extrait_{uuid.uuid4()}.json"
@@ -66,14 +120,205 @@ async def extract_text(file: UploadFile = File(...)):
             json.dump({"text": text}, f, ensure_ascii=False, indent=2)
         
         # Renvoyer le texte extrait
-        return JSONResponse(content={"text": text})
+        return JSONResponse(content={"text": text, **reused})
+    
+    except PreflightRejected as e:
+        logger.warning(f"Extraction de texte refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être traité: {str(e)}")
     
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction de texte: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction de texte: {str(e)}")
 
+@router.post("/extract-text/batch")
+async def extract_text_batch(
+    files: List[UploadFile] = File([]),
+    upload_ids: List[str] = Form([]),
+    lang: Optional[str] = Form(None),
+    hybrid: Optional[bool] = Form(None)
+):
+    """
+    Extrait le texte de plusieurs documents, ou des documents d'une archive ZIP
+
+    Les documents sont envoyés directement (files) ou par téléchargements finalisés (upload_ids).
+    Les extractions s'exécutent en parallèle dans le pool de processus ; les résultats
+    sont renvoyés en NDJSON (une ligne par fichier) dans l'ordre de fin de traitement.
+    """
+    sources = [get_upload_source(upload, None) for upload in files]
+    sources += [get_upload_source(None, upload_id) for upload_id in upload_ids]
+    logger.info(f"Demande d'extraction par lot reçue ({len(sources)} fichier(s))")
+
+    if not sources:
+        raise HTTPException(status_code=400, detail="Aucun fichier fourni")
+
+    if len(sources) == 1 and get_file_extension(sources[0].filename) == 'zip':
+        # Les entrées de l'archive sont extraites une à une, au fur et à mesure du traitement
+        success, zip_path, _ = sources[0].save(TEMP_DIR)
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {zip_path}")
+        # Une archive téléchargée par morceaux reste disponible pour d'autres requêtes
+        cleanup_paths = [] if sources[0].persistent else [zip_path]
+        try:
+            with zipfile.ZipFile(zip_path) as zip_file:
+                infos = [info for info in zip_file.infolist() if not info.is_dir()]
+        except zipfile.BadZipFile:
+            for path in cleanup_paths:
+                os.remove(path)
+            raise HTTPException(status_code=400, detail="L'archive ZIP est invalide")
+        entries = [(info.filename, info) for info in infos]
+    else:
+        # Les fichiers téléchargés sont sauvegardés avant la réponse : ils sont fermés à la fin de l'endpoint
+        entries = []
+        for source in sources:
+            success, upload_path, original_filename = source.save(UPLOADS_DIR)
+            entries.append((original_filename, upload_path if success else None))
+        zip_path = None
+        cleanup_paths = []
+
+    if len(entries) > BATCH_CONFIG["max_files"]:
+        for path in cleanup_paths:
+            os.remove(path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Le lot contient trop de fichiers ({len(entries)} > {BATCH_CONFIG['max_files']})"
+        )
+
+    return StreamingResponse(
+        _run_batch(entries, zip_path, cleanup_paths, lang, hybrid),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/extract-text/sheets")
+async def extract_text_sheets(
+    file: UploadSource = Depends(upload_source),
+    include: List[str] = Form([]),
+    exclude: List[str] = Form([])
+):
+    """
+    Extrait le texte d'un classeur Excel (XLSX, XLS) feuille par feuille, en parallèle
+    
+    Les feuilles sont filtrées par nom (include, exclude : motifs de type shell) puis
+    extraites dans le pool de processus. La réponse est en NDJSON : une première ligne
+    {filename, sheets} donne les feuilles retenues dans l'ordre du classeur, puis une ligne
+    {index, sheet, status, text} par feuille dans l'ordre de fin de traitement (index est
+    la position dans sheets), et enfin {done, errors}.
+    """
+    extension = get_file_extension(file.filename)
+    if extension not in WORKBOOK_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format XLSX ou XLS")
+    
+    try:
+        logger.info(f"Demande d'extraction par feuille reçue pour le fichier: {file.filename}")
+        
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+        
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+        
+        # Refuser les documents au-delà des limites configurées
+        preflight_extraction(upload_path, extension)
+        
+        sheet_names = select_sheets(await run_in_threadpool(list_sheets, upload_path, extension), include, exclude)
+    
+    except PreflightRejected as e:
+        logger.warning(f"Extraction par feuille refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être traité: {str(e)}")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction par feuille: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction par feuille: {str(e)}")
+    
+    return StreamingResponse(
+        _stream_sheets(original_filename, upload_path, extension, sheet_names),
+        media_type="application/x-ndjson"
+    )
+
+async def _stream_sheets(filename, file_path, extension, sheet_names):
+    """
+    Enveloppe NDJSON de l'extraction par feuille (voir extract_text_sheets)
+    """
+    yield json.dumps({"filename": filename, "sheets": sheet_names}, ensure_ascii=False) + "\n"
+    errors = 0
+    async for result in iter_workbook_sheets(file_path, extension, sheet_names):
+        errors += result["status"] == "error"
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, "errors": errors}) + "\n"
+
+def _prepare_batch_entry(entry, zip_file):
+    """
+    Renvoie le chemin sur disque d'une entrée de lot (extraite de l'archive si nécessaire)
+    """
+    filename, source = entry
+    if source is None:
+        raise Exception("Erreur lors de la sauvegarde du fichier")
+    if isinstance(source, zipfile.ZipInfo):
+        return extract_zip_entry(zip_file, source, TEMP_DIR, BATCH_CONFIG["max_entry_size"]), True
+    return source, False
+
+async def _run_batch(entries, zip_path, cleanup_paths, lang=None, hybrid=None):
+    """
+    Exécute les extractions d'un lot en gardant au plus BATCH_CONFIG["concurrency"] fichiers en cours
+    """
+    loop = asyncio.get_running_loop()
+    zip_file = zipfile.ZipFile(zip_path) if zip_path else None
+    pending = {}
+    remaining = iter(entries)
+
+    async def submit_next():
+        for entry in remaining:
+            filename = entry[0]
+            try:
+                path, temporary = await run_in_threadpool(_prepare_batch_entry, entry, zip_file)
+                future = loop.run_in_executor(get_executor(), extract_text_from_file, path, lang, hybrid)
+            except Exception as e:
+                return {"filename": filename, "status": "error", "error": str(e)}
+            pending[future] = (filename, path, temporary)
+            return None
+        return None
+
+    try:
+        while True:
+            while len(pending) < BATCH_CONFIG["concurrency"]:
+                before = len(pending)
+                failure = await submit_next()
+                if failure is not None:
+                    yield json.dumps(failure, ensure_ascii=False) + "\n"
+                elif len(pending) == before:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                filename, path, temporary = pending.pop(future)
+                try:
+                    result = {"filename": filename, "status": "ok", "text": future.result()}
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction par lot de {filename}: {str(e)}")
+                    result = {"filename": filename, "status": "error", "error": str(e)}
+                if temporary and os.path.exists(path):
+                    os.remove(path)
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+    finally:
+        # Client déconnecté : abandonner les extractions en attente
+        for future, (_, path, temporary) in pending.items():
+            future.cancel()
+            if temporary and os.path.exists(path):
+                os.remove(path)
+        if zip_file:
+            zip_file.close()
+        for path in cleanup_paths:
+            if os.path.exists(path):
+                os.remove(path)
+
 @router.post("/extract-text-unified/")
-async def extract_text_unified(file: UploadFile = File(...)):
+async def extract_text_unified(
+    file: UploadSource = Depends(upload_source),
+    lang: Optional[str] = Form(None),
+    hybrid: Optional[bool] = Form(None)
+):
     """
     Extrait le texte d'un document en détectant automatiquement son type (PDF, DOCX, etc.)
     """
@@ -81,13 +326,19 @@ async def extract_text_unified(file: UploadFile = File(...)):
         logger.info(f"Demande d'extraction de texte unifiée reçue pour le fichier: {file.filename}")
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
         
+        # Estimer le coût de l'extraction : refus ou tâche asynchrone
+        estimate = preflight_extraction(upload_path, get_file_extension(original_filename))
+        if estimate["decision"] == ASYNC:
+            job_id = submit_job("extract-text", extract_text_job, upload_path, original_filename, lang, hybrid)
+            return accepted_job_response(job_id, estimate)
+        
         # Extraire le texte en utilisant la méthode générique
-        text = extract_text_from_file(upload_path)
+        text = await run_in_threadpool(supervised_call, extract_text_from_file, upload_path, lang, hybrid)
         
         # Sauvegarder le texte extrait dans un fichier JSON
         output_filename = f"texte_extrait_{uuid.uuid4()}.json"
@@ -99,10 +350,121 @@ async def extract_text_unified(file: UploadFile = File(...)):
         # Renvoyer le texte extrait
         return JSONResponse(content={"text": text})
     
+    except PreflightRejected as e:
+        logger.warning(f"Extraction de texte refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être traité: {str(e)}")
+    
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction de texte unifiée: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction de texte: {str(e)}")
 
+@router.post("/extract-layout/")
+async def extract_layout(
+    file: UploadSource = Depends(upload_source),
+    format: str = Form("ndjson")
+):
+    """
+    Extrait la mise en page d'un PDF : blocs, lignes et fragments avec boîtes englobantes et polices
+    
+    Le format ndjson renvoie une ligne JSON par page (colonnes des blocs, lignes et fragments) ;
+    le format binary renvoie les colonnes brutes (voir layout_service.DocumentLayout.to_bytes).
+    """
+    if format not in ("ndjson", "binary"):
+        raise HTTPException(status_code=400, detail="Format non pris en charge (ndjson ou binary)")
+    check_format(file.filename, PDF_FORMAT)
+    
+    try:
+        logger.info(f"Demande d'extraction de la mise en page reçue pour le fichier: {file.filename}")
+        
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+        
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+        
+        # Refuser les documents au-delà des limites configurées
+        preflight_extraction(upload_path, "pdf")
+        
+        layout = await run_in_threadpool(supervised_call, extract_layout_from_pdf, upload_path)
+        headers = {"X-Page-Count": str(layout.page_count)}
+        
+        if format == "binary":
+            return Response(content=layout.to_bytes(), media_type="application/octet-stream", headers=headers)
+        return StreamingResponse(layout.iter_ndjson(), media_type="application/x-ndjson", headers=headers)
+    
+    except PreflightRejected as e:
+        logger.warning(f"Extraction de la mise en page refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être traité: {str(e)}")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction de la mise en page: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction de la mise en page: {str(e)}")
+
+@router.post("/extract-tables/")
+async def extract_tables(
+    file: UploadSource = Depends(upload_source),
+    format: str = Form("csv"),
+    strategy: str = Form("lines"),
+    delimiter: str = Form(",")
+):
+    """
+    Extrait les tableaux d'un PDF, renvoyés au fil de l'eau dans l'ordre des pages
+    
+    Le format csv renvoie une ligne par rangée : page, numéro du tableau dans la page,
+    boîte englobante ("x0 y0 x1 y1") puis les cellules ; le format ndjson renvoie un
+    objet {page, table, bbox, row, cells} par rangée.
+    La stratégie lines détecte les tableaux à filets, text les tableaux alignés sans filets.
+    """
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format non pris en charge (csv ou ndjson)")
+    if strategy not in STRATEGIES:
+        raise HTTPException(status_code=400, detail="Stratégie non prise en charge (lines ou text)")
+    if len(delimiter) != 1:
+        raise HTTPException(status_code=400, detail="Le séparateur doit être un caractère unique")
+    check_format(file.filename, PDF_FORMAT)
+    
+    try:
+        logger.info(f"Demande d'extraction des tableaux reçue pour le fichier: {file.filename}")
+        
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+        
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+        
+        # Refuser les documents au-delà des limites configurées
+        preflight_extraction(upload_path, "pdf")
+    
+    except PreflightRejected as e:
+        logger.warning(f"Extraction des tableaux refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être traité: {str(e)}")
+    
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction des tableaux: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'extraction des tableaux: {str(e)}")
+    
+    if format == "csv":
+        return StreamingResponse(
+            _stream_tables(upload_path, strategy, lambda table: table_to_csv(table, delimiter)),
+            media_type="text/csv; charset=utf-8"
+        )
+    return StreamingResponse(
+        _stream_tables(upload_path, strategy, table_to_ndjson),
+        media_type="application/x-ndjson"
+    )
+
+async def _stream_tables(file_path, strategy, serialize):
+    """
+    Met en forme les tableaux au fur et à mesure de leur extraction
+    """
+    try:
+        async for table in iter_pdf_tables(file_path, strategy):
+            yield serialize(table)
+    except Exception as e:
+        # La réponse est déjà commencée : l'erreur ne peut plus changer le code HTTP
+        logger.error(f"Erreur lors de l'extraction des tableaux: {str(e)}")
+        raise
+
 @router.post("/text-to-csv/")
 async def text_to_csv_endpoint(
     request: Request,
@@ -121,7 +483,7 @@ async def text_to_csv_endpoint(
         output_path = os.path.join(OUTPUT_DIR, output_filename)
         
         # Convertir le texte en CSV
-        convert_text_to_csv(text, output_path, delimiter, has_header)
+        profiled_call(convert_text_to_csv, text, output_path, delimiter, has_header)
         
         # Lire le contenu du fichier CSV pour le renvoyer
         with open(output_path, 'r', encoding='utf-8') as f:
@@ -164,7 +526,7 @@ async def text_to_csv_interactive_endpoint(
         output_path = os.path.join(OUTPUT_DIR, output_filename)
         
         # Convertir le texte en CSV
-        convert_text_to_csv_interactive(text, output_path, delimiter, has_header)
+        profiled_call(convert_text_to_csv_interactive, text, output_path, delimiter, has_header)
         
         # Lire le contenu du fichier CSV pour le renvoyer
         with open(output_path, 'r', encoding='utf-8') as f:
@@ -192,7 +554,7 @@ async def text_to_csv_interactive_endpoint(
 @router.post("/extract-text-from-csv/")
 async def extract_text_from_csv_endpoint(
     request: Request, 
-    file: UploadFile = File(...), 
+    file: UploadSource = Depends(upload_source), 
     delimiter: str = Form("keep")
 ):
     """
@@ -206,13 +568,13 @@ async def extract_text_from_csv_endpoint(
             raise HTTPException(status_code=400, detail="Le fichier doit être au format CSV")
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
         
         # Extraire le texte du fichier CSV
-        text = extract_text_from_csv(upload_path)
+        text = profiled_call(extract_text_from_csv, upload_path)
         
         # Renvoyer le texte extrait
         return JSONResponse(content={"text": text})
@@ -0,0 +1,41 @@
+"""
+Routes pour le suivi des tâches asynchrones
+"""
+import logging
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.services.job_service import get_job
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+def accepted_job_response(job_id, estimate=None):
+    """
+    Réponse 202 d'une requête dont le traitement a été confié à une tâche asynchrone
+    """
+    status_url = f"/api/jobs/{job_id}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": "queued", "status_url": status_url, "preflight": estimate},
+        headers={"Location": status_url}
+    )
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Renvoie l'état d'une tâche (queued, running, done, error) et son résultat
+    """
+    try:
+        job = await run_in_threadpool(get_job, job_id)
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture de la tâche: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la lecture de la tâche: {str(e)}")
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche introuvable")
+    return JSONResponse(content=job)
@@ -3,14 +3,20 @@ Routes pour la conversion de PDF en images
 """
 import os
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 import uuid
 import shutil
 import zipfile
 
 from backend.services.document_service import convert_pdf_to_images
-from backend.utils.file_utils import save_upload_file, clean_temp_files
+from backend.services.supervisor import supervised_call
+from backend.services.preflight import ASYNC, PreflightRejected, preflight_render
+from backend.services.job_service import submit_job, render_pdf_images_job
+from backend.app.routes.jobs import accepted_job_response
+from backend.app.routes.uploads import UploadSource, upload_source
+from backend.utils.file_utils import PDF_FORMAT, check_format, clean_temp_files
 from backend.app.config import UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR
 
 # Configuration du logging
@@ -20,7 +26,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["pdf-images"])
 
 @router.post("/pdf-to-images/")
-async def pdf_to_images_endpoint(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def pdf_to_images_endpoint(file: UploadSource = Depends(upload_source), background_tasks: BackgroundTasks = None):
     """
     Convertit un document PDF en images (une image par page)
     """
@@ -28,21 +34,31 @@ async def pdf_to_images_endpoint(file: UploadFile = File(...), background_tasks:
         logger.info(f"Demande de conversion PDF vers images reçue pour le fichier: {file.filename}")
         
         # Vérifier l'extension du fichier
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF")
+        check_format(file.filename, PDF_FORMAT)
         
         # Sauvegarder le fichier téléchargé
-        success, upload_path, original_filename = save_upload_file(file, UPLOADS_DIR)
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
         
         if not success:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
         
+        # Estimer le coût du rendu : refus, rendu réduit ou tâche asynchrone
+        estimate = preflight_render(upload_path)
+        if estimate["decision"] == ASYNC:
+            job_id = submit_job("pdf-to-images", render_pdf_images_job, upload_path, original_filename,
+                                estimate["zoom"], estimate["max_pixels"])
+            return accepted_job_response(job_id, estimate)
+        
         # Créer un dossier temporaire pour les images
         temp_dir = os.path.join(TEMP_DIR, str(uuid.uuid4()))
         os.makedirs(temp_dir, exist_ok=True)
         
         # Convertir le fichier PDF en images
-        success, message, image_paths = convert_pdf_to_images(upload_path, temp_dir)
+        render_stats = {}
+        success, message, image_paths = await run_in_threadpool(
+            supervised_call, convert_pdf_to_images, upload_path, temp_dir, estimate["zoom"], estimate["max_pixels"],
+            stats=render_stats
+        )
         
         if not success or not image_paths:
             raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {message}")
@@ -68,9 +84,18 @@ async def pdf_to_images_endpoint(file: UploadFile = File(...), background_tasks:
         return FileResponse(
             path=zip_path,
             filename=download_filename,
+            headers={
+                "Content-Location": f"/api/download/{zip_filename}",
+                # Pages reprises du cache (version révisée d'un document déjà converti)
+                "X-Reused-Pages": str(render_stats.get("reused_pages", 0))
+            },
             media_type="application/zip"
         )
     
+    except PreflightRejected as e:
+        logger.warning(f"Conversion PDF vers images refusée: {str(e)}")
+        raise HTTPException(status_code=413, detail=f"Document trop volumineux pour être converti: {str(e)}")
+    
     except Exception as e:
         logger.error(f"Erreur lors de la conversion PDF vers images: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la conversion: {str(e)}")
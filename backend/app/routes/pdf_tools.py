@@ -0,0 +1,181 @@
+"""
+Routes pour le découpage, la fusion et l'optimisation de documents PDF
+"""
+import os
+import shutil
+import logging
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import uuid
+from typing import List, Optional
+
+from backend.services.pdf_tools import split_pdf_to_files, merge_pdfs, optimize_pdf
+from backend.services.supervisor import supervised_call
+from backend.app.routes.uploads import UploadSource, upload_source, get_upload_source
+from backend.utils.file_utils import PDF_FORMAT, check_format, iter_zip
+from backend.utils.download import content_disposition
+from backend.app.config import UPLOADS_DIR, OUTPUT_DIR, TEMP_DIR
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["pdf-tools"])
+
+def _iter_files(parts, directory):
+    """
+    Entrées (nom, contenu) des parties pour iter_zip ; le dossier des parties est supprimé à la fin
+    """
+    try:
+        for name, path in parts:
+            with open(path, "rb") as f:
+                yield name, [f.read()]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+@router.post("/pdf/split/")
+async def split_pdf_endpoint(
+    file: UploadSource = Depends(upload_source),
+    ranges: Optional[str] = Form(None),
+    max_size: Optional[int] = Form(None)
+):
+    """
+    Découpe un PDF par plages de pages (ranges, ex: "1-10,11-20,21-") ou par taille
+    maximale des parties (max_size, en octets)
+
+    Le découpage s'exécute dans un worker supervisé ; les parties sont renvoyées dans une
+    archive ZIP produite au fil de l'eau.
+    """
+    if bool(ranges) == bool(max_size):
+        raise HTTPException(status_code=400, detail="Indiquez soit des plages de pages (ranges), soit une taille maximale (max_size)")
+    if max_size is not None and max_size <= 0:
+        raise HTTPException(status_code=400, detail="La taille maximale doit être positive")
+    check_format(file.filename, PDF_FORMAT)
+
+    parts_dir = os.path.join(TEMP_DIR, str(uuid.uuid4()))
+    try:
+        logger.info(f"Demande de découpage PDF reçue pour le fichier: {file.filename}")
+
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+
+        split = await run_in_threadpool(supervised_call, split_pdf_to_files, upload_path, parts_dir, ranges, max_size)
+
+    except ValueError as e:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        logger.error(f"Erreur lors du découpage PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors du découpage: {str(e)}")
+
+    base_name = os.path.splitext(original_filename)[0]
+
+    def part_name(first, last):
+        return f"{base_name}_p{first}.pdf" if first == last else f"{base_name}_p{first}-{last}.pdf"
+
+    parts = [(part_name(first, last), part_path) for first, last, part_path in split["parts"]]
+    # Générateur synchrone : exécuté dans le pool de threads par StreamingResponse
+    return StreamingResponse(
+        iter_zip(_iter_files(parts, parts_dir)),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": content_disposition(f"{base_name}_parties.zip"),
+            "X-Page-Count": str(split["pages"])
+        }
+    )
+
+@router.post("/pdf/merge/")
+async def merge_pdf_endpoint(
+    files: List[UploadFile] = File([]),
+    upload_ids: List[str] = Form([])
+):
+    """
+    Fusionne plusieurs PDF, dans l'ordre d'envoi (fichiers files puis téléchargements upload_ids)
+    """
+    sources = [get_upload_source(upload, None) for upload in files]
+    sources += [get_upload_source(None, upload_id) for upload_id in upload_ids]
+    if len(sources) < 2:
+        raise HTTPException(status_code=400, detail="Fournissez au moins deux fichiers PDF")
+    if not all(source.filename.lower().endswith('.pdf') for source in sources):
+        raise HTTPException(status_code=400, detail="Les fichiers doivent être au format PDF")
+
+    try:
+        logger.info(f"Demande de fusion PDF reçue ({len(sources)} fichiers)")
+
+        # Sauvegarder les fichiers téléchargés
+        upload_paths = []
+        for source in sources:
+            success, upload_path, original_filename = source.save(UPLOADS_DIR)
+            if not success:
+                raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+            upload_paths.append(upload_path)
+
+        output_filename = f"{uuid.uuid4()}.pdf"
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        stats = await run_in_threadpool(supervised_call, merge_pdfs, upload_paths, output_path)
+
+        download_filename = f"{os.path.splitext(sources[0].filename)[0]}_fusion.pdf"
+        return FileResponse(
+            path=output_path,
+            filename=download_filename,
+            headers={
+                "Content-Location": f"/api/download/{output_filename}",
+                "X-Page-Count": str(stats["pages"]),
+                "X-Processing-Time": f"{stats['seconds']:.3f}"
+            },
+            media_type="application/pdf"
+        )
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la fusion PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la fusion: {str(e)}")
+
+@router.post("/pdf/optimize/")
+async def optimize_pdf_endpoint(
+    file: UploadSource = Depends(upload_source),
+    linearize: bool = Form(True)
+):
+    """
+    Optimise un PDF : objets inutilisés supprimés, objets et images en double fusionnés,
+    flux compressés, linéarisation (linearize) pour l'affichage rapide sur le web
+
+    Les en-têtes X-Original-Size, X-Optimized-Size, X-Size-Reduction (pourcentage) et
+    X-Processing-Time (secondes) décrivent le gain obtenu.
+    """
+    check_format(file.filename, PDF_FORMAT)
+
+    try:
+        logger.info(f"Demande d'optimisation PDF reçue pour le fichier: {file.filename}")
+
+        # Sauvegarder le fichier téléchargé
+        success, upload_path, original_filename = file.save(UPLOADS_DIR)
+
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Erreur lors de la sauvegarde du fichier: {upload_path}")
+
+        output_filename = f"{uuid.uuid4()}.pdf"
+        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        stats = await run_in_threadpool(supervised_call, optimize_pdf, upload_path, output_path, linearize)
+
+        return FileResponse(
+            path=output_path,
+            filename=original_filename,
+            headers={
+                "Content-Location": f"/api/download/{output_filename}",
+                "X-Original-Size": str(stats["input_size"]),
+                "X-Optimized-Size": str(stats["output_size"]),
+                "X-Size-Reduction": f"{stats['reduction'] * 100:.1f}",
+                "X-Processing-Time": f"{stats['seconds']:.3f}"
+            },
+            media_type="application/pdf"
+        )
+
+    except Exception as e:
+        logger.error(f"Erreur lors de l'optimisation PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'optimisation: {str(e)}")
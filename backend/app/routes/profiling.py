@@ -0,0 +1,40 @@
+"""
+Routes pour la consultation des profils d'exécution
+"""
+import logging
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from backend.utils.profiling import is_authorized, get_profile_path, format_profile
+from backend.app.config import PROFILING_CONFIG
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["profiling"])
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: str = "pstats"):
+    """
+    Renvoie un profil sauvegardé, brut (pstats) ou résumé (text)
+    """
+    if not PROFILING_CONFIG["enabled"]:
+        raise HTTPException(status_code=404, detail="Le profilage n'est pas activé")
+
+    header_value = request.headers.get(PROFILING_CONFIG["request_header"])
+    if not is_authorized(header_value, PROFILING_CONFIG["admin_token"]):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+    profile_path = get_profile_path(profile_id, PROFILING_CONFIG["output_dir"])
+    if profile_path is None:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+
+    if format == "text":
+        return PlainTextResponse(format_profile(profile_path))
+
+    return FileResponse(
+        path=profile_path,
+        filename=f"{profile_id}.prof",
+        media_type="application/octet-stream"
+    )
@@ -0,0 +1,66 @@
+"""
+Routes pour la lecture paginée des résultats d'extraction volumineux
+"""
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.services.result_store import (
+    ResultNotFound,
+    read_slice,
+    get_result_meta,
+    get_result_text_path
+)
+from backend.utils.download import conditional_file_response
+from backend.app.config import RESULTS_CONFIG
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["results"])
+
+@router.get("/results/{result_id}")
+async def get_result_page(
+    result_id: str,
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1, le=RESULTS_CONFIG["max_page_size"])
+):
+    """
+    Renvoie une tranche d'un résultat d'extraction, à partir du curseur donné
+
+    Le champ next_cursor de la réponse est à passer à l'appel suivant ; il vaut null
+    lorsque tout le texte a été lu.
+    """
+    try:
+        meta = await run_in_threadpool(get_result_meta, result_id)
+        page = await run_in_threadpool(read_slice, result_id, cursor, limit)
+    except ResultNotFound:
+        raise HTTPException(status_code=404, detail="Résultat introuvable")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture du résultat: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la lecture du résultat: {str(e)}")
+
+    return JSONResponse(content={
+        "result_id": result_id,
+        "total_size": meta["total_size"],
+        "pages": meta["pages"],
+        **page
+    })
+
+@router.get("/results/{result_id}/text")
+async def download_result_text(result_id: str, request: Request):
+    """
+    Télécharge le texte complet d'un résultat
+    """
+    try:
+        meta = get_result_meta(result_id)
+        text_path = get_result_text_path(result_id)
+    except ResultNotFound:
+        raise HTTPException(status_code=404, detail="Résultat introuvable")
+
+    filename = f"{(meta.get('filename') or 'texte_extrait').rsplit('.', 1)[0]}.txt"
+    return await conditional_file_response(request, text_path, filename=filename, media_type="text/plain; charset=utf-8")
@@ -0,0 +1,35 @@
+"""
+Routes pour la recherche plein texte dans les documents extraits
+"""
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.services.search_service import search
+from backend.app.config import SEARCH_CONFIG
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["search"])
+
+@router.get("/search")
+async def search_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Recherche les pages des documents extraits contenant tous les mots de la requête
+    """
+    if not SEARCH_CONFIG["enabled"]:
+        raise HTTPException(status_code=404, detail="L'index de recherche n'est pas activé")
+
+    try:
+        hits = await run_in_threadpool(search, q, limit, offset)
+        return JSONResponse(content={"query": q, "hits": hits})
+    except Exception as e:
+        logger.error(f"Erreur lors de la recherche: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche: {str(e)}")
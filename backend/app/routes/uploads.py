@@ -0,0 +1,246 @@
+"""
+Routes pour les téléchargements reprenables par morceaux
+
+Déroulement :
+1. POST /api/uploads avec les en-têtes Upload-Length et Upload-Metadata (filename en base64) ;
+2. PATCH /api/uploads/{id} pour chaque morceau, avec l'en-tête Upload-Offset (position du
+   morceau) et éventuellement Upload-Checksum ("sha256 <base64>") ; les morceaux peuvent
+   être envoyés en parallèle ;
+3. HEAD /api/uploads/{id} pour connaître la position reçue sans trou après une coupure ;
+4. POST /api/uploads/{id}/finalize, puis upload_id à la place de file sur les routes
+   de conversion et d'extraction.
+"""
+import base64
+import logging
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Header
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+
+from backend.services.upload_service import (
+    UploadNotFound,
+    UploadError,
+    UploadClosed,
+    ChecksumMismatch,
+    ChunkWriter,
+    create_upload,
+    get_upload,
+    current_offset,
+    finalize_upload,
+    delete_upload,
+    resolve_upload,
+    parse_checksum_header,
+    encode_checksum
+)
+from backend.utils.file_utils import save_upload_file
+from backend.app.config import UPLOAD_CONFIG
+
+# Configuration du logging
+logger = logging.getLogger(__name__)
+
+# Créer le routeur
+router = APIRouter(prefix="/api", tags=["uploads"])
+
+TUS_HEADERS = {"Tus-Resumable": "1.0.0", "Cache-Control": "no-store"}
+
+
+class UploadSource:
+    """
+    Fichier source d'une requête : envoyé directement (file) ou téléchargé par morceaux (upload_id)
+    """
+
+    def __init__(self, upload_file=None, upload_path=None, filename=None):
+        self.upload_file = upload_file
+        self.upload_path = upload_path
+        self.filename = upload_file.filename if upload_file is not None else filename
+
+    @property
+    def persistent(self):
+        """
+        Le fichier appartient à un téléchargement finalisé et ne doit pas être supprimé
+        """
+        return self.upload_path is not None
+
+    def save(self, destination_folder):
+        """
+        Renvoie le fichier sur disque, au même format que save_upload_file
+
+        Un téléchargement finalisé est déjà sur disque : il n'est pas copié.
+        """
+        if self.upload_path is not None:
+            return True, self.upload_path, self.filename
+        return save_upload_file(self.upload_file, destination_folder)
+
+
+def get_upload_source(upload_file, upload_id):
+    """
+    Construit la source d'une requête à partir de file ou de upload_id
+
+    Raises:
+        HTTPException: Si aucun fichier n'est fourni ou si le téléchargement est introuvable
+    """
+    if upload_file is not None:
+        return UploadSource(upload_file=upload_file)
+    if not upload_id:
+        raise HTTPException(status_code=400, detail="Fournissez un fichier (file) ou un téléchargement (upload_id)")
+    try:
+        upload_path, filename = resolve_upload(upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return UploadSource(upload_path=upload_path, filename=filename)
+
+
+async def upload_source(
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None)
+) -> UploadSource:
+    """
+    Dépendance des routes de conversion et d'extraction : accepte file ou upload_id
+    """
+    return get_upload_source(file, upload_id)
+
+
+def _parse_metadata(value):
+    """
+    Décode l'en-tête Upload-Metadata ("clé base64,clé base64")
+    """
+    metadata = {}
+    for pair in (value or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1]).decode("utf-8") if len(parts) > 1 else ""
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="En-tête Upload-Metadata invalide")
+    return metadata
+
+
+@router.post("/uploads", status_code=201)
+async def create_upload_endpoint(
+    request: Request,
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None)
+):
+    """
+    Crée un téléchargement reprenable
+    """
+    filename = _parse_metadata(upload_metadata).get("filename")
+    try:
+        meta = await run_in_threadpool(create_upload, filename, upload_length)
+    except UploadError as e:
+        status_code = 413 if upload_length > UPLOAD_CONFIG["max_size"] else 400
+        raise HTTPException(status_code=status_code, detail=str(e))
+
+    location = str(request.url_for("upload_status", upload_id=meta["upload_id"]))
+    return JSONResponse(
+        status_code=201,
+        content={"upload_id": meta["upload_id"], "length": meta["length"]},
+        headers={**TUS_HEADERS, "Location": location, "Upload-Offset": "0"}
+    )
+
+
+@router.head("/uploads/{upload_id}", name="upload_status")
+async def upload_status(upload_id: str):
+    """
+    Renvoie la position reçue sans trou (Upload-Offset) et la taille totale (Upload-Length)
+    """
+    try:
+        meta = await run_in_threadpool(get_upload, upload_id)
+    except UploadNotFound:
+        return Response(status_code=404, headers=TUS_HEADERS)
+
+    offset = meta["length"] if meta["status"] == "final" else current_offset(meta)
+    return Response(status_code=200, headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(meta["length"])
+    })
+
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    upload_checksum: Optional[str] = Header(None)
+):
+    """
+    Reçoit un morceau et l'écrit à la position Upload-Offset
+    """
+    try:
+        expected_checksum = parse_checksum_header(upload_checksum) if upload_checksum else None
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        writer = await run_in_threadpool(ChunkWriter, upload_id, upload_offset)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        # Le corps est écrit au fil de la réception, par blocs de UPLOAD_CONFIG["write_buffer"]
+        buffer = bytearray()
+        async for data in request.stream():
+            buffer += data
+            if len(buffer) >= UPLOAD_CONFIG["write_buffer"]:
+                await run_in_threadpool(writer.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(writer.write, bytes(buffer))
+        offset, chunk_hash = await run_in_threadpool(writer.commit, expected_checksum)
+    except ChecksumMismatch as e:
+        raise HTTPException(status_code=460, detail=str(e))
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    except UploadClosed as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors de la réception d'un morceau: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la réception du morceau: {str(e)}")
+    finally:
+        writer.close()
+
+    return Response(status_code=204, headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(offset),
+        "Upload-Checksum": encode_checksum(chunk_hash)
+    })
+
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload_endpoint(upload_id: str):
+    """
+    Finalise un téléchargement entièrement reçu
+    """
+    try:
+        meta = await run_in_threadpool(finalize_upload, upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return JSONResponse(content={
+        "upload_id": meta["upload_id"],
+        "filename": meta["filename"],
+        "length": meta["length"],
+        "digest": meta["digest"]
+    })
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def delete_upload_endpoint(upload_id: str):
+    """
+    Abandonne un téléchargement
+    """
+    try:
+        await run_in_threadpool(delete_upload, upload_id)
+    except UploadNotFound:
+        raise HTTPException(status_code=404, detail="Téléchargement introuvable")
+    return Response(status_code=204, headers=TUS_HEADERS)
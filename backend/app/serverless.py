@@ -0,0 +1,359 @@
+"""
+Mode serverless : une requête d'extraction ou de conversion traitée en une invocation
+
+Utilisé par les points d'entrée Vercel (api/vercel.py, api/index.py). Le traitement est
+celui de l'application (document_service), exécuté dans le processus de l'invocation ;
+le document reçu et les fichiers produits ne sont écrits que dans un dossier temporaire
+propre à l'invocation (sous /tmp), supprimé à la fin. Chaque invocation est bornée
+(SERVERLESS_CONFIG) :
+- taille du document reçu et de la réponse ;
+- durée : le traitement est refusé d'emblée si son estimation (voir preflight) dépasse le
+  temps restant ; il s'exécute dans un processus enfant, tué à l'échéance de l'invocation
+  (réponse 504), si bien que rien ne continue de tourner dans l'instance réutilisée ;
+- mémoire de pointe estimée.
+
+Les bibliothèques lourdes ne sont importées qu'au premier traitement qui les utilise
+(voir loader) : un démarrage à froid ne paie que la lecture de la requête. L'OCR
+(images, pages PDF numérisées) n'est pas disponible dans ce mode.
+
+handle_event reçoit un événement au format des fonctions serverless (httpMethod, path,
+headers, body, isBase64Encoded) et un contexte optionnel (get_remaining_time_in_millis) :
+le traitement se teste localement avec un événement simulé.
+"""
+import os
+import json
+import time
+import base64
+import logging
+import tempfile
+import multiprocessing
+from fastapi import HTTPException
+from multipart.multipart import create_form_parser
+from multipart.exceptions import FormParserError
+
+from backend.app.config import SERVERLESS_CONFIG, PREFLIGHT_CONFIG, APP_CONFIG, TEMP_DIR
+from backend.app.pages import home_page, SERVERLESS_NOTICE
+from backend.services import document_service
+from backend.services.preflight import REJECT, estimate_extraction, estimate_pdf_render
+from backend.utils.file_utils import DOCX_FORMAT, PDF_FORMAT, check_format, get_file_extension, iter_zip
+from backend.utils.download import content_disposition
+
+logger = logging.getLogger(__name__)
+
+# Formats acceptés par l'extraction de texte (sans OCR)
+EXTRACT_EXTENSIONS = {"pdf", "docx", "doc", "xlsx", "xls", "csv"}
+
+# Types de contenu renvoyés tels quels (les autres sont encodés en base64 dans la réponse à l'événement)
+_TEXT_TYPES = ("application/json", "text/")
+
+
+class ServerlessError(Exception):
+    """
+    Requête refusée ou interrompue, avec son code de statut HTTP
+    """
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+    def __reduce__(self):
+        # Transmise depuis le processus de traitement
+        return ServerlessError, (self.status_code, self.detail)
+
+
+def _json(status_code, content):
+    body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+    return status_code, {"Content-Type": "application/json; charset=utf-8"}, body
+
+
+def _file(data, media_type, filename):
+    return 200, {"Content-Type": media_type, "Content-Disposition": content_disposition(filename)}, data
+
+
+def parse_multipart(body, content_type):
+    """
+    Lit un corps multipart/form-data en mémoire, avec python-multipart comme les routes FastAPI
+
+    Args:
+        body (bytes): Corps de la requête
+        content_type (str): En-tête Content-Type (avec la délimitation)
+
+    Returns:
+        tuple: (champs texte {nom: valeur}, fichiers {nom: (nom du fichier, contenu)})
+
+    Raises:
+        ServerlessError: Si le corps n'est pas au format multipart/form-data
+    """
+    if not content_type or not content_type.lower().startswith("multipart/form-data"):
+        raise ServerlessError(400, "Le corps de la requête doit être au format multipart/form-data")
+
+    fields, files = {}, {}
+
+    def on_field(field):
+        fields[field.field_name.decode("utf-8", "replace")] = (field.value or b"").decode("utf-8", "replace")
+
+    def on_file(file):
+        file.file_object.seek(0)
+        files[file.field_name.decode("utf-8", "replace")] = (
+            (file.file_name or b"").decode("utf-8", "replace"), file.file_object.read()
+        )
+
+    try:
+        # Le corps est déjà en mémoire (taille bornée) : les fichiers y restent aussi
+        parser = create_form_parser({"Content-Type": content_type}, on_field, on_file,
+                                    config={"MAX_MEMORY_FILE_SIZE": len(body) + 1})
+        parser.write(body)
+        parser.finalize()
+    except (FormParserError, ValueError) as e:
+        raise ServerlessError(400, f"Corps multipart/form-data invalide: {str(e)}")
+    return fields, files
+
+
+def _limits(deadline):
+    """
+    Limites de l'estimation préalable : temps restant de l'invocation et mémoire serverless
+    """
+    remaining = max(0.0, deadline - time.monotonic())
+    return {**PREFLIGHT_CONFIG, "max_memory": SERVERLESS_CONFIG["max_memory"],
+            "max_seconds": remaining, "async_seconds": remaining}
+
+
+def _preflight(estimate_func, *args):
+    """
+    Refuse un traitement dont l'estimation dépasse les limites de l'invocation
+    """
+    try:
+        estimate = estimate_func(*args)
+    except Exception as e:
+        # Fichier illisible : le traitement lui-même signalera l'erreur
+        logger.warning(f"Estimation impossible: {str(e)}")
+        return None
+    if estimate["decision"] == REJECT:
+        raise ServerlessError(413, f"Document trop volumineux pour être traité en ligne: {estimate['reason']}")
+    return estimate
+
+
+def _extract_text(upload_path, filename, fields, workdir, deadline):
+    extension = get_file_extension(filename)
+    _preflight(estimate_extraction, upload_path, extension, _limits(deadline))
+    text = document_service.extract_text_from_file(upload_path, hybrid=False)
+    return _json(200, {"text": text})
+
+
+def _docx_to_pdf(upload_path, filename, fields, workdir, deadline):
+    output_path = os.path.join(workdir, "document.pdf")
+    document_service.convert_docx_to_pdf(upload_path, output_path)
+    if not os.path.exists(output_path):
+        raise ServerlessError(500, "La conversion a échoué, le fichier PDF n'a pas été créé")
+    with open(output_path, "rb") as f:
+        return _file(f.read(), "application/pdf", f"{os.path.splitext(filename)[0]}.pdf")
+
+
+def _pdf_to_docx(upload_path, filename, fields, workdir, deadline):
+    _preflight(estimate_extraction, upload_path, "pdf", _limits(deadline))
+    output_path = os.path.join(workdir, "document.docx")
+    document_service.convert_pdf_to_docx(upload_path, output_path)
+    if not os.path.exists(output_path):
+        raise ServerlessError(500, "La conversion a échoué, le fichier DOCX n'a pas été créé")
+    with open(output_path, "rb") as f:
+        return _file(f.read(), "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                     f"{os.path.splitext(filename)[0]}.docx")
+
+
+def _pdf_to_images(upload_path, filename, fields, workdir, deadline):
+    estimate = _preflight(estimate_pdf_render, upload_path, None, _limits(deadline)) or {}
+    success, message, image_paths = document_service.convert_pdf_to_images(
+        upload_path, os.path.join(workdir, "images"),
+        estimate.get("zoom") or PREFLIGHT_CONFIG["render_zoom"], estimate.get("max_pixels")
+    )
+    if not success or not image_paths:
+        raise ServerlessError(500, f"Erreur lors de la conversion: {message}")
+
+    def read(image_path):
+        with open(image_path, "rb") as f:
+            yield f.read()
+
+    # Images PNG déjà compressées : archive sans recompression
+    entries = ((os.path.basename(image_path), read(image_path)) for image_path in image_paths)
+    data = b"".join(iter_zip(entries, compression=0))
+    return _file(data, "application/zip", f"{os.path.splitext(filename)[0]}_images.zip")
+
+
+# Formats acceptés par l'extraction en ligne (sans OCR)
+_EXTRACT_FORMAT = (frozenset(EXTRACT_EXTENSIONS), "Format non pris en charge en ligne (PDF, DOCX, DOC, XLSX, XLS ou CSV)")
+
+# Traitements disponibles : chemin -> (fonction, formats acceptés, comme les routes correspondantes)
+_ACTIONS = {
+    "/api/extract-text": (_extract_text, _EXTRACT_FORMAT),
+    "/api/convert/docx-to-pdf": (_docx_to_pdf, DOCX_FORMAT),
+    "/api/convert/pdf-to-docx": (_pdf_to_docx, PDF_FORMAT),
+    "/api/convert/pdf-to-images": (_pdf_to_images, PDF_FORMAT),
+    "/api/pdf-to-images": (_pdf_to_images, PDF_FORMAT),
+}
+
+
+def _action_path(path):
+    """
+    Chemin normalisé d'une requête : sans paramètres ni barre finale ; les anciens
+    chemins /api/convert-<conversion> désignent /api/convert/<conversion>
+    """
+    path = path.split("?", 1)[0].rstrip("/")
+    if path.startswith("/api/convert-"):
+        path = "/api/convert/" + path[len("/api/convert-"):]
+    return path
+
+
+def _run_child(conn, func, args):
+    """
+    Corps du processus de traitement : renvoie le résultat ou l'exception au parent
+    """
+    try:
+        reply = ("ok", func(*args))
+    except BaseException as e:
+        reply = ("error", e)
+    try:
+        conn.send(reply)
+    except Exception as e:
+        # Résultat ou exception impossible à sérialiser
+        conn.send(("error", Exception(str(reply[1]) if reply[0] == "error" else str(e))))
+    finally:
+        conn.close()
+
+
+def _run_until(deadline, func, *args):
+    """
+    Exécute func dans un processus enfant (fork), tué à l'échéance de l'invocation
+
+    Sans fork (Windows, essais locaux), func est appelée directement, sans échéance.
+
+    Raises:
+        ServerlessError: Si l'échéance est atteinte (504) ou si le processus s'arrête brutalement
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return func(*args)
+
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_child, args=(sender, func, args), name="serverless-task", daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(max(0.0, deadline - time.monotonic())):
+            raise ServerlessError(504, "Traitement interrompu: durée maximale de l'invocation atteinte")
+        try:
+            status, value = receiver.recv()
+        except EOFError:
+            raise ServerlessError(500, "Traitement interrompu: arrêt inattendu du processus de traitement")
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
+
+    if status == "error":
+        raise value
+    return value
+
+
+def _process(path, headers, body, remaining):
+    action = _ACTIONS.get(_action_path(path))
+    if action is None:
+        raise ServerlessError(404, f"L'API demandée \"{path}\" n'existe pas")
+    func, file_format = action
+
+    started = time.monotonic()
+    budget = SERVERLESS_CONFIG["time_budget"] if remaining is None else min(SERVERLESS_CONFIG["time_budget"], remaining)
+    deadline = started + budget - SERVERLESS_CONFIG["safety_margin"]
+
+    if len(body) > SERVERLESS_CONFIG["max_upload"]:
+        raise ServerlessError(413, f"Document trop volumineux pour être traité en ligne "
+                                   f"({len(body)} octets > {SERVERLESS_CONFIG['max_upload']} octets)")
+    fields, files = parse_multipart(body, headers.get("content-type"))
+    if "file" not in files:
+        raise ServerlessError(400, "Aucun fichier fourni (champ file)")
+    filename, data = files["file"]
+    check_format(filename, file_format)
+    extension = get_file_extension(filename)
+
+    logger.info(f"Traitement serverless {path} pour le fichier: {filename} ({len(data)} octets)")
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    # Dossier propre à l'invocation, supprimé une fois le processus de traitement terminé ou tué
+    with tempfile.TemporaryDirectory(dir=TEMP_DIR, prefix="invocation-", ignore_cleanup_errors=True) as workdir:
+        upload_path = os.path.join(workdir, f"document.{extension}")
+        with open(upload_path, "wb") as f:
+            f.write(data)
+        data = None
+        status_code, response_headers, content = _run_until(deadline, func, upload_path, filename, fields, workdir, deadline)
+
+    if len(content) > SERVERLESS_CONFIG["max_response"]:
+        raise ServerlessError(413, f"Résultat trop volumineux pour être renvoyé en ligne ({len(content)} octets)")
+    response_headers["X-Processing-Time"] = f"{time.monotonic() - started:.3f}"
+    return status_code, response_headers, content
+
+
+def handle_request(method, path, headers, body, remaining=None):
+    """
+    Traite une requête HTTP en mode serverless
+
+    Args:
+        method (str): Méthode HTTP
+        path (str): Chemin de la requête (paramètres compris)
+        headers (dict): En-têtes de la requête
+        body (bytes): Corps de la requête
+        remaining (float): Temps restant de l'invocation (secondes), si la plateforme l'indique
+
+    Returns:
+        tuple: (code de statut, en-têtes, corps de la réponse en octets)
+    """
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    try:
+        if method == "GET":
+            if _action_path(path) in ("", "/index.html"):
+                return 200, {"Content-Type": "text/html; charset=utf-8"}, \
+                    home_page("/frontend", SERVERLESS_NOTICE).encode("utf-8")
+            if _action_path(path) == "/api/status":
+                return _json(200, {"status": "ok", "message": "API opérationnelle", "version": APP_CONFIG["version"],
+                                   "serverless": True, "max_upload": SERVERLESS_CONFIG["max_upload"]})
+            raise ServerlessError(404, f"La ressource demandée \"{path}\" n'existe pas")
+        if method != "POST":
+            raise ServerlessError(405, f"Méthode non autorisée: {method}")
+        return _process(path, headers, body or b"", remaining)
+
+    except (ServerlessError, HTTPException) as e:
+        # HTTPException : validation partagée avec les routes (check_format)
+        logger.warning(f"Requête serverless refusée ({e.status_code}): {e.detail}")
+        return _json(e.status_code, {"detail": e.detail})
+
+    except Exception as e:
+        logger.error(f"Erreur lors du traitement serverless: {str(e)}")
+        return _json(500, {"detail": f"Erreur lors du traitement: {str(e)}"})
+
+
+def handle_event(event, context=None):
+    """
+    Traite un événement de fonction serverless
+
+    Args:
+        event (dict): Requête (httpMethod, path, headers, body, isBase64Encoded)
+        context: Contexte de l'invocation ; sa méthode get_remaining_time_in_millis,
+            si elle existe, réduit la durée accordée au traitement
+
+    Returns:
+        dict: Réponse (statusCode, headers, body, isBase64Encoded)
+    """
+    body = event.get("body") or b""
+    if isinstance(body, str):
+        body = base64.b64decode(body) if event.get("isBase64Encoded") else body.encode("utf-8")
+    remaining = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        remaining = context.get_remaining_time_in_millis() / 1000
+
+    status_code, headers, content = handle_request(
+        event.get("httpMethod", "GET"), event.get("path", "/"), event.get("headers"), body, remaining
+    )
+    if headers.get("Content-Type", "").startswith(_TEXT_TYPES):
+        return {"statusCode": status_code, "headers": headers, "body": content.decode("utf-8"),
+                "isBase64Encoded": False}
+    return {"statusCode": status_code, "headers": headers, "body": base64.b64encode(content).decode("ascii"),
+            "isBase64Encoded": True}
@@ -0,0 +1,405 @@
+"""
+Traitement par lot d'une arborescence de documents, sans passer par l'API HTTP
+
+Utilisation :
+    python -m backend.cli extract /chemin/entree /chemin/sortie --jobs 8
+    python -m backend.cli pdf-to-docx /chemin/entree /chemin/sortie
+
+Les fichiers sont traités en parallèle par des workers supervisés avec les fonctions de
+document_service (un fichier qui fait planter son worker est compté en erreur sans
+interrompre le lot) ; la sortie reproduit l'arborescence d'entrée. Un manifeste SQLite
+(par défaut <sortie>/.manifest.db), indexé par l'empreinte SHA-256 du contenu, conserve
+les fichiers terminés : une exécution interrompue reprend là où elle s'était arrêtée,
+et un fichier identique à un autre déjà traité est copié plutôt que retraité.
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import logging
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from backend.services.supervisor import SupervisedExecutor, WorkerSupervisor
+from backend.utils.file_utils import file_sha256
+
+logger = logging.getLogger("backend.cli")
+
+# Opération : (extensions acceptées, extension de sortie ; None pour un dossier d'images)
+OPERATIONS = {
+    "extract": ({".pdf", ".docx", ".doc", ".xlsx", ".xls", ".csv", ".txt",
+                 ".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".tif"}, ".txt"),
+    "pdf-to-docx": ({".pdf"}, ".docx"),
+    "docx-to-pdf": ({".docx", ".doc"}, ".pdf"),
+    "pdf-to-images": ({".pdf"}, None),
+    "layout": ({".pdf"}, ".ndjson"),
+}
+
+MANIFEST_NAME = ".manifest.db"
+
+DONE = "done"
+ERROR = "error"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    sha256 TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    status TEXT NOT NULL,
+    source TEXT NOT NULL,
+    output TEXT,
+    size INTEGER,
+    duration REAL,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (sha256, operation)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+
+class Manifest:
+    """
+    Manifeste des fichiers traités, écrit par le seul processus principal
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def content_hash(self, path):
+        """
+        Empreinte du fichier, relue dans le manifeste si sa taille et sa date n'ont pas changé
+        """
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT sha256 FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0], stat.st_size
+        sha256 = file_sha256(path)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256)
+            )
+        return sha256, stat.st_size
+
+    def finished_output(self, sha256, operation):
+        """
+        Renvoie la sortie d'un contenu déjà traité, ou None
+        """
+        row = self.connection.execute(
+            "SELECT output FROM results WHERE sha256 = ? AND operation = ? AND status = ?",
+            (sha256, operation, DONE)
+        ).fetchone()
+        if row and row[0] and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def record(self, sha256, operation, status, source, output=None, size=None, duration=None, error=None):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results "
+                "(sha256, operation, status, source, output, size, duration, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, operation, status, source, output, size, duration, error, time.time())
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+def output_path_for(source, input_dir, output_dir, operation):
+    """
+    Chemin de sortie d'un fichier, dans l'arborescence de sortie
+    """
+    relative = os.path.relpath(source, input_dir)
+    base, _ = os.path.splitext(relative)
+    suffix = OPERATIONS[operation][1]
+    return os.path.join(output_dir, base + suffix if suffix else base + "_images")
+
+
+def iter_sources(input_dir, operation, exclude=()):
+    """
+    Parcourt l'arborescence d'entrée (ordre stable) et renvoie les fichiers à traiter
+    """
+    extensions = OPERATIONS[operation][0]
+    exclude = {os.path.abspath(path) for path in exclude}
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) not in exclude)
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield os.path.join(root, name)
+
+
+def _replace(temp_path, output_path):
+    if os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    os.replace(temp_path, output_path)
+
+
+def remove_partial(output):
+    """
+    Supprime les sorties temporaires laissées par un worker arrêté en cours de traitement
+    """
+    directory, name = os.path.split(output)
+    try:
+        entries = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.startswith(f"{name}.part"):
+            path = os.path.join(directory, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+def process_file(operation, source, output, lang=None, hybrid=None):
+    """
+    Traite un fichier dans un worker ; la sortie n'apparaît qu'une fois complète
+
+    Returns:
+        float: Durée du traitement (secondes)
+    """
+    from backend.services import document_service
+
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    temp_path = f"{output}.part{os.getpid()}"
+    if OPERATIONS[operation][1]:
+        # Conserver l'extension : certains convertisseurs en dépendent
+        temp_path += OPERATIONS[operation][1]
+    try:
+        if operation == "extract":
+            text = document_service.extract_text_from_file(source, lang, hybrid)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        elif operation == "pdf-to-docx":
+            document_service.convert_pdf_to_docx(source, temp_path)
+        elif operation == "docx-to-pdf":
+            document_service.convert_docx_to_pdf(source, temp_path)
+        elif operation == "layout":
+            from backend.services.layout_service import extract_layout_from_pdf
+            with open(temp_path, "wb") as f:
+                f.writelines(extract_layout_from_pdf(source).iter_ndjson())
+        elif operation == "pdf-to-images":
+            success, message, _ = document_service.convert_pdf_to_images(source, temp_path)
+            if not success:
+                raise Exception(message)
+        _replace(temp_path, output)
+    except BaseException:
+        if os.path.isdir(temp_path):
+            shutil.rmtree(temp_path, ignore_errors=True)
+        elif os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return time.perf_counter() - start
+
+
+def _copy_output(existing, output):
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    if os.path.isdir(existing):
+        shutil.copytree(existing, output, dirs_exist_ok=True)
+    else:
+        shutil.copyfile(existing, output)
+
+
+class Progress:
+    """
+    Affiche l'avancement et le débit sur la sortie d'erreur
+    """
+
+    def __init__(self, total, stream=sys.stderr, interval=1.0):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.start = time.monotonic()
+        self.last = 0.0
+        self.counts = {"processed": 0, "skipped": 0, "copied": 0, "errors": 0}
+        self.bytes = 0
+
+    @property
+    def completed(self):
+        return sum(self.counts.values())
+
+    def update(self, kind, size=0, force=False):
+        if kind:
+            self.counts[kind] += 1
+        if kind == "processed":
+            self.bytes += size
+        now = time.monotonic()
+        if force or now - self.last >= self.interval:
+            self.last = now
+            # Ligne réécrite sur place dans un terminal, une ligne par intervalle sinon
+            end = "\r" if not force and self.stream.isatty() else "\n"
+            self.stream.write(self.line() + end)
+            self.stream.flush()
+
+    def line(self):
+        elapsed = time.monotonic() - self.start
+        rate = self.counts["processed"] / elapsed if elapsed else 0
+        remaining = self.total - self.completed
+        eta = f"{remaining / rate:.0f} s" if rate else "-"
+        return (
+            f"[{self.completed}/{self.total}] {rate:.1f} fichiers/s, {self.bytes / 2**20 / elapsed if elapsed else 0:.1f} Mo/s"
+            f" | traités {self.counts['processed']}, déjà faits {self.counts['skipped']},"
+            f" doublons {self.counts['copied']}, erreurs {self.counts['errors']} | reste {eta}"
+        )
+
+
+def run_batch(operation, input_dir, output_dir, jobs=None, manifest_path=None, lang=None, hybrid=None,
+              progress_stream=sys.stderr, timeout=None):
+    """
+    Traite une arborescence de documents en parallèle
+
+    Args:
+        operation (str): Opération (voir OPERATIONS)
+        input_dir (str): Dossier d'entrée, parcouru récursivement
+        output_dir (str): Dossier de sortie
+        jobs (int): Nombre de processus (nombre de processeurs par défaut)
+        manifest_path (str): Manifeste SQLite (<sortie>/.manifest.db par défaut)
+        lang (str): Langue OCR (extraction)
+        hybrid (bool): OCR des pages PDF numérisées (extraction)
+        progress_stream: Flux d'affichage de l'avancement (None pour ne rien afficher)
+        timeout (float): Délai maximal par fichier (secondes), TASK_TIMEOUT par défaut
+
+    Returns:
+        dict: Compteurs (processed, skipped, copied, errors), durée et liste des erreurs
+    """
+    input_dir = os.path.abspath(input_dir)
+    output_dir = os.path.abspath(output_dir)
+    jobs = jobs or os.cpu_count() or 1
+    manifest = Manifest(manifest_path or os.path.join(output_dir, MANIFEST_NAME))
+
+    sources = list(iter_sources(input_dir, operation, exclude=[output_dir]))
+    progress = Progress(len(sources), progress_stream) if progress_stream else None
+    failures = []
+    counts = {"processed": 0, "skipped": 0, "copied": 0, "errors": 0}
+
+    def done(kind, size=0):
+        counts[kind] += 1
+        if progress:
+            progress.update(kind, size)
+
+    start = time.monotonic()
+    executor = SupervisedExecutor(WorkerSupervisor(workers=jobs, timeout=timeout))
+    pending = {}
+    # Contenus en cours de traitement : un doublon attend la fin du premier
+    in_progress = {}
+
+    def collect(finished):
+        for future in finished:
+            sha256, source, output, size = pending.pop(future)
+            duplicates = in_progress.pop(sha256, [])
+            try:
+                duration = future.result()
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement de {source}: {str(e)}")
+                remove_partial(output)
+                manifest.record(sha256, operation, ERROR, source, size=size, error=str(e))
+                failures.append({"source": source, "error": str(e)})
+                done("errors")
+                for _, duplicate_source in duplicates:
+                    failures.append({"source": duplicate_source, "error": str(e)})
+                    done("errors")
+                continue
+            manifest.record(sha256, operation, DONE, source, output, size, duration)
+            done("processed", size)
+            for duplicate_output, _ in duplicates:
+                _copy_output(output, duplicate_output)
+                done("copied")
+
+    try:
+        for source in sources:
+            output = output_path_for(source, input_dir, output_dir, operation)
+            try:
+                sha256, size = manifest.content_hash(source)
+            except OSError as e:
+                failures.append({"source": source, "error": str(e)})
+                done("errors")
+                continue
+
+            existing = manifest.finished_output(sha256, operation)
+            if existing:
+                if existing != output and not os.path.exists(output):
+                    _copy_output(existing, output)
+                    done("copied")
+                else:
+                    done("skipped")
+                continue
+            if sha256 in in_progress:
+                in_progress[sha256].append((output, source))
+                continue
+
+            # Fenêtre bornée : la liste des tâches ne grossit pas avec l'arborescence
+            while len(pending) >= jobs * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            future = executor.submit(process_file, operation, source, output, lang, hybrid)
+            pending[future] = (sha256, source, output, size)
+            in_progress[sha256] = []
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+    except KeyboardInterrupt:
+        logger.warning("Interruption : les fichiers terminés sont conservés dans le manifeste")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        manifest.close()
+
+    if progress:
+        progress.update(None, force=True)
+    return {**counts, "total": len(sources), "duration": time.monotonic() - start, "failures": failures}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traitement par lot d'une arborescence de documents")
+    parser.add_argument("operation", choices=sorted(OPERATIONS))
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Nombre de processus")
+    parser.add_argument("--manifest", default=None, help="Manifeste SQLite (<sortie>/.manifest.db par défaut)")
+    parser.add_argument("--lang", default=None, help="Langue OCR")
+    parser.add_argument("--hybrid", action="store_true", help="OCR des pages PDF numérisées")
+    parser.add_argument("--timeout", type=float, default=None, help="Délai maximal par fichier (secondes)")
+    parser.add_argument("--quiet", action="store_true", help="Ne pas afficher l'avancement")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Dossier introuvable: {args.input_dir}")
+
+    try:
+        summary = run_batch(args.operation, args.input_dir, args.output_dir, args.jobs, args.manifest,
+                            args.lang, args.hybrid or None, None if args.quiet else sys.stderr, args.timeout)
+    except KeyboardInterrupt:
+        return 130
+
+    print(
+        f"{summary['total']} fichiers en {summary['duration']:.1f} s : {summary['processed']} traités, "
+        f"{summary['skipped']} déjà faits, {summary['copied']} doublons copiés, {summary['errors']} erreurs"
+    )
+    for failure in summary["failures"]:
+        print(f"  {failure['source']}: {failure['error']}", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Lanceur de production : plusieurs workers uvicorn préchargés (modèle préfork)
+
+Utilisation :
+    python -m backend.server --workers 4 --port 8000
+
+Le processus maître importe l'application et les bibliothèques lourdes, ouvre le socket
+d'écoute, puis crée les workers par fork : ils partagent les pages mémoire du code déjà
+chargé et acceptent les connexions sur le même socket. Le maître remplace tout worker
+terminé, qu'il ait planté ou atteint sa limite de requêtes (recyclage contre la
+croissance de la mémoire).
+
+Signaux du maître : SIGTERM/SIGINT arrêtent le serveur (les requêtes en cours sont
+terminées), SIGHUP recycle tous les workers.
+
+Sans fork (Windows), l'application est servie par un seul processus.
+"""
+import os
+import sys
+import time
+import random
+import signal
+import socket
+import logging
+import argparse
+
+logger = logging.getLogger("backend.server")
+
+# Un worker qui s'arrête moins de MIN_WORKER_LIFETIME secondes après son démarrage est
+# considéré comme en échec ; au-delà de MAX_STARTUP_FAILURES échecs consécutifs, le
+# serveur s'arrête plutôt que de relancer des workers en boucle
+MIN_WORKER_LIFETIME = 2.0
+MAX_STARTUP_FAILURES = 5
+
+
+def bind_socket(host, port, backlog=2048):
+    """
+    Ouvre le socket d'écoute partagé par les workers
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Arbiter:
+    """
+    Processus maître : crée, surveille et recycle les workers
+    """
+
+    def __init__(self, app, sock, workers, max_requests=0, max_requests_jitter=0, graceful_timeout=30,
+                 log_level="info"):
+        self.app = app
+        self.sock = sock
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.workers = {}
+        self.stopping = False
+        self.startup_failures = 0
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker()
+            except BaseException as e:
+                logger.error(f"Erreur dans le worker {os.getpid()}: {str(e)}")
+                exit_code = 1
+            finally:
+                # Ne jamais revenir dans la boucle du maître
+                os._exit(exit_code)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"Worker démarré (pid {pid})")
+
+    def _run_worker(self):
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        random.seed()
+
+        limit = None
+        if self.max_requests:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _handle_stop(self, signum, frame):
+        self.stopping = True
+
+    def _handle_reload(self, signum, frame):
+        logger.info("Recyclage de tous les workers")
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            lifetime = time.monotonic() - started
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                logger.info(f"Worker {pid} arrêté")
+                continue
+            # uvicorn renvoie le signal reçu après son arrêt propre : SIGTERM n'est pas une erreur
+            clean = code in (0, -signal.SIGTERM)
+            if clean:
+                logger.info(f"Worker {pid} terminé après {lifetime:.0f} s, remplacement")
+            else:
+                logger.warning(f"Worker {pid} arrêté (code {code}) après {lifetime:.0f} s, remplacement")
+            if lifetime < MIN_WORKER_LIFETIME and not clean:
+                self.startup_failures += 1
+            else:
+                self.startup_failures = 0
+
+    def run(self):
+        """
+        Boucle du maître, jusqu'à SIGTERM ou SIGINT
+
+        Returns:
+            int: Code de sortie
+        """
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        logger.info(f"Serveur démarré (pid {os.getpid()}, {self.num_workers} workers)")
+
+        exit_code = 0
+        try:
+            while not self.stopping:
+                self._reap()
+                if self.startup_failures >= MAX_STARTUP_FAILURES:
+                    logger.error("Les workers échouent au démarrage, arrêt du serveur")
+                    exit_code = 1
+                    break
+                while len(self.workers) < self.num_workers and not self.stopping:
+                    self.spawn_worker()
+                time.sleep(0.2)
+        finally:
+            self.stop()
+        return exit_code
+
+    def stop(self):
+        """
+        Arrête les workers : SIGTERM, puis SIGKILL après le délai de grâce
+        """
+        logger.info("Arrêt des workers")
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"Worker {pid} arrêté de force")
+            self._signal(pid, signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de production de l'application")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-requests", type=int, default=None,
+                        help="Requêtes avant recyclage d'un worker (0 : jamais)")
+    parser.add_argument("--max-requests-jitter", type=int, default=None)
+    parser.add_argument("--graceful-timeout", type=int, default=None)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 2))
+    # Répartir les processus de calcul entre les workers plutôt que d'en créer autant par worker
+    os.environ.setdefault("WORKER_POOL_SIZE", str(max(1, (os.cpu_count() or 2) // workers)))
+
+    from backend.app.config import SERVER_CONFIG
+    from backend.services.loader import prewarm
+
+    host = args.host or SERVER_CONFIG["host"]
+    port = args.port or SERVER_CONFIG["port"]
+    max_requests = SERVER_CONFIG["max_requests"] if args.max_requests is None else args.max_requests
+    jitter = SERVER_CONFIG["max_requests_jitter"] if args.max_requests_jitter is None else args.max_requests_jitter
+    # 0 est une valeur valide (arrêt immédiat des requêtes en cours)
+    graceful_timeout = SERVER_CONFIG["graceful_timeout"] if args.graceful_timeout is None else args.graceful_timeout
+
+    # Préchargement avant le fork : les workers héritent des bibliothèques déjà importées
+    from backend.app.main import app
+    prewarm()
+
+    if not hasattr(os, "fork"):
+        import uvicorn
+        logger.warning("fork indisponible sur cette plateforme : un seul processus")
+        uvicorn.run(app, host=host, port=port, log_level=args.log_level)
+        return 0
+
+    sock = bind_socket(host, port)
+    logger.info(f"Écoute sur http://{host}:{port}")
+    try:
+        return Arbiter(app, sock, workers, max_requests, jitter, graceful_timeout, args.log_level).run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
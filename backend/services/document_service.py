@@ -5,37 +5,53 @@ Contient les fonctions pour extraire et convertir les documents
 import os
 import tempfile
 import logging
-import docx
-from docx import Document
 import subprocess
 import sys
 import uuid
 import zipfile
-import fitz  # PyMuPDF
-import pandas as pd
 import csv
-import chardet
 import re
-from docx.shared import Inches
-import openpyxl
-import xlrd
 import traceback
 import shutil
 from io import StringIO
-from PIL import Image
 from pathlib import Path
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from backend.services.loader import lazy_module
+from backend.services.docx_stream import iter_docx_text
+
+# Bibliothèques lourdes importées au premier usage
+fitz = lazy_module("fitz")  # PyMuPDF
+pd = lazy_module("pandas")
+docx = lazy_module("docx")
+chardet = lazy_module("chardet")
+xlrd = lazy_module("xlrd")
+
 logger = logging.getLogger(__name__)
 
 def extract_text_from_docx(file_path):
     """
     Extrait le texte d'un fichier DOCX
+    
+    Le texte est lu en flux (voir docx_stream) : corps du document avec tableaux et zones
+    de texte, en-têtes, pieds de page et notes. Si la lecture en flux échoue, le texte des
+    paragraphes du corps est extrait avec python-docx.
+    
+    Args:
+        file_path (str): Chemin vers le fichier DOCX
+        
+    Returns:
+        str: Texte extrait du fichier
+        
+    Raises:
+        Exception: En cas d'erreur lors de l'extraction
     """
     try:
         logger.info(f"Extraction du texte du fichier DOCX: {file_path}")
-        doc = Document(file_path)
+        try:
+            return '\n'.join(iter_docx_text(file_path))
+        except Exception as e:
+            logger.warning(f"Lecture en flux du fichier DOCX impossible, extraction avec python-docx: {str(e)}")
+        doc = docx.Document(file_path)
         text = []
         for para in doc.paragraphs:
             text.append(para.text)
@@ -45,16 +61,40 @@ def extract_text_from_docx(file_path):
         logger.error(traceback.format_exc())
         raise Exception(f"Erreur lors de l'extraction du texte DOCX: {str(e)}")
 
-def extract_text_from_pdf(file_path):
+def extract_text_from_pdf(file_path, hybrid=None, lang=None):
     """
     Extrait le texte d'un fichier PDF en gérant les émoticônes et caractères spéciaux
     
     Args:
         file_path (str): Chemin vers le fichier PDF
+        hybrid (bool): Si True, les pages sans couche texte exploitable (numérisées)
+            sont rendues et passées à l'OCR ; valeur configurée par défaut
+        lang (str): Langue OCR des pages numérisées (langue configurée par défaut)
         
     Returns:
         str: Texte extrait du fichier
         
+    Raises:
+        Exception: En cas d'erreur lors de l'extraction
+    """
+    return "".join(extract_pages_from_pdf(file_path, hybrid, lang))
+
+def extract_pages_from_pdf(file_path, hybrid=None, lang=None, stats=None):
+    """
+    Extrait le texte de chaque page d'un fichier PDF
+    
+    Les pages déjà extraites (même empreinte de contenu, voir page_cache) sont reprises
+    du cache : pour une version révisée d'un document, seules les pages modifiées sont extraites.
+    
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        hybrid (bool): OCR des pages numérisées (voir extract_text_from_pdf)
+        lang (str): Langue OCR des pages numérisées
+        stats (dict): Complété avec le nombre de pages (pages) et de pages reprises du cache (reused_pages)
+        
+    Returns:
+        list: Texte de chaque page, dans l'ordre des pages
+        
     Raises:
         Exception: En cas d'erreur lors de l'extraction
     """
@@ -62,24 +102,129 @@ def extract_text_from_pdf(file_path):
     try:
         logger.info(f"Extraction du texte du fichier PDF: {file_path}")
         
+        if hybrid is None:
+            from backend.app.config import OCR_CONFIG
+            hybrid = OCR_CONFIG["pdf_hybrid"]
+        
+        from backend.app.config import PAGE_CACHE_CONFIG
+        from backend.services import page_cache
+        
         # Utiliser PyMuPDF (fitz) pour extraire le texte
-        text = ""
         with fitz.open(file_path) as doc:
-            for page in doc:
-                text += page.get_text()
+            page_numbers = list(range(len(doc)))
+            pages_text = [None] * len(doc)
+            fingerprints = [None] * len(doc)
+            mode = f"hybrid:{lang or ''}" if hybrid else "text"
             
-            # Nettoyer le texte des caractères problématiques
-            clean_text = ""
-            for char in text:
-                if ord(char) < 65536:  # Filtrer les caractères Unicode valides
-                    clean_text += char
-                    
-            return clean_text
+            if PAGE_CACHE_CONFIG["enabled"]:
+                hasher = page_cache.PageHasher(doc)
+                fingerprints = [hasher.fingerprint(page) for page in doc]
+                pages_text = page_cache.get_texts(fingerprints, mode)
+                page_numbers = [number for number, text in enumerate(pages_text) if text is None]
+            
+            if hybrid:
+                extracted = _extract_pdf_pages_hybrid(doc, lang, page_numbers)
+            else:
+                extracted = [doc[number].get_text() for number in page_numbers]
+            
+            for number, text in zip(page_numbers, extracted):
+                # Nettoyer le texte des caractères problématiques
+                # (ne garder que les caractères Unicode du plan multilingue de base)
+                text = "".join(char for char in text if ord(char) < 65536)
+                pages_text[number] = text
+                if fingerprints[number]:
+                    page_cache.put_text(fingerprints[number], mode, text)
+            
+            reused = len(doc) - len(page_numbers)
+            if reused:
+                logger.info(f"{reused} page(s) sur {len(doc)} reprise(s) du cache")
+            if stats is not None:
+                stats.update(pages=len(doc), reused_pages=reused)
+            return pages_text
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte du PDF: {str(e)}")
         logger.error(traceback.format_exc())
         raise Exception(f"Erreur lors de l'extraction du texte du PDF: {str(e)}")
 
+def page_needs_ocr(page, text, min_chars, image_coverage):
+    """
+    Indique si une page PDF n'a pas de couche texte exploitable
+    
+    Args:
+        page (fitz.Page): Page PDF
+        text (str): Texte extrait de la page par get_text
+        min_chars (int): Nombre de caractères en dessous duquel la couche texte est jugée vide
+        image_coverage (float): Part de la page couverte par des images au-delà de laquelle
+            une page peu textuelle est considérée comme numérisée
+        
+    Returns:
+        bool: True si la page doit passer par l'OCR
+    """
+    stripped = text.strip()
+    if len(stripped) < min_chars:
+        return True
+    
+    # Page couverte d'images avec peu de texte : scan avec une couche texte partielle
+    if len(stripped) < 10 * min_chars:
+        page_area = abs(page.rect)
+        image_area = 0.0
+        for info in page.get_image_info():
+            covered = fitz.Rect(info["bbox"]) & page.rect
+            if not covered.is_empty:
+                image_area += abs(covered)
+        if page_area and image_area / page_area >= image_coverage:
+            return True
+    
+    return False
+
+def _extract_pdf_pages_hybrid(doc, lang=None, page_numbers=None):
+    """
+    Extrait le texte de chaque page, en passant à l'OCR les seules pages numérisées
+    
+    Les pages numérisées sont rendues et reconnues par lots dans le pool OCR, ce qui
+    borne la mémoire utilisée par les images rendues.
+    
+    Args:
+        doc (fitz.Document): Document ouvert
+        lang (str): Langue OCR
+        page_numbers (list): Numéros des pages à extraire (toutes par défaut)
+        
+    Returns:
+        list: Texte de chaque page demandée, dans l'ordre de page_numbers
+    """
+    from backend.app.config import OCR_CONFIG
+    from backend.services.ocr_service import recognize_many
+    
+    if page_numbers is None:
+        page_numbers = list(range(len(doc)))
+    
+    pages_text = []
+    ocr_pages = []
+    for index, page_num in enumerate(page_numbers):
+        page = doc[page_num]
+        text = page.get_text()
+        pages_text.append(text)
+        if page_needs_ocr(page, text, OCR_CONFIG["pdf_min_chars"], OCR_CONFIG["pdf_image_coverage"]):
+            ocr_pages.append(index)
+    
+    if not ocr_pages:
+        return pages_text
+    
+    logger.info(f"{len(ocr_pages)} page(s) sans couche texte passée(s) à l'OCR sur {len(doc)}")
+    
+    batch_size = max(1, OCR_CONFIG["workers"] * 2)
+    for start in range(0, len(ocr_pages), batch_size):
+        batch = ocr_pages[start:start + batch_size]
+        images = []
+        for index in batch:
+            pix = doc[page_numbers[index]].get_pixmap(dpi=OCR_CONFIG["pdf_dpi"], colorspace=fitz.csGRAY)
+            images.append(pix.tobytes("png"))
+            pix = None
+        for index, text in zip(batch, recognize_many(images, lang)):
+            pages_text[index] = text if text.endswith("\n") else text + "\n"
+    
+    return pages_text
+
 def convert_docx_to_pdf(input_path, output_path):
     """
     Convertit un fichier DOCX en PDF
@@ -195,7 +340,7 @@ def convert_pdf_to_docx(input_path, output_path):
         logger.info(f"Conversion du fichier PDF en DOCX: {input_path} -> {output_path}")
         
         # Créer un nouveau document DOCX
-        doc = Document()
+        doc = docx.Document()
         
         # Ajouter un titre au document
         doc.add_heading("Document converti depuis PDF", level=1)
@@ -235,13 +380,37 @@ def convert_pdf_to_docx(input_path, output_path):
         logger.error(traceback.format_exc())
         raise Exception(f"Erreur lors de la conversion PDF vers DOCX: {str(e)}")
 
-def convert_pdf_to_images(input_path, output_dir):
+def render_zoom_for_page(rect, zoom, max_pixels=None):
+    """
+    Renvoie le facteur de rendu d'une page, réduit si l'image dépasserait max_pixels
+    
+    Args:
+        rect (fitz.Rect): Dimensions de la page (points)
+        zoom (float): Facteur de rendu demandé
+        max_pixels (int): Nombre maximal de pixels de l'image (aucune limite si None)
+        
+    Returns:
+        float: Facteur de rendu à appliquer
+    """
+    area = rect.width * rect.height
+    if max_pixels and area > 0 and area * zoom * zoom > max_pixels:
+        return (max_pixels / area) ** 0.5
+    return zoom
+
+def convert_pdf_to_images(input_path, output_dir, zoom=2.0, max_pixels=None, stats=None):
     """
     Convertit un fichier PDF en images (une image par page) en utilisant PyMuPDF
     
+    Les pages déjà rendues au même facteur (même empreinte de contenu, voir page_cache)
+    sont reprises du cache.
+    
     Args:
         input_path (str): Chemin du fichier PDF à convertir
         output_dir (str): Répertoire de sortie pour les images
+        zoom (float): Facteur de rendu (2 = 144 dpi)
+        max_pixels (int): Nombre maximal de pixels par image ; les pages plus grandes
+            (affiches, plans) sont rendues à un facteur réduit
+        stats (dict): Complété avec le nombre de pages (pages) et de pages reprises du cache (reused_pages)
         
     Returns:
         tuple: (bool, str, list) indiquant le succès ou l'échec, un message, et la liste des chemins d'images
@@ -252,25 +421,44 @@ def convert_pdf_to_images(input_path, output_dir):
         # Créer le répertoire de sortie si nécessaire
         os.makedirs(output_dir, exist_ok=True)
         
+        from backend.app.config import PAGE_CACHE_CONFIG
+        from backend.services import page_cache
+        
         # Ouvrir le document PDF avec PyMuPDF
         image_paths = []
+        reused = 0
         with fitz.open(input_path) as pdf:
+            hasher = page_cache.PageHasher(pdf) if PAGE_CACHE_CONFIG["enabled"] else None
             # Parcourir chaque page
             for page_num, page in enumerate(pdf):
                 # Rendre la page en image avec une résolution plus élevée
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                page_zoom = render_zoom_for_page(page.rect, zoom, max_pixels)
                 
                 # Définir le chemin de sortie pour l'image
                 image_path = os.path.join(output_dir, f"page_{page_num + 1}.png")
+                image_paths.append(image_path)
                 
-                # Sauvegarder l'image
-                pix.save(image_path)
+                # Page inchangée depuis un rendu précédent : reprise du cache
+                fingerprint = hasher.fingerprint(page) if hasher else None
+                if fingerprint and page_cache.get_render(fingerprint, page_zoom, image_path):
+                    reused += 1
+                    continue
                 
-                # Ajouter le chemin à la liste
-                image_paths.append(image_path)
+                # Sauvegarder l'image (sans écrire dans un rendu du cache lié à ce chemin)
+                if os.path.lexists(image_path):
+                    os.remove(image_path)
+                pix = page.get_pixmap(matrix=fitz.Matrix(page_zoom, page_zoom))
+                pix.save(image_path)
+                pix = None
+                if fingerprint:
+                    page_cache.put_render(fingerprint, page_zoom, image_path)
                 
                 logger.info(f"Page {page_num + 1} convertie en image: {image_path}")
         
+        if reused:
+            logger.info(f"{reused} page(s) sur {len(image_paths)} reprise(s) du cache")
+        if stats is not None:
+            stats.update(pages=len(image_paths), reused_pages=reused)
         return True, f"{len(image_paths)} pages converties en images", image_paths
         
     except Exception as e:
@@ -298,23 +486,84 @@ def clean_text_for_docx(text):
     
     return safe_text
 
-def convert_image_to_text(image_path):
+def convert_image_to_text(image_path, lang=None):
     """
     Extrait le texte d'une image en utilisant OCR
+    
+    Args:
+        image_path (str): Chemin vers l'image (les TIFF multipages sont pris en charge)
+        lang (str): Langue tesseract (ex: "fra", "fra+eng"), langue configurée par défaut
+        
+    Returns:
+        str: Texte extrait de l'image
     """
     try:
-        # Cette fonction nécessite l'installation de pytesseract et tesseract-ocr
-        import pytesseract
-        from PIL import Image
+        # Cette fonction nécessite l'installation de tesserocr ou pytesseract, et de tesseract-ocr
+        from backend.services.ocr_service import ocr_file
         
         logger.info(f"Extraction du texte de l'image: {image_path}")
-        img = Image.open(image_path)
-        text = pytesseract.image_to_string(img, lang='fra')
-        return text
+        return ocr_file(image_path, lang)
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte de l'image: {str(e)}")
         raise Exception(f"Erreur lors de l'extraction du texte de l'image: {str(e)}")
 
+def clean_text(text):
+    """
+    Supprime les caractères hors du plan multilingue de base (émoticônes...)
+    """
+    return "".join(char for char in text if ord(char) < 65536)
+
+def dataframe_to_text(df):
+    """
+    Met en forme le contenu d'une feuille Excel lue par pandas
+    
+    Returns:
+        str: Texte tabulaire, ou None si la feuille est vide
+    """
+    if df.empty:
+        return None
+    
+    try:
+        # Méthode 1: Utiliser to_string pour un format tabulaire
+        return df.to_string(index=False)
+    except Exception as e1:
+        logger.warning(f"Erreur lors de la conversion en texte tabulaire: {str(e1)}")
+    
+    try:
+        # Méthode 2: Convertir en CSV comme alternative
+        csv_buffer = StringIO()
+        df.to_csv(csv_buffer, index=False)
+        return csv_buffer.getvalue()
+    except Exception as e2:
+        logger.warning(f"Erreur lors de la conversion en CSV: {str(e2)}")
+    
+    # Méthode 3: Parcourir manuellement les cellules
+    rows_text = []
+    for _, row in df.iterrows():
+        row_values = [str(val) for val in row.values]
+        rows_text.append("\t".join(row_values))
+    
+    if rows_text:
+        return "\n".join(rows_text)
+    return "(Impossible d'extraire le contenu)"
+
+def xls_sheet_to_text(sheet):
+    """
+    Met en forme le contenu d'une feuille XLS lue par xlrd (cellules séparées par des tabulations)
+    
+    Returns:
+        str: Texte de la feuille, ou None si la feuille est vide
+    """
+    if sheet.nrows == 0:
+        return None
+    
+    # Récupérer les en-têtes (première ligne) puis les données (lignes suivantes)
+    sheet_data = []
+    for row_idx in range(sheet.nrows):
+        row_values = [str(sheet.cell_value(row_idx, col_idx)) for col_idx in range(sheet.ncols)]
+        sheet_data.append("\t".join(row_values))
+    return "\n".join(sheet_data)
+
 def extract_text_from_xlsx(file_path):
     """
     Extrait le texte d'un fichier Excel (XLSX)
@@ -344,52 +593,13 @@ def extract_text_from_xlsx(file_path):
             # Lire la feuille
             df = pd.read_excel(xlsx, sheet_name=sheet_name)
             
-            # Ajouter le nom de la feuille
+            # Ajouter le nom de la feuille et son contenu
             all_text.append(f"=== Feuille: {sheet_name} ===")
-            
-            # Vérifier si le DataFrame est vide
-            if df.empty:
-                all_text.append("(Feuille vide)")
-                continue
-            
-            # Convertir le DataFrame en texte
-            try:
-                # Méthode 1: Utiliser to_string pour un format tabulaire
-                text = df.to_string(index=False)
-                all_text.append(text)
-            except Exception as e1:
-                logger.warning(f"Erreur lors de la conversion en texte tabulaire: {str(e1)}")
-                
-                try:
-                    # Méthode 2: Convertir en CSV comme alternative
-                    csv_buffer = StringIO()
-                    df.to_csv(csv_buffer, index=False)
-                    text = csv_buffer.getvalue()
-                    all_text.append(text)
-                except Exception as e2:
-                    logger.warning(f"Erreur lors de la conversion en CSV: {str(e2)}")
-                    
-                    # Méthode 3: Parcourir manuellement les cellules
-                    rows_text = []
-                    for _, row in df.iterrows():
-                        row_values = [str(val) for val in row.values]
-                        rows_text.append("\t".join(row_values))
-                    
-                    if rows_text:
-                        all_text.append("\n".join(rows_text))
-                    else:
-                        all_text.append("(Impossible d'extraire le contenu)")
-        
-        # Joindre tout le texte
-        full_text = "\n\n".join(all_text)
+            text = dataframe_to_text(df)
+            all_text.append("(Feuille vide)" if text is None else text)
         
-        # Nettoyer le texte des caractères problématiques
-        clean_text = ""
-        for char in full_text:
-            if ord(char) < 65536:  # Filtrer les caractères Unicode valides
-                clean_text += char
-        
-        return clean_text
+        # Joindre tout le texte et le nettoyer des caractères problématiques
+        return clean_text("\n\n".join(all_text))
         
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte Excel (XLSX): {str(e)}")
@@ -423,55 +633,27 @@ def extract_text_from_xls(file_path):
         for sheet_name in sheet_names:
             logger.info(f"Lecture de la feuille: {sheet_name}")
             
-            # Ouvrir la feuille
-            sheet = workbook.sheet_by_name(sheet_name)
-            
-            # Ajouter le nom de la feuille
+            # Ajouter le nom de la feuille et son contenu
             all_text.append(f"=== Feuille: {sheet_name} ===")
-            
-            # Vérifier si la feuille est vide
-            if sheet.nrows == 0:
-                all_text.append("(Feuille vide)")
-                continue
-            
-            # Extraire les données
-            sheet_data = []
-            
-            # Récupérer les en-têtes (première ligne)
-            if sheet.nrows > 0:
-                headers = [str(sheet.cell_value(0, col_idx)) for col_idx in range(sheet.ncols)]
-                sheet_data.append("\t".join(headers))
-            
-            # Récupérer les données (lignes suivantes)
-            for row_idx in range(1, sheet.nrows):
-                row_values = [str(sheet.cell_value(row_idx, col_idx)) for col_idx in range(sheet.ncols)]
-                sheet_data.append("\t".join(row_values))
-            
-            # Ajouter les données de la feuille au texte
-            all_text.append("\n".join(sheet_data))
-        
-        # Joindre tout le texte
-        full_text = "\n\n".join(all_text)
-        
-        # Nettoyer le texte des caractères problématiques
-        clean_text = ""
-        for char in full_text:
-            if ord(char) < 65536:  # Filtrer les caractères Unicode valides
-                clean_text += char
+            text = xls_sheet_to_text(workbook.sheet_by_name(sheet_name))
+            all_text.append("(Feuille vide)" if text is None else text)
         
-        return clean_text
+        # Joindre tout le texte et le nettoyer des caractères problématiques
+        return clean_text("\n\n".join(all_text))
         
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction du texte Excel (XLS): {str(e)}")
         logger.error(traceback.format_exc())
         raise Exception(f"Erreur lors de l'extraction du texte Excel (XLS): {str(e)}")
 
-def extract_text_from_file(file_path):
+def extract_text_from_file(file_path, lang=None, hybrid=None):
     """
     Extrait le texte d'un fichier en détectant automatiquement son type (PDF, DOCX/DOC, Excel, ou image)
     
     Args:
         file_path (str): Chemin vers le fichier
+        lang (str): Langue OCR pour les images (langue configurée par défaut)
+        hybrid (bool): OCR des pages PDF numérisées (voir extract_text_from_pdf)
         
     Returns:
         str: Texte extrait du fichier
@@ -487,7 +669,7 @@ def extract_text_from_file(file_path):
         
         # Extraire le texte en fonction du type de fichier
         if file_extension in ['.pdf']:
-            return extract_text_from_pdf(file_path)
+            return extract_text_from_pdf(file_path, hybrid, lang)
         
         elif file_extension in ['.docx', '.doc']:
             return extract_text_from_docx(file_path)
@@ -506,7 +688,7 @@ def extract_text_from_file(file_path):
                 return f.read()
         
         elif file_extension in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif']:
-            return convert_image_to_text(file_path)
+            return convert_image_to_text(file_path, lang)
         
         else:
             raise Exception(f"Format de fichier non pris en charge: {file_extension}")
@@ -0,0 +1,159 @@
+"""
+Extraction du texte des documents DOCX en flux, sans construire le modèle python-docx
+
+Les parties XML sont lues directement dans l'archive avec un analyseur incrémental
+(lxml.etree.iterparse) : chaque paragraphe est renvoyé dès sa fin puis libéré, si bien
+que la mémoire reste bornée quelle que soit la taille du document.
+
+Sont extraits, dans cet ordre : en-têtes, corps du document (paragraphes, tableaux,
+zones de texte), pieds de page, notes de bas de page et notes de fin. Une rangée de
+tableau donne une ligne, cellules séparées par une tabulation.
+"""
+import zipfile
+import posixpath
+import logging
+
+from backend.services.loader import lazy_module
+
+etree = lazy_module("lxml.etree")
+
+logger = logging.getLogger(__name__)
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_RELATIONSHIPS = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+_RELATIONSHIP_TYPES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+# Parties annexes, dans l'ordre d'extraction (le corps du document suit les en-têtes)
+_PART_ORDER = ("header", None, "footer", "footnotes", "endnotes")
+
+# Éléments de texte d'un paragraphe (w:delText, texte supprimé en mode révision, est ignoré)
+_TEXT = W + "t"
+_CHARACTERS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n", W + "noBreakHyphen": "-"}
+# Éléments libérés dès leur fin
+_BLOCKS = (W + "p", W + "tr", W + "tbl")
+
+
+def _main_part(archive):
+    """
+    Chemin de la partie principale (word/document.xml en général)
+    """
+    try:
+        with archive.open("_rels/.rels") as rels:
+            for relation in etree.parse(rels).getroot().iter(_RELATIONSHIPS):
+                if relation.get("Type") == _RELATIONSHIP_TYPES + "officeDocument":
+                    return relation.get("Target").lstrip("/")
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+
+def _document_parts(archive):
+    """
+    Parties à extraire (en-têtes, corps, pieds de page, notes), dans l'ordre d'extraction
+    """
+    main_part = _main_part(archive)
+    directory = posixpath.dirname(main_part)
+    rels_path = posixpath.join(directory, "_rels", posixpath.basename(main_part) + ".rels")
+    related = {kind: [] for kind in _PART_ORDER if kind}
+    try:
+        with archive.open(rels_path) as rels:
+            for relation in etree.parse(rels).getroot().iter(_RELATIONSHIPS):
+                kind = relation.get("Type", "").rsplit("/", 1)[-1]
+                if kind in related and relation.get("TargetMode") != "External":
+                    target = relation.get("Target")
+                    path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(
+                        posixpath.join(directory, target))
+                    related[kind].append(path)
+    except KeyError:
+        pass
+    names = set(archive.namelist())
+    parts = []
+    for kind in _PART_ORDER:
+        for path in related[kind] if kind else [main_part]:
+            if path in names:
+                parts.append(path)
+    return parts
+
+
+def _iter_part(source):
+    """
+    Texte d'une partie XML : un élément par paragraphe ou rangée de tableau
+    """
+    paragraphs = []  # paragraphes ouverts (une zone de texte est un paragraphe dans un paragraphe)
+    cells = []  # cellules de tableau ouvertes : textes de leurs paragraphes
+    rows = []  # rangées de tableau ouvertes : textes de leurs cellules
+    fallback = 0  # profondeur dans mc:Fallback (doublon de mc:Choice pour les anciens lecteurs)
+
+    for event, element in etree.iterparse(source, events=("start", "end"), huge_tree=True,
+                                          resolve_entities=False):
+        tag = element.tag
+        if tag == MC_FALLBACK:
+            fallback += 1 if event == "start" else -1
+            continue
+        if fallback:
+            if event == "end":
+                element.clear()
+            continue
+
+        if event == "start":
+            if tag == W + "p":
+                paragraphs.append([])
+            elif tag == W + "tc":
+                cells.append([])
+            elif tag == W + "tr":
+                rows.append([])
+            continue
+
+        line = None
+        if tag == _TEXT:
+            if paragraphs and element.text:
+                paragraphs[-1].append(element.text)
+        elif tag in _CHARACTERS:
+            if paragraphs:
+                paragraphs[-1].append(_CHARACTERS[tag])
+        elif tag == W + "p":
+            line = "".join(paragraphs.pop())
+        elif tag == W + "tc":
+            text = " ".join(paragraph for paragraph in cells.pop() if paragraph)
+            if rows:
+                rows[-1].append(text)
+        elif tag == W + "tr":
+            line = "\t".join(rows.pop())
+            # Tableau imbriqué : la rangée fait partie de la cellule englobante
+            if cells:
+                line = line.replace("\t", " ")
+
+        if line is not None:
+            if cells:
+                cells[-1].append(line)
+            else:
+                yield line
+
+        if tag in _BLOCKS:
+            # Libérer l'élément traité et ceux qui le précèdent
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+def iter_docx_text(file_path):
+    """
+    Renvoie au fil de l'eau le texte d'un fichier DOCX
+
+    Args:
+        file_path (str): Chemin vers le fichier DOCX
+
+    Yields:
+        str: Texte d'un paragraphe ou d'une rangée de tableau (cellules séparées par des tabulations)
+
+    Raises:
+        zipfile.BadZipFile: Si le fichier n'est pas une archive DOCX
+        lxml.etree.XMLSyntaxError: Si une partie XML est invalide
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        for part in _document_parts(archive):
+            with archive.open(part) as source:
+                yield from _iter_part(source)
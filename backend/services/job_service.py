@@ -0,0 +1,245 @@
+"""
+Tâches asynchrones : traitements trop longs pour être exécutés pendant la requête
+
+Les tâches s'exécutent dans le pool de processus supervisé (délai JOBS_CONFIG["timeout"]) ;
+leur état est conservé dans une base SQLite, mise à jour par le processus serveur qui a
+planifié la tâche (une tâche dont le worker est tué échoue donc bien), et lisible par
+tous les workers du serveur. Les tâches terminées depuis plus de JOBS_CONFIG["ttl"]
+secondes sont supprimées avec leurs résultats.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import zipfile
+
+from backend.app.config import JOBS_CONFIG, OUTPUT_DIR, TEMP_DIR
+from backend.services.worker_pool import get_executor
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+"""
+
+
+def connect(db_path=None):
+    """
+    Ouvre la base des tâches (créée si nécessaire), en mode WAL
+    """
+    db_path = db_path or JOBS_CONFIG["db_path"]
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _update(db_path, job_id, **fields):
+    connection = connect(db_path)
+    try:
+        with connection:
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            connection.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+    finally:
+        connection.close()
+
+
+def _finish_job(db_path, job_id, future):
+    """
+    Enregistre le résultat d'une tâche terminée (succès, erreur ou worker arrêté)
+    """
+    try:
+        result = future.result()
+    except BaseException as e:
+        error = "Tâche annulée" if future.cancelled() else str(e)
+        logger.error(f"Erreur lors de l'exécution de la tâche {job_id}: {error}")
+        _update(db_path, job_id, status=ERROR, finished_at=time.time(), error=error)
+        return
+    _update(db_path, job_id, status=DONE, finished_at=time.time(), result=json.dumps(result, ensure_ascii=False))
+
+
+def _delete_job_outputs(result):
+    """
+    Supprime les fichiers produits par une tâche (archive téléchargeable, résultat paginé)
+    """
+    from backend.services.result_store import delete_result
+
+    if result.get("download_url"):
+        path = os.path.join(OUTPUT_DIR, os.path.basename(result["download_url"]))
+        if os.path.isfile(path):
+            os.remove(path)
+    if result.get("result_id"):
+        delete_result(result["result_id"])
+
+
+def clean_expired_jobs(db_path=None):
+    """
+    Supprime les tâches terminées depuis plus de JOBS_CONFIG["ttl"] secondes et leurs
+    résultats, ainsi que les tâches jamais terminées (serveur arrêté pendant leur exécution)
+    """
+    now = time.time()
+    limit = now - JOBS_CONFIG["ttl"]
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            "SELECT job_id, result FROM jobs WHERE finished_at < ? OR (finished_at IS NULL AND created_at < ?)",
+            (limit, limit - JOBS_CONFIG["timeout"])
+        ).fetchall()
+        for job_id, result in rows:
+            try:
+                if result:
+                    _delete_job_outputs(json.loads(result))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Résultats de la tâche {job_id} non supprimés: {str(e)}")
+                continue
+            with connection:
+                connection.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+    finally:
+        connection.close()
+    if rows:
+        logger.info(f"{len(rows)} tâche(s) expirée(s) supprimée(s)")
+
+
+def submit_job(kind, func, *args):
+    """
+    Planifie une tâche dans le pool de processus supervisé
+
+    Args:
+        kind (str): Type de tâche (affiché dans son état)
+        func (callable): Fonction de niveau module, renvoyant un résultat sérialisable en JSON
+        *args: Arguments de la fonction
+
+    Returns:
+        str: Identifiant de la tâche
+    """
+    db_path = str(JOBS_CONFIG["db_path"])
+    clean_expired_jobs(db_path)
+    job_id = uuid.uuid4().hex
+    connection = connect(db_path)
+    try:
+        with connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, kind, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, kind, QUEUED, time.time())
+            )
+    finally:
+        connection.close()
+
+    try:
+        future = get_executor().submit_task(
+            func, args, timeout=JOBS_CONFIG["timeout"],
+            on_start=lambda: _update(db_path, job_id, status=RUNNING, started_at=time.time())
+        )
+        future.add_done_callback(lambda done: _finish_job(db_path, job_id, done))
+    except Exception as e:
+        _update(db_path, job_id, status=ERROR, finished_at=time.time(), error=str(e))
+        raise Exception(f"Erreur lors de la planification de la tâche: {str(e)}")
+
+    logger.info(f"Tâche planifiée: {job_id} ({kind})")
+    return job_id
+
+
+def get_job(job_id):
+    """
+    Renvoie l'état d'une tâche
+
+    Returns:
+        dict: État de la tâche, ou None si elle n'existe pas
+    """
+    connection = connect()
+    try:
+        row = connection.execute(
+            "SELECT job_id, kind, status, created_at, started_at, finished_at, result, error "
+            "FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        return None
+    job_id, kind, status, created_at, started_at, finished_at, result, error = row
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "status": status,
+        "created_at": created_at,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "result": json.loads(result) if result else None,
+        "error": error,
+    }
+
+
+def render_pdf_images_job(upload_path, original_filename, zoom, max_pixels):
+    """
+    Tâche : convertit un PDF en images et les regroupe dans une archive ZIP
+
+    Returns:
+        dict: Nom de l'archive et URL de téléchargement
+    """
+    from backend.services.document_service import convert_pdf_to_images
+
+    temp_dir = os.path.join(TEMP_DIR, str(uuid.uuid4()))
+    try:
+        stats = {}
+        success, message, image_paths = convert_pdf_to_images(upload_path, temp_dir, zoom, max_pixels, stats)
+        if not success or not image_paths:
+            raise Exception(message)
+
+        zip_filename = f"{uuid.uuid4()}.zip"
+        with zipfile.ZipFile(os.path.join(OUTPUT_DIR, zip_filename), 'w') as zipf:
+            for image_path in image_paths:
+                zipf.write(image_path, os.path.basename(image_path))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return {
+        "filename": original_filename.replace('.pdf', '_images.zip'),
+        "pages": len(image_paths),
+        "reused_pages": stats.get("reused_pages", 0),
+        "download_url": f"/api/download/{zip_filename}",
+    }
+
+
+def extract_text_job(upload_path, original_filename, lang=None, hybrid=None):
+    """
+    Tâche : extrait le texte d'un document, l'indexe et le stocke pour une lecture paginée
+
+    Returns:
+        dict: Identifiant du résultat (voir /api/results/{id}), taille et nombre de pages
+    """
+    from backend.services.document_service import extract_pages_from_pdf, extract_text_from_file
+    from backend.services.result_store import store_result
+    from backend.services.search_service import index_document
+
+    stats = {}
+    if upload_path.lower().endswith('.pdf'):
+        pages = extract_pages_from_pdf(upload_path, hybrid, lang, stats)
+    else:
+        pages = [extract_text_from_file(upload_path, lang, hybrid)]
+    meta = store_result(pages, original_filename)
+    index_document(upload_path, original_filename, pages, wait=True)
+    return {
+        "result_id": meta["result_id"],
+        "total_size": meta["total_size"],
+        "pages": meta["pages"],
+        "reused_pages": stats.get("reused_pages", 0),
+        "results_url": f"/api/results/{meta['result_id']}",
+    }
@@ -0,0 +1,328 @@
+"""
+Extraction de la mise en page d'un PDF sous forme compacte (colonnes typées)
+
+La structure de page.get_text("dict") coûte plusieurs centaines d'octets par fragment de
+texte (un dictionnaire et ses clés par bloc, ligne et fragment). Ici, chaque attribut est
+une colonne (array typé) couvrant tout le document :
+- pages : largeur, hauteur, indice du premier bloc ;
+- blocs : boîte englobante, indice de la première ligne ;
+- lignes : boîte englobante, direction d'écriture, indice du premier fragment ;
+- fragments (spans) : boîte englobante, taille, police, attributs, couleur, texte.
+
+Les textes et noms de police sont des indices dans une table de chaînes unique (chaînes
+identiques dédoublonnées). Les indices "premier élément" suivent la convention CSR : les
+éléments de la page i sont ceux de page_block_start[i] à page_block_start[i + 1].
+
+Deux sérialisations : NDJSON (une ligne par page, lisible en flux) et binaire (colonnes
+brutes petit-boutistes, relues sans analyse).
+"""
+import io
+import sys
+import json
+import array
+import struct
+import logging
+
+from backend.services.loader import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+BINARY_MAGIC = b"DCLAYOUT"
+BINARY_VERSION = 1
+
+# Colonnes par niveau : (nom, code de type array)
+PAGE_COLUMNS = (("width", "f"), ("height", "f"))
+BLOCK_COLUMNS = (("x0", "f"), ("y0", "f"), ("x1", "f"), ("y1", "f"))
+LINE_COLUMNS = (("x0", "f"), ("y0", "f"), ("x1", "f"), ("y1", "f"), ("wmode", "B"), ("dir_x", "f"), ("dir_y", "f"))
+SPAN_COLUMNS = (
+    ("x0", "f"), ("y0", "f"), ("x1", "f"), ("y1", "f"),
+    ("size", "f"), ("font", "I"), ("flags", "I"), ("color", "I"), ("text", "I"),
+)
+
+_HEADER = struct.Struct("<8sHIIIII")
+
+
+class StringTable:
+    """
+    Table de chaînes dédoublonnées, référencées par indice
+
+    Une fois figée (freeze), la table ne conserve qu'un bloc UTF-8 et la position de
+    chaque chaîne : plus d'objet Python par chaîne.
+    """
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._index = {value: index for index, value in enumerate(self.strings)}
+        self._blob = None
+        self._offsets = None
+
+    @property
+    def frozen(self):
+        return self._blob is not None
+
+    def add(self, value):
+        if self.frozen:
+            raise ValueError("Table de chaînes figée")
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def freeze(self):
+        """
+        Remplace les chaînes par un bloc UTF-8 et leurs positions
+        """
+        if self.frozen:
+            return
+        offsets = array.array("I", [0])
+        blob = io.BytesIO()
+        for value in self.strings:
+            blob.write(value.encode("utf-8"))
+            offsets.append(blob.tell())
+        self._blob = blob.getvalue()
+        self._offsets = offsets
+        self.strings = None
+        self._index = None
+
+    def __getitem__(self, index):
+        if not self.frozen:
+            return self.strings[index]
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def __len__(self):
+        return len(self._offsets) - 1 if self.frozen else len(self.strings)
+
+    def nbytes(self):
+        self.freeze()
+        return len(self._blob) + self._offsets.itemsize * len(self._offsets)
+
+    def to_bytes(self):
+        """
+        Positions (uint32, n + 1 valeurs) suivies des chaînes concaténées en UTF-8
+        """
+        self.freeze()
+        return _le_bytes(self._offsets) + self._blob
+
+    @classmethod
+    def from_bytes(cls, data, count):
+        table = cls()
+        table._offsets = _from_le_bytes("I", data[:(count + 1) * 4])
+        table._blob = bytes(data[(count + 1) * 4:(count + 1) * 4 + table._offsets[count]])
+        table.strings = None
+        table._index = None
+        return table
+
+
+def _le_bytes(values):
+    if sys.byteorder == "big":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le_bytes(typecode, data):
+    values = array.array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class _Columns:
+    """
+    Colonnes typées d'un niveau (pages, blocs, lignes ou fragments)
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        for name, typecode in columns:
+            setattr(self, name, array.array(typecode))
+
+    def __len__(self):
+        return len(getattr(self, self.columns[0][0]))
+
+    def append_bbox(self, bbox):
+        x0, y0, x1, y1 = bbox
+        self.x0.append(x0)
+        self.y0.append(y0)
+        self.x1.append(x1)
+        self.y1.append(y1)
+
+    def arrays(self):
+        return [getattr(self, name) for name, _ in self.columns]
+
+    def nbytes(self):
+        return sum(values.itemsize * len(values) for values in self.arrays())
+
+
+class DocumentLayout:
+    """
+    Mise en page d'un document, en colonnes typées
+    """
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.pages = _Columns(PAGE_COLUMNS)
+        self.blocks = _Columns(BLOCK_COLUMNS)
+        self.lines = _Columns(LINE_COLUMNS)
+        self.spans = _Columns(SPAN_COLUMNS)
+        # Indices CSR : premier bloc de chaque page, première ligne de chaque bloc...
+        self.page_block_start = array.array("I", [0])
+        self.block_line_start = array.array("I", [0])
+        self.line_span_start = array.array("I", [0])
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def add_page(self, page_dict):
+        """
+        Ajoute une page à partir de la structure de page.get_text("dict") (libérée ensuite)
+        """
+        if self.strings.frozen:
+            raise ValueError("Mise en page figée")
+        self.pages.width.append(page_dict["width"])
+        self.pages.height.append(page_dict["height"])
+        lines, spans, strings = self.lines, self.spans, self.strings
+        for block in page_dict["blocks"]:
+            if block.get("type", 0) != 0:
+                continue
+            self.blocks.append_bbox(block["bbox"])
+            for line in block["lines"]:
+                lines.append_bbox(line["bbox"])
+                lines.wmode.append(line.get("wmode", 0))
+                dir_x, dir_y = line.get("dir", (1.0, 0.0))
+                lines.dir_x.append(dir_x)
+                lines.dir_y.append(dir_y)
+                for span in line["spans"]:
+                    spans.append_bbox(span["bbox"])
+                    spans.size.append(span["size"])
+                    spans.font.append(strings.add(span["font"]))
+                    spans.flags.append(span["flags"])
+                    spans.color.append(span["color"] & 0xFFFFFFFF)
+                    spans.text.append(strings.add(span["text"]))
+                self.line_span_start.append(len(spans))
+            self.block_line_start.append(len(lines))
+        self.page_block_start.append(len(self.blocks))
+
+    def nbytes(self):
+        """
+        Taille des données (colonnes, indices et chaînes), hors en-têtes des objets Python
+        """
+        indexes = sum(values.itemsize * len(values)
+                      for values in (self.page_block_start, self.block_line_start, self.line_span_start))
+        return (self.pages.nbytes() + self.blocks.nbytes() + self.lines.nbytes() + self.spans.nbytes()
+                + indexes + self.strings.nbytes())
+
+    # Sérialisation NDJSON
+
+    def page_record(self, page_index):
+        """
+        Enregistrement d'une page : colonnes de ses blocs, lignes et fragments, textes en clair
+        """
+        first_block, last_block = self.page_block_start[page_index], self.page_block_start[page_index + 1]
+        first_line, last_line = self.block_line_start[first_block], self.block_line_start[last_block]
+        first_span, last_span = self.line_span_start[first_line], self.line_span_start[last_line]
+
+        def columns(level, names, start, stop):
+            # Coordonnées au centième de point : les flottants 32 bits n'ont pas plus de précision utile
+            return {name: [round(value, 2) if isinstance(value, float) else value
+                           for value in getattr(level, name)[start:stop]] for name in names}
+
+        def relative(starts, first, stop):
+            return [value - starts[first] for value in starts[first:stop + 1]]
+
+        spans = columns(self.spans, ("x0", "y0", "x1", "y1", "size", "flags", "color"), first_span, last_span)
+        spans["font"] = [self.strings[index] for index in self.spans.font[first_span:last_span]]
+        spans["text"] = [self.strings[index] for index in self.spans.text[first_span:last_span]]
+        return {
+            "page": page_index + 1,
+            "width": round(self.pages.width[page_index], 2),
+            "height": round(self.pages.height[page_index], 2),
+            "blocks": {**columns(self.blocks, ("x0", "y0", "x1", "y1"), first_block, last_block),
+                       "line_start": relative(self.block_line_start, first_block, last_block)},
+            "lines": {**columns(self.lines, ("x0", "y0", "x1", "y1", "wmode", "dir_x", "dir_y"),
+                                first_line, last_line),
+                      "span_start": relative(self.line_span_start, first_line, last_line)},
+            "spans": spans,
+        }
+
+    def iter_ndjson(self):
+        """
+        Lignes NDJSON (octets) : une par page
+        """
+        for page_index in range(self.page_count):
+            yield json.dumps(self.page_record(page_index), ensure_ascii=False,
+                             separators=(",", ":")).encode("utf-8") + b"\n"
+
+    # Sérialisation binaire
+
+    def _all_arrays(self):
+        return (self.pages.arrays() + self.blocks.arrays() + self.lines.arrays() + self.spans.arrays()
+                + [self.page_block_start, self.block_line_start, self.line_span_start])
+
+    def to_bytes(self):
+        """
+        Format binaire : en-tête (magique, version, effectifs), colonnes dans l'ordre de
+        PAGE_COLUMNS, BLOCK_COLUMNS, LINE_COLUMNS, SPAN_COLUMNS, indices CSR, puis table de chaînes
+        """
+        output = io.BytesIO()
+        output.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(self.pages), len(self.blocks),
+                                  len(self.lines), len(self.spans), len(self.strings)))
+        for values in self._all_arrays():
+            output.write(_le_bytes(values))
+        output.write(self.strings.to_bytes())
+        return output.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, pages, blocks, lines, spans, strings = _HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("Format de mise en page non reconnu")
+        layout = cls()
+        offset = _HEADER.size
+        for level, count in ((layout.pages, pages), (layout.blocks, blocks), (layout.lines, lines),
+                             (layout.spans, spans)):
+            for name, typecode in level.columns:
+                size = array.array(typecode).itemsize * count
+                setattr(level, name, _from_le_bytes(typecode, data[offset:offset + size]))
+                offset += size
+        for name, count in (("page_block_start", pages + 1), ("block_line_start", blocks + 1),
+                            ("line_span_start", lines + 1)):
+            setattr(layout, name, _from_le_bytes("I", data[offset:offset + count * 4]))
+            offset += count * 4
+        layout.strings = StringTable.from_bytes(data[offset:], strings)
+        return layout
+
+
+def extract_layout_from_pdf(file_path):
+    """
+    Extrait la mise en page (blocs, lignes, fragments avec boîtes et polices) d'un PDF
+
+    Les pages sont analysées une à une : la structure dict de chaque page est convertie
+    en colonnes puis libérée.
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+
+    Returns:
+        DocumentLayout: Mise en page du document
+
+    Raises:
+        Exception: En cas d'erreur lors de l'extraction
+    """
+    try:
+        logger.info(f"Extraction de la mise en page du fichier PDF: {file_path}")
+        layout = DocumentLayout()
+        with fitz.open(file_path) as doc:
+            for page in doc:
+                layout.add_page(page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT))
+        layout.strings.freeze()
+        logger.info(f"Mise en page extraite: {layout.page_count} pages, {len(layout.spans)} fragments")
+        return layout
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction de la mise en page: {str(e)}")
+        raise Exception(f"Erreur lors de l'extraction de la mise en page: {str(e)}")
@@ -0,0 +1,94 @@
+"""
+Chargement différé des bibliothèques lourdes du service de documents
+
+Les modules déclarés avec lazy_module ne sont importés qu'au premier accès à l'un de
+leurs attributs : un worker qui ne traite que des CSV ne paie pas l'import de PyMuPDF
+ou de python-docx. prewarm() permet aux workers de longue durée de tout importer au
+démarrage.
+"""
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Bibliothèques lourdes utilisées par les services (importées par prewarm)
+HEAVY_MODULES = [
+    "fitz",
+    "pandas",
+    "openpyxl",
+    "xlrd",
+    "docx",
+    "chardet",
+    "PIL.Image",
+]
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Mandataire d'un module importé au premier accès à l'un de ses attributs
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    self._module = importlib.import_module(self._name)
+                    logger.debug(f"Module {self._name} importé en {(time.perf_counter() - start) * 1000:.0f} ms")
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "chargé" if self._module is not None else "non chargé"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_module(name):
+    """
+    Déclare un module à importer au premier usage
+
+    Args:
+        name (str): Nom complet du module (ex: "fitz", "PIL.Image")
+
+    Returns:
+        LazyModule: Mandataire du module
+    """
+    return LazyModule(name)
+
+
+def prewarm(modules=None):
+    """
+    Importe immédiatement les bibliothèques lourdes
+
+    Args:
+        modules (list): Modules à importer (HEAVY_MODULES par défaut)
+
+    Returns:
+        dict: Durée d'import en secondes par module (None si l'import a échoué)
+    """
+    timings = {}
+    for name in modules or HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = time.perf_counter() - start
+        except ImportError as e:
+            logger.warning(f"Préchargement impossible du module {name}: {str(e)}")
+            timings[name] = None
+    total = sum(t for t in timings.values() if t)
+    logger.info(f"Bibliothèques préchargées en {total * 1000:.0f} ms")
+    return timings
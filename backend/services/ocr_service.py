@@ -0,0 +1,354 @@
+"""
+Service d'OCR : pool de workers de longue durée et prétraitement des images
+
+Chaque worker garde son moteur OCR chargé entre deux images (tesserocr si disponible,
+qui conserve une instance de tesseract par langue ; sinon pytesseract). Les images sont
+prétraitées avant la reconnaissance : réduction à la résolution cible, niveaux de gris,
+binarisation (seuil d'Otsu) et redressement. Les pages d'un TIFF multipage sont
+réparties entre les workers ; depuis un worker supervisé, les images sont confiées au
+pool OCR du processus parent.
+"""
+import io
+import re
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.app.config import OCR_CONFIG
+from backend.services.loader import lazy_module
+from backend.services import supervisor
+
+Image = lazy_module("PIL.Image")
+ImageOps = lazy_module("PIL.ImageOps")
+ImageSequence = lazy_module("PIL.ImageSequence")
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+_LANG_PATTERN = re.compile(r"^[A-Za-z_]{3,}(\+[A-Za-z_]{3,})*$")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Moteur OCR du processus courant (chargé une seule fois par worker)
+_engine = None
+
+
+def validate_lang(lang):
+    """
+    Valide un code de langue tesseract (ex: "fra", "fra+eng")
+
+    Args:
+        lang (str): Code de langue, ou None pour la langue par défaut
+
+    Returns:
+        str: Code de langue validé
+
+    Raises:
+        ValueError: Si le code est invalide
+    """
+    lang = lang or OCR_CONFIG["default_lang"]
+    if not _LANG_PATTERN.match(lang):
+        raise ValueError(f"Code de langue OCR invalide: {lang}")
+    return lang
+
+
+def otsu_threshold(histogram):
+    """
+    Calcule le seuil d'Otsu d'un histogramme de niveaux de gris (256 classes)
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 128
+    sum_total = sum(i * count for i, count in enumerate(histogram))
+
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 0
+    best_variance = -1.0
+    for i, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += i * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_total - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+    return best_threshold
+
+
+def estimate_skew(image, max_angle=5.0, step=0.5):
+    """
+    Estime l'inclinaison du texte par profil de projection horizontal
+
+    L'angle retenu est celui qui, appliqué à l'image, rend les lignes de texte les plus
+    nettes (variance maximale de la somme des pixels par ligne).
+
+    Args:
+        image (PIL.Image.Image): Image en niveaux de gris
+        max_angle (float): Angle maximal recherché (degrés)
+        step (float): Pas de recherche (degrés)
+
+    Returns:
+        float: Angle de rotation à appliquer pour redresser l'image (degrés)
+    """
+    sample = image.copy()
+    sample.thumbnail((1000, 1000))
+    inverted = ImageOps.invert(sample)
+
+    best_angle = 0.0
+    best_score = -1.0
+    steps = int(round(max_angle / step))
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        rotated = inverted.rotate(angle, resample=Image.BILINEAR, fillcolor=0)
+        profile = np.asarray(rotated, dtype=np.float32).sum(axis=1)
+        score = float(profile.var())
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
+
+
+def preprocess_image(image, target_dpi=None, max_dimension=None, binarize=None, deskew=None,
+                     max_skew_angle=None):
+    """
+    Prépare une image pour l'OCR
+
+    Args:
+        image (PIL.Image.Image): Image source
+        target_dpi (int): Résolution cible (réduction si l'image est plus résolue)
+        max_dimension (int): Plus grande dimension acceptée (pixels)
+        binarize (bool): Appliquer un seuil d'Otsu
+        deskew (bool): Redresser le texte incliné
+        max_skew_angle (float): Angle maximal recherché lors du redressement
+
+    Returns:
+        PIL.Image.Image: Image prétraitée (niveaux de gris ou binaire)
+    """
+    target_dpi = target_dpi or OCR_CONFIG["target_dpi"]
+    max_dimension = max_dimension or OCR_CONFIG["max_dimension"]
+    binarize = OCR_CONFIG["binarize"] if binarize is None else binarize
+    deskew = OCR_CONFIG["deskew"] if deskew is None else deskew
+    max_skew_angle = max_skew_angle or OCR_CONFIG["max_skew_angle"]
+
+    # Appliquer l'orientation EXIF des photos de téléphone
+    image = ImageOps.exif_transpose(image)
+
+    # Réduire à la résolution cible, puis à la dimension maximale
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > target_dpi:
+        scale = target_dpi / float(dpi[0])
+    longest = max(image.size) * scale
+    if longest > max_dimension:
+        scale *= max_dimension / longest
+    if scale < 1.0:
+        new_size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        image = image.resize(new_size, Image.LANCZOS)
+
+    image = image.convert("L")
+
+    if deskew:
+        angle = estimate_skew(image, max_skew_angle)
+        if angle:
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    if binarize:
+        threshold = otsu_threshold(image.histogram())
+        image = image.point(lambda value: 255 if value > threshold else 0, mode="1").convert("L")
+
+    return image
+
+
+class _TesserocrEngine:
+    """
+    Moteur tesserocr : une instance de tesseract chargée par langue et réutilisée
+    """
+
+    def __init__(self, tesserocr):
+        self.tesserocr = tesserocr
+        self.apis = {}
+
+    def recognize(self, image, lang):
+        api = self.apis.get(lang)
+        if api is None:
+            api = self.tesserocr.PyTessBaseAPI(lang=lang)
+            self.apis[lang] = api
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+class _PytesseractEngine:
+    """
+    Moteur pytesseract (un processus tesseract par image)
+    """
+
+    def __init__(self, pytesseract):
+        self.pytesseract = pytesseract
+
+    def recognize(self, image, lang):
+        return self.pytesseract.image_to_string(image, lang=lang)
+
+
+def get_engine():
+    """
+    Renvoie le moteur OCR du processus courant, chargé au premier appel
+
+    Raises:
+        Exception: Si ni tesserocr ni pytesseract ne sont installés
+    """
+    global _engine
+    if _engine is None:
+        try:
+            import tesserocr
+            _engine = _TesserocrEngine(tesserocr)
+            logger.info("Moteur OCR: tesserocr")
+        except ImportError:
+            try:
+                import pytesseract
+            except ImportError:
+                raise Exception("Aucun moteur OCR disponible: installez tesserocr ou pytesseract et tesseract-ocr")
+            _engine = _PytesseractEngine(pytesseract)
+            logger.info("Moteur OCR: pytesseract")
+    return _engine
+
+
+def _init_worker(default_lang):
+    """
+    Initialise un worker OCR : charge le moteur et la langue par défaut
+    """
+    try:
+        engine = get_engine()
+        if isinstance(engine, _TesserocrEngine):
+            engine.recognize(Image.new("L", (32, 32), 255), default_lang)
+    except Exception as e:
+        logger.warning(f"Initialisation du worker OCR incomplète: {str(e)}")
+
+
+def recognize(source, lang, preprocess=True):
+    """
+    Reconnaît le texte d'une image (exécuté dans un worker OCR)
+
+    Args:
+        source (str | bytes): Chemin de l'image ou contenu encodé (PNG, TIFF...)
+        lang (str): Code de langue tesseract
+        preprocess (bool): Appliquer le prétraitement
+
+    Returns:
+        str: Texte reconnu
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with Image.open(source) as image:
+        image.load()
+        if preprocess:
+            image = preprocess_image(image)
+        return get_engine().recognize(image, lang)
+
+
+def get_executor():
+    """
+    Renvoie le pool de workers OCR, créé au premier appel
+    """
+    global _executor
+    if _executor is None or getattr(_executor, "_broken", False):
+        with _executor_lock:
+            if _executor is not None and getattr(_executor, "_broken", False):
+                logger.warning("Pool OCR inutilisable, remplacement")
+                _executor.shutdown(wait=False, cancel_futures=True)
+                _executor = None
+            if _executor is None:
+                logger.info(f"Démarrage du pool OCR ({OCR_CONFIG['workers']} workers)")
+                _executor = ProcessPoolExecutor(
+                    max_workers=OCR_CONFIG["workers"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(OCR_CONFIG["default_lang"],),
+                )
+    return _executor
+
+
+def shutdown_executor():
+    """
+    Arrête le pool de workers OCR s'il a été créé
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def split_frames(image_path):
+    """
+    Découpe une image multipage (TIFF) en pages encodées en PNG
+
+    Args:
+        image_path (str): Chemin de l'image
+
+    Returns:
+        list: Contenu PNG de chaque page (liste vide si l'image n'a qu'une page)
+    """
+    with Image.open(image_path) as image:
+        if getattr(image, "n_frames", 1) <= 1:
+            return []
+        frames = []
+        for frame in ImageSequence.Iterator(image):
+            buffer = io.BytesIO()
+            frame.save(buffer, format="PNG", compress_level=1)
+            frames.append(buffer.getvalue())
+        return frames
+
+
+def recognize_many(sources, lang=None):
+    """
+    Reconnaît le texte de plusieurs images en parallèle, dans l'ordre donné
+
+    Depuis un worker supervisé, les images sont reconnues dans le pool OCR du processus
+    parent. Dans un autre processus enfant (worker OCR...), elles sont traitées sur place
+    plutôt que dans un pool imbriqué.
+
+    Args:
+        sources (list): Chemins ou contenus encodés des images
+        lang (str): Code de langue tesseract (langue par défaut si None)
+
+    Returns:
+        list: Texte reconnu pour chaque image
+    """
+    lang = validate_lang(lang)
+    if not sources:
+        return []
+    if supervisor.in_supervised_worker():
+        return supervisor.call_in_parent(recognize_many, sources, lang)
+    if multiprocessing.parent_process() is not None or len(sources) == 1 and OCR_CONFIG["workers"] <= 1:
+        return [recognize(source, lang) for source in sources]
+
+    executor = get_executor()
+    futures = [executor.submit(recognize, source, lang) for source in sources]
+    return [future.result() for future in futures]
+
+
+def ocr_file(image_path, lang=None):
+    """
+    Extrait le texte d'une image ; les pages d'un TIFF multipage sont réparties entre les workers
+
+    Args:
+        image_path (str): Chemin de l'image
+        lang (str): Code de langue tesseract (langue par défaut si None)
+
+    Returns:
+        str: Texte reconnu (pages séparées par une ligne vide)
+    """
+    frames = split_frames(image_path)
+    if frames:
+        logger.info(f"Image multipage: {len(frames)} pages réparties entre les workers OCR")
+        return "\n\n".join(recognize_many(frames, lang))
+    return recognize_many([image_path], lang)[0]
@@ -0,0 +1,234 @@
+"""
+Cache par page des textes extraits et des rendus PDF
+
+Chaque page est identifiée par une empreinte de son contenu : flux de contenu, ressources
+(polices, images, formulaires), annotations, dimensions et rotation. Les objets référencés
+sont hachés récursivement d'après leur contenu et non leur numéro, si bien qu'une page
+inchangée garde son empreinte dans une nouvelle version du document, même réécrite.
+
+Lorsqu'une version révisée d'un document est envoyée, seules les pages dont l'empreinte
+est nouvelle sont extraites ou rendues ; les autres sont reprises du cache.
+
+Les textes et les images rendues sont conservés dans PAGE_CACHE_CONFIG["render_dir"], sous
+une même limite de taille : les entrées les moins récemment utilisées sont supprimées.
+"""
+import os
+import re
+import random
+import shutil
+import hashlib
+import logging
+
+from backend.app.config import PAGE_CACHE_CONFIG
+from backend.services.loader import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter si l'extraction ou le rendu change de résultat pour une même page
+CACHE_VERSION = 1
+
+_REFERENCE = re.compile(rb"(\d+) (\d+) R")
+# Références vers le parent (arbre des pages, annotation parente) : elles rattacheraient
+# chaque page au document entier
+_BACK_REFERENCE = re.compile(rb"/(?:Parent|P)\s*\d+ \d+ R")
+
+# Probabilité de vérifier la taille du cache lors d'un ajout
+_PRUNE_PROBABILITY = 0.02
+
+
+class PageHasher:
+    """
+    Calcule l'empreinte des pages d'un document, en mémorisant celle des objets partagés
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._digests = {}
+        self._page_xrefs = None
+
+    def _is_page(self, xref):
+        if self._page_xrefs is None:
+            self._page_xrefs = {page.xref for page in self.doc}
+        return xref in self._page_xrefs
+
+    def _object_digest(self, xref, root=False):
+        digest = self._digests.get(xref)
+        if digest is not None:
+            return digest
+        # Lien vers une autre page (destination d'un lien) : son contenu n'influe pas sur celle-ci
+        if not root and self._is_page(xref):
+            return b"page"
+        # Cycle de références : marqueur fixe
+        self._digests[xref] = b"cycle"
+
+        source = self.doc.xref_object(xref, compressed=True).encode("latin-1", "replace")
+        source = _BACK_REFERENCE.sub(b"", source)
+        hasher = hashlib.sha256()
+        hasher.update(_REFERENCE.sub(lambda match: self._object_digest(int(match.group(1))), source))
+        if self.doc.xref_is_stream(xref):
+            hasher.update(self.doc.xref_stream_raw(xref) or b"")
+        digest = hasher.hexdigest().encode("ascii")
+        self._digests[xref] = digest
+        return digest
+
+    def _inherited_resources(self, page):
+        xref = page.xref
+        while xref:
+            kind, value = self.doc.xref_get_key(xref, "Resources")
+            if kind == "xref":
+                return self._object_digest(int(value.split()[0]))
+            if kind == "dict":
+                return _REFERENCE.sub(lambda match: self._object_digest(int(match.group(1))),
+                                      value.encode("latin-1", "replace"))
+            kind, value = self.doc.xref_get_key(xref, "Parent")
+            xref = int(value.split()[0]) if kind == "xref" else 0
+        return b""
+
+    def fingerprint(self, page):
+        """
+        Renvoie l'empreinte d'une page (hexadécimale), ou None si elle ne peut être calculée
+        """
+        try:
+            return self._fingerprint(page)
+        except (RecursionError, RuntimeError, ValueError) as e:
+            logger.warning(f"Empreinte de la page {page.number + 1} impossible: {str(e)}")
+            return None
+
+    def _fingerprint(self, page):
+        hasher = hashlib.sha256()
+        hasher.update(f"v{CACHE_VERSION}|{fitz.VersionBind}|{tuple(page.mediabox)}|{tuple(page.cropbox)}|"
+                      f"{page.rotation}|".encode("ascii"))
+        hasher.update(self._object_digest(page.xref, root=True))
+        # Ressources héritées de l'arbre des pages (absentes de l'objet page)
+        hasher.update(self._inherited_resources(page))
+        return hasher.hexdigest()
+
+
+def _cache_path(key, extension):
+    name = hashlib.sha256(key.encode("ascii")).hexdigest()
+    return os.path.join(PAGE_CACHE_CONFIG["render_dir"], name[:2], f"{name}.{extension}")
+
+
+def _text_path(fingerprint, mode):
+    return _cache_path(f"text:{mode}:{fingerprint}", "txt")
+
+
+def _render_path(fingerprint, zoom):
+    return _cache_path(f"{fingerprint}:{zoom:.6f}", "png")
+
+
+def _touch(path):
+    try:
+        # Date de dernier usage, pour la purge des entrées les plus anciennes
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _store(path, write):
+    """
+    Écrit une entrée du cache (fichier temporaire puis renommage) ; False en cas d'échec
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        write(temp_path)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"Mise en cache impossible: {str(e)}")
+        return False
+    if random.random() < _PRUNE_PROBABILITY:
+        prune_renders()
+    return True
+
+
+def get_texts(fingerprints, mode):
+    """
+    Renvoie les textes en cache pour chaque empreinte (None si absent)
+    """
+    texts = []
+    for fingerprint in fingerprints:
+        text = None
+        if fingerprint:
+            path = _text_path(fingerprint, mode)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                _touch(path)
+            except FileNotFoundError:
+                pass
+        texts.append(text)
+    return texts
+
+
+def put_text(fingerprint, mode, text):
+    """
+    Conserve le texte extrait d'une page
+    """
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    _store(_text_path(fingerprint, mode), write)
+
+
+def _link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def get_render(fingerprint, zoom, destination):
+    """
+    Copie dans destination le rendu en cache d'une page
+
+    Returns:
+        bool: True si le rendu était en cache
+    """
+    cached = _render_path(fingerprint, zoom)
+    try:
+        _link_or_copy(cached, destination)
+    except FileNotFoundError:
+        return False
+    _touch(cached)
+    return True
+
+
+def put_render(fingerprint, zoom, image_path):
+    """
+    Conserve le rendu d'une page
+    """
+    _store(_render_path(fingerprint, zoom), lambda path: _link_or_copy(image_path, path))
+
+
+def prune_renders(max_bytes=None):
+    """
+    Supprime les entrées (textes et rendus) les plus anciennes au-delà de la taille maximale du cache
+    """
+    max_bytes = max_bytes or PAGE_CACHE_CONFIG["max_render_bytes"]
+    entries = []
+    total = 0
+    for root, _, files in os.walk(PAGE_CACHE_CONFIG["render_dir"]):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    logger.info(f"Cache par page réduit à {total // 2**20} Mo")
@@ -0,0 +1,237 @@
+"""
+Découpage, fusion et optimisation de documents PDF (PyMuPDF)
+
+- Découpage par plages de pages ("1-3,4-10,11-") ou par taille maximale des parties ;
+  les parties sont produites une à une (une seule en mémoire), puis écrites sur disque
+  (split_pdf_to_files, exécuté dans un worker supervisé).
+- Fusion de plusieurs documents, dans l'ordre donné.
+- Optimisation : suppression des objets inutilisés et fusion des objets identiques
+  (images et polices dupliquées comprises), compression des flux, linéarisation
+  (affichage rapide de la première page sur le web).
+"""
+import os
+import re
+import time
+import logging
+
+from backend.services.loader import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"^\s*(\d*)\s*(-?)\s*(\d*)\s*$")
+
+# Options d'enregistrement des parties et des documents fusionnés
+_SAVE_OPTIONS = {"garbage": 3, "deflate": True}
+# Options d'enregistrement d'un document optimisé (garbage=4 : fusion des objets identiques)
+_OPTIMIZE_OPTIONS = {"garbage": 4, "deflate": True, "deflate_images": True, "deflate_fonts": True, "clean": True}
+
+
+def parse_page_ranges(spec, page_count):
+    """
+    Analyse une liste de plages de pages ("1-3,5,8-" : pages 1 à 3, page 5, page 8 à la fin)
+
+    Args:
+        spec (str): Plages séparées par des virgules, pages numérotées à partir de 1
+        page_count (int): Nombre de pages du document
+
+    Returns:
+        list: Plages (première page, dernière page), numérotées à partir de 0, bornes incluses
+
+    Raises:
+        ValueError: Si une plage est invalide ou hors du document
+    """
+    ranges = []
+    for part in spec.split(","):
+        match = _RANGE.match(part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"Plage de pages invalide: {part.strip()!r}")
+        first, dash, last = match.groups()
+        first = int(first) if first else 1
+        last = (int(last) if last else page_count) if dash else first
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(f"Plage de pages hors du document ({page_count} pages): {part.strip()!r}")
+        ranges.append((first - 1, last - 1))
+    return ranges
+
+
+def _page_weight(doc, page, counted):
+    """
+    Estime la taille d'une page : flux de contenu et images non encore comptés dans la partie
+    """
+    weight = 0
+    xrefs = list(page.get_contents()) + [image[0] for image in page.get_images(full=True)]
+    for xref in xrefs:
+        if xref in counted:
+            continue
+        counted.add(xref)
+        weight += len(doc.xref_stream_raw(xref) or b"")
+    return weight
+
+
+def _build_part(doc, first, last):
+    part = fitz.open()
+    try:
+        part.insert_pdf(doc, from_page=first, to_page=last)
+        return part.tobytes(**_SAVE_OPTIONS)
+    finally:
+        part.close()
+
+
+def _split_to_size(doc, first, last, max_bytes):
+    """
+    Parties de taille au plus max_bytes couvrant les pages first à last
+
+    Les pages sont regroupées d'après une estimation de leur taille ; une partie qui
+    dépasse malgré tout la limite est coupée en deux. Une page seule plus grande que la
+    limite forme sa propre partie.
+    """
+    start = first
+    while start <= last:
+        counted = set()
+        size = 0
+        end = start
+        while end <= last:
+            weight = _page_weight(doc, doc[end], counted)
+            if end > start and size + weight > max_bytes:
+                break
+            size += weight
+            end += 1
+        yield from _checked_part(doc, start, end - 1, max_bytes)
+        start = end
+
+
+def _checked_part(doc, first, last, max_bytes):
+    data = _build_part(doc, first, last)
+    if len(data) <= max_bytes or first == last:
+        yield first, last, data
+        return
+    middle = (first + last) // 2
+    # Libérer la partie trop volumineuse avant de la recouper
+    data = None
+    yield from _checked_part(doc, first, middle, max_bytes)
+    yield from _checked_part(doc, middle + 1, last, max_bytes)
+
+
+def iter_split_pdf(file_path, ranges=None, max_bytes=None):
+    """
+    Découpe un PDF en parties, produites une à une
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        ranges (str): Plages de pages, une partie par plage (voir parse_page_ranges)
+        max_bytes (int): Taille maximale de chaque partie (octets), si ranges n'est pas fourni
+
+    Yields:
+        tuple: (première page, dernière page, contenu PDF de la partie), pages numérotées à partir de 1
+
+    Raises:
+        ValueError: Si ni ranges ni max_bytes n'est fourni, ou si une plage est invalide
+    """
+    if not ranges and not max_bytes:
+        raise ValueError("Indiquez des plages de pages ou une taille maximale")
+    with fitz.open(file_path) as doc:
+        if ranges:
+            parts = ((first, last, _build_part(doc, first, last))
+                     for first, last in parse_page_ranges(ranges, doc.page_count))
+        else:
+            parts = _split_to_size(doc, 0, doc.page_count - 1, max_bytes)
+        for first, last, data in parts:
+            yield first + 1, last + 1, data
+
+
+def split_pdf_to_files(file_path, output_dir, ranges=None, max_bytes=None):
+    """
+    Découpe un PDF et écrit ses parties dans un dossier (voir iter_split_pdf)
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        output_dir (str): Dossier des parties
+        ranges (str): Plages de pages, une partie par plage
+        max_bytes (int): Taille maximale de chaque partie (octets), si ranges n'est pas fourni
+
+    Returns:
+        dict: Nombre de pages du document (pages) et parties (parts) : listes
+            [première page, dernière page, chemin], pages numérotées à partir de 1
+
+    Raises:
+        ValueError: Si ni ranges ni max_bytes n'est fourni, ou si une plage est invalide
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with fitz.open(file_path) as doc:
+        pages = doc.page_count
+    parts = []
+    for index, (first, last, data) in enumerate(iter_split_pdf(file_path, ranges, max_bytes)):
+        part_path = os.path.join(output_dir, f"{index + 1}.pdf")
+        with open(part_path, "wb") as f:
+            f.write(data)
+        parts.append([first, last, part_path])
+    return {"pages": pages, "parts": parts}
+
+
+def merge_pdfs(file_paths, output_path):
+    """
+    Fusionne des documents PDF, dans l'ordre donné
+
+    Args:
+        file_paths (list): Chemins des documents à fusionner
+        output_path (str): Chemin du document fusionné
+
+    Returns:
+        dict: Nombre de pages (pages), taille du document (output_size) et durée (seconds)
+
+    Raises:
+        Exception: En cas d'erreur lors de la fusion
+    """
+    try:
+        logger.info(f"Fusion de {len(file_paths)} documents PDF")
+        started = time.perf_counter()
+        with fitz.open() as merged:
+            for file_path in file_paths:
+                with fitz.open(file_path) as doc:
+                    merged.insert_pdf(doc)
+            pages = merged.page_count
+            merged.save(output_path, **_SAVE_OPTIONS)
+        return {"pages": pages, "output_size": os.path.getsize(output_path),
+                "seconds": time.perf_counter() - started}
+    except Exception as e:
+        logger.error(f"Erreur lors de la fusion des PDF: {str(e)}")
+        raise Exception(f"Erreur lors de la fusion des PDF: {str(e)}")
+
+
+def optimize_pdf(file_path, output_path, linearize=True):
+    """
+    Optimise un document PDF : objets inutilisés supprimés, objets identiques fusionnés,
+    flux compressés et, si demandé, linéarisation
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        output_path (str): Chemin du document optimisé
+        linearize (bool): Linéariser le document (affichage rapide sur le web)
+
+    Returns:
+        dict: Tailles avant et après (input_size, output_size), réduction relative
+            (reduction, entre 0 et 1, négative si le document a grossi) et durée (seconds)
+
+    Raises:
+        Exception: En cas d'erreur lors de l'optimisation
+    """
+    try:
+        logger.info(f"Optimisation du fichier PDF: {file_path}")
+        started = time.perf_counter()
+        with fitz.open(file_path) as doc:
+            doc.save(output_path, linear=linearize, **_OPTIMIZE_OPTIONS)
+        input_size = os.path.getsize(file_path)
+        output_size = os.path.getsize(output_path)
+        stats = {
+            "input_size": input_size,
+            "output_size": output_size,
+            "reduction": 1 - output_size / input_size if input_size else 0.0,
+            "seconds": time.perf_counter() - started,
+        }
+        logger.info(f"PDF optimisé: {input_size} -> {output_size} octets en {stats['seconds']:.2f} s")
+        return stats
+    except Exception as e:
+        logger.error(f"Erreur lors de l'optimisation du PDF: {str(e)}")
+        raise Exception(f"Erreur lors de l'optimisation du PDF: {str(e)}")
@@ -0,0 +1,241 @@
+"""
+Estimation préalable du coût d'un rendu ou d'une extraction
+
+L'inspection est peu coûteuse : dimensions des pages via PyMuPDF (sans rendu),
+dimensions des feuilles via openpyxl en lecture seule (ou xlrd à la demande),
+taille du fichier pour les CSV et DOCX. Elle fournit une estimation de la mémoire
+de pointe et de la durée, et une décision :
+- accept : traitement normal ;
+- downscale : rendu à un facteur réduit pour tenir dans la limite de mémoire ;
+- async : traitement trop long pour une requête, à exécuter en tâche asynchrone ;
+- reject : limites dépassées.
+"""
+import os
+import zipfile
+import logging
+
+from backend.app.config import PREFLIGHT_CONFIG
+from backend.services.loader import lazy_module
+from backend.services.document_service import render_zoom_for_page
+
+fitz = lazy_module("fitz")  # PyMuPDF
+openpyxl = lazy_module("openpyxl")
+xlrd = lazy_module("xlrd")
+
+logger = logging.getLogger(__name__)
+
+ACCEPT = "accept"
+DOWNSCALE = "downscale"
+ASYNC = "async"
+REJECT = "reject"
+
+# Taille moyenne d'une cellule dans le XML d'une feuille, lorsque ses dimensions ne sont pas déclarées
+_XLSX_BYTES_PER_CELL = 40
+
+
+class PreflightRejected(Exception):
+    """
+    Le traitement dépasse les limites configurées
+    """
+
+    def __init__(self, estimate):
+        super().__init__(estimate["reason"])
+        self.estimate = estimate
+
+
+def _decide(estimate, config):
+    """
+    Complète une estimation avec la décision (refus ou passage en asynchrone)
+    """
+    if estimate.get("pages", 0) > config["max_pages"]:
+        return {**estimate, "decision": REJECT,
+                "reason": f"Trop de pages ({estimate['pages']} > {config['max_pages']})"}
+    if estimate["estimated_memory"] > config["max_memory"]:
+        return {**estimate, "decision": REJECT,
+                "reason": f"Mémoire estimée trop élevée ({estimate['estimated_memory'] // 2**20} Mo)"}
+    if estimate["estimated_seconds"] > config["max_seconds"]:
+        return {**estimate, "decision": REJECT,
+                "reason": f"Durée estimée trop longue ({estimate['estimated_seconds']:.0f} s)"}
+    if estimate["estimated_seconds"] > config["async_seconds"]:
+        return {**estimate, "decision": ASYNC,
+                "reason": f"Durée estimée {estimate['estimated_seconds']:.0f} s : traitement asynchrone"}
+    return {**estimate, "decision": estimate.get("decision", ACCEPT), "reason": estimate.get("reason")}
+
+
+def estimate_pdf_render(file_path, zoom=None, config=None):
+    """
+    Estime le rendu d'un PDF en images et choisit le facteur de rendu
+
+    Les pages dont l'image dépasserait max_page_pixels sont rendues à un facteur réduit ;
+    si ce facteur tombe sous min_render_zoom, le rendu est refusé.
+
+    Args:
+        file_path (str): Chemin du fichier PDF
+        zoom (float): Facteur de rendu demandé (configuré par défaut)
+        config (dict): Limites (PREFLIGHT_CONFIG par défaut)
+
+    Returns:
+        dict: Estimation (pages, pixels, zoom, max_pixels, mémoire, durée) et décision
+    """
+    config = config or PREFLIGHT_CONFIG
+    zoom = zoom or config["render_zoom"]
+    max_pixels = config["max_page_pixels"]
+
+    total_pixels = 0
+    largest_page = 0
+    smallest_zoom = zoom
+    with fitz.open(file_path) as pdf:
+        pages = pdf.page_count
+        if pages > config["max_pages"]:
+            return _decide({"kind": "pdf_render", "pages": pages, "estimated_memory": 0,
+                            "estimated_seconds": 0}, config)
+        for page in pdf:
+            page_zoom = render_zoom_for_page(page.rect, zoom, max_pixels)
+            pixels = page.rect.width * page.rect.height * page_zoom * page_zoom
+            total_pixels += pixels
+            largest_page = max(largest_page, pixels)
+            smallest_zoom = min(smallest_zoom, page_zoom)
+
+    estimate = {
+        "kind": "pdf_render",
+        "pages": pages,
+        "zoom": zoom,
+        "max_pixels": max_pixels,
+        "total_pixels": int(total_pixels),
+        # Une page est rendue à la fois : la pointe est celle de la plus grande page
+        "estimated_memory": int(largest_page * config["memory"]["pixel"]),
+        "estimated_seconds": total_pixels / config["throughput"]["render_pixels"],
+    }
+    if smallest_zoom < config["min_render_zoom"]:
+        return {**estimate, "decision": REJECT,
+                "reason": f"Page trop grande pour être rendue (facteur {smallest_zoom:.2f})"}
+    if smallest_zoom < zoom:
+        estimate.update(decision=DOWNSCALE, min_zoom=smallest_zoom,
+                        reason=f"Pages trop grandes rendues au facteur {smallest_zoom:.2f}")
+    return _decide(estimate, config)
+
+
+def _xlsx_cells(file_path):
+    """
+    Compte les cellules déclarées des feuilles d'un classeur XLSX, sans les charger
+    """
+    cells = 0
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            if sheet.max_row is None or sheet.max_column is None:
+                raise ValueError("Dimensions non déclarées")
+            cells += sheet.max_row * sheet.max_column
+    except ValueError:
+        # Dimensions absentes : estimation d'après la taille décompressée des feuilles
+        with zipfile.ZipFile(file_path) as archive:
+            sheet_bytes = sum(info.file_size for info in archive.infolist()
+                              if info.filename.startswith("xl/worksheets/"))
+        cells = sheet_bytes // _XLSX_BYTES_PER_CELL
+    finally:
+        workbook.close()
+    return cells
+
+
+def _xls_cells(file_path):
+    """
+    Compte les cellules des feuilles d'un classeur XLS, une feuille chargée à la fois
+    """
+    cells = 0
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        for index in range(book.nsheets):
+            sheet = book.sheet_by_index(index)
+            cells += sheet.nrows * sheet.ncols
+            book.unload_sheet(index)
+    finally:
+        book.release_resources()
+    return cells
+
+
+def estimate_extraction(file_path, extension, config=None):
+    """
+    Estime l'extraction de texte d'un document
+
+    Args:
+        file_path (str): Chemin du fichier
+        extension (str): Extension du fichier (sans le point)
+        config (dict): Limites (PREFLIGHT_CONFIG par défaut)
+
+    Returns:
+        dict: Estimation (taille, pages ou cellules, mémoire, durée) et décision
+    """
+    config = config or PREFLIGHT_CONFIG
+    throughput = config["throughput"]
+    memory = config["memory"]
+    size = os.path.getsize(file_path)
+    estimate = {"kind": extension, "size": size}
+
+    if extension == "pdf":
+        with fitz.open(file_path) as pdf:
+            pages = pdf.page_count
+        estimate.update(pages=pages, estimated_memory=size * memory["pdf_byte"],
+                        estimated_seconds=pages / throughput["pdf_pages"])
+    elif extension == "xlsx":
+        cells = _xlsx_cells(file_path)
+        estimate.update(cells=cells, estimated_memory=cells * memory["xlsx_cell"],
+                        estimated_seconds=cells / throughput["xlsx_cells"])
+    elif extension == "xls":
+        cells = _xls_cells(file_path)
+        estimate.update(cells=cells, estimated_memory=cells * memory["xls_cell"],
+                        estimated_seconds=cells / throughput["xls_cells"])
+    elif extension == "csv":
+        estimate.update(estimated_memory=size * memory["csv_byte"],
+                        estimated_seconds=size / throughput["csv_bytes"])
+    elif extension in ("docx", "doc"):
+        estimate.update(estimated_memory=size * memory["docx_byte"],
+                        estimated_seconds=size / throughput["docx_bytes"])
+    else:
+        # Images et autres formats : pas d'estimation fiable, traitement normal
+        return {**estimate, "decision": ACCEPT, "reason": None, "estimated_memory": None,
+                "estimated_seconds": None}
+
+    return _decide(estimate, config)
+
+
+def preflight_render(file_path, zoom=None):
+    """
+    Estimation préalable d'un rendu PDF, si elle est activée
+
+    Raises:
+        PreflightRejected: Si le rendu dépasse les limites
+    """
+    default = {"decision": ACCEPT, "zoom": zoom or PREFLIGHT_CONFIG["render_zoom"], "max_pixels": None}
+    if not PREFLIGHT_CONFIG["enabled"]:
+        return default
+    try:
+        estimate = estimate_pdf_render(file_path, zoom)
+    except Exception as e:
+        # Fichier illisible : le rendu lui-même signalera l'erreur
+        logger.warning(f"Estimation impossible pour {file_path}: {str(e)}")
+        return default
+    logger.info(f"Estimation du rendu: {estimate['decision']} ({estimate.get('reason') or 'dans les limites'})")
+    if estimate["decision"] == REJECT:
+        raise PreflightRejected(estimate)
+    return estimate
+
+
+def preflight_extraction(file_path, extension):
+    """
+    Estimation préalable d'une extraction de texte, si elle est activée
+
+    Raises:
+        PreflightRejected: Si l'extraction dépasse les limites
+    """
+    if not PREFLIGHT_CONFIG["enabled"]:
+        return {"decision": ACCEPT}
+    try:
+        estimate = estimate_extraction(file_path, extension)
+    except Exception as e:
+        # Fichier illisible : l'extraction elle-même signalera l'erreur
+        logger.warning(f"Estimation impossible pour {file_path}: {str(e)}")
+        return {"decision": ACCEPT}
+    logger.info(f"Estimation de l'extraction: {estimate['decision']} ({estimate.get('reason') or 'dans les limites'})")
+    if estimate["decision"] == REJECT:
+        raise PreflightRejected(estimate)
+    return estimate
@@ -0,0 +1,201 @@
+"""
+Stockage paginé des résultats d'extraction volumineux
+
+Chaque résultat est stocké dans son propre dossier :
+- text.txt : le texte complet, encodé en UTF-8 ;
+- offsets.bin : la table des positions (octets) du début de chaque page du document ;
+- meta.json : taille totale et nombre de pages.
+
+Les lectures projettent text.txt en mémoire (mmap) et n'en décodent que la tranche
+demandée : servir une page d'un résultat de 50 Mo ne charge pas le résultat entier.
+Les résultats sont supprimés RESULTS_CONFIG["ttl"] secondes après leur création.
+"""
+import os
+import re
+import json
+import mmap
+import time
+import uuid
+import array
+import bisect
+import shutil
+import logging
+
+from backend.app.config import RESULTS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ResultNotFound(Exception):
+    """
+    Le résultat demandé n'existe pas
+    """
+
+
+def _result_dir(result_id):
+    if not _RESULT_ID_PATTERN.match(result_id):
+        raise ResultNotFound(result_id)
+    return os.path.join(RESULTS_CONFIG["dir"], result_id)
+
+
+def clean_expired_results():
+    """
+    Supprime les résultats créés depuis plus de RESULTS_CONFIG["ttl"] secondes
+    """
+    results_dir = RESULTS_CONFIG["dir"]
+    if not os.path.isdir(results_dir):
+        return
+    limit = time.time() - RESULTS_CONFIG["ttl"]
+    for name in os.listdir(results_dir):
+        if not _RESULT_ID_PATTERN.match(name):
+            continue
+        try:
+            # meta.json est écrit en dernier : un résultat sans meta.json est en cours d'écriture
+            # (ou interrompu), sa date est celle de son dossier
+            path = os.path.join(results_dir, name)
+            meta_path = os.path.join(path, "meta.json")
+            created = os.path.getmtime(meta_path if os.path.exists(meta_path) else path)
+        except OSError:
+            continue
+        if created < limit:
+            delete_result(name)
+
+
+def store_result(pages, filename=None):
+    """
+    Stocke un résultat d'extraction page par page
+
+    Args:
+        pages (list): Texte de chaque page du document (un seul élément pour les formats sans pages)
+        filename (str): Nom du fichier d'origine
+
+    Returns:
+        dict: Métadonnées du résultat (result_id, total_size, pages)
+    """
+    clean_expired_results()
+    result_id = uuid.uuid4().hex
+    result_dir = os.path.join(RESULTS_CONFIG["dir"], result_id)
+    os.makedirs(result_dir, exist_ok=True)
+
+    offsets = array.array("Q")
+    position = 0
+    with open(os.path.join(result_dir, "text.txt"), "wb") as f:
+        for text in pages:
+            offsets.append(position)
+            data = text.encode("utf-8")
+            f.write(data)
+            position += len(data)
+
+    with open(os.path.join(result_dir, "offsets.bin"), "wb") as f:
+        offsets.tofile(f)
+
+    meta = {"result_id": result_id, "filename": filename, "total_size": position, "pages": len(pages)}
+    with open(os.path.join(result_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    logger.info(f"Résultat stocké: {result_id} ({position} octets, {len(pages)} pages)")
+    return meta
+
+
+def delete_result(result_id):
+    """
+    Supprime un résultat (sans erreur s'il n'existe plus)
+    """
+    try:
+        shutil.rmtree(_result_dir(result_id))
+    except (ResultNotFound, FileNotFoundError):
+        return
+    logger.info(f"Résultat supprimé: {result_id}")
+
+
+def get_result_meta(result_id):
+    """
+    Renvoie les métadonnées d'un résultat
+
+    Raises:
+        ResultNotFound: Si le résultat n'existe pas
+    """
+    meta_path = os.path.join(_result_dir(result_id), "meta.json")
+    if not os.path.exists(meta_path):
+        raise ResultNotFound(result_id)
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_result_text_path(result_id):
+    """
+    Renvoie le chemin du texte complet d'un résultat
+
+    Raises:
+        ResultNotFound: Si le résultat n'existe pas
+    """
+    text_path = os.path.join(_result_dir(result_id), "text.txt")
+    if not os.path.exists(text_path):
+        raise ResultNotFound(result_id)
+    return text_path
+
+
+def _load_offsets(result_id):
+    offsets = array.array("Q")
+    offsets_path = os.path.join(_result_dir(result_id), "offsets.bin")
+    with open(offsets_path, "rb") as f:
+        offsets.frombytes(f.read())
+    return offsets
+
+
+def read_slice(result_id, cursor=0, limit=None):
+    """
+    Lit une tranche d'un résultat sans le charger entièrement
+
+    La fin de la tranche est ramenée à une frontière de caractère UTF-8 : le curseur
+    suivant reprend exactement là où la tranche s'arrête.
+
+    Args:
+        result_id (str): Identifiant du résultat
+        cursor (int): Position de départ (octets), renvoyée par l'appel précédent
+        limit (int): Taille maximale de la tranche (octets)
+
+    Returns:
+        dict: text, cursor, next_cursor (None en fin de résultat), first_page et last_page (à partir de 1)
+
+    Raises:
+        ResultNotFound: Si le résultat n'existe pas
+        ValueError: Si le curseur est invalide
+    """
+    limit = min(limit or RESULTS_CONFIG["page_size"], RESULTS_CONFIG["max_page_size"])
+    text_path = get_result_text_path(result_id)
+    total_size = os.path.getsize(text_path)
+
+    if cursor < 0 or cursor > total_size:
+        raise ValueError(f"Curseur invalide: {cursor}")
+    if total_size == 0:
+        return {"text": "", "cursor": 0, "next_cursor": None, "first_page": 1, "last_page": 1}
+
+    with open(text_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Un curseur valide est toujours sur une frontière de caractère
+        if cursor < total_size and (mm[cursor] & 0xC0) == 0x80:
+            raise ValueError(f"Curseur invalide: {cursor}")
+
+        end = min(cursor + limit, total_size)
+        while end < total_size and end > cursor and (mm[end] & 0xC0) == 0x80:
+            end -= 1
+        if end == cursor and cursor < total_size:
+            # Limite plus petite qu'un caractère : renvoyer au moins un caractère
+            end = cursor + 1
+            while end < total_size and (mm[end] & 0xC0) == 0x80:
+                end += 1
+        text = mm[cursor:end].decode("utf-8")
+
+    offsets = _load_offsets(result_id)
+    first_page = bisect.bisect_right(offsets, cursor)
+    last_page = bisect.bisect_right(offsets, max(cursor, end - 1))
+
+    return {
+        "text": text,
+        "cursor": cursor,
+        "next_cursor": end if end < total_size else None,
+        "first_page": max(first_page, 1),
+        "last_page": max(last_page, 1),
+    }
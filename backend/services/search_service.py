@@ -0,0 +1,289 @@
+"""
+Index de recherche plein texte des documents extraits (SQLite FTS5)
+
+Les documents sont indexés page par page, par un thread d'arrière-plan qui regroupe
+les insertions en transactions : l'indexation n'ajoute rien à la latence des requêtes
+d'extraction. Un document déjà indexé (même empreinte SHA-256) n'est pas réindexé.
+Les documents indexés depuis plus de SEARCH_CONFIG["retention"] secondes sont retirés
+de l'index par le même thread.
+"""
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from backend.app.config import SEARCH_CONFIG
+from backend.utils.file_utils import file_sha256
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_hash TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    pages INTEGER NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text,
+    doc_hash UNINDEXED,
+    page UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def connect(db_path=None):
+    """
+    Ouvre la base de l'index (créée si nécessaire), en mode WAL pour lire pendant l'indexation
+    """
+    db_path = db_path or SEARCH_CONFIG["db_path"]
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+class SearchIndexer(threading.Thread):
+    """
+    Thread d'indexation : écrit les documents en attente par lots
+    """
+
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None):
+        super().__init__(name="search-indexer", daemon=True)
+        self.db_path = db_path or SEARCH_CONFIG["db_path"]
+        self.batch_size = batch_size or SEARCH_CONFIG["batch_size"]
+        self.flush_interval = flush_interval or SEARCH_CONFIG["flush_interval"]
+        self.queue = queue.Queue()
+        self._stopping = threading.Event()
+
+    def enqueue(self, file_path, filename, pages):
+        """
+        Ajoute un document à indexer
+
+        Args:
+            file_path (str): Fichier source (sert au calcul de l'empreinte)
+            filename (str): Nom d'origine du fichier
+            pages (list): Texte de chaque page
+        """
+        self.queue.put((file_path, filename, pages))
+
+    def run(self):
+        connection = connect(self.db_path)
+        last_purge = None
+        try:
+            while not (self._stopping.is_set() and self.queue.empty()):
+                if SEARCH_CONFIG["retention"] and (
+                        last_purge is None or time.monotonic() - last_purge >= SEARCH_CONFIG["purge_interval"]):
+                    last_purge = time.monotonic()
+                    try:
+                        purge_expired(connection)
+                    except Exception as e:
+                        logger.error(f"Erreur lors de la purge de l'index: {str(e)}")
+                batch = self._next_batch()
+                if batch:
+                    try:
+                        self._write_batch(connection, batch)
+                    except Exception as e:
+                        logger.error(f"Erreur lors de l'indexation de {len(batch)} document(s): {str(e)}")
+        finally:
+            connection.close()
+
+    def _next_batch(self):
+        """
+        Attend un premier document, puis complète le lot jusqu'à batch_size documents ou
+        flush_interval secondes après le premier
+        """
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.flush_interval))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, connection, batch):
+        _write_documents(connection, batch)
+
+    def stop(self, timeout=10):
+        """
+        Arrête le thread après avoir écrit les documents en attente
+        """
+        self._stopping.set()
+        self.join(timeout)
+
+
+def _write_documents(connection, batch):
+    """
+    Écrit un lot de documents (file_path, filename, pages) en une transaction, sans
+    réindexer les documents déjà présents
+    """
+    documents = []
+    for file_path, filename, pages in batch:
+        try:
+            doc_hash = file_sha256(file_path)
+        except OSError as e:
+            logger.warning(f"Document non indexé ({filename}): {str(e)}")
+            continue
+        documents.append((doc_hash, filename, pages))
+
+    indexed_at = datetime.now().isoformat()
+    with connection:
+        known = set()
+        hashes = list({doc_hash for doc_hash, _, _ in documents})
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = connection.execute(
+                f"SELECT doc_hash FROM documents WHERE doc_hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(row[0] for row in rows)
+
+        new_documents = []
+        page_rows = []
+        for doc_hash, filename, pages in documents:
+            if doc_hash in known:
+                continue
+            known.add(doc_hash)
+            new_documents.append((doc_hash, filename, len(pages), indexed_at))
+            page_rows.extend(
+                (text, doc_hash, page_num) for page_num, text in enumerate(pages, start=1) if text.strip()
+            )
+
+        connection.executemany(
+            "INSERT INTO documents (doc_hash, filename, pages, indexed_at) VALUES (?, ?, ?, ?)", new_documents
+        )
+        connection.executemany("INSERT INTO pages_fts (text, doc_hash, page) VALUES (?, ?, ?)", page_rows)
+
+    if new_documents:
+        logger.info(f"{len(new_documents)} document(s) indexé(s), {len(page_rows)} page(s)")
+
+
+def purge_expired(connection, retention=None):
+    """
+    Retire de l'index les documents indexés depuis plus de retention secondes
+
+    Args:
+        connection (sqlite3.Connection): Connexion à la base de l'index
+        retention (float): Durée de conservation (secondes), configurée par défaut
+
+    Returns:
+        int: Nombre de documents retirés
+    """
+    retention = SEARCH_CONFIG["retention"] if retention is None else retention
+    limit = (datetime.now() - timedelta(seconds=retention)).isoformat()
+    with connection:
+        hashes = [row[0] for row in connection.execute(
+            "SELECT doc_hash FROM documents WHERE indexed_at < ?", (limit,)
+        )]
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            connection.execute(f"DELETE FROM pages_fts WHERE doc_hash IN ({placeholders})", chunk)
+            connection.execute(f"DELETE FROM documents WHERE doc_hash IN ({placeholders})", chunk)
+    if hashes:
+        logger.info(f"{len(hashes)} document(s) expiré(s) retiré(s) de l'index")
+    return len(hashes)
+
+
+def index_document(file_path, filename, pages, wait=False):
+    """
+    Planifie l'indexation d'un document extrait (par défaut sans attendre l'écriture)
+
+    Args:
+        file_path (str): Fichier source
+        filename (str): Nom d'origine du fichier
+        pages (list): Texte de chaque page
+        wait (bool): Écrire le document immédiatement, dans le thread appelant (tâches
+            exécutées dans un worker, qui peut être arrêté avant l'écriture du lot)
+    """
+    global _indexer
+    if not SEARCH_CONFIG["enabled"]:
+        return
+    if wait:
+        try:
+            connection = connect()
+            try:
+                _write_documents(connection, [(file_path, filename, pages)])
+            finally:
+                connection.close()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'indexation de {filename}: {str(e)}")
+        return
+    if _indexer is None:
+        with _indexer_lock:
+            if _indexer is None:
+                _indexer = SearchIndexer()
+                _indexer.start()
+    _indexer.enqueue(file_path, filename, pages)
+
+
+def stop_indexer():
+    """
+    Arrête le thread d'indexation s'il a été démarré
+    """
+    global _indexer
+    with _indexer_lock:
+        if _indexer is not None:
+            _indexer.stop()
+            _indexer = None
+
+
+def _to_fts_query(query):
+    """
+    Convertit une saisie libre en requête FTS5 (chaque mot est cité, tous sont requis)
+    """
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+def search(query, limit=20, offset=0, db_path=None):
+    """
+    Recherche les pages contenant tous les mots de la requête
+
+    Args:
+        query (str): Mots recherchés
+        limit (int): Nombre maximal de résultats
+        offset (int): Nombre de résultats à sauter
+        db_path (str): Base de l'index (configurée par défaut)
+
+    Returns:
+        list: Résultats classés par pertinence (bm25), avec un extrait de la page
+    """
+    fts_query = _to_fts_query(query)
+    if not fts_query:
+        return []
+
+    connection = connect(db_path)
+    try:
+        rows = connection.execute(
+            """
+            SELECT pages_fts.doc_hash, documents.filename, pages_fts.page,
+                   snippet(pages_fts, 0, '[', ']', '…', ?), bm25(pages_fts) AS score
+            FROM pages_fts JOIN documents ON documents.doc_hash = pages_fts.doc_hash
+            WHERE pages_fts MATCH ?
+            ORDER BY score
+            LIMIT ? OFFSET ?
+            """,
+            (SEARCH_CONFIG["snippet_tokens"], fts_query, limit, offset),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    return [
+        {"doc_hash": doc_hash, "filename": filename, "page": page, "snippet": snippet, "score": -score}
+        for doc_hash, filename, page, snippet, score in rows
+    ]
@@ -0,0 +1,106 @@
+"""
+Cache clé-valeur partagé entre les workers du serveur (SQLite)
+
+Chaque worker a son propre processus : un cache en mémoire y serait recalculé autant de
+fois qu'il y a de workers. Les valeurs sont sérialisées en JSON, avec une durée de vie.
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+
+from backend.app.config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Probabilité de purger les entrées expirées lors d'une écriture
+_PRUNE_PROBABILITY = 0.01
+
+
+class SharedCache:
+    """
+    Cache clé-valeur adossé à une base SQLite, une connexion par thread
+    """
+
+    def __init__(self, db_path=None, default_ttl=None):
+        self.db_path = str(db_path or CACHE_CONFIG["db_path"])
+        self.default_ttl = default_ttl or CACHE_CONFIG["default_ttl"]
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        # Une connexion héritée d'un fork appartient au processus parent
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key, default=None):
+        """
+        Renvoie la valeur associée à la clé, ou default si elle est absente ou expirée
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Lecture du cache partagé impossible: {str(e)}")
+            return default
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value, ttl=None):
+        """
+        Associe une valeur (sérialisable en JSON) à la clé
+        """
+        expires_at = time.time() + (ttl or self.default_ttl)
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                if random.random() < _PRUNE_PROBABILITY:
+                    connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Écriture du cache partagé impossible: {str(e)}")
+
+    def delete(self, key):
+        """
+        Supprime une entrée
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Renvoie le cache partagé de l'application, créé au premier appel
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SharedCache()
+    return _cache
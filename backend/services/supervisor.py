@@ -0,0 +1,406 @@
+"""
+Workers supervisés pour les traitements lourds du service de documents
+
+Chaque appel s'exécute dans un processus worker dédié (lancé en mode "spawn"), sous
+surveillance :
+- délai maximal par tâche : un worker bloqué (PDF malformé) est tué puis remplacé ;
+- mémoire maximale (RSS) par tâche, vérifiée périodiquement : au-delà, le worker est tué ;
+- un worker qui s'arrête brutalement (plantage de fitz) est remplacé ;
+- chaque worker est recyclé après un nombre maximal de tâches, ce qui rend au système la
+  mémoire conservée par fitz et pandas.
+
+Un worker peut faire exécuter une partie de sa tâche par le processus parent (call_in_parent) :
+l'OCR des pages rendues dans le worker est ainsi réparti dans le pool OCR du parent, plutôt
+que traité page par page dans le worker.
+
+Les arrêts forcés et les recyclages sont comptés dans les métriques (/metrics).
+"""
+import os
+import time
+import queue
+import signal
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from backend.app.config import SUPERVISOR_CONFIG
+from backend.utils.metrics import counter
+from backend.utils.profiling import get_current_session, profiled_call
+
+logger = logging.getLogger(__name__)
+
+KILLED = counter("supervisor_worker_kills_total", "Workers supervisés tués", ["reason"])
+RECYCLED = counter("supervisor_worker_recycles_total", "Workers supervisés recyclés après max_tasks tâches")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Canal vers le processus parent, dans un worker supervisé (None ailleurs)
+_parent_conn = None
+
+
+class WorkerError(Exception):
+    """
+    Tâche interrompue par le superviseur
+    """
+
+
+class WorkerTimeout(WorkerError):
+    pass
+
+
+class WorkerMemoryExceeded(WorkerError):
+    pass
+
+
+class WorkerCrashed(WorkerError):
+    pass
+
+
+def _worker_main(conn):
+    """
+    Boucle d'un worker : reçoit (fonction, args, kwargs), renvoie le résultat ou l'exception
+    """
+    global _parent_conn
+    _parent_conn = conn
+    # L'interruption (Ctrl+C) est gérée par le processus parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        func, args, kwargs = message
+        try:
+            # Le dictionnaire stats éventuel est renvoyé : ses modifications ne traversent pas le processus
+            reply = ("ok", func(*args, **kwargs), kwargs.get("stats"))
+        except Exception as e:
+            reply = ("error", e, None)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Résultat ou exception impossible à sérialiser
+            conn.send(("error", Exception(str(reply[1]) if reply[0] == "error" else str(e)), None))
+
+
+def in_supervised_worker():
+    """
+    Indique si le processus courant est un worker supervisé
+    """
+    return _parent_conn is not None
+
+
+def call_in_parent(func, *args, **kwargs):
+    """
+    Exécute func(*args, **kwargs) dans le processus parent et attend son résultat
+
+    Depuis un worker supervisé uniquement : la tâche en cours reste soumise à son délai
+    et à sa limite de mémoire pendant l'appel.
+
+    Args:
+        func: Fonction à appeler (définie au niveau d'un module)
+        *args, **kwargs: Arguments de la fonction
+
+    Returns:
+        Le résultat de la fonction
+
+    Raises:
+        Exception: L'exception levée par la fonction dans le processus parent
+    """
+    _parent_conn.send(("call", func, args, kwargs))
+    status, result = _parent_conn.recv()
+    if status == "error":
+        raise result
+    return result
+
+
+def _serve_call(conn, func, args, kwargs):
+    """
+    Exécute un appel demandé par un worker (thread du processus parent) et lui renvoie le résultat
+    """
+    try:
+        reply = ("ok", func(*args, **kwargs))
+    except Exception as e:
+        reply = ("error", e)
+    try:
+        try:
+            conn.send(reply)
+        except (OSError, EOFError):
+            raise
+        except Exception as e:
+            # Résultat ou exception impossible à sérialiser (rien n'a été envoyé)
+            conn.send(("error", Exception(str(reply[1]) if reply[0] == "error" else str(e))))
+    except (OSError, EOFError):
+        # Worker arrêté entre-temps (délai, mémoire) : le résultat n'a plus de destinataire
+        pass
+
+
+class _Worker:
+    """
+    Processus worker et son canal de communication
+    """
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def rss(self):
+        """
+        Mémoire résidente du worker (octets), None si elle ne peut être lue
+        """
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self, timeout=5):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class WorkerSupervisor:
+    """
+    Ensemble de workers supervisés ; les appels attendent qu'un worker soit libre
+    """
+
+    def __init__(self, workers=None, timeout=None, max_memory=None, max_tasks=None, check_interval=None):
+        self.workers = workers or SUPERVISOR_CONFIG["workers"]
+        self.timeout = timeout or SUPERVISOR_CONFIG["timeout"]
+        self.max_memory = SUPERVISOR_CONFIG["max_memory"] if max_memory is None else max_memory
+        self.max_tasks = max_tasks or SUPERVISOR_CONFIG["max_tasks"]
+        self.check_interval = check_interval or SUPERVISOR_CONFIG["check_interval"]
+        self._context = multiprocessing.get_context("spawn")
+        # Emplacements libres : un worker inactif, ou None (worker à démarrer à la demande)
+        self._slots = queue.LifoQueue()
+        for _ in range(self.workers):
+            self._slots.put(None)
+        self._closed = False
+
+    def _acquire(self):
+        worker = self._slots.get()
+        if worker is not None and not worker.process.is_alive():
+            # Worker arrêté pendant son inactivité (tué par le système...)
+            KILLED.inc(reason="crash")
+            worker.conn.close()
+            worker = None
+        if worker is None:
+            try:
+                worker = _Worker(self._context)
+            except BaseException:
+                self._slots.put(None)
+                raise
+        return worker
+
+    def _release(self, worker):
+        if self._closed and worker is not None:
+            worker.stop()
+            worker = None
+        self._slots.put(worker)
+
+    def _abort(self, worker, reason, error):
+        KILLED.inc(reason=reason)
+        logger.error(f"Worker {worker.process.pid} arrêté ({reason}): {str(error)}")
+        worker.kill()
+        raise error
+
+    def _wait(self, worker, deadline, timeout):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._abort(worker, "timeout", WorkerTimeout(f"Traitement interrompu: délai de {timeout:g} s dépassé"))
+            if worker.conn.poll(min(self.check_interval, remaining)):
+                return
+            if self.max_memory:
+                rss = worker.rss()
+                if rss is not None and rss > self.max_memory:
+                    self._abort(worker, "memory", WorkerMemoryExceeded(
+                        f"Traitement interrompu: mémoire maximale dépassée ({rss // 2**20} Mo > "
+                        f"{self.max_memory // 2**20} Mo)"))
+            if not worker.process.is_alive() and not worker.conn.poll(0):
+                self._abort(worker, "crash", WorkerCrashed(
+                    f"Traitement interrompu: arrêt inattendu du worker (code {worker.process.exitcode})"))
+
+    def run(self, func, args=(), kwargs=None, timeout=None):
+        """
+        Exécute func(*args, **kwargs) dans un worker supervisé
+
+        Si kwargs contient un dictionnaire stats, il est complété avec celui du worker.
+
+        Args:
+            func: Fonction à appeler (définie au niveau d'un module, pour être transmise au worker)
+            args (tuple): Arguments positionnels
+            kwargs (dict): Arguments nommés
+            timeout (float): Délai maximal (secondes), délai configuré par défaut
+
+        Returns:
+            Le résultat de la fonction
+
+        Raises:
+            WorkerTimeout, WorkerMemoryExceeded, WorkerCrashed: Si le worker a été arrêté
+            Exception: L'exception levée par la fonction
+        """
+        kwargs = kwargs or {}
+        timeout = timeout or self.timeout
+        worker = self._acquire()
+        try:
+            try:
+                deadline = time.monotonic() + timeout
+                worker.conn.send((func, args, kwargs))
+                while True:
+                    self._wait(worker, deadline, timeout)
+                    message = worker.conn.recv()
+                    if message[0] != "call":
+                        break
+                    # Appel demandé par le worker : exécuté dans un thread, la surveillance continue
+                    threading.Thread(target=_serve_call, args=(worker.conn, *message[1:]),
+                                     name="supervised-call", daemon=True).start()
+                status, result, stats = message
+            except (EOFError, OSError) as e:
+                self._abort(worker, "crash", WorkerCrashed(f"Traitement interrompu: arrêt inattendu du worker ({str(e)})"))
+        except WorkerError:
+            worker = None
+            raise
+        except BaseException:
+            # Appel abandonné en cours de tâche : le worker est encore occupé
+            worker.kill()
+            worker = None
+            raise
+        finally:
+            if worker is not None:
+                worker.tasks += 1
+                if worker.tasks >= self.max_tasks:
+                    RECYCLED.inc()
+                    logger.info(f"Recyclage du worker {worker.process.pid} après {worker.tasks} tâches")
+                    worker.stop()
+                    worker = None
+            self._release(worker)
+
+        if status == "error":
+            raise result
+        if stats is not None and kwargs.get("stats") is not None:
+            kwargs["stats"].update(stats)
+        return result
+
+    def shutdown(self):
+        """
+        Arrête les workers inactifs ; les workers occupés s'arrêtent à la fin de leur tâche
+        """
+        self._closed = True
+        while True:
+            try:
+                worker = self._slots.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.stop()
+
+
+class SupervisedExecutor(Executor):
+    """
+    Interface Executor (submit, shutdown) de workers supervisés
+
+    Chaque tâche soumise attend un worker libre dans un thread du processus courant,
+    puis s'exécute sous la surveillance du superviseur (délai, mémoire, recyclage) ;
+    utilisable avec loop.run_in_executor.
+    """
+
+    def __init__(self, supervisor):
+        self.supervisor = supervisor
+        # Nombre de tâches exécutées en même temps (lu par les appelants qui bornent leurs envois)
+        self._max_workers = supervisor.workers
+        self._threads = ThreadPoolExecutor(max_workers=supervisor.workers, thread_name_prefix="supervised")
+
+    def submit(self, fn, /, *args, **kwargs):
+        return self.submit_task(fn, args, kwargs)
+
+    def submit_task(self, fn, args=(), kwargs=None, timeout=None, on_start=None):
+        """
+        Planifie une tâche
+
+        Args:
+            fn: Fonction à appeler (définie au niveau d'un module)
+            args (tuple): Arguments positionnels
+            kwargs (dict): Arguments nommés
+            timeout (float): Délai maximal de la tâche (délai du superviseur par défaut)
+            on_start (callable): Appelé dans le processus courant lorsque la tâche démarre
+
+        Returns:
+            Future: Résultat de la tâche
+        """
+        def run():
+            if on_start is not None:
+                on_start()
+            return self.supervisor.run(fn, args, kwargs, timeout)
+        return self._threads.submit(run)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self.supervisor.shutdown()
+
+
+_supervisor = None
+_lock = threading.Lock()
+
+
+def get_supervisor():
+    """
+    Renvoie le superviseur partagé, créé au premier appel
+    """
+    global _supervisor
+    if _supervisor is None:
+        with _lock:
+            if _supervisor is None:
+                logger.info(f"Démarrage des workers supervisés ({SUPERVISOR_CONFIG['workers']} workers)")
+                _supervisor = WorkerSupervisor()
+    return _supervisor
+
+
+def shutdown_supervisor():
+    """
+    Arrête les workers supervisés s'ils ont été créés
+    """
+    global _supervisor
+    with _lock:
+        if _supervisor is not None:
+            logger.info("Arrêt des workers supervisés")
+            _supervisor.shutdown()
+            _supervisor = None
+
+
+def supervised_call(func, *args, **kwargs):
+    """
+    Appelle une fonction du service de documents dans un worker supervisé
+
+    Si la requête en cours est profilée, ou si la supervision est désactivée, la fonction
+    est appelée dans le processus courant (voir profiled_call). L'appel est bloquant :
+    depuis une route, l'exécuter avec run_in_threadpool.
+
+    Args:
+        func: Fonction à appeler
+        *args, **kwargs: Arguments de la fonction
+
+    Returns:
+        Le résultat de la fonction
+    """
+    if not SUPERVISOR_CONFIG["enabled"] or get_current_session() is not None:
+        return profiled_call(func, *args, **kwargs)
+    return get_supervisor().run(func, args, kwargs)
@@ -0,0 +1,163 @@
+"""
+Extraction des tableaux des documents PDF (page.find_tables de PyMuPDF)
+
+Les pages sont réparties par lots dans le pool de processus ; chaque lot ouvre le
+document une fois. Avant la détection, coûteuse, les pages sans texte ou (stratégie
+"lines") sans trait ni rectangle sont écartées.
+
+find_tables s'appuie sur un état global du module fitz : la détection ne doit pas être
+exécutée dans plusieurs threads d'un même processus.
+"""
+import io
+import csv
+import json
+import asyncio
+import logging
+
+from backend.app.config import TABLES_CONFIG
+from backend.services.loader import lazy_module
+
+fitz = lazy_module("fitz")  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("lines", "text")
+
+# Éléments de tracé pouvant former les filets d'un tableau : ligne, rectangle, quadrilatère
+_RULING_ITEMS = ("l", "re", "qu")
+
+
+def page_may_contain_tables(page, strategy="lines"):
+    """
+    Test rapide : la page peut-elle contenir un tableau ?
+
+    Args:
+        page (fitz.Page): Page PDF
+        strategy (str): Stratégie de détection ("lines" : tableaux à filets, "text" : alignement du texte)
+
+    Returns:
+        bool: False si la page n'a pas de texte, ou pas de filets avec la stratégie "lines"
+    """
+    if not page.get_text("blocks", flags=fitz.TEXTFLAGS_TEXT):
+        return False
+    if strategy == "lines":
+        return any(item[0] in _RULING_ITEMS for path in page.get_cdrawings() for item in path["items"])
+    return True
+
+
+def extract_tables_from_pages(file_path, page_numbers, strategy="lines"):
+    """
+    Extrait les tableaux d'un lot de pages (exécuté dans un worker)
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        page_numbers (list): Numéros des pages (à partir de 0)
+        strategy (str): Stratégie de détection
+
+    Returns:
+        tuple: (liste des tableaux {page, table, bbox, rows}, nombre de pages écartées)
+    """
+    tables = []
+    skipped = 0
+    with fitz.open(file_path) as doc:
+        for page_number in page_numbers:
+            page = doc[page_number]
+            if not page_may_contain_tables(page, strategy):
+                skipped += 1
+                continue
+            for index, table in enumerate(page.find_tables(strategy=strategy).tables):
+                rows = [["" if cell is None else cell for cell in row] for row in table.extract()]
+                if not rows:
+                    continue
+                tables.append({
+                    "page": page_number + 1,
+                    "table": index + 1,
+                    "bbox": [round(value, 2) for value in table.bbox],
+                    "rows": rows,
+                })
+    return tables, skipped
+
+
+def _chunks(page_count, chunk_pages):
+    return [list(range(start, min(start + chunk_pages, page_count))) for start in range(0, page_count, chunk_pages)]
+
+
+async def iter_pdf_tables(file_path, strategy="lines", executor=None, chunk_pages=None):
+    """
+    Renvoie au fil de l'eau les tableaux d'un PDF, dans l'ordre des pages
+
+    Les lots de pages sont traités en parallèle dans le pool de processus ; au plus
+    2 lots par worker sont planifiés à la fois.
+
+    Args:
+        file_path (str): Chemin vers le fichier PDF
+        strategy (str): Stratégie de détection ("lines" ou "text")
+        executor (Executor): Pool d'exécution (pool de processus partagé par défaut)
+        chunk_pages (int): Nombre de pages par lot (configuré par défaut)
+
+    Yields:
+        dict: Tableau {page, table, bbox, rows}
+    """
+    from backend.services.worker_pool import get_executor
+
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Stratégie inconnue: {strategy}")
+    executor = executor or get_executor()
+    chunk_pages = chunk_pages or TABLES_CONFIG["chunk_pages"]
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+
+    loop = asyncio.get_running_loop()
+    chunks = _chunks(page_count, chunk_pages)
+    window = max(2, 2 * getattr(executor, "_max_workers", 1))
+    pending = []
+    skipped = 0
+    try:
+        for chunk in chunks:
+            pending.append(loop.run_in_executor(executor, extract_tables_from_pages, file_path, chunk, strategy))
+            if len(pending) < window:
+                continue
+            tables, chunk_skipped = await pending.pop(0)
+            skipped += chunk_skipped
+            for table in tables:
+                yield table
+        while pending:
+            tables, chunk_skipped = await pending.pop(0)
+            skipped += chunk_skipped
+            for table in tables:
+                yield table
+    finally:
+        # Client déconnecté : abandonner les lots en attente
+        for future in pending:
+            future.cancel()
+    logger.info(f"Tableaux extraits de {file_path}: {page_count - skipped} page(s) analysée(s) sur {page_count}")
+
+
+def table_to_csv(table, delimiter=","):
+    """
+    Met en forme un tableau en lignes CSV : page, numéro du tableau, boîte englobante
+    ("x0 y0 x1 y1"), puis les cellules
+
+    Returns:
+        str: Lignes CSV
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+    bbox = " ".join(str(value) for value in table["bbox"])
+    for row in table["rows"]:
+        writer.writerow([table["page"], table["table"], bbox] + row)
+    return buffer.getvalue()
+
+
+def table_to_ndjson(table):
+    """
+    Met en forme un tableau en lignes NDJSON : une ligne par rangée
+
+    Returns:
+        str: Lignes NDJSON
+    """
+    return "".join(
+        json.dumps({"page": table["page"], "table": table["table"], "bbox": table["bbox"], "row": index,
+                    "cells": row}, ensure_ascii=False) + "\n"
+        for index, row in enumerate(table["rows"])
+    )
@@ -0,0 +1,516 @@
+"""
+Téléchargements reprenables par morceaux (protocole inspiré de tus)
+
+Un téléchargement est créé avec sa taille totale ; le fichier est alloué d'emblée et
+chaque morceau est écrit à sa position (pwrite), ce qui permet d'envoyer les morceaux
+dans le désordre ou en parallèle et de reprendre après une coupure. Un morceau est d'abord
+reçu dans un fichier intermédiaire et son empreinte SHA-256 calculée : il n'est écrit à sa
+position qu'une fois l'empreinte vérifiée, un morceau refusé ne modifie donc pas le fichier.
+L'empreinte SHA-256 du fichier entier est calculée au fil de la réception : chaque processus
+avance la sienne sur la partie reçue sans trou, hors du verrou ; la finalisation n'a plus qu'à
+lire la fin du fichier (ou tout le fichier si le morceau a été reçu par un autre processus).
+
+Fichiers d'un téléchargement <id> dans UPLOAD_CONFIG["dir"] :
+- <id>.part : contenu en cours de réception ;
+- <id>.<jeton>.chunk : morceau en cours de réception, avant vérification ;
+- <id>.json : métadonnées et morceaux reçus ;
+- <id>.lock : verrou des métadonnées (partagé entre les processus).
+"""
+import os
+import re
+import json
+import time
+import uuid
+import base64
+import hashlib
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from backend.app.config import UPLOAD_CONFIG, UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Verrous par téléchargement (threads d'un même processus) et empreintes en cours de calcul
+_registry_lock = threading.Lock()
+_thread_locks = {}
+_content_hashes = {}
+
+
+class UploadNotFound(Exception):
+    """
+    Le téléchargement demandé n'existe pas (ou a expiré)
+    """
+
+
+class UploadError(Exception):
+    """
+    Requête invalide pour l'état du téléchargement (position, taille, empreinte...)
+    """
+
+
+class UploadClosed(UploadError):
+    """
+    Le téléchargement n'accepte plus de morceaux (finalisé ou en cours de finalisation)
+    """
+
+
+class ChecksumMismatch(UploadError):
+    """
+    L'empreinte d'un morceau ne correspond pas à celle annoncée par le client
+    """
+
+
+def _paths(upload_id):
+    if not _UPLOAD_ID_PATTERN.match(upload_id or ""):
+        raise UploadNotFound(upload_id)
+    base = os.path.join(UPLOAD_CONFIG["dir"], upload_id)
+    return base + ".part", base + ".json", base + ".lock"
+
+
+class _MetaLock:
+    """
+    Verrou exclusif des métadonnées d'un téléchargement (threads et processus)
+    """
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.handle = None
+        with _registry_lock:
+            self.thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            self.handle = open(self.lock_path, "a")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+        self.thread_lock.release()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadNotFound(os.path.basename(meta_path))
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def _received_ranges(meta):
+    """
+    Fusionne les morceaux reçus en intervalles disjoints triés
+    """
+    ranges = []
+    for start, (end, _) in sorted((int(offset), chunk) for offset, chunk in meta["chunks"].items()):
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def current_offset(meta):
+    """
+    Renvoie la position jusqu'à laquelle le fichier a été reçu sans trou
+    """
+    ranges = _received_ranges(meta)
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+class _ContentHash:
+    """
+    Empreinte SHA-256 du début du fichier, jusqu'à position (propre au processus)
+    """
+
+    def __init__(self, epoch):
+        self.lock = threading.Lock()
+        self.reset(epoch)
+
+    def reset(self, epoch):
+        self.epoch = epoch
+        self.position = 0
+        self.digest = hashlib.sha256()
+
+
+def _advance_content_hash(upload_id, path, end):
+    """
+    Avance l'empreinte du fichier jusqu'à end en lisant les octets reçus depuis le dernier appel
+
+    Appelée hors du verrou des métadonnées : un morceau qui recouvre des octets déjà reçus
+    incrémente meta["epoch"] avant d'être écrit, l'empreinte est alors recalculée depuis le début.
+
+    Returns:
+        _ContentHash: Empreinte à jour, ou None si un morceau a été réécrit pendant la lecture
+    """
+    _, meta_path, _ = _paths(upload_id)
+    with _registry_lock:
+        state = _content_hashes.get(upload_id)
+        if state is None:
+            state = _content_hashes[upload_id] = _ContentHash(0)
+
+    with state.lock:
+        epoch = _read_meta(meta_path).get("epoch", 0)
+        if state.epoch != epoch:
+            state.reset(epoch)
+        if state.position >= end:
+            return state
+
+        digest = state.digest.copy()
+        with open(path, "rb") as f:
+            f.seek(state.position)
+            remaining = end - state.position
+            while remaining > 0:
+                data = f.read(min(remaining, UPLOAD_CONFIG["write_buffer"]))
+                if not data:
+                    raise UploadError("Fichier tronqué pendant le calcul de l'empreinte")
+                digest.update(data)
+                remaining -= len(data)
+
+        if _read_meta(meta_path).get("epoch", 0) != epoch:
+            return None
+        state.digest, state.position = digest, end
+        return state
+
+
+def _forget_upload(upload_id, lock_path):
+    with _registry_lock:
+        _content_hashes.pop(upload_id, None)
+        _thread_locks.pop(lock_path, None)
+
+
+def clean_expired_uploads():
+    """
+    Supprime les téléchargements non finalisés plus anciens que UPLOAD_CONFIG["expiration"]
+    et les fichiers finalisés depuis plus de UPLOAD_CONFIG["final_expiration"]
+    """
+    upload_dir = UPLOAD_CONFIG["dir"]
+    if not os.path.isdir(upload_dir):
+        return
+    now = time.time()
+    limit = now - UPLOAD_CONFIG["expiration"]
+    for name in os.listdir(upload_dir):
+        if name.endswith(".chunk"):
+            # Morceau abandonné (processus interrompu pendant la réception)
+            path = os.path.join(upload_dir, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+            continue
+        if not name.endswith(".json"):
+            continue
+        upload_id = name[:-5]
+        try:
+            meta = get_upload(upload_id)
+            if meta["status"] == "final":
+                expired = meta["finalized_at"] < now - UPLOAD_CONFIG["final_expiration"]
+            else:
+                expired = meta["created_at"] < limit
+            if expired:
+                delete_upload(upload_id)
+                logger.info(f"Téléchargement expiré supprimé: {upload_id}")
+        except (UploadNotFound, OSError, ValueError):
+            continue
+
+
+def create_upload(filename, length):
+    """
+    Crée un téléchargement reprenable
+
+    Args:
+        filename (str): Nom d'origine du fichier
+        length (int): Taille totale du fichier (octets)
+
+    Returns:
+        dict: Métadonnées du téléchargement
+
+    Raises:
+        UploadError: Si la taille ou le nom de fichier est invalide
+    """
+    if length < 0 or length > UPLOAD_CONFIG["max_size"]:
+        raise UploadError(f"Taille invalide: {length} (maximum {UPLOAD_CONFIG['max_size']} octets)")
+    filename = os.path.basename(filename or "")
+    if not filename:
+        raise UploadError("Nom de fichier manquant")
+
+    clean_expired_uploads()
+    os.makedirs(UPLOAD_CONFIG["dir"], exist_ok=True)
+
+    upload_id = uuid.uuid4().hex
+    part_path, meta_path, _ = _paths(upload_id)
+    with open(part_path, "wb") as f:
+        f.truncate(length)
+
+    meta = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "length": length,
+        "created_at": time.time(),
+        "status": "pending",
+        "chunks": {},
+        "epoch": 0,
+    }
+    _write_meta(meta_path, meta)
+    logger.info(f"Téléchargement créé: {upload_id} ({filename}, {length} octets)")
+    return meta
+
+
+def get_upload(upload_id):
+    """
+    Renvoie les métadonnées d'un téléchargement
+
+    Raises:
+        UploadNotFound: Si le téléchargement n'existe pas
+    """
+    _, meta_path, _ = _paths(upload_id)
+    return _read_meta(meta_path)
+
+
+class ChunkWriter:
+    """
+    Reçoit un morceau dans un fichier intermédiaire et calcule son empreinte
+
+    Le morceau n'est écrit à sa position dans le fichier qu'à l'enregistrement (commit),
+    une fois son empreinte vérifiée.
+    """
+
+    def __init__(self, upload_id, offset):
+        meta = get_upload(upload_id)
+        if meta["status"] != "pending":
+            raise UploadClosed("Le téléchargement est déjà finalisé")
+        if offset < 0 or offset > meta["length"]:
+            raise UploadError(f"Position invalide: {offset}")
+
+        self.upload_id = upload_id
+        self.offset = offset
+        self.position = offset
+        self.length = meta["length"]
+        self.digest = hashlib.sha256()
+        self.part_path, _, _ = _paths(upload_id)
+        self.staging_path = os.path.join(UPLOAD_CONFIG["dir"], f"{upload_id}.{uuid.uuid4().hex}.chunk")
+        self.staging = open(self.staging_path, "w+b")
+
+    def write(self, data):
+        """
+        Reçoit une partie du morceau, à la suite de la précédente
+
+        Raises:
+            UploadError: Si le morceau dépasse la taille annoncée du fichier
+        """
+        if self.position + len(data) > self.length:
+            raise UploadError("Le morceau dépasse la taille annoncée du fichier")
+        self.staging.write(data)
+        self.position += len(data)
+        self.digest.update(data)
+
+    def _copy_to_part(self):
+        """
+        Écrit le morceau reçu à sa position dans le fichier
+        """
+        self.staging.flush()
+        self.staging.seek(0)
+        fd = os.open(self.part_path, os.O_WRONLY)
+        try:
+            position = self.offset
+            for data in iter(lambda: self.staging.read(UPLOAD_CONFIG["write_buffer"]), b""):
+                view = memoryview(data)
+                while view:
+                    written = os.pwrite(fd, view, position)
+                    position += written
+                    view = view[written:]
+        finally:
+            os.close(fd)
+
+    def commit(self, expected_checksum=None):
+        """
+        Vérifie le morceau entièrement reçu, puis l'écrit dans le fichier et l'enregistre
+
+        Args:
+            expected_checksum (bytes): Empreinte SHA-256 annoncée par le client (optionnelle)
+
+        Returns:
+            tuple: (position reçue sans trou, empreinte hexadécimale du morceau)
+
+        Raises:
+            ChecksumMismatch: Si l'empreinte ne correspond pas (le fichier n'est pas modifié)
+            UploadClosed: Si le téléchargement a été finalisé pendant la réception
+            UploadNotFound: S'il a été abandonné pendant la réception
+        """
+        try:
+            if expected_checksum is not None and self.digest.digest() != expected_checksum:
+                raise ChecksumMismatch("L'empreinte du morceau ne correspond pas")
+
+            chunk_hash = self.digest.hexdigest()
+            _, meta_path, lock_path = _paths(self.upload_id)
+            # L'écriture a lieu sous le verrou : la finalisation ne peut déplacer le fichier entre-temps
+            with _MetaLock(lock_path):
+                meta = _read_meta(meta_path)
+                if meta["status"] != "pending":
+                    raise UploadClosed("Le téléchargement est déjà finalisé")
+                if self.position > self.offset:
+                    overlaps = any(start < self.position and self.offset < end
+                                   for start, end in _received_ranges(meta))
+                    if overlaps:
+                        # Des octets déjà reçus sont réécrits : les empreintes en cours sont périmées
+                        meta["epoch"] = meta.get("epoch", 0) + 1
+                        _write_meta(meta_path, meta)
+                    self._copy_to_part()
+                    meta["chunks"][str(self.offset)] = [self.position, chunk_hash]
+                    _write_meta(meta_path, meta)
+        finally:
+            self.close()
+
+        offset = current_offset(meta)
+        try:
+            _advance_content_hash(self.upload_id, self.part_path, offset)
+        except (OSError, UploadError) as e:
+            # Finalisé ou abandonné entre-temps : l'empreinte sera calculée (ou pas) par la finalisation
+            logger.debug(f"Empreinte du téléchargement {self.upload_id} non avancée: {str(e)}")
+        return offset, chunk_hash
+
+    def close(self):
+        """
+        Supprime le fichier intermédiaire (morceau enregistré ou abandonné)
+        """
+        if self.staging is not None:
+            self.staging.close()
+            self.staging = None
+            try:
+                os.remove(self.staging_path)
+            except FileNotFoundError:
+                pass
+
+
+def finalize_upload(upload_id):
+    """
+    Finalise un téléchargement entièrement reçu : le fichier rejoint les fichiers téléchargés
+
+    Args:
+        upload_id (str): Identifiant du téléchargement
+
+    Returns:
+        dict: Métadonnées du téléchargement (chemin du fichier et empreinte)
+
+    Raises:
+        UploadNotFound: Si le téléchargement n'existe pas
+        UploadError: Si des morceaux manquent ou si une finalisation est déjà en cours
+    """
+    part_path, meta_path, lock_path = _paths(upload_id)
+    with _MetaLock(lock_path):
+        meta = _read_meta(meta_path)
+        if meta["status"] == "final":
+            return meta
+        if meta["status"] == "finalizing":
+            raise UploadError("Finalisation déjà en cours")
+
+        offset = current_offset(meta)
+        if offset < meta["length"]:
+            raise UploadError(f"Téléchargement incomplet: {offset}/{meta['length']} octets reçus")
+
+        # Plus aucun morceau n'est accepté : la fin de l'empreinte peut être calculée hors du verrou
+        meta["status"] = "finalizing"
+        _write_meta(meta_path, meta)
+
+    try:
+        state = _advance_content_hash(upload_id, part_path, meta["length"])
+        digest = "sha256:" + state.digest.hexdigest()
+    except BaseException:
+        with _MetaLock(lock_path):
+            meta = _read_meta(meta_path)
+            meta["status"] = "pending"
+            _write_meta(meta_path, meta)
+        raise
+
+    with _MetaLock(lock_path):
+        meta = _read_meta(meta_path)
+        os.makedirs(UPLOADS_DIR, exist_ok=True)
+        extension = os.path.splitext(meta["filename"])[1]
+        final_path = os.path.join(UPLOADS_DIR, f"{upload_id}{extension}")
+        os.replace(part_path, final_path)
+
+        meta.update({"status": "final", "path": final_path, "digest": digest, "finalized_at": time.time()})
+        _write_meta(meta_path, meta)
+    with _registry_lock:
+        _content_hashes.pop(upload_id, None)
+
+    logger.info(f"Téléchargement finalisé: {upload_id} ({digest})")
+    return meta
+
+
+def delete_upload(upload_id):
+    """
+    Abandonne un téléchargement et supprime ses fichiers
+    """
+    part_path, meta_path, lock_path = _paths(upload_id)
+    with _MetaLock(lock_path):
+        meta = _read_meta(meta_path)
+        for path in (part_path, meta.get("path") if meta["status"] == "final" else None, meta_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+    if os.path.exists(lock_path):
+        os.remove(lock_path)
+    _forget_upload(upload_id, lock_path)
+
+
+def resolve_upload(upload_id):
+    """
+    Renvoie le fichier d'un téléchargement finalisé
+
+    Args:
+        upload_id (str): Identifiant du téléchargement
+
+    Returns:
+        tuple: (chemin du fichier, nom d'origine)
+
+    Raises:
+        UploadNotFound: Si le téléchargement n'existe pas
+        UploadError: Si le téléchargement n'est pas finalisé
+    """
+    meta = get_upload(upload_id)
+    if meta["status"] != "final":
+        raise UploadError("Le téléchargement n'est pas finalisé")
+    if not os.path.exists(meta["path"]):
+        raise UploadNotFound(upload_id)
+    return meta["path"], meta["filename"]
+
+
+def parse_checksum_header(value):
+    """
+    Décode un en-tête Upload-Checksum ("sha256 <base64>")
+
+    Raises:
+        UploadError: Si l'algorithme n'est pas pris en charge ou la valeur invalide
+    """
+    try:
+        algorithm, encoded = value.strip().split(" ", 1)
+        if algorithm.lower() != "sha256":
+            raise UploadError(f"Algorithme d'empreinte non pris en charge: {algorithm}")
+        return base64.b64decode(encoded.strip(), validate=True)
+    except (ValueError, base64.binascii.Error):
+        raise UploadError("En-tête Upload-Checksum invalide")
+
+
+def encode_checksum(hex_digest):
+    """
+    Encode une empreinte hexadécimale au format de l'en-tête Upload-Checksum
+    """
+    return "sha256 " + base64.b64encode(bytes.fromhex(hex_digest)).decode("ascii")
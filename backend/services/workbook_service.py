@@ -0,0 +1,269 @@
+"""
+Extraction du texte des classeurs Excel (XLSX, XLS) feuille par feuille, en parallèle
+
+Les feuilles sélectionnées sont réparties en lots (WORKBOOK_CONFIG["sheets_per_task"])
+dans le pool de processus ; chaque worker ouvre le classeur en lecture seule pour ses
+feuilles. Les résultats sont renvoyés dès qu'un lot est terminé, chacun repéré par sa
+position dans la liste ordonnée des feuilles.
+
+La conversion en CSV (iter_sheets_csv) lit les feuilles ligne par ligne (openpyxl en
+lecture seule, xlrd à la demande) : la mémoire utilisée ne dépend pas du nombre de lignes.
+"""
+import io
+import re
+import csv
+import asyncio
+import fnmatch
+import logging
+import datetime
+
+from backend.app.config import WORKBOOK_CONFIG
+from backend.services.loader import lazy_module
+
+pd = lazy_module("pandas")
+openpyxl = lazy_module("openpyxl")
+xlrd = lazy_module("xlrd")
+
+logger = logging.getLogger(__name__)
+
+WORKBOOK_EXTENSIONS = ("xlsx", "xls")
+
+
+def list_sheets(file_path, extension):
+    """
+    Noms des feuilles d'un classeur, dans l'ordre du classeur
+
+    Args:
+        file_path (str): Chemin du classeur
+        extension (str): Extension du fichier ("xlsx" ou "xls")
+
+    Returns:
+        list: Noms des feuilles
+    """
+    if extension == "xlsx":
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        return book.sheet_names()
+    finally:
+        book.release_resources()
+
+
+def select_sheets(sheet_names, include=None, exclude=None):
+    """
+    Filtre les feuilles par nom (motifs de type shell acceptés : "2024-*", "Feuil?")
+
+    Args:
+        sheet_names (list): Noms des feuilles, dans l'ordre du classeur
+        include (list): Motifs des feuilles à retenir (toutes si vide)
+        exclude (list): Motifs des feuilles à écarter
+
+    Returns:
+        list: Noms retenus, dans l'ordre du classeur
+    """
+    def matches(name, patterns):
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+    return [
+        name for name in sheet_names
+        if (not include or matches(name, include)) and not matches(name, exclude or ())
+    ]
+
+
+def extract_sheet_texts(file_path, extension, sheet_names):
+    """
+    Extrait le texte de quelques feuilles d'un classeur (exécuté dans un worker)
+
+    Le classeur est ouvert une fois, en lecture seule, pour toutes les feuilles du lot.
+    Le texte est mis en forme comme par extract_text_from_xlsx et extract_text_from_xls.
+
+    Args:
+        file_path (str): Chemin du classeur
+        extension (str): Extension du fichier ("xlsx" ou "xls")
+        sheet_names (list): Feuilles à extraire
+
+    Returns:
+        list: (nom de la feuille, texte) pour chaque feuille ; texte vide pour une feuille vide
+    """
+    from backend.services.document_service import dataframe_to_text, xls_sheet_to_text, clean_text
+
+    results = []
+    if extension == "xlsx":
+        # Le lecteur openpyxl de pandas ouvre le classeur en lecture seule
+        with pd.ExcelFile(file_path, engine="openpyxl") as workbook:
+            for sheet_name in sheet_names:
+                text = dataframe_to_text(pd.read_excel(workbook, sheet_name=sheet_name))
+                results.append((sheet_name, clean_text(text or "")))
+        return results
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        for sheet_name in sheet_names:
+            text = xls_sheet_to_text(book.sheet_by_name(sheet_name))
+            results.append((sheet_name, clean_text(text or "")))
+            book.unload_sheet(sheet_name)
+    finally:
+        book.release_resources()
+    return results
+
+
+async def iter_workbook_sheets(file_path, extension, sheet_names, executor=None, sheets_per_task=None,
+                               concurrency=None):
+    """
+    Renvoie le texte des feuilles au fur et à mesure de leur extraction
+
+    Args:
+        file_path (str): Chemin du classeur
+        extension (str): Extension du fichier ("xlsx" ou "xls")
+        sheet_names (list): Feuilles à extraire, dans l'ordre du classeur (voir select_sheets)
+        executor (Executor): Pool d'exécution (pool de processus partagé par défaut)
+        sheets_per_task (int): Nombre de feuilles par lot (configuré par défaut)
+        concurrency (int): Nombre maximal de lots en cours (configuré par défaut)
+
+    Yields:
+        dict: {index, sheet, status, text} ou {index, sheet, status, error}, dans l'ordre de
+            fin de traitement ; index est la position de la feuille dans sheet_names
+    """
+    from backend.services.worker_pool import get_executor
+
+    executor = executor or get_executor()
+    sheets_per_task = sheets_per_task or WORKBOOK_CONFIG["sheets_per_task"]
+    concurrency = concurrency or WORKBOOK_CONFIG["concurrency"]
+    loop = asyncio.get_running_loop()
+    indexed = list(enumerate(sheet_names))
+    remaining = iter([indexed[start:start + sheets_per_task] for start in range(0, len(indexed), sheets_per_task)])
+    pending = {}
+
+    try:
+        while True:
+            for task in remaining:
+                future = loop.run_in_executor(executor, extract_sheet_texts, file_path, extension,
+                                              [name for _, name in task])
+                pending[future] = task
+                if len(pending) >= concurrency:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                try:
+                    texts = dict(future.result())
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction des feuilles {[name for _, name in task]}: {str(e)}")
+                    for index, name in task:
+                        yield {"index": index, "sheet": name, "status": "error", "error": str(e)}
+                    continue
+                for index, name in task:
+                    yield {"index": index, "sheet": name, "status": "ok", "text": texts[name]}
+    finally:
+        # Client déconnecté : abandonner les lots en attente
+        for future in pending:
+            future.cancel()
+
+
+# Taille des blocs CSV renvoyés (octets)
+_CSV_CHUNK_SIZE = 64 * 1024
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _xls_value(book, cell):
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        try:
+            return xlrd.xldate_as_datetime(cell.value, book.datemode)
+        except xlrd.xldate.XLDateError:
+            return cell.value
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(cell.value, "#ERR")
+    return cell.value
+
+
+def _iter_rows_csv(rows, delimiter):
+    """
+    Met en forme des lignes en CSV (UTF-8), par blocs d'environ _CSV_CHUNK_SIZE octets
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= _CSV_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_sheets_csv(file_path, extension, sheet_names, delimiter=","):
+    """
+    Convertit des feuilles en CSV, ligne par ligne
+
+    Le classeur est ouvert une fois ; chaque feuille est lue au moment où son contenu
+    est consommé (les feuilles doivent être consommées dans l'ordre).
+
+    Args:
+        file_path (str): Chemin du classeur
+        extension (str): Extension du fichier ("xlsx" ou "xls")
+        sheet_names (list): Feuilles à convertir
+        delimiter (str): Séparateur des colonnes
+
+    Yields:
+        tuple: (nom de la feuille, blocs d'octets du CSV)
+    """
+    if extension == "xlsx":
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet_name in sheet_names:
+                rows = workbook[sheet_name].iter_rows(values_only=True)
+                yield sheet_name, _iter_rows_csv(rows, delimiter)
+        finally:
+            workbook.close()
+        return
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        for sheet_name in sheet_names:
+            sheet = book.sheet_by_name(sheet_name)
+            rows = ([_xls_value(book, cell) for cell in sheet.row(row_idx)] for row_idx in range(sheet.nrows))
+            yield sheet_name, _iter_rows_csv(rows, delimiter)
+            book.unload_sheet(sheet_name)
+    finally:
+        book.release_resources()
+
+
+def csv_filenames(sheet_names):
+    """
+    Noms de fichiers CSV des feuilles (caractères interdits remplacés, doublons numérotés)
+
+    Returns:
+        dict: Nom de fichier pour chaque feuille
+    """
+    filenames = {}
+    used = set()
+    for sheet_name in sheet_names:
+        base = re.sub(r'[\\/:*?"<>|\x00-\x1f]', "_", sheet_name).strip(" .") or "feuille"
+        filename = f"{base}.csv"
+        counter = 2
+        while filename.lower() in used:
+            filename = f"{base}_{counter}.csv"
+            counter += 1
+        used.add(filename.lower())
+        filenames[sheet_name] = filename
+    return filenames
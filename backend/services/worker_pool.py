@@ -0,0 +1,50 @@
+"""
+Pool de processus partagé pour les traitements lourds du service de documents
+
+Les workers du pool sont supervisés (voir supervisor) : délai et mémoire maximaux par
+tâche, remplacement d'un worker bloqué ou arrêté brutalement, recyclage après
+max_tasks tâches. Ils sont distincts des workers des appels directs des routes
+(supervised_call), qu'un lot ou une tâche asynchrone ne peut donc pas tous occuper.
+"""
+import logging
+import threading
+
+from backend.app.config import WORKER_POOL_CONFIG
+from backend.services.supervisor import WorkerSupervisor, SupervisedExecutor
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Renvoie le pool de processus, créé au premier appel
+
+    Les workers sont lancés en mode "spawn" : le processus serveur est multi-thread,
+    et un fork pourrait hériter de verrous détenus par d'autres threads.
+
+    Returns:
+        SupervisedExecutor: Pool de processus partagé
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                max_workers = WORKER_POOL_CONFIG["max_workers"]
+                logger.info(f"Démarrage du pool de processus ({max_workers} workers)")
+                _executor = SupervisedExecutor(WorkerSupervisor(workers=max_workers))
+    return _executor
+
+
+def shutdown_executor():
+    """
+    Arrête le pool de processus s'il a été créé
+    """
+    global _executor
+    with _lock:
+        if _executor is not None:
+            logger.info("Arrêt du pool de processus")
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,250 @@
+"""
+Micro-benchmarks des fonctions du service de documents
+
+Utilisation :
+    python -m backend.tests.benchmarks --profile medium --output resultats.json
+    python -m backend.tests.benchmarks --baseline reference.json --threshold 0.2
+
+Les résultats sont écrits en JSON ; avec --baseline, chaque benchmark est comparé
+à la référence et le programme échoue si la médiane dépasse le seuil de régression.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+import subprocess
+from datetime import datetime
+
+from backend.app.config import PAGE_CACHE_CONFIG
+from backend.tests.corpus import build_corpus
+
+logger = logging.getLogger(__name__)
+
+# Seuil de régression par défaut (20 % plus lent que la référence)
+DEFAULT_THRESHOLD = 0.20
+
+
+def _benchmark_cases(corpus, work_dir):
+    """
+    Construit la liste des cas de benchmark : (nom, fonction à mesurer)
+    """
+    from backend.services import document_service as ds
+
+    def output(name):
+        return os.path.join(work_dir, name)
+
+    def pdf_to_images():
+        images_dir = output("images")
+        success, message, _ = ds.convert_pdf_to_images(corpus["pdf"], images_dir)
+        shutil.rmtree(images_dir, ignore_errors=True)
+        if not success:
+            raise Exception(message)
+
+    cases = [
+        ("extract_text_from_pdf", lambda: ds.extract_text_from_pdf(corpus["pdf"])),
+        ("extract_text_from_docx", lambda: ds.extract_text_from_docx(corpus["docx"])),
+        ("extract_text_from_xlsx", lambda: ds.extract_text_from_xlsx(corpus["xlsx"])),
+        ("extract_text_from_xls", (lambda: ds.extract_text_from_xls(corpus["xls"])) if corpus["xls"] else None),
+        ("extract_text_from_csv[utf-8]", lambda: ds.extract_text_from_csv(corpus["csv_utf-8"])),
+        ("extract_text_from_csv[latin-1]", lambda: ds.extract_text_from_csv(corpus["csv_latin-1"])),
+        ("convert_pdf_to_images", pdf_to_images),
+        ("convert_pdf_to_docx", lambda: ds.convert_pdf_to_docx(corpus["pdf"], output("converti.docx"))),
+        ("convert_docx_to_pdf", lambda: ds.convert_docx_to_pdf(corpus["docx"], output("converti.pdf"))),
+        ("convert_text_to_csv", lambda: ds.convert_text_to_csv(corpus["text"], output("converti.csv"), "auto")),
+    ]
+    return cases
+
+
+# Imports mesurés à froid, chacun dans un nouvel interpréteur
+IMPORT_CASES = {
+    "import[backend.app.main]": "import backend.app.main",
+    "import[backend.services.document_service]": "import backend.services.document_service",
+    "import[backend.app.main+prewarm]": (
+        "import backend.app.main; from backend.services.loader import prewarm; prewarm()"
+    ),
+}
+
+
+def measure_import_time(statement, repeat=3):
+    """
+    Mesure la durée d'une instruction d'import dans un nouvel interpréteur (démarrage à froid)
+
+    Args:
+        statement (str): Instruction Python à mesurer
+        repeat (int): Nombre de mesures
+
+    Returns:
+        list: Durées en secondes
+    """
+    code = (
+        "import time, logging; logging.disable(logging.CRITICAL); start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def _summarize(timings):
+    return {
+        "repeat": len(timings),
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+    }
+
+
+def run_benchmarks(profile="small", repeat=3, corpus_dir=None, only=None):
+    """
+    Exécute les benchmarks sur le corpus synthétique
+
+    Args:
+        profile (str): Profil de taille du corpus (small, medium, large)
+        repeat (int): Nombre de mesures par benchmark
+        corpus_dir (str): Dossier du corpus (réutilisé entre les exécutions), temporaire par défaut
+        only (list): Noms des benchmarks à exécuter (tous par défaut)
+
+    Returns:
+        dict: Résultats au format {"meta": {...}, "benchmarks": {nom: {...}}}
+    """
+    corpus_dir = corpus_dir or os.path.join(tempfile.gettempdir(), "doc-convert-corpus")
+    corpus = build_corpus(corpus_dir, profile)
+
+    # Les journaux du service à chaque page fausseraient les mesures
+    service_logger = logging.getLogger("backend.services.document_service")
+    previous_level = service_logger.level
+    service_logger.setLevel(logging.WARNING)
+
+    # Les mesures répétées porteraient sinon sur les pages reprises du cache
+    cache_enabled = PAGE_CACHE_CONFIG["enabled"]
+    PAGE_CACHE_CONFIG["enabled"] = False
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="doc-convert-bench-")
+    try:
+        for name, func in _benchmark_cases(corpus, work_dir):
+            if only and name not in only and name.split("[")[0] not in only:
+                continue
+            if func is None:
+                results[name] = {"skipped": True, "reason": "dépendance de génération absente"}
+                continue
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+
+            results[name] = _summarize(timings)
+            logger.info(f"{name}: médiane {results[name]['median'] * 1000:.1f} ms")
+    finally:
+        service_logger.setLevel(previous_level)
+        PAGE_CACHE_CONFIG["enabled"] = cache_enabled
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for name, statement in IMPORT_CASES.items():
+        if only and name not in only and "import" not in only:
+            continue
+        results[name] = _summarize(measure_import_time(statement, repeat))
+        logger.info(f"{name}: médiane {results[name]['median'] * 1000:.1f} ms")
+
+    return {
+        "meta": {
+            "profile": profile,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare des résultats à une référence
+
+    Args:
+        current (dict): Résultats de run_benchmarks
+        baseline (dict): Résultats de référence
+        threshold (float): Ralentissement toléré (0.2 = 20 %)
+
+    Returns:
+        list: Régressions, sous forme de dicts {name, baseline, current, ratio}
+    """
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if not reference or result.get("skipped") or reference.get("skipped"):
+            continue
+        ratio = result["median"] / reference["median"] if reference["median"] else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append({
+                "name": name,
+                "baseline": reference["median"],
+                "current": result["median"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def save_results(results, path):
+    """
+    Sauvegarde les résultats au format JSON
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    """
+    Charge des résultats sauvegardés au format JSON
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks du service de documents")
+    parser.add_argument("--profile", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus-dir", default=None)
+    parser.add_argument("--only", nargs="*", default=None, help="Noms des benchmarks à exécuter")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="Fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    results = run_benchmarks(args.profile, args.repeat, args.corpus_dir, args.only)
+    save_results(results, args.output)
+    logger.info(f"Résultats sauvegardés: {args.output}")
+
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            logger.error(
+                f"Régression {regression['name']}: {regression['baseline'] * 1000:.1f} ms -> "
+                f"{regression['current'] * 1000:.1f} ms (x{regression['ratio']:.2f})"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
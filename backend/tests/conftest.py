@@ -0,0 +1,18 @@
+"""
+Configuration commune des tests : les données de l'application (fichiers téléchargés,
+résultats, bases SQLite) sont écrites dans un dossier temporaire, jamais dans backend/data
+"""
+import os
+import shutil
+import tempfile
+
+# Avant tout import de backend.app.config ; les workers lancés par les tests héritent de l'environnement
+_DATA_DIR = tempfile.mkdtemp(prefix="doc-convert-tests-")
+os.environ["DATA_DIR"] = _DATA_DIR
+for _name in ("UPLOAD_FOLDER", "OUTPUT_FOLDER", "TEMP_FOLDER", "CACHE_DB_PATH", "JOBS_DB_PATH", "SEARCH_DB_PATH",
+              "RESULTS_DIR", "RESUMABLE_UPLOADS_DIR", "PAGE_CACHE_DIR", "PROFILING_DIR", "WATCH_OUTPUT_DIR"):
+    os.environ.pop(_name, None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
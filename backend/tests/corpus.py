@@ -0,0 +1,333 @@
+"""
+Générateur de corpus synthétique et déterministe pour les benchmarks
+
+Chaque générateur produit le même contenu pour les mêmes paramètres (graine fixe),
+afin que deux exécutions de benchmarks soient comparables.
+"""
+import io
+import os
+import csv
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "document conversion extraction texte page fichier tableau cellule feuille "
+    "facture client montant date référence produit quantité prix total remise "
+    "société adresse téléphone contrat article annexe section paragraphe ligne"
+).split()
+
+# Profils de taille du corpus
+CORPUS_PROFILES = {
+    "small": {
+        "pdf_pages": 5, "pdf_images": 1,
+        "docx_paragraphs": 100, "docx_tables": 2, "table_rows": 10, "table_cols": 4,
+        "sheet_rows": 200, "sheet_cols": 10, "sheets": 2,
+        "csv_rows": 1000, "csv_cols": 8,
+    },
+    "medium": {
+        "pdf_pages": 50, "pdf_images": 1,
+        "docx_paragraphs": 2000, "docx_tables": 10, "table_rows": 50, "table_cols": 6,
+        "sheet_rows": 5000, "sheet_cols": 20, "sheets": 4,
+        "csv_rows": 50000, "csv_cols": 12,
+    },
+    "large": {
+        "pdf_pages": 500, "pdf_images": 2,
+        "docx_paragraphs": 20000, "docx_tables": 50, "table_rows": 100, "table_cols": 8,
+        "sheet_rows": 50000, "sheet_cols": 30, "sheets": 8,
+        "csv_rows": 500000, "csv_cols": 16,
+    },
+}
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _cell_value(rng, row, col):
+    # Alterner texte, entiers et décimaux pour ressembler à de vraies feuilles
+    kind = (row + col) % 3
+    if kind == 0:
+        return rng.choice(_WORDS)
+    if kind == 1:
+        return rng.randint(0, 100000)
+    return round(rng.uniform(0, 10000), 2)
+
+
+def _png_bytes(rng, width=320, height=240):
+    """
+    Génère une image PNG déterministe (dégradé bruité)
+    """
+    from PIL import Image
+
+    pixels = bytes(
+        (x * 255 // width + rng.randint(0, 32)) % 256
+        for y in range(height) for x in range(width)
+    )
+    image = Image.frombytes("L", (width, height), pixels).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def generate_pdf(path, pages=10, images_per_page=1, seed=0):
+    """
+    Génère un PDF de N pages contenant du texte et des images
+
+    Args:
+        path (str): Chemin du fichier à créer
+        pages (int): Nombre de pages
+        images_per_page (int): Nombre d'images insérées sur chaque page
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+    """
+    import fitz
+
+    rng = random.Random(seed)
+    image = _png_bytes(rng) if images_per_page else None
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        text = "\n".join(_sentence(rng) for _ in range(30))
+        page.insert_textbox(fitz.Rect(50, 50, 545, 500), f"Page {page_num + 1}\n{text}", fontsize=9)
+        for i in range(images_per_page):
+            top = 510 + i * 150
+            page.insert_image(fitz.Rect(50, top, 250, top + 140), stream=image)
+    doc.set_metadata({"producer": "corpus", "creationDate": "", "modDate": ""})
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+    return path
+
+
+def generate_docx(path, paragraphs=100, tables=2, table_rows=10, table_cols=4, seed=0):
+    """
+    Génère un DOCX contenant N paragraphes et des tableaux
+
+    Args:
+        path (str): Chemin du fichier à créer
+        paragraphs (int): Nombre de paragraphes
+        tables (int): Nombre de tableaux, répartis entre les paragraphes
+        table_rows (int): Nombre de lignes par tableau
+        table_cols (int): Nombre de colonnes par tableau
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+    """
+    from datetime import datetime
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_heading("Corpus de test", level=1)
+    table_every = max(1, paragraphs // (tables + 1)) if tables else None
+
+    for i in range(paragraphs):
+        doc.add_paragraph(_sentence(rng, words=20))
+        if table_every and tables and (i + 1) % table_every == 0:
+            table = doc.add_table(rows=table_rows, cols=table_cols)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = str(_cell_value(rng, r, c))
+            tables -= 1
+
+    doc.core_properties.created = datetime(2024, 1, 1)
+    doc.save(path)
+    return path
+
+
+def generate_xlsx(path, rows=200, cols=10, sheets=2, seed=0):
+    """
+    Génère un classeur XLSX de N×M cellules par feuille
+
+    Args:
+        path (str): Chemin du fichier à créer
+        rows (int): Nombre de lignes par feuille (en-tête inclus)
+        cols (int): Nombre de colonnes
+        sheets (int): Nombre de feuilles
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+    """
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    for sheet_idx in range(sheets):
+        sheet = workbook.create_sheet(f"Feuille{sheet_idx + 1}")
+        sheet.append([f"colonne_{c + 1}" for c in range(cols)])
+        for r in range(1, rows):
+            sheet.append([_cell_value(rng, r, c) for c in range(cols)])
+    workbook.save(path)
+    return path
+
+
+def generate_xls(path, rows=200, cols=10, sheets=2, seed=0):
+    """
+    Génère un classeur XLS de N×M cellules par feuille (nécessite xlwt)
+
+    Args:
+        path (str): Chemin du fichier à créer
+        rows (int): Nombre de lignes par feuille (en-tête inclus, 65536 au maximum)
+        cols (int): Nombre de colonnes (256 au maximum)
+        sheets (int): Nombre de feuilles
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+
+    Raises:
+        ImportError: Si xlwt n'est pas installé
+    """
+    import xlwt
+
+    rng = random.Random(seed)
+    workbook = xlwt.Workbook()
+    for sheet_idx in range(sheets):
+        sheet = workbook.add_sheet(f"Feuille{sheet_idx + 1}")
+        for c in range(cols):
+            sheet.write(0, c, f"colonne_{c + 1}")
+        for r in range(1, min(rows, 65536)):
+            for c in range(cols):
+                sheet.write(r, c, _cell_value(rng, r, c))
+    workbook.save(path)
+    return path
+
+
+def generate_csv(path, rows=1000, cols=8, encoding="utf-8", delimiter=",", seed=0):
+    """
+    Génère un fichier CSV de taille et d'encodage configurables
+
+    Args:
+        path (str): Chemin du fichier à créer
+        rows (int): Nombre de lignes de données
+        cols (int): Nombre de colonnes
+        encoding (str): Encodage du fichier (utf-8, latin-1, cp1252...)
+        delimiter (str): Séparateur de colonnes
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+    """
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding=encoding) as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow([f"colonne_{c + 1}" for c in range(cols)])
+        for r in range(rows):
+            writer.writerow([_cell_value(rng, r, c) for c in range(cols)])
+    return path
+
+
+def generate_text(rows=1000, cols=8, delimiter=";", seed=0):
+    """
+    Génère un texte tabulaire pour convert_text_to_csv
+
+    Returns:
+        str: Texte généré
+    """
+    rng = random.Random(seed)
+    lines = [delimiter.join(f"colonne_{c + 1}" for c in range(cols))]
+    for r in range(rows):
+        lines.append(delimiter.join(str(_cell_value(rng, r, c)) for c in range(cols)))
+    return "\n".join(lines)
+
+
+def generate_scanned_image(path, lines=40, skew=2.0, dpi=300, width=2480, height=3508, pages=1, seed=0):
+    """
+    Génère une image de page numérisée (texte noir légèrement incliné, bruit de fond)
+
+    Args:
+        path (str): Chemin du fichier à créer (.png, .jpg ou .tif ; TIFF pour plusieurs pages)
+        lines (int): Nombre de lignes de texte par page
+        skew (float): Inclinaison du texte (degrés)
+        dpi (int): Résolution déclarée dans le fichier
+        width (int): Largeur en pixels (A4 à 300 dpi par défaut)
+        height (int): Hauteur en pixels
+        pages (int): Nombre de pages (TIFF multipage si > 1)
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        str: Chemin du fichier créé
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    try:
+        font = ImageFont.load_default(size=max(12, height // 90))
+    except TypeError:
+        font = ImageFont.load_default()
+
+    frames = []
+    for page_num in range(pages):
+        image = Image.new("L", (width, height), 235)
+        draw = ImageDraw.Draw(image)
+        line_height = (height - 200) // max(lines, 1)
+        for i in range(lines):
+            draw.text((100, 100 + i * line_height), _sentence(rng, words=8), fill=20, font=font)
+        image = image.rotate(skew, resample=Image.BICUBIC, fillcolor=235)
+        noise = Image.effect_noise((width, height), 12)
+        frames.append(Image.blend(image, noise, 0.1))
+
+    if pages > 1:
+        frames[0].save(path, save_all=True, append_images=frames[1:], dpi=(dpi, dpi))
+    else:
+        frames[0].save(path, dpi=(dpi, dpi))
+    return path
+
+
+def build_corpus(directory, profile="small", seed=0):
+    """
+    Génère l'ensemble du corpus d'un profil de taille dans un dossier
+
+    Les fichiers existants sont réutilisés : le nom de chaque fichier encode ses paramètres.
+
+    Args:
+        directory (str): Dossier de destination
+        profile (str): Profil de taille (small, medium, large)
+        seed (int): Graine du générateur pseudo-aléatoire
+
+    Returns:
+        dict: Chemins des fichiers générés par type ("xls" vaut None si xlwt est absent)
+    """
+    params = CORPUS_PROFILES[profile]
+    os.makedirs(directory, exist_ok=True)
+
+    def target(name):
+        return os.path.join(directory, f"{profile}_{seed}_{name}")
+
+    corpus = {}
+
+    corpus["pdf"] = target("document.pdf")
+    if not os.path.exists(corpus["pdf"]):
+        generate_pdf(corpus["pdf"], params["pdf_pages"], params["pdf_images"], seed)
+
+    corpus["docx"] = target("document.docx")
+    if not os.path.exists(corpus["docx"]):
+        generate_docx(corpus["docx"], params["docx_paragraphs"], params["docx_tables"],
+                      params["table_rows"], params["table_cols"], seed)
+
+    corpus["xlsx"] = target("classeur.xlsx")
+    if not os.path.exists(corpus["xlsx"]):
+        generate_xlsx(corpus["xlsx"], params["sheet_rows"], params["sheet_cols"], params["sheets"], seed)
+
+    corpus["xls"] = target("classeur.xls")
+    if not os.path.exists(corpus["xls"]):
+        try:
+            generate_xls(corpus["xls"], params["sheet_rows"], params["sheet_cols"], params["sheets"], seed)
+        except ImportError:
+            logger.warning("xlwt n'est pas installé, le fichier XLS n'est pas généré")
+            corpus["xls"] = None
+
+    for encoding in ("utf-8", "latin-1"):
+        key = f"csv_{encoding}"
+        corpus[key] = target(f"donnees_{encoding}.csv")
+        if not os.path.exists(corpus[key]):
+            generate_csv(corpus[key], params["csv_rows"], params["csv_cols"], encoding, seed=seed)
+
+    corpus["text"] = generate_text(params["csv_rows"], params["csv_cols"], seed=seed)
+    return corpus
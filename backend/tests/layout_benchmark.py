@@ -0,0 +1,112 @@
+"""
+Empreinte mémoire de la mise en page : structure dict de PyMuPDF contre colonnes typées
+
+Utilisation :
+    python -m backend.tests.layout_benchmark --pages 1000 --output layout.json
+
+Mesure (tracemalloc) la mémoire retenue par la mise en page complète d'un document du
+corpus synthétique, sous forme de page.get_text("dict") pour chaque page d'une part, de
+DocumentLayout d'autre part, ainsi que les durées d'extraction et la taille des
+sérialisations NDJSON et binaire.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from backend.tests.corpus import generate_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def _measure(func):
+    """
+    Exécute func et renvoie (résultat, mémoire retenue par le résultat, durée)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        duration = time.perf_counter() - start
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, retained, duration
+
+
+def run_layout_benchmark(pages=1000, pdf_path=None):
+    """
+    Compare les deux représentations sur un PDF de N pages
+
+    Returns:
+        dict: Mémoire retenue, durées et tailles sérialisées
+    """
+    import fitz
+    from backend.services.layout_service import extract_layout_from_pdf
+
+    pdf_path = pdf_path or os.path.join(tempfile.gettempdir(), f"doc-convert-layout-{pages}.pdf")
+    if not os.path.exists(pdf_path):
+        generate_pdf(pdf_path, pages=pages, images_per_page=0)
+
+    def dict_layout():
+        with fitz.open(pdf_path) as doc:
+            return [page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT) for page in doc]
+
+    dicts, dict_memory, dict_seconds = _measure(dict_layout)
+    spans = sum(len(line["spans"]) for page in dicts for block in page["blocks"] for line in block["lines"])
+    del dicts
+
+    layout, layout_memory, layout_seconds = _measure(lambda: extract_layout_from_pdf(pdf_path))
+    ndjson_size = sum(len(line) for line in layout.iter_ndjson())
+    binary_size = len(layout.to_bytes())
+
+    return {
+        "meta": {"pages": pages, "spans": spans, "timestamp": datetime.now().isoformat()},
+        "dict": {"memory": dict_memory, "bytes_per_span": dict_memory / spans if spans else None,
+                 "seconds": dict_seconds},
+        "compact": {"memory": layout_memory, "bytes_per_span": layout_memory / spans if spans else None,
+                    "seconds": layout_seconds, "data_bytes": layout.nbytes(),
+                    "ndjson_bytes": ndjson_size, "binary_bytes": binary_size},
+        "memory_ratio": dict_memory / layout_memory if layout_memory else None,
+    }
+
+
+def format_report(report):
+    meta, dicts, compact = report["meta"], report["dict"], report["compact"]
+    return "\n".join([
+        f"{meta['pages']} pages, {meta['spans']} fragments",
+        f"dict      : {dicts['memory'] / 2**20:8.1f} Mo ({dicts['bytes_per_span']:.0f} o/fragment), "
+        f"{dicts['seconds']:.2f} s",
+        f"colonnes  : {compact['memory'] / 2**20:8.1f} Mo ({compact['bytes_per_span']:.0f} o/fragment), "
+        f"{compact['seconds']:.2f} s",
+        f"gain mémoire : x{report['memory_ratio']:.1f}",
+        f"NDJSON {compact['ndjson_bytes'] / 2**20:.1f} Mo, binaire {compact['binary_bytes'] / 2**20:.1f} Mo",
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Empreinte mémoire de l'extraction de mise en page")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--pdf", default=None, help="PDF à mesurer (généré par défaut)")
+    parser.add_argument("--output", default="layout_results.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    report = run_layout_benchmark(args.pages, args.pdf)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
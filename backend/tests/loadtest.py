@@ -0,0 +1,438 @@
+"""
+Test de charge HTTP de bout en bout de l'application FastAPI
+
+Démarre l'application localement (uvicorn dans un sous-processus), puis envoie une
+charge mixte sur toutes les routes de conversion et d'extraction, en utilisant le
+corpus synthétique, pour plusieurs niveaux de concurrence.
+
+Utilisation :
+    python -m backend.tests.loadtest --concurrency 1 4 16 --duration 20 --output charge.json
+
+Pour chaque niveau et chaque route, le rapport donne le débit, les latences p50/p95/p99,
+le taux d'erreur et le pic de RSS du serveur pendant les requêtes de la route.
+Une sonde interroge /health en continu : sa latence mesure les blocages de la boucle
+d'événements.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import bisect
+import socket
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+
+from backend.tests.corpus import build_corpus
+
+logger = logging.getLogger(__name__)
+
+# Intervalle d'échantillonnage du RSS et de la sonde /health (secondes)
+SAMPLE_INTERVAL = 0.05
+
+
+def _route_table(corpus):
+    """
+    Décrit la charge mixte : (nom, méthode, chemin, fichier, champs de formulaire, poids)
+    """
+    csv_path = corpus["csv_utf-8"]
+    text_sample = "\n".join(corpus["text"].splitlines()[:200])
+    return [
+        ("convert/docx-to-pdf", "POST", "/api/convert/docx-to-pdf/", corpus["docx"], None, 1),
+        ("convert/pdf-to-docx", "POST", "/api/convert/pdf-to-docx/", corpus["pdf"], None, 1),
+        ("convert/pdf-to-images", "POST", "/api/convert/pdf-to-images/", corpus["pdf"], None, 1),
+        ("extract-text[pdf]", "POST", "/api/extract-text/", corpus["pdf"], None, 2),
+        ("extract-text[docx]", "POST", "/api/extract-text/", corpus["docx"], None, 2),
+        ("extract-text[xlsx]", "POST", "/api/extract-text/", corpus["xlsx"], None, 2),
+        ("extract-text[csv]", "POST", "/api/extract-text/", csv_path, None, 2),
+        ("extract-text-unified", "POST", "/api/extract-text-unified/", corpus["pdf"], None, 1),
+        ("text-to-csv", "POST", "/api/text-to-csv/", None, {"text": text_sample, "delimiter": "auto"}, 1),
+        ("text-to-csv-interactive", "POST", "/api/text-to-csv-interactive/", None,
+         {"text": text_sample, "delimiter": ";"}, 1),
+        ("extract-text-from-csv", "POST", "/api/extract-text-from-csv/", csv_path, None, 1),
+        ("pdf-to-images", "POST", "/api/pdf-to-images/", corpus["pdf"], None, 1),
+        ("pdf-to-images/status", "GET", "/api/pdf-to-images/status/", None, None, 1),
+    ]
+
+
+def encode_multipart(fields=None, file_path=None, field_name="file"):
+    """
+    Encode un corps multipart/form-data
+
+    Args:
+        fields (dict): Champs texte du formulaire
+        file_path (str): Fichier à joindre
+        field_name (str): Nom du champ du fichier
+
+    Returns:
+        tuple: (corps en bytes, valeur de l'en-tête Content-Type)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    if file_path:
+        with open(file_path, "rb") as f:
+            content = f.read()
+        filename = os.path.basename(file_path)
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode("utf-8") + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def percentile(values, pct):
+    """
+    Calcule un percentile par interpolation linéaire (values doit être trié)
+    """
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    rank = (len(values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def read_rss(pids):
+    """
+    Renvoie le RSS cumulé (octets) des processus donnés, via /proc (Linux) ou psutil
+    """
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except FileNotFoundError:
+            try:
+                import psutil
+                total += psutil.Process(pid).memory_info().rss
+            except Exception:
+                pass
+    return total
+
+
+def _process_tree(pid):
+    """
+    Renvoie le processus et ses descendants (workers uvicorn), via /proc
+    """
+    pids = [pid]
+    try:
+        for child_pid in os.listdir("/proc"):
+            if not child_pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{child_pid}/stat", "r") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (FileNotFoundError, ProcessLookupError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                pids.extend(_process_tree(int(child_pid)))
+    except FileNotFoundError:
+        pass
+    return pids
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    """
+    Application lancée dans un sous-processus uvicorn pour la durée du test
+    """
+
+    def __init__(self, port=None, command=None, startup_timeout=60, env=None):
+        self.port = port or _free_port()
+        self.command = command or [
+            sys.executable, "-m", "uvicorn", "backend.app.main:app",
+            "--host", "127.0.0.1", "--port", str(self.port), "--log-level", "warning",
+        ]
+        self.startup_timeout = startup_timeout
+        self.env = {**os.environ, **env} if env else None
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise Exception(f"Le serveur s'est arrêté au démarrage (code {self.process.returncode})")
+            try:
+                status, _ = _request("127.0.0.1", self.port, "GET", "/health")
+                if status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise Exception("Le serveur n'a pas démarré à temps")
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    @property
+    def pids(self):
+        return _process_tree(self.process.pid)
+
+
+def _request(host, port, method, path, body=None, content_type=None, timeout=300):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        headers = {"Content-Type": content_type} if content_type else {}
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, response
+    finally:
+        connection.close()
+
+
+class _Sampler(threading.Thread):
+    """
+    Échantillonne le RSS du serveur et la latence de /health pendant un palier
+    """
+
+    def __init__(self, host, port, pids_getter):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.pids_getter = pids_getter
+        self.rss_samples = []
+        self.probe_latencies = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        pids = self.pids_getter()
+        while not self._stopped.is_set():
+            self.rss_samples.append((time.monotonic(), read_rss(pids)))
+            start = time.perf_counter()
+            try:
+                _request(self.host, self.port, "GET", "/health", timeout=30)
+                self.probe_latencies.append(time.perf_counter() - start)
+            except OSError:
+                pass
+            self._stopped.wait(SAMPLE_INTERVAL)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _peak_rss_during(rss_samples, intervals):
+    """
+    Pic de RSS parmi les échantillons pris pendant l'un des intervalles donnés
+
+    L'échantillon qui suit la fin de chaque intervalle est inclus, afin que les requêtes
+    plus courtes que la période d'échantillonnage soient tout de même attribuées.
+    """
+    times = [t for t, _ in rss_samples]
+    peak = 0
+    for start, end in intervals:
+        first = bisect.bisect_left(times, start)
+        last = bisect.bisect_right(times, end)
+        for _, rss in rss_samples[first:min(last + 1, len(rss_samples))]:
+            if rss > peak:
+                peak = rss
+    return peak
+
+
+def run_level(host, port, routes, concurrency, duration, pids_getter, seed=0):
+    """
+    Exécute la charge mixte pendant une durée donnée à un niveau de concurrence
+
+    Returns:
+        dict: Statistiques du palier (globales et par route)
+    """
+    weighted = [route for route in routes for _ in range(route[5])]
+    bodies = {}
+    for name, method, path, file_path, fields, _ in routes:
+        if method == "POST":
+            bodies[name] = encode_multipart(fields, file_path)
+
+    records = {route[0]: [] for route in routes}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.monotonic() < deadline:
+            name, method, path, _, _, _ = rng.choice(weighted)
+            body, content_type = bodies.get(name, (None, None))
+            start = time.monotonic()
+            try:
+                status, _ = _request(host, port, method, path, body, content_type)
+            except OSError:
+                status = None
+            end = time.monotonic()
+            with lock:
+                records[name].append((start, end, status))
+
+    sampler = _Sampler(host, port, pids_getter)
+    sampler.start()
+    rss_before = read_rss(pids_getter())
+    level_start = time.monotonic()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - level_start
+    sampler.stop()
+    rss_after = read_rss(pids_getter())
+
+    route_stats = {}
+    for name, entries in records.items():
+        latencies = sorted(end - start for start, end, _ in entries)
+        errors = sum(1 for _, _, status in entries if status is None or not 200 <= status < 400)
+        # Refus du contrôle d'admission (429), comptés aussi comme erreurs
+        rejected = sum(1 for _, _, status in entries if status == 429)
+        route_stats[name] = {
+            "requests": len(entries),
+            "throughput": len(entries) / elapsed if elapsed else 0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "error_rate": errors / len(entries) if entries else 0,
+            "rejected_rate": rejected / len(entries) if entries else 0,
+            "peak_rss": _peak_rss_during(sampler.rss_samples, [(s, e) for s, e, _ in entries]),
+        }
+
+    probes = sorted(sampler.probe_latencies)
+    total_requests = sum(stats["requests"] for stats in route_stats.values())
+    return {
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "requests": total_requests,
+        "throughput": total_requests / elapsed if elapsed else 0,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+        "peak_rss": max((rss for _, rss in sampler.rss_samples), default=0),
+        "loop_probe": {
+            "p50": percentile(probes, 50),
+            "p99": percentile(probes, 99),
+            "max": probes[-1] if probes else None,
+        },
+        "routes": route_stats,
+    }
+
+
+def run_load_test(concurrency_levels=(1, 4, 16), duration=20, profile="small", corpus_dir=None,
+                  server_command=None, only=None, env=None):
+    """
+    Démarre le serveur et exécute la charge pour chaque niveau de concurrence
+
+    Args:
+        concurrency_levels (iterable): Niveaux de concurrence à balayer
+        duration (float): Durée de chaque palier (secondes)
+        profile (str): Profil de taille du corpus
+        corpus_dir (str): Dossier du corpus, temporaire par défaut
+        server_command (list): Commande de lancement du serveur (uvicorn mono-processus par défaut)
+        only (list): Noms des routes à inclure (toutes par défaut)
+        env (dict): Variables d'environnement supplémentaires du serveur
+
+    Returns:
+        dict: Rapport {"meta": {...}, "levels": [...]}
+    """
+    corpus_dir = corpus_dir or os.path.join(tempfile.gettempdir(), "doc-convert-corpus")
+    corpus = build_corpus(corpus_dir, profile)
+    routes = [route for route in _route_table(corpus) if not only or route[0] in only]
+
+    levels = []
+    port = _free_port()
+    if server_command:
+        server_command = [part.replace("{port}", str(port)) for part in server_command]
+    with ServerProcess(port=port, command=server_command, env=env) as server:
+        for concurrency in concurrency_levels:
+            logger.info(f"Palier de concurrence {concurrency} ({duration} s)")
+            levels.append(run_level("127.0.0.1", server.port, routes, concurrency, duration,
+                                    lambda: server.pids))
+
+    return {
+        "meta": {
+            "profile": profile,
+            "duration": duration,
+            "concurrency_levels": list(concurrency_levels),
+            "timestamp": datetime.now().isoformat(),
+        },
+        "levels": levels,
+    }
+
+
+def format_report(report):
+    """
+    Met en forme le rapport sous forme de tableau texte
+    """
+    def ms(value):
+        return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+    lines = []
+    for level in report["levels"]:
+        probe = level["loop_probe"]
+        lines.append(
+            f"=== Concurrence {level['concurrency']}: {level['throughput']:.1f} req/s, "
+            f"RSS {level['rss_before'] / 2**20:.0f} -> {level['rss_after'] / 2**20:.0f} Mo "
+            f"(pic {level['peak_rss'] / 2**20:.0f} Mo), sonde /health p99 {ms(probe['p99']).strip()} ms "
+            f"max {ms(probe['max']).strip()} ms ==="
+        )
+        lines.append(f"{'route':<28}{'req':>6}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                     f"{'err %':>7}{'429 %':>7}{'RSS Mo':>8}")
+        for name, stats in level["routes"].items():
+            lines.append(
+                f"{name:<28}{stats['requests']:>6}{stats['throughput']:>8.2f}{ms(stats['p50']):>9}"
+                f"{ms(stats['p95']):>9}{ms(stats['p99']):>9}{stats['error_rate'] * 100:>7.1f}"
+                f"{stats.get('rejected_rate', 0) * 100:>7.1f}{stats['peak_rss'] / 2**20:>8.0f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge HTTP de l'application")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--profile", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--corpus-dir", default=None)
+    parser.add_argument("--only", nargs="*", default=None, help="Noms des routes à inclure")
+    parser.add_argument("--server-command", default=None,
+                        help="Commande de lancement du serveur ({port} est remplacé par le port choisi)")
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server_command = args.server_command.split() if args.server_command else None
+    report = run_load_test(args.concurrency, args.duration, args.profile, args.corpus_dir,
+                           server_command, args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(format_report(report))
+    logger.info(f"Rapport sauvegardé: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Benchmark de débit de l'OCR : chemin historique contre pool de workers
+
+Utilisation :
+    python -m backend.tests.ocr_benchmark --images 16 --lang eng
+
+Le chemin historique ouvre chaque image et appelle pytesseract (un processus tesseract
+par image, sans prétraitement). Le chemin actuel prétraite les images et les répartit
+entre les workers OCR de longue durée. Le débit est donné en images par seconde.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+from backend.tests.corpus import generate_scanned_image
+
+logger = logging.getLogger(__name__)
+
+
+def ocr_available():
+    """
+    Indique si un moteur OCR est installé (tesserocr, ou pytesseract et tesseract-ocr)
+    """
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        pass
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _legacy_ocr(image_paths, lang):
+    import pytesseract
+    from PIL import Image
+
+    return [pytesseract.image_to_string(Image.open(path), lang=lang) for path in image_paths]
+
+
+def _pool_ocr(image_paths, lang):
+    from backend.services.ocr_service import recognize_many
+
+    return recognize_many(image_paths, lang)
+
+
+def run_ocr_benchmark(images=8, lang="eng", corpus_dir=None):
+    """
+    Mesure le débit des deux chemins d'OCR sur des pages numérisées synthétiques
+
+    Args:
+        images (int): Nombre d'images
+        lang (str): Langue tesseract
+        corpus_dir (str): Dossier des images générées, temporaire par défaut
+
+    Returns:
+        dict: Débit (images/s) et durée de chaque chemin
+    """
+    from backend.services.ocr_service import get_executor
+
+    corpus_dir = corpus_dir or os.path.join(tempfile.gettempdir(), "doc-convert-corpus", "ocr")
+    os.makedirs(corpus_dir, exist_ok=True)
+    image_paths = []
+    for i in range(images):
+        path = os.path.join(corpus_dir, f"scan_{i}.png")
+        if not os.path.exists(path):
+            generate_scanned_image(path, skew=1.5, seed=i)
+        image_paths.append(path)
+
+    results = {"images": images, "lang": lang}
+    paths = {"legacy": _legacy_ocr, "pool": _pool_ocr}
+
+    # Démarrer les workers avant la mesure : ils sont de longue durée en production
+    get_executor()
+    _pool_ocr(image_paths[:1], lang)
+
+    for name, func in paths.items():
+        start = time.perf_counter()
+        func(image_paths, lang)
+        elapsed = time.perf_counter() - start
+        results[name] = {"seconds": elapsed, "images_per_second": images / elapsed}
+        logger.info(f"{name}: {images / elapsed:.2f} images/s")
+
+    results["speedup"] = results["pool"]["images_per_second"] / results["legacy"]["images_per_second"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de débit de l'OCR")
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--corpus-dir", default=None)
+    parser.add_argument("--output", default="ocr_benchmark.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not ocr_available():
+        logger.error("Aucun moteur OCR disponible (tesserocr, ou pytesseract et tesseract-ocr)")
+        return 1
+
+    results = run_ocr_benchmark(args.images, args.lang, args.corpus_dir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Accélération: x{results['speedup']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
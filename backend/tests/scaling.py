@@ -0,0 +1,121 @@
+"""
+Mesure de la montée en charge selon le nombre de workers du serveur de production
+
+Pour chaque nombre de workers, le serveur (python -m backend.server) est démarré et la
+charge de backend/tests/loadtest.py est envoyée à une concurrence fixe ; le rapport
+indique le débit, les latences p50/p99 et le gain par rapport à un seul worker.
+
+Utilisation :
+    python -m backend.tests.scaling --workers 1 2 4 --concurrency 16 --duration 20
+"""
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+
+from backend.tests.loadtest import run_load_test
+
+logger = logging.getLogger(__name__)
+
+
+def _server_command(workers):
+    return [
+        sys.executable, "-m", "backend.server", "--host", "127.0.0.1", "--port", "{port}",
+        "--workers", str(workers), "--log-level", "warning",
+    ]
+
+
+def _summarize(level):
+    """
+    Débit et latences globales d'un palier (toutes routes confondues, moyenne pondérée)
+    """
+    routes = [stats for stats in level["routes"].values() if stats["requests"]]
+    requests = sum(stats["requests"] for stats in routes)
+
+    def weighted(key):
+        values = [(stats[key], stats["requests"]) for stats in routes if stats[key] is not None]
+        total = sum(weight for _, weight in values)
+        return sum(value * weight for value, weight in values) / total if total else None
+
+    return {
+        "requests": requests,
+        "throughput": level["throughput"],
+        "p50": weighted("p50"),
+        "p99": weighted("p99"),
+        "error_rate": weighted("error_rate") or 0.0,
+        "peak_rss": level["peak_rss"],
+        "probe_p99": level["loop_probe"]["p99"],
+    }
+
+
+def run_scaling(worker_counts=(1, 2, 4), concurrency=16, duration=20, profile="small", corpus_dir=None, only=None):
+    """
+    Exécute la charge pour chaque nombre de workers
+
+    Returns:
+        dict: Rapport {"meta": {...}, "runs": [...]}
+    """
+    runs = []
+    for workers in worker_counts:
+        logger.info(f"Serveur à {workers} worker(s)")
+        # Capacité brute : le contrôle d'admission limiterait chaque worker
+        report = run_load_test([concurrency], duration, profile, corpus_dir, _server_command(workers), only,
+                               env={"ADMISSION_CONTROL": "0"})
+        runs.append({"workers": workers, **_summarize(report["levels"][0])})
+
+    baseline = runs[0]["throughput"] if runs else 0
+    for run in runs:
+        run["speedup"] = run["throughput"] / baseline if baseline else None
+
+    return {
+        "meta": {
+            "profile": profile,
+            "concurrency": concurrency,
+            "duration": duration,
+            "timestamp": datetime.now().isoformat(),
+        },
+        "runs": runs,
+    }
+
+
+def format_report(report):
+    """
+    Met en forme le rapport sous forme de tableau texte
+    """
+    def ms(value):
+        return f"{value * 1000:9.1f}" if value is not None else "        -"
+
+    lines = [f"{'workers':>8}{'req/s':>9}{'gain':>7}{'p50 ms':>9}{'p99 ms':>9}{'err %':>7}{'RSS Mo':>8}"]
+    for run in report["runs"]:
+        lines.append(
+            f"{run['workers']:>8}{run['throughput']:>9.1f}{run['speedup'] or 0:>6.2f}x{ms(run['p50'])}"
+            f"{ms(run['p99'])}{run['error_rate'] * 100:>7.1f}{run['peak_rss'] / 2**20:>8.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Montée en charge selon le nombre de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--profile", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--corpus-dir", default=None)
+    parser.add_argument("--only", nargs="*", default=None, help="Noms des routes à inclure")
+    parser.add_argument("--output", default="scaling_results.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    report = run_scaling(args.workers, args.concurrency, args.duration, args.profile, args.corpus_dir, args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(format_report(report))
+    logger.info(f"Rapport sauvegardé: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Tests du contrôle d'admission
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.utils.admission import AdmissionControlMiddleware, AdmissionRejected, CostClass, TokenBucket
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2.0, burst=2)
+    bucket.updated = 0.0
+    assert bucket.take(now=0.0) == 0.0
+    assert bucket.take(now=0.0) == 0.0
+    # Seau vide : un jeton revient en 1 / rate secondes
+    assert bucket.take(now=0.0) == pytest.approx(0.5)
+    assert bucket.take(now=0.25) == pytest.approx(0.25)
+    assert bucket.take(now=0.5) == 0.0
+    assert not bucket.is_full(now=0.5)
+    # Le remplissage est plafonné à burst
+    assert bucket.is_full(now=10.0) and bucket.tokens == 2
+    bucket.refund()
+    assert bucket.tokens == 2
+
+
+def test_acquire_release_hand_off():
+    async def scenario():
+        cost_class = CostClass("test", concurrency=1, queue=1, rate=100.0, burst=100)
+        assert await cost_class.acquire("a") == 0.0
+        assert cost_class.active == 1
+
+        waiter = asyncio.ensure_future(cost_class.acquire("b", timeout=5))
+        await asyncio.sleep(0)
+        assert len(cost_class.waiters) == 1
+        # File pleine : refus immédiat, jeton rendu
+        with pytest.raises(AdmissionRejected) as rejected:
+            await cost_class.acquire("c")
+        assert rejected.value.reason == "queue_full" and rejected.value.retry_after >= 1
+        assert cost_class.buckets["c"].tokens == pytest.approx(100, abs=0.1)
+
+        # La place est cédée directement à la requête en attente
+        cost_class.release(duration=2.0)
+        assert await waiter >= 0.0
+        assert cost_class.active == 1 and not cost_class.waiters
+        cost_class.release()
+        assert cost_class.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_refunds_token():
+    async def scenario():
+        cost_class = CostClass("test", concurrency=1, queue=4, rate=0.001, burst=2)
+        await cost_class.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await cost_class.acquire("b", timeout=0.05)
+        assert rejected.value.reason == "timeout"
+        assert not cost_class.waiters
+        assert cost_class.buckets["b"].tokens == pytest.approx(2, abs=0.01)
+        cost_class.release()
+        assert cost_class.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_rate_limit_per_client():
+    async def scenario():
+        cost_class = CostClass("test", concurrency=10, queue=10, rate=0.5, burst=1)
+        await cost_class.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await cost_class.acquire("a")
+        assert rejected.value.reason == "rate" and rejected.value.retry_after == 2
+        # Les autres clients ont leur propre seau
+        await cost_class.acquire("b")
+
+    asyncio.run(scenario())
+
+
+def test_middleware_rejects_with_retry_after():
+    app = FastAPI()
+
+    @app.post("/api/extract-text/")
+    async def extract():
+        return {"ok": True}
+
+    @app.get("/api/extract-text/")
+    async def status():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionControlMiddleware, config={
+        "client_header": "X-Forwarded-For",
+        "queue_timeout": 1,
+        "classes": {"light": {"concurrency": 2, "queue": 2, "rate": 0.1, "burst": 1}},
+        "routes": [("/api/extract-text", "light")],
+    })
+    client = TestClient(app)
+
+    assert client.post("/api/extract-text/", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
+    response = client.post("/api/extract-text/", headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.9"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert "rate" in response.json()["detail"]
+    # Autre client, et méthodes non limitées
+    assert client.post("/api/extract-text/", headers={"X-Forwarded-For": "10.0.0.2"}).status_code == 200
+    assert client.get("/api/extract-text/", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
@@ -0,0 +1,121 @@
+"""
+Tests de l'extraction par lot (/api/extract-text/batch)
+"""
+import io
+import os
+import json
+import time
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import BATCH_CONFIG
+from backend.app.routes import extract
+from backend.utils.file_utils import extract_zip_entry
+
+
+def _zip(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_extract_zip_entry_limits_size(tmp_path):
+    with zipfile.ZipFile(io.BytesIO(_zip({"a.txt": b"x" * 100}))) as archive:
+        info = archive.getinfo("a.txt")
+        with pytest.raises(ValueError):
+            extract_zip_entry(archive, info, tmp_path / "out", max_size=99)
+        path = extract_zip_entry(archive, info, tmp_path / "out", max_size=100)
+    assert os.path.getsize(path) == 100
+    assert os.listdir(tmp_path / "out") == [os.path.basename(path)]
+
+
+@pytest.mark.parametrize("name, extension", [
+    ("../../evil.txt", ".txt"),
+    ("/etc/cron.d/evil.csv", ".csv"),
+    ("dossier\\..\\..\\evil.pdf", ".pdf"),
+    ("rapport.pdf\\..\\..\\evil", ""),
+    ("archive.tar/../x.", ""),
+])
+def test_extract_zip_entry_stays_in_destination(tmp_path, name, extension):
+    destination = tmp_path / "a" / "b"
+    with zipfile.ZipFile(io.BytesIO(_zip({name: b"contenu"}))) as archive:
+        path = extract_zip_entry(archive, archive.infolist()[0], destination)
+    assert os.path.dirname(os.path.realpath(path)) == os.path.realpath(destination)
+    assert os.path.splitext(path)[1] == extension
+    assert sorted(os.listdir(tmp_path)) == ["a"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, "TEMP_DIR", str(tmp_path / "temp"))
+    monkeypatch.setattr(extract, "UPLOADS_DIR", str(tmp_path / "uploads"))
+    os.makedirs(tmp_path / "temp")
+    os.makedirs(tmp_path / "uploads")
+    executor = ThreadPoolExecutor(max_workers=8)
+    monkeypatch.setattr(extract, "get_executor", lambda: executor)
+    app = FastAPI()
+    app.include_router(extract.router)
+    yield TestClient(app)
+    executor.shutdown()
+
+
+def test_batch_concurrency_bound(client, monkeypatch):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def slow_extract(path, lang=None, hybrid=None):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    monkeypatch.setattr(extract, "extract_text_from_file", slow_extract)
+    monkeypatch.setitem(BATCH_CONFIG, "concurrency", 2)
+    files = [("files", (f"f{index}.txt", f"texte {index}".encode(), "text/plain")) for index in range(8)]
+    response = client.post("/api/extract-text/batch", files=files)
+
+    assert response.status_code == 200
+    results = _lines(response)
+    assert sorted(result["text"] for result in results) == sorted(f"texte {index}" for index in range(8))
+    assert state["peak"] == 2
+
+
+def test_batch_zip_entries(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, "extract_text_from_file",
+                        lambda path, lang=None, hybrid=None: open(path, encoding="utf-8").read())
+    monkeypatch.setitem(BATCH_CONFIG, "max_entry_size", 10)
+    archive = _zip({"ok.txt": b"court", "gros.txt": b"x" * 11, "../../evil.txt": b"dehors", "dossier/": b""})
+    response = client.post("/api/extract-text/batch", files=[("files", ("lot.zip", archive, "application/zip"))])
+
+    results = {result["filename"]: result for result in _lines(response)}
+    assert sorted(results) == ["../../evil.txt", "gros.txt", "ok.txt"]
+    assert results["ok.txt"]["text"] == "court"
+    assert results["../../evil.txt"]["text"] == "dehors"
+    assert results["gros.txt"]["status"] == "error" and "taille maximale" in results["gros.txt"]["error"]
+    # Entrées temporaires et archive supprimées, rien n'est écrit hors du dossier temporaire
+    assert os.listdir(tmp_path / "temp") == []
+    assert sorted(os.listdir(tmp_path)) == ["temp", "uploads"]
+
+
+def test_batch_rejects_invalid_requests(client, monkeypatch):
+    assert client.post("/api/extract-text/batch").status_code == 400
+    response = client.post("/api/extract-text/batch", files=[("files", ("lot.zip", b"pas un zip", "application/zip"))])
+    assert response.status_code == 400
+    monkeypatch.setitem(BATCH_CONFIG, "max_files", 1)
+    files = [("files", (f"f{index}.txt", b"x", "text/plain")) for index in range(2)]
+    assert client.post("/api/extract-text/batch", files=files).status_code == 400
@@ -0,0 +1,72 @@
+"""
+Tests du corpus synthétique et des micro-benchmarks du service de documents
+
+Définir BENCHMARK_BASELINE (chemin d'un JSON de référence) pour faire échouer
+la suite en cas de régression au-delà de BENCHMARK_THRESHOLD.
+"""
+import os
+
+import pytest
+
+from backend.tests.corpus import build_corpus, generate_csv, generate_text
+from backend.tests.benchmarks import (
+    DEFAULT_THRESHOLD,
+    IMPORT_CASES,
+    run_benchmarks,
+    compare_results,
+    save_results,
+    load_results,
+)
+
+EXPECTED_BENCHMARKS = {
+    "extract_text_from_pdf",
+    "extract_text_from_docx",
+    "extract_text_from_xlsx",
+    "extract_text_from_xls",
+    "extract_text_from_csv[utf-8]",
+    "extract_text_from_csv[latin-1]",
+    "convert_pdf_to_images",
+    "convert_pdf_to_docx",
+    "convert_docx_to_pdf",
+    "convert_text_to_csv",
+}
+
+
+def test_corpus_is_deterministic(tmp_path):
+    first = generate_csv(str(tmp_path / "a.csv"), rows=50, encoding="latin-1", seed=3)
+    second = generate_csv(str(tmp_path / "b.csv"), rows=50, encoding="latin-1", seed=3)
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert f1.read() == f2.read()
+    assert generate_text(rows=20, seed=1) == generate_text(rows=20, seed=1)
+
+
+def test_build_corpus(tmp_path):
+    corpus = build_corpus(str(tmp_path), "small")
+    for key in ("pdf", "docx", "xlsx", "csv_utf-8", "csv_latin-1"):
+        assert os.path.getsize(corpus[key]) > 0
+
+
+def test_run_benchmarks(tmp_path):
+    results = run_benchmarks("small", repeat=1, corpus_dir=str(tmp_path))
+    assert set(results["benchmarks"]) == EXPECTED_BENCHMARKS | set(IMPORT_CASES)
+    for name, result in results["benchmarks"].items():
+        if not result.get("skipped"):
+            assert result["median"] > 0, name
+
+    output = tmp_path / "resultats.json"
+    save_results(results, str(output))
+    assert load_results(str(output))["benchmarks"].keys() == results["benchmarks"].keys()
+
+    baseline_path = os.environ.get("BENCHMARK_BASELINE")
+    if baseline_path:
+        threshold = float(os.environ.get("BENCHMARK_THRESHOLD", DEFAULT_THRESHOLD))
+        regressions = compare_results(results, load_results(baseline_path), threshold)
+        assert not regressions, regressions
+
+
+def test_compare_results_detects_regressions():
+    baseline = {"benchmarks": {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"skipped": True}}}
+    current = {"benchmarks": {"a": {"median": 1.1}, "b": {"median": 1.5}, "c": {"median": 9.0}}}
+    regressions = compare_results(current, baseline, threshold=0.2)
+    assert [r["name"] for r in regressions] == ["b"]
+    assert regressions[0]["ratio"] == pytest.approx(1.5)
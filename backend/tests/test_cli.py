@@ -0,0 +1,61 @@
+"""
+Tests du traitement par lot en ligne de commande
+"""
+import os
+import sqlite3
+
+from backend import cli
+from backend.cli import run_batch, output_path_for, MANIFEST_NAME
+from backend.tests.corpus import generate_csv
+
+
+def test_batch_extract_resumes_from_manifest(tmp_path):
+    input_dir = tmp_path / "entree"
+    output_dir = tmp_path / "sortie"
+    (input_dir / "sous-dossier").mkdir(parents=True)
+    generate_csv(str(input_dir / "a.csv"), rows=20, seed=1)
+    generate_csv(str(input_dir / "sous-dossier" / "b.csv"), rows=20, seed=2)
+    # Même contenu que a.csv : copié, pas retraité
+    generate_csv(str(input_dir / "sous-dossier" / "copie.csv"), rows=20, seed=1)
+    (input_dir / "ignore.bin").write_bytes(b"\x00")
+
+    summary = run_batch("extract", str(input_dir), str(output_dir), jobs=2, progress_stream=None)
+    assert summary["total"] == 3
+    assert summary["processed"] == 2 and summary["copied"] == 1 and summary["errors"] == 0
+    for name in ("a.txt", os.path.join("sous-dossier", "b.txt"), os.path.join("sous-dossier", "copie.txt")):
+        assert (output_dir / name).read_text(encoding="utf-8").strip()
+
+    with sqlite3.connect(str(output_dir / MANIFEST_NAME)) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM results WHERE status = 'done'").fetchone()[0] == 2
+
+    # Reprise : rien n'est retraité
+    summary = run_batch("extract", str(input_dir), str(output_dir), jobs=2, progress_stream=None)
+    assert summary["processed"] == 0 and summary["skipped"] == 3
+
+
+def crash_on_marked_file(operation, source, output, *args):
+    """
+    process_file qui arrête brutalement le worker pour les fichiers nommés "plante*"
+    """
+    if os.path.basename(source).startswith("plante"):
+        os._exit(1)
+    return cli.process_file(operation, source, output, *args)
+
+
+def test_batch_survives_worker_crash(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "process_file", crash_on_marked_file)
+    input_dir = tmp_path / "entree"
+    input_dir.mkdir()
+    generate_csv(str(input_dir / "plante.csv"), rows=5, seed=1)
+    for index in range(4):
+        generate_csv(str(input_dir / f"f{index}.csv"), rows=20, seed=index + 2)
+
+    summary = run_batch("extract", str(input_dir), str(tmp_path / "sortie"), jobs=2, progress_stream=None)
+    assert summary["processed"] == 4 and summary["errors"] == 1
+    assert [failure["source"] for failure in summary["failures"]] == [str(input_dir / "plante.csv")]
+    assert sorted(os.listdir(tmp_path / "sortie")) == [MANIFEST_NAME, "f0.txt", "f1.txt", "f2.txt", "f3.txt"]
+
+
+def test_output_path_mirrors_tree():
+    assert output_path_for("/in/a/b.pdf", "/in", "/out", "pdf-to-docx") == os.path.join("/out", "a", "b.docx")
+    assert output_path_for("/in/b.pdf", "/in", "/out", "pdf-to-images") == os.path.join("/out", "b_images")
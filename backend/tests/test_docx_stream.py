@@ -0,0 +1,73 @@
+"""
+Tests de l'extraction en flux des documents DOCX
+"""
+import zipfile
+
+from backend.services.docx_stream import iter_docx_text
+from backend.services.document_service import extract_text_from_docx
+from backend.tests.corpus import generate_docx
+
+_NS = ('xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+       'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"')
+_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+_DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document {_NS}><w:body>
+<w:p><w:r><w:t>Début</w:t><w:tab/><w:t xml:space="preserve">du texte</w:t></w:r><w:del><w:r><w:delText>supprimé</w:delText></w:r></w:del></w:p>
+<w:tbl><w:tr><w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>b</w:t></w:r></w:p></w:tc></w:tr></w:tbl>
+<w:p><w:r><w:t>Avant</w:t></w:r><w:r><mc:AlternateContent><mc:Choice Requires="wps"><w:drawing><w:txbxContent>
+<w:p><w:r><w:t>Zone de texte</w:t></w:r></w:p></w:txbxContent></w:drawing></mc:Choice>
+<mc:Fallback><w:pict><w:txbxContent><w:p><w:r><w:t>Zone de texte</w:t></w:r></w:p></w:txbxContent></w:pict></mc:Fallback>
+</mc:AlternateContent></w:r></w:p>
+<w:sectPr/></w:body></w:document>"""
+
+_FOOTNOTES = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:footnotes {_NS}><w:footnote w:id="1"><w:p><w:r><w:t>Note</w:t></w:r></w:p></w:footnote></w:footnotes>"""
+
+_HEADER = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:hdr {_NS}><w:p><w:r><w:t>En-tête</w:t></w:r></w:p></w:hdr>"""
+
+
+def _write_docx(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("_rels/.rels", f"""<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="{_RELS}/officeDocument" Target="word/document.xml"/></Relationships>""")
+        archive.writestr("word/_rels/document.xml.rels", f"""<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="{_RELS}/footnotes" Target="footnotes.xml"/>
+<Relationship Id="rId2" Type="{_RELS}/header" Target="header1.xml"/></Relationships>""")
+        archive.writestr("word/document.xml", _DOCUMENT)
+        archive.writestr("word/footnotes.xml", _FOOTNOTES)
+        archive.writestr("word/header1.xml", _HEADER)
+    return path
+
+
+def test_stream_covers_tables_text_boxes_and_notes(tmp_path):
+    path = _write_docx(str(tmp_path / "doc.docx"))
+    assert list(iter_docx_text(path)) == [
+        "En-tête", "Début\tdu texte", "a\tb", "Zone de texte", "Avant", "Note",
+    ]
+
+
+def test_stream_matches_python_docx_paragraphs(tmp_path):
+    import docx
+
+    path = generate_docx(str(tmp_path / "doc.docx"), paragraphs=30, tables=2, table_rows=3, table_cols=2)
+    document = docx.Document(path)
+    text = extract_text_from_docx(path)
+    for paragraph in document.paragraphs:
+        assert paragraph.text in text
+    row = document.tables[0].rows[1]
+    assert "\t".join(cell.text for cell in row.cells) in text.split("\n")
+
+
+def test_falls_back_to_python_docx(tmp_path, monkeypatch):
+    import backend.services.document_service as document_service
+
+    def broken(file_path):
+        raise ValueError("partie illisible")
+        yield
+
+    path = generate_docx(str(tmp_path / "doc.docx"), paragraphs=5, tables=0)
+    expected = extract_text_from_docx(path)
+    monkeypatch.setattr(document_service, "iter_docx_text", broken)
+    assert extract_text_from_docx(path) == expected
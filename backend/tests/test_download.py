@@ -0,0 +1,164 @@
+"""
+Tests des téléchargements conditionnels et partiels
+"""
+import os
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.services.shared_cache import SharedCache
+from backend.utils import download
+from backend.utils.download import (
+    MAX_RANGES, RangeNotSatisfiable, _etag_matches, compute_etag, conditional_file_response, parse_range_header
+)
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=1000-", [(1000, 1023)]),
+    ("bytes=-24", [(1000, 1023)]),
+    ("bytes=-5000", [(0, 1023)]),
+    ("bytes=900-5000", [(900, 1023)]),
+    # Plages triées et fusionnées lorsqu'elles se chevauchent ou se touchent
+    ("bytes=500-599, 0-9, 10-19, 550-650", [(0, 19), (500, 650)]),
+    ("bytes=0-0,-1", [(0, 0), (1023, 1023)]),
+    # Plages hors du fichier ignorées si une autre est satisfaisable
+    ("bytes=2000-3000,0-1", [(0, 1)]),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, len(CONTENT)) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-1", "bytes=", "bytes=5", "bytes=10-2", "bytes=a-b", "bytes=-x"])
+def test_parse_range_header_invalid(header):
+    assert parse_range_header(header, len(CONTENT)) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=5000-6000", "bytes=-0"])
+def test_parse_range_header_unsatisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, len(CONTENT))
+
+
+def test_parse_range_header_limits_range_count():
+    header = "bytes=" + ",".join(f"{index * 10}-{index * 10}" for index in range(MAX_RANGES + 1))
+    assert parse_range_header(header, len(CONTENT)) == [(0, MAX_RANGES * 10)]
+
+
+@pytest.fixture
+def sample(tmp_path, monkeypatch):
+    cache = SharedCache(tmp_path / "cache.db")
+    monkeypatch.setattr(download, "get_shared_cache", lambda: cache)
+    path = tmp_path / "document.bin"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+@pytest.fixture
+def client(sample):
+    app = FastAPI()
+
+    @app.api_route("/fichier", methods=["GET", "HEAD"])
+    async def fichier(request: Request):
+        return await conditional_file_response(request, sample, filename="document.bin")
+
+    return TestClient(app)
+
+
+def test_etag_follows_content(sample):
+    etag = compute_etag(sample)
+    assert etag.startswith('"sha256-') and compute_etag(sample) == etag
+    with open(sample, "wb") as f:
+        f.write(CONTENT[::-1])
+    os.utime(sample, ns=(0, 10**9))
+    assert compute_etag(sample) != etag
+
+
+def test_etag_matches_weak_validators():
+    assert _etag_matches('W/"abc"', '"abc"')
+    assert _etag_matches('"abc"', 'W/"abc"')
+    assert _etag_matches('"x", W/"abc"', 'W/"abc"')
+    # Seul le préfixe W/ est ignoré, pas n'importe quelle suite de W et de /
+    assert not _etag_matches('WW/"abc"', '"abc"')
+    assert not _etag_matches('W//"abc"', '"abc"')
+
+
+def test_full_and_conditional(client, sample):
+    response = client.get("/fichier")
+    assert response.status_code == 200 and response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    etag = response.headers["etag"]
+
+    for value in (etag, f"W/{etag}", f'"autre", {etag}', "*"):
+        response = client.get("/fichier", headers={"If-None-Match": value})
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag
+    assert client.get("/fichier", headers={"If-None-Match": '"autre"'}).status_code == 200
+
+    last_modified = response.headers["last-modified"]
+    assert client.get("/fichier", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/fichier", headers={"If-Modified-Since": formatdate(0, usegmt=True)}).status_code == 200
+    # If-None-Match l'emporte sur If-Modified-Since
+    assert client.get("/fichier", headers={
+        "If-None-Match": '"autre"', "If-Modified-Since": last_modified
+    }).status_code == 200
+
+
+def test_single_range(client):
+    response = client.get("/fichier", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-10:]
+    assert response.headers["content-range"] == "bytes 1014-1023/1024"
+    assert response.headers["content-length"] == "10"
+    assert response.headers["content-disposition"] == 'attachment; filename="document.bin"'
+
+
+def test_if_range(client):
+    etag = client.get("/fichier").headers["etag"]
+    response = client.get("/fichier", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206 and response.content == CONTENT[:10]
+    # Version différente : fichier entier
+    response = client.get("/fichier", headers={"Range": "bytes=0-9", "If-Range": '"ancienne"'})
+    assert response.status_code == 200 and response.content == CONTENT
+
+
+def test_multipart_byteranges(client):
+    response = client.get("/fichier", headers={"Range": "bytes=0-3,100-103"})
+    assert response.status_code == 206
+    media_type, _, boundary = response.headers["content-type"].partition("; boundary=")
+    assert media_type == "multipart/byteranges"
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b"" and parts[-1] == b"--\r\n"
+    for part, (first, last) in zip(parts[1:-1], [(0, 3), (100, 103)]):
+        head, _, body = part.partition(b"\r\n\r\n")
+        assert f"Content-Range: bytes {first}-{last}/1024".encode() in head
+        assert body == CONTENT[first:last + 1] + b"\r\n"
+
+
+def test_unsatisfiable_range(client):
+    response = client.get("/fichier", headers={"Range": "bytes=2048-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    # En-tête invalide : ignoré
+    assert client.get("/fichier", headers={"Range": "lignes=1-2"}).status_code == 200
+
+
+def test_head(client):
+    response = client.head("/fichier")
+    assert response.status_code == 200 and response.content == b""
+    assert response.headers["content-length"] == "1024"
+
+    response = client.head("/fichier", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206 and response.content == b""
+    assert response.headers["content-length"] == "10"
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+
+    response = client.head("/fichier", headers={"Range": "bytes=0-1,10-11"})
+    assert response.status_code == 206 and response.content == b""
+    assert int(response.headers["content-length"]) > 4
@@ -0,0 +1,37 @@
+"""
+Tests du temps d'import à froid du service de documents
+"""
+import sys
+import json
+import subprocess
+
+from backend.services.loader import HEAVY_MODULES
+from backend.tests.benchmarks import IMPORT_CASES, measure_import_time
+
+
+def _loaded_heavy_modules(statement):
+    code = (
+        f"import sys, json; {statement}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_does_not_load_heavy_modules():
+    assert _loaded_heavy_modules("import backend.app.main") == []
+
+
+def test_lazy_module_loads_on_first_use():
+    statement = "from backend.services import document_service as ds; ds.chardet.detect(b'abc')"
+    assert _loaded_heavy_modules(statement) == ["chardet"]
+
+
+def test_lazy_import_is_faster_than_prewarm():
+    lazy = min(measure_import_time(IMPORT_CASES["import[backend.app.main]"], repeat=2))
+    prewarmed = min(measure_import_time(IMPORT_CASES["import[backend.app.main+prewarm]"], repeat=2))
+    assert lazy < prewarmed
+
+
+def test_serverless_import_does_not_load_heavy_modules():
+    assert _loaded_heavy_modules("import backend.app.serverless") == []
@@ -0,0 +1,136 @@
+"""
+Tests des tâches asynchrones
+"""
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import JOBS_CONFIG, PREFLIGHT_CONFIG, RESULTS_CONFIG, SEARCH_CONFIG
+from backend.app.routes import extract, jobs
+from backend.services import job_service, worker_pool
+from backend.services.job_service import DONE, ERROR, clean_expired_jobs, connect, get_job, submit_job
+from backend.services.result_store import get_result_meta, store_result, ResultNotFound
+from backend.services.search_service import search
+from backend.tests.corpus import generate_csv
+
+
+def add(a, b):
+    return {"sum": a + b}
+
+
+def fail():
+    raise ValueError("échec volontaire")
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setitem(JOBS_CONFIG, "db_path", tmp_path / "jobs.db")
+    yield tmp_path / "jobs.db"
+    worker_pool.shutdown_executor()
+
+
+def _wait_for_job(job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job["status"] in (DONE, ERROR):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"Tâche {job_id} non terminée")
+
+
+def test_submit_and_get_job(jobs_db):
+    done_id = submit_job("addition", add, 2, 3)
+    failed_id = submit_job("echec", fail)
+
+    job = _wait_for_job(done_id)
+    assert job["status"] == DONE and job["kind"] == "addition"
+    assert job["result"] == {"sum": 5}
+    assert job["created_at"] <= job["started_at"] <= job["finished_at"]
+
+    job = _wait_for_job(failed_id)
+    assert job["status"] == ERROR and "échec volontaire" in job["error"]
+    assert get_job("inconnue") is None
+
+    app = FastAPI()
+    app.include_router(jobs.router)
+    client = TestClient(app)
+    assert client.get(f"/api/jobs/{done_id}").json()["result"] == {"sum": 5}
+    assert client.get("/api/jobs/inconnue").status_code == 404
+
+
+def test_clean_expired_jobs(jobs_db, tmp_path, monkeypatch):
+    monkeypatch.setitem(RESULTS_CONFIG, "dir", tmp_path / "results")
+    monkeypatch.setattr(job_service, "OUTPUT_DIR", str(tmp_path))
+    archive = tmp_path / "images.zip"
+    archive.write_bytes(b"zip")
+    stored = store_result(["texte"], "a.pdf")
+
+    now = time.time()
+    old = now - JOBS_CONFIG["ttl"] - 10
+    rows = [
+        ("rendu", DONE, old, old, {"download_url": "/api/download/images.zip"}),
+        ("texte", DONE, old, old, {"result_id": stored["result_id"]}),
+        ("recent", DONE, now, now, {"sum": 1}),
+        # Jamais terminée, mais trop ancienne pour être encore en cours
+        ("perdue", "running", old - JOBS_CONFIG["timeout"], None, None),
+        ("en-cours", "running", old, None, None),
+    ]
+    connection = connect(jobs_db)
+    with connection:
+        connection.executemany(
+            "INSERT INTO jobs (job_id, kind, status, created_at, finished_at, result) VALUES (?, 'test', ?, ?, ?, ?)",
+            [(job_id, status, created, finished, json.dumps(result) if result else None)
+             for job_id, status, created, finished, result in rows]
+        )
+    connection.close()
+
+    clean_expired_jobs(str(jobs_db))
+    connection = connect(jobs_db)
+    remaining = sorted(row[0] for row in connection.execute("SELECT job_id FROM jobs"))
+    connection.close()
+    assert remaining == ["en-cours", "recent"]
+    assert not archive.exists()
+    with pytest.raises(ResultNotFound):
+        get_result_meta(stored["result_id"])
+
+
+def test_extract_text_job_indexes_document(tmp_path, monkeypatch):
+    monkeypatch.setitem(RESULTS_CONFIG, "dir", tmp_path / "results")
+    monkeypatch.setitem(SEARCH_CONFIG, "db_path", str(tmp_path / "search.db"))
+    monkeypatch.setitem(SEARCH_CONFIG, "enabled", True)
+    source = tmp_path / "notes.txt"
+    source.write_text("compte rendu de la réunion budgétaire", encoding="utf-8")
+
+    result = job_service.extract_text_job(str(source), "notes.txt")
+    assert result["pages"] == 1 and result["results_url"] == f"/api/results/{result['result_id']}"
+    assert [hit["filename"] for hit in search("réunion budgétaire")] == ["notes.txt"]
+
+
+def test_extraction_accepted_as_job(tmp_path, monkeypatch):
+    submitted = []
+
+    def fake_submit(kind, func, *args):
+        submitted.append((kind, func, args))
+        return "0123456789abcdef"
+
+    monkeypatch.setattr(extract, "submit_job", fake_submit)
+    monkeypatch.setattr(extract, "UPLOADS_DIR", str(tmp_path))
+    monkeypatch.setitem(PREFLIGHT_CONFIG, "async_seconds", 0.0)
+    app = FastAPI()
+    app.include_router(extract.router)
+    client = TestClient(app)
+
+    path = tmp_path / "donnees.csv"
+    generate_csv(str(path), rows=20)
+    with open(path, "rb") as f:
+        response = client.post("/api/extract-text/", files={"file": ("donnees.csv", f, "text/csv")})
+    assert response.status_code == 202
+    assert response.headers["location"] == "/api/jobs/0123456789abcdef"
+    body = response.json()
+    assert body["status"] == "queued" and body["preflight"]["decision"] == "async"
+    kind, func, args = submitted[0]
+    assert kind == "extract-text" and func is job_service.extract_text_job and args[1] == "donnees.csv"
@@ -0,0 +1,36 @@
+"""
+Tests de l'extraction compacte de la mise en page
+"""
+import json
+
+from backend.services.layout_service import DocumentLayout, extract_layout_from_pdf
+from backend.tests.corpus import generate_pdf
+from backend.tests.layout_benchmark import run_layout_benchmark
+
+
+def test_layout_matches_dict_and_round_trips(tmp_path):
+    import fitz
+
+    path = generate_pdf(str(tmp_path / "doc.pdf"), pages=3, images_per_page=1)
+    layout = extract_layout_from_pdf(path)
+    assert layout.page_count == 3
+
+    with fitz.open(path) as doc:
+        expected = doc[1].get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+    spans = [span for block in expected["blocks"] for line in block["lines"] for span in line["spans"]]
+
+    record = json.loads(list(layout.iter_ndjson())[1])
+    assert record["page"] == 2
+    assert record["spans"]["text"] == [span["text"] for span in spans]
+    assert record["spans"]["font"] == [span["font"] for span in spans]
+    assert abs(record["spans"]["x1"][0] - spans[0]["bbox"][2]) < 0.01
+    assert record["lines"]["span_start"][-1] == len(spans)
+    assert record["blocks"]["line_start"][-1] == len(record["lines"]["x0"])
+
+    restored = DocumentLayout.from_bytes(layout.to_bytes())
+    assert [restored.page_record(i) for i in range(3)] == [layout.page_record(i) for i in range(3)]
+
+
+def test_layout_is_smaller_than_dict(tmp_path):
+    report = run_layout_benchmark(pages=20, pdf_path=str(tmp_path / "doc.pdf"))
+    assert report["compact"]["memory"] * 3 < report["dict"]["memory"]
@@ -0,0 +1,31 @@
+"""
+Tests des utilitaires du test de charge HTTP
+"""
+from backend.tests.loadtest import encode_multipart, percentile, _peak_rss_during
+
+
+def test_percentile():
+    values = sorted([0.1, 0.2, 0.3, 0.4, 0.5])
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 100) == 0.5
+    assert percentile([0.7], 99) == 0.7
+    assert percentile([], 50) is None
+
+
+def test_encode_multipart(tmp_path):
+    path = tmp_path / "donnees.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    body, content_type = encode_multipart({"delimiter": ";"}, str(path))
+    boundary = content_type.split("boundary=")[1]
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+    assert b'name="delimiter"\r\n\r\n;\r\n' in body
+    assert b'filename="donnees.csv"' in body and b"a,b\n1,2\n" in body
+
+
+def test_peak_rss_attribution():
+    samples = [(0.0, 100), (1.0, 300), (2.0, 200), (3.0, 150)]
+    assert _peak_rss_during(samples, [(0.5, 1.5)]) == 300
+    # Une requête plus courte que la période d'échantillonnage prend l'échantillon suivant
+    assert _peak_rss_during(samples, [(2.1, 2.2)]) == 150
+    assert _peak_rss_during(samples, []) == 0
@@ -0,0 +1,124 @@
+"""
+Tests du prétraitement OCR et du benchmark de débit
+"""
+import io
+
+import fitz
+import pytest
+from PIL import Image
+
+from backend.app.config import OCR_CONFIG
+from backend.services import ocr_service
+from backend.services.document_service import _extract_pdf_pages_hybrid, page_needs_ocr
+from backend.tests.corpus import generate_scanned_image
+from backend.tests.ocr_benchmark import ocr_available, run_ocr_benchmark
+
+
+def test_otsu_threshold_separates_two_levels():
+    histogram = [0] * 256
+    histogram[30] = 1000
+    histogram[220] = 3000
+    threshold = ocr_service.otsu_threshold(histogram)
+    assert 30 <= threshold < 220
+
+
+def test_estimate_skew_recovers_angle(tmp_path):
+    path = generate_scanned_image(str(tmp_path / "scan.png"), skew=3.0, width=1240, height=1754)
+    with Image.open(path) as image:
+        angle = ocr_service.estimate_skew(image.convert("L"), max_angle=5.0)
+    assert angle == pytest.approx(-3.0, abs=1.0)
+
+
+def test_preprocess_downscales_and_binarizes(tmp_path):
+    path = generate_scanned_image(str(tmp_path / "scan.png"), dpi=600, width=2000, height=2800)
+    with Image.open(path) as image:
+        result = ocr_service.preprocess_image(image, target_dpi=300, max_dimension=5000, deskew=False)
+    assert result.mode == "L"
+    assert max(result.size) == 1400
+    assert set(result.getdata()) <= {0, 255}
+
+
+def test_split_frames_multipage_tiff(tmp_path):
+    path = generate_scanned_image(str(tmp_path / "scan.tif"), width=400, height=560, lines=5, pages=3)
+    assert len(ocr_service.split_frames(path)) == 3
+    single = generate_scanned_image(str(tmp_path / "scan.png"), width=400, height=560, lines=5)
+    assert ocr_service.split_frames(single) == []
+
+
+def test_validate_lang():
+    assert ocr_service.validate_lang("fra+eng") == "fra+eng"
+    with pytest.raises(ValueError):
+        ocr_service.validate_lang("fra; rm -rf /")
+
+
+@pytest.mark.skipif(not ocr_available(), reason="aucun moteur OCR installé")
+def test_ocr_benchmark(tmp_path):
+    results = run_ocr_benchmark(images=2, corpus_dir=str(tmp_path))
+    assert results["pool"]["images_per_second"] > 0
+    assert results["legacy"]["images_per_second"] > 0
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("L", (width, height), 200).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _mixed_pdf(path):
+    """
+    Pages : 0 texte, 1 scan, 2 texte court, 3 scan avec couche texte partielle, 4 scan
+    (largeurs différentes pour reconnaître les pages rendues)
+    """
+    with fitz.open() as pdf:
+        for index, kind in enumerate(["text", "scan", "short", "partial", "scan"]):
+            page = pdf.new_page(width=300 + 10 * index, height=400)
+            if kind in ("scan", "partial"):
+                page.insert_image(page.rect, stream=_png(60, 80))
+            if kind == "text":
+                page.insert_text((20, 40), "Texte de la page avec une couche texte complète. " * 8)
+            elif kind == "short":
+                page.insert_text((20, 40), "Une courte note de bas de page.")
+            elif kind == "partial":
+                page.insert_text((20, 40), "Tampon 2024")
+        pdf.save(str(path))
+
+
+def test_page_needs_ocr_thresholds(tmp_path):
+    _mixed_pdf(tmp_path / "mixte.pdf")
+    with fitz.open(str(tmp_path / "mixte.pdf")) as pdf:
+        decisions = [page_needs_ocr(page, page.get_text(), 20, 0.8) for page in pdf]
+        assert decisions == [False, True, False, True, True]
+
+        # Seuil de caractères : la note courte (31 caractères) passe à l'OCR au-delà
+        short = pdf[2]
+        assert page_needs_ocr(short, short.get_text(), 40, 0.8)
+        # Seuil de couverture : l'image couvre toute la page, un seuil supérieur à 1 ne la retient pas
+        partial = pdf[3]
+        assert not page_needs_ocr(partial, partial.get_text(), 5, 1.01)
+        # Assez de texte : la couverture d'images n'est plus examinée
+        assert not page_needs_ocr(partial, "x" * 200, 20, 0.8)
+
+
+def test_hybrid_extraction_maps_ocr_pages(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_recognize_many(images, lang=None):
+        calls.append(len(images))
+        # La largeur de l'image rendue identifie la page
+        return [f"ocr {round(fitz.Pixmap(image).width * 72 / OCR_CONFIG['pdf_dpi'])}" for image in images]
+
+    monkeypatch.setattr(ocr_service, "recognize_many", fake_recognize_many)
+    monkeypatch.setitem(OCR_CONFIG, "workers", 1)
+    _mixed_pdf(tmp_path / "mixte.pdf")
+    with fitz.open(str(tmp_path / "mixte.pdf")) as pdf:
+        pages = _extract_pdf_pages_hybrid(pdf, "fra")
+        assert pages[0].startswith("Texte de la page") and pages[2].startswith("Une courte note")
+        assert [pages[1], pages[3], pages[4]] == ["ocr 310\n", "ocr 330\n", "ocr 340\n"]
+        # Lots de workers * 2 images
+        assert calls == [2, 1]
+
+        # Sous-ensemble de pages : les résultats suivent l'ordre de page_numbers
+        calls.clear()
+        pages = _extract_pdf_pages_hybrid(pdf, "fra", page_numbers=[4, 0, 1])
+        assert pages[0] == "ocr 340\n" and pages[1].startswith("Texte") and pages[2] == "ocr 310\n"
+        assert calls == [2]
@@ -0,0 +1,78 @@
+"""
+Tests du cache par page des textes extraits et des rendus PDF
+"""
+import os
+
+import fitz
+import pytest
+
+from backend.app.config import PAGE_CACHE_CONFIG
+from backend.services import page_cache
+from backend.services.document_service import extract_pages_from_pdf, convert_pdf_to_images
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setitem(PAGE_CACHE_CONFIG, "enabled", True)
+    monkeypatch.setitem(PAGE_CACHE_CONFIG, "render_dir", tmp_path / "rendus")
+
+
+def _write_pdf(path, texts):
+    with fitz.open() as doc:
+        for text in texts:
+            page = doc.new_page()
+            page.insert_text((72, 72), text)
+        doc.save(str(path))
+
+
+def test_revised_document_reuses_unchanged_pages(tmp_path):
+    texts = [f"Page numero {number}" for number in range(5)]
+    _write_pdf(tmp_path / "v1.pdf", texts)
+    texts[2] = "Page numero 2 revisee"
+    # Nouvelle version réécrite entièrement (numéros d'objets différents)
+    _write_pdf(tmp_path / "v2.pdf", ["Page de garde"] + texts)
+
+    stats = {}
+    first = extract_pages_from_pdf(str(tmp_path / "v1.pdf"), hybrid=False, stats=stats)
+    assert stats == {"pages": 5, "reused_pages": 0}
+
+    second = extract_pages_from_pdf(str(tmp_path / "v2.pdf"), hybrid=False, stats=stats)
+    assert stats == {"pages": 6, "reused_pages": 4}
+    assert "revisee" in second[3] and "garde" in second[0]
+    assert second[1:3] == first[0:2] and second[4:] == first[3:]
+
+    # Le mode d'extraction fait partie de la clé
+    extract_pages_from_pdf(str(tmp_path / "v1.pdf"), hybrid=False, stats=stats)
+    assert stats["reused_pages"] == 5
+
+
+def test_render_cache(tmp_path):
+    _write_pdf(tmp_path / "v1.pdf", ["Un", "Deux", "Trois"])
+    _write_pdf(tmp_path / "v2.pdf", ["Un", "Deux modifiee", "Trois"])
+
+    stats = {}
+    success, _, first = convert_pdf_to_images(str(tmp_path / "v1.pdf"), str(tmp_path / "a"), 1.0, stats=stats)
+    assert success and stats["reused_pages"] == 0
+    success, _, second = convert_pdf_to_images(str(tmp_path / "v2.pdf"), str(tmp_path / "b"), 1.0, stats=stats)
+    assert success and stats["reused_pages"] == 2
+    with open(first[0], "rb") as a, open(second[0], "rb") as b:
+        assert a.read() == b.read()
+
+    # Un autre facteur de rendu n'est pas repris
+    convert_pdf_to_images(str(tmp_path / "v1.pdf"), str(tmp_path / "c"), 1.5, stats=stats)
+    assert stats["reused_pages"] == 0
+
+
+def test_texts_share_the_size_budget(tmp_path):
+    fingerprints = [f"{number:064x}" for number in range(4)]
+    for fingerprint in fingerprints:
+        page_cache.put_text(fingerprint, "text", "x" * 1000)
+    assert page_cache.get_texts(fingerprints, "text") == ["x" * 1000] * 4
+    assert page_cache.get_texts(fingerprints, "hybrid") == [None] * 4
+
+    # Les entrées les moins récemment utilisées partent en premier
+    for age, fingerprint in enumerate(reversed(fingerprints)):
+        path = page_cache._text_path(fingerprint, "text")
+        os.utime(path, (1000 + age, 1000 + age))
+    page_cache.prune_renders(max_bytes=2500)
+    assert page_cache.get_texts(fingerprints, "text") == ["x" * 1000] * 2 + [None] * 2
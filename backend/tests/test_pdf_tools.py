@@ -0,0 +1,50 @@
+"""
+Tests du découpage, de la fusion et de l'optimisation des PDF
+"""
+import pytest
+
+from backend.services.pdf_tools import parse_page_ranges, iter_split_pdf, merge_pdfs, optimize_pdf
+from backend.tests.corpus import generate_pdf
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges("1-3, 5,8-", 10) == [(0, 2), (4, 4), (7, 9)]
+    assert parse_page_ranges("-2", 10) == [(0, 1)]
+    for spec in ("0-2", "3-1", "11", "a", "1,,2"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec, 10)
+
+
+def test_split_by_ranges_and_size(tmp_path):
+    import fitz
+
+    path = generate_pdf(str(tmp_path / "doc.pdf"), pages=20, images_per_page=0)
+    parts = list(iter_split_pdf(path, ranges="1-5,6,7-"))
+    assert [(first, last) for first, last, _ in parts] == [(1, 5), (6, 6), (7, 20)]
+    with fitz.open(stream=parts[2][2]) as part:
+        assert part.page_count == 14
+
+    max_bytes = 12000
+    parts = list(iter_split_pdf(path, max_bytes=max_bytes))
+    assert parts[0][0] == 1 and parts[-1][1] == 20
+    assert all(previous[1] + 1 == following[0] for previous, following in zip(parts, parts[1:]))
+    assert all(len(data) <= max_bytes for first, last, data in parts if first != last)
+    assert 1 < len(parts) < 20
+
+
+def test_merge_then_optimize_deduplicates_and_linearizes(tmp_path):
+    import fitz
+
+    path = generate_pdf(str(tmp_path / "doc.pdf"), pages=3, images_per_page=1)
+    merged_path = str(tmp_path / "fusion.pdf")
+    stats = merge_pdfs([path, path], merged_path)
+    assert stats["pages"] == 6
+
+    optimized_path = str(tmp_path / "optimise.pdf")
+    stats = optimize_pdf(merged_path, optimized_path)
+    # L'image, présente dans les deux documents fusionnés, n'est plus conservée qu'une fois
+    assert stats["reduction"] > 0.3
+    assert stats["output_size"] < stats["input_size"]
+    with fitz.open(optimized_path) as doc:
+        assert doc.page_count == 6
+        assert doc.is_fast_webaccess
@@ -0,0 +1,114 @@
+"""
+Tests de l'estimation préalable des rendus et extractions
+"""
+import copy
+
+import fitz
+import pytest
+
+from backend.app.config import PREFLIGHT_CONFIG
+from backend.services import preflight
+from backend.services.preflight import (
+    ACCEPT, ASYNC, DOWNSCALE, REJECT, PreflightRejected, _decide, estimate_extraction, estimate_pdf_render,
+    preflight_extraction
+)
+from backend.tests.corpus import generate_csv, generate_pdf, generate_xlsx
+
+
+@pytest.fixture
+def config():
+    return copy.deepcopy(PREFLIGHT_CONFIG)
+
+
+@pytest.mark.parametrize("estimate, decision", [
+    ({"pages": 10, "estimated_memory": 10, "estimated_seconds": 1}, ACCEPT),
+    ({"pages": 6000, "estimated_memory": 10, "estimated_seconds": 1}, REJECT),
+    ({"estimated_memory": 3 * 1024 ** 3, "estimated_seconds": 1}, REJECT),
+    ({"estimated_memory": 10, "estimated_seconds": 1000}, REJECT),
+    ({"estimated_memory": 10, "estimated_seconds": 60}, ASYNC),
+    # Une décision déjà prise (rendu réduit) est conservée si les limites sont respectées
+    ({"estimated_memory": 10, "estimated_seconds": 1, "decision": DOWNSCALE, "reason": "réduit"}, DOWNSCALE),
+])
+def test_decide(config, estimate, decision):
+    result = _decide(estimate, config)
+    assert result["decision"] == decision
+    assert (result["reason"] is None) == (decision == ACCEPT)
+
+
+def _blank_pdf(path, pages, width=595, height=842):
+    with fitz.open() as pdf:
+        for _ in range(pages):
+            pdf.new_page(width=width, height=height)
+        pdf.save(str(path))
+    return str(path)
+
+
+def test_estimate_pdf_render(tmp_path, config):
+    path = _blank_pdf(tmp_path / "a4.pdf", pages=3)
+    estimate = estimate_pdf_render(path, config=config)
+    assert estimate["decision"] == ACCEPT and estimate["pages"] == 3
+    page_pixels = 595 * 842 * 2.0 ** 2
+    assert estimate["total_pixels"] == pytest.approx(3 * page_pixels, rel=0.01)
+    assert estimate["estimated_memory"] == pytest.approx(page_pixels * config["memory"]["pixel"], rel=0.01)
+
+    # Page trop grande au facteur demandé : rendu réduit
+    config["max_page_pixels"] = int(page_pixels / 4)
+    estimate = estimate_pdf_render(path, config=config)
+    assert estimate["decision"] == DOWNSCALE and estimate["min_zoom"] < 2.0
+
+    # Facteur réduit sous min_render_zoom : refus
+    config["max_page_pixels"] = 1000
+    assert estimate_pdf_render(path, config=config)["decision"] == REJECT
+
+    config = copy.deepcopy(PREFLIGHT_CONFIG)
+    config["max_pages"] = 2
+    estimate = estimate_pdf_render(path, config=config)
+    assert estimate["decision"] == REJECT and "pages" in estimate["reason"]
+
+    config = copy.deepcopy(PREFLIGHT_CONFIG)
+    config["async_seconds"] = 0.001
+    assert estimate_pdf_render(path, config=config)["decision"] == ASYNC
+
+
+def test_estimate_extraction(tmp_path, config):
+    pdf_path = str(tmp_path / "doc.pdf")
+    generate_pdf(pdf_path, pages=4, images_per_page=0)
+    estimate = estimate_extraction(pdf_path, "pdf", config)
+    assert estimate["pages"] == 4 and estimate["decision"] == ACCEPT
+    assert estimate["estimated_seconds"] == pytest.approx(4 / config["throughput"]["pdf_pages"])
+
+    xlsx_path = str(tmp_path / "classeur.xlsx")
+    generate_xlsx(xlsx_path, rows=50, cols=4, sheets=2)
+    estimate = estimate_extraction(xlsx_path, "xlsx", config)
+    assert estimate["cells"] >= 2 * 50 * 4
+
+    csv_path = str(tmp_path / "donnees.csv")
+    generate_csv(csv_path, rows=100)
+    estimate = estimate_extraction(csv_path, "csv", config)
+    assert estimate["estimated_memory"] == estimate["size"] * config["memory"]["csv_byte"]
+
+    # Formats sans estimation : traitement normal
+    image_path = tmp_path / "scan.png"
+    image_path.write_bytes(b"\x89PNG")
+    assert estimate_extraction(str(image_path), "png", config)["decision"] == ACCEPT
+
+    config["memory"]["csv_byte"] = 10 ** 9
+    assert estimate_extraction(csv_path, "csv", config)["decision"] == REJECT
+
+
+def test_preflight_extraction(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "donnees.csv")
+    generate_csv(csv_path, rows=100)
+    monkeypatch.setitem(PREFLIGHT_CONFIG, "max_seconds", 0.0)
+    with pytest.raises(PreflightRejected) as rejected:
+        preflight_extraction(csv_path, "csv")
+    assert rejected.value.estimate["decision"] == REJECT
+
+    # Fichier illisible : l'estimation est abandonnée, pas l'extraction
+    broken = tmp_path / "casse.pdf"
+    broken.write_bytes(b"pas un pdf")
+    assert preflight_extraction(str(broken), "pdf") == {"decision": ACCEPT}
+
+    monkeypatch.setitem(PREFLIGHT_CONFIG, "enabled", False)
+    assert preflight_extraction(csv_path, "csv") == {"decision": ACCEPT}
+    assert preflight.preflight_render(str(broken))["decision"] == ACCEPT
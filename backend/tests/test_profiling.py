@@ -0,0 +1,99 @@
+"""
+Tests du profilage à la demande
+"""
+import os
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import PROFILING_CONFIG
+from backend.app.routes import profiling
+from backend.utils.profiling import ProfilingMiddleware, get_current_session, profiled_call
+
+TOKEN = "jeton-secret"
+
+
+def _work():
+    return sum(i * i for i in range(10000))
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, config=PROFILING_CONFIG)
+    app.include_router(profiling.router)
+
+    @app.get("/travail")
+    async def travail():
+        return {"resultat": profiled_call(_work)}
+
+    return app
+
+
+@pytest.fixture
+def enabled(tmp_path, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "enabled", True)
+    monkeypatch.setitem(PROFILING_CONFIG, "always", False)
+    monkeypatch.setitem(PROFILING_CONFIG, "admin_token", TOKEN)
+    monkeypatch.setitem(PROFILING_CONFIG, "output_dir", tmp_path / "profiles")
+    return TestClient(_app())
+
+
+def test_profiled_request_returns_profile_id(enabled):
+    response = enabled.get("/travail", headers={"X-Profile": TOKEN})
+    assert response.status_code == 200 and response.json()["resultat"] == _work()
+    profile_id = response.headers["X-Profile-Id"]
+
+    profile_path = PROFILING_CONFIG["output_dir"] / f"{profile_id}.prof"
+    functions = {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+    assert "_work" in functions
+
+
+def test_profile_is_served_with_the_token(enabled):
+    profile_id = enabled.get("/travail", headers={"X-Profile": TOKEN}).headers["X-Profile-Id"]
+
+    response = enabled.get(f"/api/profiles/{profile_id}", headers={"X-Profile": TOKEN})
+    assert response.status_code == 200
+    assert response.content == (PROFILING_CONFIG["output_dir"] / f"{profile_id}.prof").read_bytes()
+
+    response = enabled.get(f"/api/profiles/{profile_id}?format=text", headers={"X-Profile": TOKEN})
+    assert response.status_code == 200 and "_work" in response.text
+
+    assert enabled.get(f"/api/profiles/{profile_id}", headers={"X-Profile": "mauvais"}).status_code == 403
+    assert enabled.get(f"/api/profiles/{profile_id}").status_code == 403
+    assert enabled.get("/api/profiles/" + "0" * 32, headers={"X-Profile": TOKEN}).status_code == 404
+    assert enabled.get("/api/profiles/..%2Fconfig", headers={"X-Profile": TOKEN}).status_code == 404
+
+
+def test_requests_without_valid_token_are_not_profiled(enabled):
+    for headers in ({}, {"X-Profile": "mauvais"}, {"X-Profile": ""}):
+        response = enabled.get("/travail", headers=headers)
+        assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+    assert not os.path.exists(PROFILING_CONFIG["output_dir"])
+
+
+def test_empty_admin_token_disables_header_opt_in(enabled, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "admin_token", "")
+    response = enabled.get("/travail", headers={"X-Profile": ""})
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_always_profiles_every_request(enabled, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "always", True)
+    assert "X-Profile-Id" in enabled.get("/travail").headers
+
+
+def test_disabled_mode_is_a_no_op(tmp_path, monkeypatch):
+    monkeypatch.setitem(PROFILING_CONFIG, "enabled", False)
+    monkeypatch.setitem(PROFILING_CONFIG, "admin_token", TOKEN)
+    monkeypatch.setitem(PROFILING_CONFIG, "output_dir", tmp_path / "profiles")
+    app = FastAPI()
+    app.include_router(profiling.router)
+    client = TestClient(app)
+
+    # Sans session, profiled_call appelle directement la fonction
+    assert get_current_session() is None
+    assert profiled_call(_work) == _work()
+    assert client.get("/api/profiles/" + "0" * 32, headers={"X-Profile": TOKEN}).status_code == 404
+    assert not os.path.exists(PROFILING_CONFIG["output_dir"])
@@ -0,0 +1,121 @@
+"""
+Tests du stockage paginé des résultats d'extraction
+"""
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import RESULTS_CONFIG
+from backend.app.routes import results
+from backend.services.shared_cache import SharedCache
+from backend.utils import download
+from backend.services.result_store import (
+    ResultNotFound, clean_expired_results, get_result_meta, read_slice, store_result
+)
+
+# Caractères de 1, 2, 3 et 4 octets en UTF-8
+PAGES = ["abc é", "€ page deux 😀", "", "fin 😀€é"]
+
+
+@pytest.fixture(autouse=True)
+def results_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(RESULTS_CONFIG, "dir", tmp_path / "results")
+    return tmp_path / "results"
+
+
+def _read_all(result_id, limit):
+    parts, cursor = [], 0
+    while cursor is not None:
+        page = read_slice(result_id, cursor, limit)
+        # Chaque tranche se décode seule : elle ne coupe aucun caractère
+        assert page["text"]
+        parts.append(page["text"])
+        cursor = page["next_cursor"]
+    return parts
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 7, 64])
+def test_slices_follow_character_boundaries(limit):
+    meta = store_result(PAGES, "doc.pdf")
+    assert meta["total_size"] == len("".join(PAGES).encode("utf-8"))
+    parts = _read_all(meta["result_id"], limit)
+    assert "".join(parts) == "".join(PAGES)
+    for part in parts:
+        # Au plus limit octets, sauf pour un caractère plus long que la limite
+        assert len(part.encode("utf-8")) <= limit or len(part) == 1
+
+
+def test_cursor_inside_a_character():
+    meta = store_result(PAGES)
+    data = "".join(PAGES).encode("utf-8")
+    for cursor in range(len(data)):
+        if data[cursor] & 0xC0 == 0x80:
+            with pytest.raises(ValueError):
+                read_slice(meta["result_id"], cursor, 8)
+        else:
+            assert read_slice(meta["result_id"], cursor, 8)["cursor"] == cursor
+    with pytest.raises(ValueError):
+        read_slice(meta["result_id"], len(data) + 1)
+    assert read_slice(meta["result_id"], len(data)) == {
+        "text": "", "cursor": len(data), "next_cursor": None, "first_page": 4, "last_page": 4
+    }
+
+
+def test_slice_pages():
+    meta = store_result(PAGES)
+    first_size = len(PAGES[0].encode("utf-8"))
+    page = read_slice(meta["result_id"], 0, first_size)
+    assert page["text"] == PAGES[0] and (page["first_page"], page["last_page"]) == (1, 1)
+    page = read_slice(meta["result_id"], first_size, 1000)
+    # La page 3 est vide : la tranche va de la page 2 à la page 4
+    assert (page["first_page"], page["last_page"]) == (2, 4)
+
+
+def test_empty_and_unknown_results():
+    meta = store_result([""])
+    assert read_slice(meta["result_id"]) == {
+        "text": "", "cursor": 0, "next_cursor": None, "first_page": 1, "last_page": 1
+    }
+    with pytest.raises(ResultNotFound):
+        read_slice("0" * 32)
+    with pytest.raises(ResultNotFound):
+        get_result_meta("../../etc")
+
+
+def test_clean_expired_results(results_dir, monkeypatch):
+    old = store_result(["ancien"])
+    old_time = time.time() - RESULTS_CONFIG["ttl"] - 10
+    os.utime(results_dir / old["result_id"] / "meta.json", (old_time, old_time))
+    (results_dir / "autre").mkdir()
+
+    recent = store_result(["récent"])
+    assert sorted(os.listdir(results_dir)) == sorted(["autre", recent["result_id"]])
+
+    monkeypatch.setitem(RESULTS_CONFIG, "ttl", -1)
+    clean_expired_results()
+    assert os.listdir(results_dir) == ["autre"]
+
+
+def test_results_routes(tmp_path, monkeypatch):
+    cache = SharedCache(tmp_path / "cache.db")
+    monkeypatch.setattr(download, "get_shared_cache", lambda: cache)
+    app = FastAPI()
+    app.include_router(results.router)
+    client = TestClient(app)
+    meta = store_result(PAGES, "doc.pdf")
+
+    response = client.get(f"/api/results/{meta['result_id']}", params={"limit": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["text"] == "abc" and body["next_cursor"] == 3 and body["pages"] == 4
+
+    assert client.get(f"/api/results/{meta['result_id']}", params={"cursor": 5}).status_code == 400
+    assert client.get("/api/results/inconnu").status_code == 404
+
+    response = client.get(f"/api/results/{meta['result_id']}/text")
+    assert response.status_code == 200
+    assert response.content.decode("utf-8") == "".join(PAGES)
+    assert 'filename="doc.txt"' in response.headers["content-disposition"]
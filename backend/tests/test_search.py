@@ -0,0 +1,136 @@
+"""
+Tests de l'index de recherche plein texte
+"""
+import time
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import SEARCH_CONFIG
+from backend.app.routes import search as search_routes
+from backend.services import search_service
+from backend.services.search_service import SearchIndexer, connect, purge_expired, search
+
+
+def _document(tmp_path, name, content=None):
+    path = tmp_path / name
+    path.write_bytes((content or name).encode())
+    return str(path)
+
+
+def _index(db_path, documents):
+    indexer = SearchIndexer(db_path=db_path, flush_interval=0.05)
+    indexer.start()
+    for file_path, filename, pages in documents:
+        indexer.enqueue(file_path, filename, pages)
+    indexer.stop()
+    assert not indexer.is_alive()
+
+
+def test_indexer_deduplicates(tmp_path):
+    db_path = str(tmp_path / "search.db")
+    source = _document(tmp_path, "a.pdf")
+    copy = _document(tmp_path, "b.pdf", "a.pdf")
+    _index(db_path, [
+        (source, "a.pdf", ["facture fournisseur", "   "]),
+        (copy, "copie.pdf", ["facture fournisseur"]),
+    ])
+
+    connection = connect(db_path)
+    try:
+        assert connection.execute("SELECT filename, pages FROM documents").fetchall() == [("a.pdf", 2)]
+        # Les pages vides ne sont pas indexées
+        assert connection.execute("SELECT COUNT(*) FROM pages_fts").fetchone()[0] == 1
+    finally:
+        connection.close()
+
+
+def test_batch_deadline(tmp_path):
+    indexer = SearchIndexer(db_path=str(tmp_path / "search.db"), batch_size=100, flush_interval=0.3)
+    stop = threading.Event()
+
+    def trickle():
+        # Un document toutes les 0,1 s, plus souvent que flush_interval
+        while not stop.is_set():
+            indexer.enqueue("x", "x", [])
+            time.sleep(0.1)
+
+    feeder = threading.Thread(target=trickle)
+    feeder.start()
+    try:
+        started = time.monotonic()
+        batch = indexer._next_batch()
+        elapsed = time.monotonic() - started
+    finally:
+        stop.set()
+        feeder.join()
+    # Le lot se ferme flush_interval après le premier document, même si la file reste alimentée
+    assert 2 <= len(batch) <= 5
+    assert elapsed < 0.6
+
+
+def test_search_ranking_and_snippets(tmp_path):
+    db_path = str(tmp_path / "search.db")
+    _index(db_path, [
+        (_document(tmp_path, "a.pdf"), "a.pdf", ["contrat de location", "le contrat contrat contrat est signé"]),
+        (_document(tmp_path, "b.pdf"), "b.pdf", ["aucun rapport"]),
+    ])
+
+    hits = search("contrat", db_path=db_path)
+    assert [(hit["filename"], hit["page"]) for hit in hits] == [("a.pdf", 2), ("a.pdf", 1)]
+    assert hits[0]["score"] >= hits[1]["score"]
+    assert "[contrat]" in hits[0]["snippet"]
+    # Tous les mots sont requis, les guillemets ne cassent pas la requête
+    assert [hit["page"] for hit in search('location "contrat', db_path=db_path)] == [1]
+    assert search("introuvable", db_path=db_path) == []
+    assert search("   ", db_path=db_path) == []
+    assert len(search("contrat", limit=1, offset=1, db_path=db_path)) == 1
+
+
+def test_purge_expired(tmp_path):
+    db_path = str(tmp_path / "search.db")
+    _index(db_path, [
+        (_document(tmp_path, "old.pdf"), "old.pdf", ["ancien contrat"]),
+        (_document(tmp_path, "new.pdf"), "new.pdf", ["nouveau contrat"]),
+    ])
+    connection = connect(db_path)
+    try:
+        old = (datetime.now() - timedelta(days=2)).isoformat()
+        with connection:
+            connection.execute("UPDATE documents SET indexed_at = ? WHERE filename = 'old.pdf'", (old,))
+        assert purge_expired(connection, retention=24 * 3600) == 1
+    finally:
+        connection.close()
+    assert [hit["filename"] for hit in search("contrat", db_path=db_path)] == ["new.pdf"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "search.db")
+    monkeypatch.setitem(SEARCH_CONFIG, "db_path", db_path)
+    _index(db_path, [(_document(tmp_path, "a.pdf"), "a.pdf", ["budget prévisionnel"])])
+    app = FastAPI()
+    app.include_router(search_routes.router)
+    return TestClient(app)
+
+
+def test_search_route(client, monkeypatch):
+    response = client.get("/api/search", params={"q": "budget"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["query"] == "budget"
+    assert [hit["filename"] for hit in body["hits"]] == ["a.pdf"]
+
+    assert client.get("/api/search", params={"q": "budget", "limit": 0}).status_code == 422
+    monkeypatch.setitem(SEARCH_CONFIG, "enabled", False)
+    assert client.get("/api/search", params={"q": "budget"}).status_code == 404
+
+
+def test_index_document_disabled(monkeypatch):
+    monkeypatch.setitem(SEARCH_CONFIG, "enabled", False)
+    monkeypatch.setattr(search_service, "_indexer", None)
+    search_service.index_document("x", "x", ["texte"])
+    assert search_service._indexer is None
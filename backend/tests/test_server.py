@@ -0,0 +1,146 @@
+"""
+Tests du lanceur préfork et du cache partagé entre les workers
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+import urllib.request
+
+import pytest
+
+from backend import server
+from backend.app.config import SERVER_CONFIG
+from backend.services.shared_cache import SharedCache
+
+fork_only = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+
+
+def test_shared_cache_ttl(tmp_path, monkeypatch):
+    cache = SharedCache(tmp_path / "cache.db", default_ttl=60)
+    cache.set("a", {"valeur": [1, 2]})
+    cache.set("b", "court", ttl=5)
+    assert cache.get("a") == {"valeur": [1, 2]}
+    assert cache.get("absente", "défaut") == "défaut"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == {"valeur": [1, 2]}
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("a", "expirée") == "expirée"
+
+    monkeypatch.undo()
+    cache.set("a", 1)
+    cache.delete("a")
+    assert cache.get("a") is None
+    # Une seconde instance (autre worker) lit la même base
+    cache.set("c", "partagée")
+    assert SharedCache(tmp_path / "cache.db").get("c") == "partagée"
+
+
+@fork_only
+def test_shared_cache_reconnects_after_fork(tmp_path):
+    cache = SharedCache(tmp_path / "cache.db")
+    cache.set("avant", "parent")
+    parent_connection = cache._local.connection
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            # La connexion héritée n'est pas réutilisée dans le processus enfant
+            ok = cache.get("avant") == "parent" and cache._local.connection is not parent_connection
+            cache.set("apres", os.getpid())
+            code = 0 if ok else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache._local.connection is parent_connection
+    assert cache.get("apres") == pid
+
+
+_ARBITER_SCRIPT = """
+import os
+import sys
+from backend.server import Arbiter, bind_socket
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            await send({"type": message["type"] + ".complete"})
+            if message["type"] == "lifespan.shutdown":
+                return
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": str(os.getpid()).encode()})
+
+sock = bind_socket("127.0.0.1", 0)
+print(sock.getsockname()[1], flush=True)
+sys.exit(Arbiter(app, sock, 1, max_requests=2, max_requests_jitter=0, graceful_timeout=2,
+                 log_level="warning").run())
+"""
+
+
+def _get(url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return int(response.read())
+        except OSError:
+            # Worker en cours de remplacement
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+@fork_only
+def test_arbiter_replaces_recycled_workers():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    process = subprocess.Popen([sys.executable, "-c", _ARBITER_SCRIPT], cwd=root, stdout=subprocess.PIPE,
+                               text=True)
+    try:
+        port = int(process.stdout.readline())
+        pids = []
+        for _ in range(6):
+            pids.append(_get(f"http://127.0.0.1:{port}/"))
+            # uvicorn vérifie limit_max_requests toutes les 0,1 s
+            time.sleep(0.3)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        code = process.wait(timeout=30)
+
+    # Chaque worker sert au plus max_requests requêtes, puis il est remplacé
+    assert len(set(pids)) >= 3
+    assert all(pids.count(pid) <= 2 for pid in set(pids))
+    assert process.pid not in pids
+    assert code == 0
+
+
+@fork_only
+def test_graceful_timeout_zero_is_kept(monkeypatch):
+    arbiters = []
+
+    class FakeArbiter:
+        def __init__(self, app, sock, workers, max_requests, jitter, graceful_timeout, log_level):
+            arbiters.append({"workers": workers, "graceful_timeout": graceful_timeout})
+
+        def run(self):
+            return 0
+
+    class FakeSocket:
+        def close(self):
+            pass
+
+    monkeypatch.setenv("WORKER_POOL_SIZE", "1")
+    monkeypatch.setattr("backend.services.loader.prewarm", lambda: None)
+    monkeypatch.setattr(server, "Arbiter", FakeArbiter)
+    monkeypatch.setattr(server, "bind_socket", lambda host, port: FakeSocket())
+
+    assert server.main(["--workers", "2", "--graceful-timeout", "0"]) == 0
+    assert server.main(["--workers", "2"]) == 0
+    assert arbiters[0] == {"workers": 2, "graceful_timeout": 0}
+    assert arbiters[1]["graceful_timeout"] == SERVER_CONFIG["graceful_timeout"]
@@ -0,0 +1,127 @@
+"""
+Tests du mode serverless (événements simulés, comme sur Vercel)
+"""
+import io
+import os
+import time
+import json
+import base64
+import zipfile
+import multiprocessing
+
+from backend.app import serverless
+from backend.app.config import TEMP_DIR
+from backend.utils.file_utils import PDF_FORMAT
+from backend.tests.corpus import generate_pdf, generate_csv, generate_docx
+
+
+class _Context:
+    """
+    Contexte d'invocation simulé
+    """
+
+    def __init__(self, remaining):
+        self.deadline = time.monotonic() + remaining
+
+    def get_remaining_time_in_millis(self):
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def _event(path, filename, data, fields=None):
+    boundary = "limite-serverless"
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in (fields or {}).items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b"\r\n"
+    )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode()
+    return {
+        "httpMethod": "POST",
+        "path": path,
+        "headers": {"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        "body": base64.b64encode(body).decode("ascii"),
+        "isBase64Encoded": True,
+    }
+
+
+def _invocations():
+    return [name for name in os.listdir(TEMP_DIR) if name.startswith("invocation-")]
+
+
+def test_extract_text_and_render_images(tmp_path):
+    path = generate_pdf(str(tmp_path / "doc.pdf"), pages=2, images_per_page=0)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    response = serverless.handle_event(_event("/api/extract-text/", "doc.pdf", data), _Context(30))
+    assert response["statusCode"] == 200 and not response["isBase64Encoded"]
+    assert json.loads(response["body"])["text"].strip()
+
+    # Ancien chemin des conversions
+    response = serverless.handle_event(_event("/api/convert-pdf-to-images", "doc.pdf", data), _Context(30))
+    assert response["statusCode"] == 200 and response["isBase64Encoded"]
+    with zipfile.ZipFile(io.BytesIO(base64.b64decode(response["body"]))) as archive:
+        assert archive.namelist() == ["page_1.png", "page_2.png"]
+    assert _invocations() == []
+
+
+def test_docx_to_pdf_without_word_or_libreoffice(tmp_path):
+    # Environnement serverless : ni Word ni LibreOffice, conversion de secours (reportlab)
+    path = generate_docx(str(tmp_path / "rapport.docx"), paragraphs=10, tables=0)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    response = serverless.handle_event(_event("/api/convert/docx-to-pdf", "rapport.docx", data), _Context(30))
+    assert response["statusCode"] == 200
+    assert base64.b64decode(response["body"]).startswith(b"%PDF")
+
+
+def test_guards(tmp_path, monkeypatch):
+    path = generate_csv(str(tmp_path / "data.csv"), rows=50)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    def status(event, remaining=30):
+        response = serverless.handle_event(event, _Context(remaining))
+        return response["statusCode"], json.loads(response["body"]).get("detail")
+
+    assert status(_event("/api/extract-text", "image.png", b"\x89PNG"))[0] == 400
+    # Même validation et mêmes messages que les routes
+    assert status(_event("/api/convert/pdf-to-docx", "data.csv", data)) == (400, PDF_FORMAT[1])
+    invalid = _event("/api/extract-text", "data.csv", data)
+    invalid["headers"]["Content-Type"] = "multipart/form-data; boundary=autre-limite"
+    assert status(invalid)[0] == 400
+    assert status(_event("/api/extract-layout", "data.csv", data))[0] == 404
+
+    monkeypatch.setitem(serverless.SERVERLESS_CONFIG, "max_upload", 1000)
+    assert status(_event("/api/extract-text", "data.csv", data))[0] == 413
+    monkeypatch.setitem(serverless.SERVERLESS_CONFIG, "max_upload", 10**7)
+
+    # Traitement qui dépasse l'échéance de l'invocation : abandonné
+    monkeypatch.setattr(serverless.document_service, "extract_text_from_file", lambda *args, **kwargs: time.sleep(3))
+    started = time.monotonic()
+    assert status(_event("/api/extract-text", "data.csv", data), remaining=1.5)[0] == 504
+    assert time.monotonic() - started < 1.5
+    # Le processus de traitement est tué : rien ne continue dans l'instance, ni n'écrit dans le dossier supprimé
+    assert multiprocessing.active_children() == [] and _invocations() == []
+
+    # Arrêt brutal du processus de traitement
+    monkeypatch.setattr(serverless.document_service, "extract_text_from_file", lambda *args, **kwargs: os._exit(1))
+    assert status(_event("/api/extract-text", "data.csv", data))[0] == 500
+
+
+def test_parse_multipart():
+    event = _event("/api/extract-text", "résumé.pdf", b"%PDF\r\n--pas-une-limite", {"lang": "fra"})
+    content_type = event["headers"]["Content-Type"]
+    fields, files = serverless.parse_multipart(base64.b64decode(event["body"]), content_type)
+    assert fields == {"lang": "fra"}
+    assert files == {"file": ("résumé.pdf", b"%PDF\r\n--pas-une-limite")}
+
+
+def test_home_page_is_shared():
+    response = serverless.handle_event({"httpMethod": "GET", "path": "/"})
+    assert response["statusCode"] == 200
+    assert serverless.SERVERLESS_NOTICE in response["body"]
@@ -0,0 +1,152 @@
+"""
+Tests des workers supervisés
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import pytest
+
+from backend.services import ocr_service
+from backend.services.document_service import extract_pages_from_pdf
+from backend.services.supervisor import (
+    KILLED, RECYCLED, WorkerSupervisor, SupervisedExecutor, WorkerTimeout, WorkerMemoryExceeded, WorkerCrashed
+)
+
+
+# Fonctions exécutées dans les workers (définies au niveau du module pour être transmises)
+
+def _pid(stats=None):
+    if stats is not None:
+        stats["pid"] = os.getpid()
+    return os.getpid()
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def _allocate(megabytes):
+    data = b"x" * (megabytes * 2**20)
+    time.sleep(30)
+    return len(data)
+
+
+def _crash():
+    os._exit(3)
+
+
+def _fail():
+    raise ValueError("document illisible")
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = WorkerSupervisor(workers=1, timeout=30, max_memory=0, max_tasks=100, check_interval=0.05)
+    yield supervisor
+    supervisor.shutdown()
+
+
+def test_results_exceptions_and_stats(supervisor):
+    stats = {}
+    pid = supervisor.run(_pid, kwargs={"stats": stats})
+    assert pid != os.getpid() and stats == {"pid": pid}
+    with pytest.raises(ValueError, match="document illisible"):
+        supervisor.run(_fail)
+    # Une exception de la fonction ne remplace pas le worker
+    assert supervisor.run(_pid) == pid
+
+
+def test_hung_and_crashed_workers_are_replaced(supervisor):
+    pid = supervisor.run(_pid)
+    timeouts = KILLED.value(reason="timeout")
+    with pytest.raises(WorkerTimeout):
+        supervisor.run(_sleep, (30,), timeout=0.5)
+    assert KILLED.value(reason="timeout") == timeouts + 1
+
+    crashes = KILLED.value(reason="crash")
+    with pytest.raises(WorkerCrashed):
+        supervisor.run(_crash)
+    assert KILLED.value(reason="crash") == crashes + 1
+    assert supervisor.run(_pid) not in (pid, None)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="/proc indisponible")
+def test_memory_limit():
+    supervisor = WorkerSupervisor(workers=1, timeout=30, max_memory=150 * 2**20, check_interval=0.05)
+    try:
+        with pytest.raises(WorkerMemoryExceeded):
+            supervisor.run(_allocate, (300,))
+        assert supervisor.run(_pid)
+    finally:
+        supervisor.shutdown()
+
+
+def test_workers_are_recycled():
+    supervisor = WorkerSupervisor(workers=1, timeout=30, max_memory=0, max_tasks=2, check_interval=0.05)
+    try:
+        recycled = RECYCLED.value()
+        pids = [supervisor.run(_pid) for _ in range(4)]
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+        assert RECYCLED.value() == recycled + 2
+    finally:
+        supervisor.shutdown()
+
+
+def test_executor_interface():
+    executor = SupervisedExecutor(WorkerSupervisor(workers=2, timeout=30, max_memory=0, check_interval=0.05))
+    try:
+        async def run():
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(loop.run_in_executor(executor, _pid) for _ in range(4)))
+
+        pids = asyncio.run(run())
+        assert len(set(pids)) <= 2 and os.getpid() not in pids
+
+        started = []
+        future = executor.submit_task(_sleep, (30,), timeout=0.5, on_start=lambda: started.append(True))
+        with pytest.raises(WorkerTimeout):
+            future.result()
+        assert started == [True]
+    finally:
+        executor.shutdown()
+
+
+def test_ocr_from_a_worker_runs_in_the_parent_pool(tmp_path, monkeypatch):
+    # Pages sans couche texte : toutes passent par l'OCR
+    path = tmp_path / "scan.pdf"
+    with fitz.open() as doc:
+        for _ in range(4):
+            doc.new_page()
+        doc.save(str(path))
+
+    lock = threading.Lock()
+    calls = {"running": 0, "max_running": 0, "pids": set()}
+
+    def fake_recognize(source, lang, preprocess=True):
+        with lock:
+            calls["running"] += 1
+            calls["max_running"] = max(calls["max_running"], calls["running"])
+            calls["pids"].add(os.getpid())
+        time.sleep(0.3)
+        with lock:
+            calls["running"] -= 1
+        return "texte reconnu"
+
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(ocr_service, "recognize", fake_recognize)
+    monkeypatch.setattr(ocr_service, "get_executor", lambda: executor)
+
+    supervisor = WorkerSupervisor(workers=1, timeout=60, max_memory=0, max_tasks=100, check_interval=0.05)
+    try:
+        pages = supervisor.run(extract_pages_from_pdf, (str(path), True, None))
+    finally:
+        supervisor.shutdown()
+        executor.shutdown()
+
+    assert pages == ["texte reconnu\n"] * 4
+    # Pages rendues dans le worker, reconnues en parallèle dans le pool OCR du processus parent
+    assert calls["pids"] == {os.getpid()} and calls["max_running"] >= 2
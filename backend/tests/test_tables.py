@@ -0,0 +1,61 @@
+"""
+Tests de l'extraction des tableaux PDF
+"""
+import csv
+import io
+import json
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from backend.services.table_service import iter_pdf_tables, table_to_csv, table_to_ndjson
+
+
+def _generate_table_pdf(path, pages=3):
+    """
+    PDF dont les pages paires portent un tableau à filets, les impaires du texte seul
+    """
+    import fitz
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Page {number + 1}")
+        if number % 2:
+            continue
+        x_edges, y_edges = [72, 192, 312], [100, 130, 160, 190]
+        for x in x_edges:
+            page.draw_line((x, y_edges[0]), (x, y_edges[-1]))
+        for y in y_edges:
+            page.draw_line((x_edges[0], y), (x_edges[-1], y))
+        for row, y in enumerate(y_edges[:-1]):
+            page.insert_text((80, y + 20), "Nom" if row == 0 else f"article {number}-{row}")
+            page.insert_text((200, y + 20), "Prix" if row == 0 else f"{row * 10},5")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _collect(path, **kwargs):
+    # find_tables conserve un état global dans le module fitz : processus, et non threads
+    async def run():
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return [table async for table in iter_pdf_tables(path, executor=executor, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_tables_are_extracted_in_page_order(tmp_path):
+    path = _generate_table_pdf(str(tmp_path / "tableaux.pdf"), pages=5)
+    tables = _collect(path, chunk_pages=1)
+
+    assert [table["page"] for table in tables] == [1, 3, 5]
+    assert tables[1]["rows"] == [["Nom", "Prix"], ["article 2-1", "10,5"], ["article 2-2", "20,5"]]
+    assert tables[0]["bbox"] == [72.0, 100.0, 312.0, 190.0]
+
+    rows = list(csv.reader(io.StringIO(table_to_csv(tables[0], ";")), delimiter=";"))
+    assert rows[1] == ["1", "1", "72.0 100.0 312.0 190.0", "article 0-1", "10,5"]
+
+    records = [json.loads(line) for line in table_to_ndjson(tables[2]).splitlines()]
+    assert [record["row"] for record in records] == [0, 1, 2]
+    assert records[0] == {"page": 5, "table": 1, "bbox": [72.0, 100.0, 312.0, 190.0], "row": 0,
+                          "cells": ["Nom", "Prix"]}
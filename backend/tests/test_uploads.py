@@ -0,0 +1,168 @@
+"""
+Tests des téléchargements reprenables par morceaux
+"""
+import os
+import time
+import base64
+import hashlib
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.config import UPLOAD_CONFIG
+from backend.app.routes import uploads
+from backend.services import upload_service
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setitem(UPLOAD_CONFIG, "dir", tmp_path / "resumable")
+    monkeypatch.setattr(upload_service, "UPLOADS_DIR", tmp_path / "uploads")
+    app = FastAPI()
+    app.include_router(uploads.router)
+    return TestClient(app)
+
+
+def _create(client, length, filename="rapport.pdf"):
+    metadata = "filename " + base64.b64encode(filename.encode()).decode()
+    response = client.post("/api/uploads", headers={"Upload-Length": str(length), "Upload-Metadata": metadata})
+    assert response.status_code == 201 and response.headers["Upload-Offset"] == "0"
+    return response.json()["upload_id"]
+
+
+def _patch(client, upload_id, offset, data, checksum=None):
+    headers = {"Upload-Offset": str(offset)}
+    if checksum is not None:
+        headers["Upload-Checksum"] = checksum
+    return client.patch(f"/api/uploads/{upload_id}", content=data, headers=headers)
+
+
+def _checksum(data):
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def test_chunks_out_of_order_then_finalize(client):
+    upload_id = _create(client, 12)
+    assert _patch(client, upload_id, 8, b"IJKL", _checksum(b"IJKL")).status_code == 204
+    # Morceau reçu après un trou : la position reçue sans trou reste 0
+    assert client.head(f"/api/uploads/{upload_id}").headers["Upload-Offset"] == "0"
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+
+    response = _patch(client, upload_id, 0, b"ABCDEFGH")
+    assert response.status_code == 204 and response.headers["Upload-Offset"] == "12"
+    assert response.headers["Upload-Checksum"] == _checksum(b"ABCDEFGH")
+    # Le morceau dépasse la taille annoncée
+    assert _patch(client, upload_id, 10, b"XYZ").status_code == 413
+
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["digest"] == "sha256:" + hashlib.sha256(b"ABCDEFGHIJKL").hexdigest()
+    path, filename = upload_service.resolve_upload(upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == b"ABCDEFGHIJKL" and filename == "rapport.pdf"
+    # Plus aucun morceau accepté après la finalisation
+    assert _patch(client, upload_id, 0, b"ABCD").status_code == 409
+
+
+def test_rejected_chunk_leaves_accepted_bytes_intact(client):
+    upload_id = _create(client, 8)
+    assert _patch(client, upload_id, 0, b"GOODGOOD", _checksum(b"GOODGOOD")).status_code == 204
+    assert _patch(client, upload_id, 0, b"EVILEVIL", _checksum(b"GOODGOOD")).status_code == 460
+
+    meta = client.post(f"/api/uploads/{upload_id}/finalize").json()
+    path, _ = upload_service.resolve_upload(upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == b"GOODGOOD"
+    assert meta["digest"] == "sha256:" + hashlib.sha256(b"GOODGOOD").hexdigest()
+    # Aucun fichier intermédiaire ne subsiste
+    assert not list(UPLOAD_CONFIG["dir"].glob("*.chunk"))
+
+
+def test_overlapping_chunks_digest_reads_the_file(client):
+    upload_id = _create(client, 8)
+    assert _patch(client, upload_id, 0, b"AAAAAAAA").status_code == 204
+    assert _patch(client, upload_id, 4, b"BBBB").status_code == 204
+    meta = client.post(f"/api/uploads/{upload_id}/finalize").json()
+    assert meta["digest"] == "sha256:" + hashlib.sha256(b"AAAABBBB").hexdigest()
+
+
+def test_digest_is_computed_as_chunks_arrive(client):
+    upload_id = _create(client, 8)
+    assert _patch(client, upload_id, 4, b"EFGH").status_code == 204
+    assert upload_service._content_hashes[upload_id].position == 0
+    # Le morceau qui comble le trou fait avancer l'empreinte jusqu'à la fin du fichier :
+    # la finalisation n'a plus rien à lire
+    assert _patch(client, upload_id, 0, b"ABCD").status_code == 204
+    assert upload_service._content_hashes[upload_id].position == 8
+
+    meta = client.post(f"/api/uploads/{upload_id}/finalize").json()
+    assert meta["digest"] == "sha256:" + hashlib.sha256(b"ABCDEFGH").hexdigest()
+    assert upload_id not in upload_service._content_hashes
+
+
+def test_lock_is_per_upload(client):
+    first, second = _create(client, 4), _create(client, 4)
+    _, _, lock_path = upload_service._paths(first)
+    done = threading.Event()
+
+    def write_second():
+        writer = upload_service.ChunkWriter(second, 0)
+        writer.write(b"DATA")
+        writer.commit()
+        done.set()
+
+    # Le verrou d'un téléchargement ne bloque pas les autres
+    with upload_service._MetaLock(lock_path):
+        thread = threading.Thread(target=write_second)
+        thread.start()
+        assert done.wait(5)
+    thread.join()
+
+
+def test_expired_uploads_are_removed(client, monkeypatch):
+    pending = _create(client, 4)
+    final = _create(client, 4)
+    assert _patch(client, final, 0, b"DATA").status_code == 204
+    client.post(f"/api/uploads/{final}/finalize")
+    path, _ = upload_service.resolve_upload(final)
+
+    upload_service.clean_expired_uploads()
+    assert upload_service.get_upload(pending) and os.path.exists(path)
+
+    later = time.time() + 48 * 3600
+    monkeypatch.setattr(upload_service.time, "time", lambda: later)
+    upload_service.clean_expired_uploads()
+    for upload_id in (pending, final):
+        with pytest.raises(upload_service.UploadNotFound):
+            upload_service.get_upload(upload_id)
+    assert not os.path.exists(path)
+
+
+def test_invalid_requests(client):
+    upload_id = _create(client, 8)
+    assert _patch(client, upload_id, 0, b"DATA", "sha256 pas-du-base64!").status_code == 400
+    assert _patch(client, upload_id, 0, b"DATA", "md5 " + base64.b64encode(b"x").decode()).status_code == 400
+    assert _patch(client, upload_id, 9, b"DATA").status_code == 409
+    assert _patch(client, "0" * 32, 0, b"DATA").status_code == 404
+    assert _patch(client, "../../etc", 0, b"DATA").status_code == 404
+
+    response = client.post("/api/uploads", headers={"Upload-Length": str(UPLOAD_CONFIG["max_size"] + 1),
+                                                    "Upload-Metadata": "filename " + base64.b64encode(b"a.pdf").decode()})
+    assert response.status_code == 413
+    assert client.post("/api/uploads", headers={"Upload-Length": "8"}).status_code == 400
+
+
+def test_commit_after_finalize_is_refused(client):
+    upload_id = _create(client, 4)
+    late = upload_service.ChunkWriter(upload_id, 0)
+    late.write(b"LATE")
+    assert _patch(client, upload_id, 0, b"GOOD").status_code == 204
+    client.post(f"/api/uploads/{upload_id}/finalize")
+
+    with pytest.raises(upload_service.UploadClosed):
+        late.commit()
+    path, _ = upload_service.resolve_upload(upload_id)
+    with open(path, "rb") as f:
+        assert f.read() == b"GOOD"
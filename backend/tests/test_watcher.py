@@ -0,0 +1,78 @@
+"""
+Tests de la surveillance des dossiers de dépôt
+"""
+import os
+import time
+import threading
+
+import pytest
+
+from backend.tests.corpus import generate_csv
+from backend.utils import inotify
+from backend import watcher as watcher_module
+from backend.tests.test_cli import crash_on_marked_file
+from backend.watcher import HotFolderWatcher, WatchedFolder, PROCESSING_DIR, DONE_DIR, FAILED_DIR
+
+
+def _wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@pytest.mark.parametrize("use_inotify", [
+    pytest.param(True, marks=pytest.mark.skipif(not inotify.is_available(), reason="inotify indisponible")),
+    False,
+])
+def test_watcher_processes_dropped_files(tmp_path, use_inotify):
+    depot = tmp_path / "depot"
+    folder = WatchedFolder.parse(f"{depot}=extract", str(tmp_path / "sortie"))
+    # Fichier interrompu lors d'une exécution précédente : repris au démarrage
+    generate_csv(str(depot / PROCESSING_DIR / "interrompu.csv"), rows=10, seed=1)
+
+    watcher = HotFolderWatcher([folder], debounce=0.2, workers=1, poll_interval=0.2, use_inotify=use_inotify)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        generate_csv(str(tmp_path / "a.csv"), rows=10, seed=2)
+        os.rename(tmp_path / "a.csv", depot / "a.csv")
+        generate_csv(str(depot / "b.csv"), rows=10, seed=3)
+        (depot / "ignore.bin").write_bytes(b"\x00")
+
+        outputs = [tmp_path / "sortie" / "depot" / f"{name}.txt" for name in ("interrompu", "a", "b")]
+        assert _wait_for(lambda: all(path.exists() for path in outputs) and watcher.backlog == 0)
+    finally:
+        watcher.stop()
+        thread.join(timeout=30)
+
+    assert sorted(os.listdir(depot / DONE_DIR)) == ["a.csv", "b.csv", "interrompu.csv"]
+    assert os.listdir(depot / PROCESSING_DIR) == []
+    assert (depot / "ignore.bin").exists()
+
+
+def test_worker_crash_fails_only_its_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(watcher_module, "process_file", crash_on_marked_file)
+    depot = tmp_path / "depot"
+    folder = WatchedFolder.parse(f"{depot}=extract", str(tmp_path / "sortie"))
+    names = ["plante.csv"] + [f"f{index}.csv" for index in range(4)]
+    for index, name in enumerate(names):
+        generate_csv(str(depot / name), rows=10, seed=index)
+
+    watcher = HotFolderWatcher([folder], debounce=0.1, workers=2, poll_interval=0.1, use_inotify=False)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        assert _wait_for(lambda: len(os.listdir(depot / DONE_DIR)) == 4 and watcher.backlog == 0)
+        # Le watcher continue après le plantage
+        generate_csv(str(depot / "apres.csv"), rows=10, seed=9)
+        assert _wait_for(lambda: (depot / DONE_DIR / "apres.csv").exists())
+    finally:
+        watcher.stop()
+        thread.join(timeout=30)
+
+    assert sorted(os.listdir(depot / FAILED_DIR)) == ["plante.csv", "plante.csv.error"]
+    assert "arrêt inattendu" in (depot / FAILED_DIR / "plante.csv.error").read_text(encoding="utf-8")
+    assert sorted(os.listdir(tmp_path / "sortie" / "depot")) == ["apres.txt"] + [f"f{index}.txt" for index in range(4)]
@@ -0,0 +1,75 @@
+"""
+Tests de l'extraction des classeurs feuille par feuille
+"""
+import io
+import csv
+import asyncio
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from backend.services.document_service import extract_text_from_xlsx, extract_text_from_xls
+from backend.services.workbook_service import (
+    list_sheets, select_sheets, iter_workbook_sheets, iter_sheets_csv, csv_filenames
+)
+from backend.utils.file_utils import iter_zip
+from backend.tests.corpus import generate_xlsx, generate_xls
+
+
+def _collect(path, extension, sheet_names):
+    async def run():
+        with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return [result async for result in iter_workbook_sheets(path, extension, sheet_names, executor=executor)]
+    return asyncio.run(run())
+
+
+def test_select_sheets():
+    names = ["Résumé", "2023-T4", "2024-T1", "2024-T2", "Notes"]
+    assert select_sheets(names) == names
+    assert select_sheets(names, include=["2024-*", "Résumé"]) == ["Résumé", "2024-T1", "2024-T2"]
+    assert select_sheets(names, exclude=["*-T?", "Notes"]) == ["Résumé"]
+
+
+@pytest.mark.parametrize("extension, generate, sequential", [
+    ("xlsx", generate_xlsx, extract_text_from_xlsx),
+    ("xls", generate_xls, extract_text_from_xls),
+])
+def test_sheets_match_sequential_extraction(tmp_path, extension, generate, sequential):
+    if extension == "xls":
+        pytest.importorskip("xlwt")
+    path = generate(str(tmp_path / f"classeur.{extension}"), rows=20, cols=3, sheets=4)
+    sheet_names = select_sheets(list_sheets(path, extension), exclude=["Feuille2"])
+    assert sheet_names == ["Feuille1", "Feuille3", "Feuille4"]
+
+    results = sorted(_collect(path, extension, sheet_names), key=lambda result: result["index"])
+    assert [(result["index"], result["sheet"], result["status"]) for result in results] == [
+        (0, "Feuille1", "ok"), (1, "Feuille3", "ok"), (2, "Feuille4", "ok"),
+    ]
+    expected = sequential(path)
+    for result in results:
+        assert f"=== Feuille: {result['sheet']} ===\n\n{result['text']}" in expected
+
+
+def test_csv_filenames():
+    assert csv_filenames(["Ventes 2024", "a/b", "A_B", ""]) == {
+        "Ventes 2024": "Ventes 2024.csv", "a/b": "a_b.csv", "A_B": "A_B_2.csv", "": "feuille.csv",
+    }
+
+
+def test_sheets_stream_into_zip_of_csv(tmp_path):
+    import openpyxl
+
+    path = generate_xlsx(str(tmp_path / "classeur.xlsx"), rows=50, cols=4, sheets=3)
+    sheet_names = list_sheets(path, "xlsx")
+    filenames = csv_filenames(sheet_names)
+    entries = ((filenames[name], chunks) for name, chunks in iter_sheets_csv(path, "xlsx", sheet_names, ";"))
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(entries))))
+    assert archive.namelist() == ["Feuille1.csv", "Feuille2.csv", "Feuille3.csv"]
+
+    rows = list(csv.reader(io.StringIO(archive.read("Feuille2.csv").decode("utf-8")), delimiter=";"))
+    expected = openpyxl.load_workbook(path)["Feuille2"]
+    assert len(rows) == 50
+    assert rows[0] == [f"colonne_{c + 1}" for c in range(4)]
+    assert rows[7] == [str(cell.value) for cell in expected[8]]
@@ -0,0 +1,266 @@
+"""
+Contrôle d'admission des requêtes selon leur classe de coût
+
+Chaque route coûteuse appartient à une classe (extraction légère, conversion bureautique,
+rendu lourd). Pour chaque classe :
+- un seau de jetons par client limite le débit de requêtes ;
+- un nombre maximal de requêtes s'exécutent simultanément, les suivantes attendent
+  dans une file bornée (ordre d'arrivée) ;
+- au-delà de la file, ou après une attente trop longue, la requête est refusée
+  (429 avec Retry-After).
+
+Les limites s'appliquent par processus. Le temps d'attente dans la file est publié dans
+la métrique admission_queue_wait_seconds.
+"""
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+
+from fastapi.responses import JSONResponse
+
+from backend.utils.metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT = histogram(
+    "admission_queue_wait_seconds", "Temps d'attente avant l'exécution d'une requête", ["cost_class"]
+)
+REJECTED = counter(
+    "admission_rejected_total", "Requêtes refusées par le contrôle d'admission", ["cost_class", "reason"]
+)
+IN_FLIGHT = gauge("admission_in_flight", "Requêtes en cours d'exécution", ["cost_class"])
+QUEUED = gauge("admission_queued", "Requêtes en attente dans la file", ["cost_class"])
+
+# Au-delà, les seaux pleins (clients inactifs) sont oubliés
+_MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    """
+    Requête refusée par le contrôle d'admission
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class TokenBucket:
+    """
+    Seau de jetons : rate jetons par seconde, burst jetons au plus
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now=None):
+        """
+        Prend un jeton
+
+        Returns:
+            float: 0 si un jeton a été pris, sinon le délai (secondes) avant le prochain jeton
+        """
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self, now=None):
+        self._refill(time.monotonic() if now is None else now)
+        return self.tokens >= self.burst
+
+
+class CostClass:
+    """
+    Limites d'une classe de coût : débit par client, concurrence et file d'attente
+    """
+
+    def __init__(self, name, concurrency, queue, rate, burst):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue
+        self.rate = rate
+        self.burst = burst
+        self.active = 0
+        self.waiters = deque()
+        self.buckets = {}
+        # Durée moyenne d'exécution (moyenne mobile), pour estimer Retry-After
+        self.service_time = 1.0
+
+    def _bucket(self, client):
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= _MAX_TRACKED_CLIENTS:
+                now = time.monotonic()
+                for key in [key for key, value in self.buckets.items() if value.is_full(now)]:
+                    del self.buckets[key]
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _reject(self, reason, retry_after):
+        REJECTED.inc(cost_class=self.name, reason=reason)
+        raise AdmissionRejected(reason, retry_after)
+
+    def _estimated_wait(self):
+        return self.service_time * (len(self.waiters) + 1) / self.concurrency
+
+    async def acquire(self, client, timeout=None):
+        """
+        Attend une place d'exécution pour le client
+
+        Returns:
+            float: Temps passé dans la file (secondes)
+
+        Raises:
+            AdmissionRejected: Débit dépassé, file pleine ou attente trop longue
+        """
+        bucket = self._bucket(client)
+        delay = bucket.take()
+        if delay:
+            self._reject("rate", delay)
+
+        if self.active < self.concurrency and not self.waiters:
+            self.active += 1
+            IN_FLIGHT.set(self.active, cost_class=self.name)
+            QUEUE_WAIT.observe(0.0, cost_class=self.name)
+            return 0.0
+
+        if len(self.waiters) >= self.queue_size:
+            # La requête n'a pas été servie : son jeton est rendu
+            bucket.refund()
+            self._reject("queue_full", self._estimated_wait())
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        QUEUED.set(len(self.waiters), cost_class=self.name)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # La requête n'est pas servie (attente trop longue ou client parti) : son jeton est rendu
+            bucket.refund()
+            if future.done() and not future.cancelled():
+                # La place a été attribuée au même moment : la céder au suivant
+                self.release()
+            else:
+                future.cancel()
+                try:
+                    self.waiters.remove(future)
+                except ValueError:
+                    pass
+            QUEUED.set(len(self.waiters), cost_class=self.name)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject("timeout", self._estimated_wait())
+
+        waited = time.monotonic() - start
+        QUEUED.set(len(self.waiters), cost_class=self.name)
+        QUEUE_WAIT.observe(waited, cost_class=self.name)
+        return waited
+
+    def release(self, duration=None):
+        """
+        Libère une place d'exécution (attribuée directement à la première requête en attente)
+
+        Args:
+            duration (float): Durée d'exécution de la requête, pour l'estimation de Retry-After
+        """
+        if duration is not None:
+            self.service_time = 0.8 * self.service_time + 0.2 * duration
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+        IN_FLIGHT.set(self.active, cost_class=self.name)
+
+
+class AdmissionController:
+    """
+    Associe les routes à leur classe de coût
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.classes = {name: CostClass(name, **limits) for name, limits in config["classes"].items()}
+        self.routes = [(prefix, self.classes[name]) for prefix, name in config["routes"]]
+
+    def classify(self, method, path):
+        """
+        Renvoie la classe de coût d'une requête, ou None si elle n'est pas limitée
+        """
+        if method != "POST":
+            return None
+        for prefix, cost_class in self.routes:
+            if path.startswith(prefix):
+                return cost_class
+        return None
+
+    def client_id(self, scope):
+        """
+        Identifie le client (en-tête configuré derrière un proxy, adresse IP sinon)
+        """
+        header = self.config.get("client_header")
+        if header:
+            name = header.lower().encode("latin-1")
+            for key, value in scope.get("headers", []):
+                if key == name:
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "inconnu"
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI : la place d'exécution est gardée jusqu'à la fin de l'envoi de la
+    réponse (y compris pour les réponses en flux)
+    """
+
+    def __init__(self, app, config):
+        self.app = app
+        self.controller = AdmissionController(config)
+        self.queue_timeout = config.get("queue_timeout")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cost_class = self.controller.classify(scope["method"], scope["path"])
+        if cost_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = self.controller.client_id(scope)
+        try:
+            await cost_class.acquire(client, self.queue_timeout)
+        except AdmissionRejected as e:
+            logger.warning(f"Requête refusée ({cost_class.name}, {e.reason}) pour le client {client}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": f"Trop de requêtes ({e.reason}), réessayez dans {e.retry_after} s"},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            cost_class.release(time.monotonic() - start)
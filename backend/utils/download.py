@@ -0,0 +1,274 @@
+"""
+Réponses de téléchargement avec validateurs et requêtes partielles
+
+- ETag fort dérivé de l'empreinte SHA-256 du contenu (mise en cache par fichier, taille et date,
+  en mémoire et dans le cache partagé entre les workers) ;
+- requêtes conditionnelles If-None-Match / If-Modified-Since (304) ;
+- requêtes partielles Range, simples (206) ou multiples (multipart/byteranges), avec If-Range ;
+- Cache-Control immutable pour les fichiers de sortie, jamais réécrits après leur création.
+"""
+import os
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from backend.utils.file_utils import file_sha256
+from backend.services.shared_cache import get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Au-delà, les plages demandées sont fusionnées en une seule (protection contre les requêtes abusives)
+MAX_RANGES = 16
+READ_CHUNK_SIZE = 256 * 1024
+
+_ETAG_CACHE_SIZE = 1024
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Aucune des plages demandées n'est dans le fichier
+    """
+
+
+def compute_etag(file_path, stat_result=None):
+    """
+    Renvoie l'ETag fort d'un fichier, calculé une fois par version (taille et date de modification)
+
+    Args:
+        file_path (str): Chemin du fichier
+        stat_result (os.stat_result): Résultat de os.stat déjà disponible
+
+    Returns:
+        str: ETag entre guillemets
+    """
+    stat_result = stat_result or os.stat(file_path)
+    version = (stat_result.st_size, stat_result.st_mtime_ns)
+    with _etag_lock:
+        cached = _etag_cache.get(file_path)
+        if cached and cached[0] == version:
+            _etag_cache.move_to_end(file_path)
+            return cached[1]
+
+    # Empreinte déjà calculée par un autre worker ?
+    shared_key = f"etag:{file_path}:{version[0]}:{version[1]}"
+    shared_cache = get_shared_cache()
+    etag = shared_cache.get(shared_key)
+    if etag is None:
+        etag = f'"sha256-{file_sha256(file_path)[:32]}"'
+        shared_cache.set(shared_key, etag)
+
+    with _etag_lock:
+        _etag_cache[file_path] = (version, etag)
+        _etag_cache.move_to_end(file_path)
+        while len(_etag_cache) > _ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return etag
+
+
+def _etag_matches(header, etag):
+    """
+    Comparaison faible d'un en-tête If-None-Match avec l'ETag
+    """
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_range_header(value, size):
+    """
+    Analyse un en-tête Range ("bytes=0-499,-500,900-")
+
+    Args:
+        value (str): Valeur de l'en-tête
+        size (int): Taille du fichier
+
+    Returns:
+        list: Plages (début, fin incluse) triées et fusionnées, ou None si l'en-tête est
+        invalide (le fichier est alors renvoyé en entier)
+
+    Raises:
+        RangeNotSatisfiable: Si aucune plage n'est dans le fichier
+    """
+    unit, _, specs = value.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        start, dash, end = spec.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if start:
+                first = int(start)
+                last = int(end) if end else max(first, size - 1)
+                if last < first:
+                    return None
+            else:
+                # Suffixe : les N derniers octets
+                length = int(end)
+                if length == 0:
+                    continue
+                first, last = max(size - length, 0), size - 1
+        except ValueError:
+            return None
+        if first < size:
+            ranges.append((first, min(last, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for first, last in ranges[1:]:
+        if first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    if len(merged) > MAX_RANGES:
+        merged = [(merged[0][0], merged[-1][1])]
+    return merged
+
+
+def content_disposition(filename, disposition_type="attachment"):
+    """
+    Construit un en-tête Content-Disposition (nom encodé selon la RFC 5987 si nécessaire)
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition_type}; filename*=utf-8''{quoted}"
+    return f'{disposition_type}; filename="{filename}"'
+
+
+def _read_range(file_path, first, last):
+    with open(file_path, "rb") as f:
+        f.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            data = f.read(min(READ_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _multipart_ranges(file_path, ranges, size, media_type, boundary):
+    for first, last in ranges:
+        yield (
+            f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+            f"Content-Range: bytes {first}-{last}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        yield from _read_range(file_path, first, last)
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode("latin-1")
+
+
+def _multipart_length(ranges, size, media_type, boundary):
+    length = 0
+    for first, last in ranges:
+        length += len(
+            f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+            f"Content-Range: bytes {first}-{last}/{size}\r\n\r\n"
+        ) + (last - first + 1) + 2
+    return length + len(f"--{boundary}--\r\n")
+
+
+async def conditional_file_response(request: Request, file_path, filename=None, media_type=None, immutable=True):
+    """
+    Renvoie un fichier en tenant compte des en-têtes conditionnels et des plages demandées
+
+    Args:
+        request (Request): Requête en cours
+        file_path (str): Chemin du fichier
+        filename (str): Nom proposé au téléchargement (Content-Disposition)
+        media_type (str): Type MIME (déduit de l'extension par défaut)
+        immutable (bool): Le fichier n'est jamais réécrit (Cache-Control immutable)
+
+    Returns:
+        Response: 200, 206, 304 ou 416
+    """
+    stat_result = await run_in_threadpool(os.stat, file_path)
+    etag = await run_in_threadpool(compute_etag, file_path, stat_result)
+    size = stat_result.st_size
+    media_type = media_type or guess_type(filename or file_path)[0] or "application/octet-stream"
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() not in (etag, headers["Last-Modified"]):
+        # Le fichier a changé depuis la première partie reçue : renvoyer le fichier entier
+        range_header = None
+
+    ranges = None
+    if range_header:
+        try:
+            ranges = parse_range_header(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if not ranges:
+        return FileResponse(path=file_path, filename=filename, media_type=media_type, headers=headers,
+                            stat_result=stat_result)
+
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    # HEAD : mêmes en-têtes, sans corps (StreamingResponse l'enverrait)
+    head_only = request.method == "HEAD"
+
+    if len(ranges) == 1:
+        first, last = ranges[0]
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        headers["Content-Length"] = str(last - first + 1)
+        if head_only:
+            return Response(status_code=206, media_type=media_type, headers=headers)
+        return StreamingResponse(_read_range(file_path, first, last), status_code=206,
+                                 media_type=media_type, headers=headers)
+
+    boundary = uuid.uuid4().hex
+    headers["Content-Length"] = str(_multipart_length(ranges, size, media_type, boundary))
+    if head_only:
+        return Response(status_code=206, media_type=f"multipart/byteranges; boundary={boundary}", headers=headers)
+    return StreamingResponse(
+        _multipart_ranges(file_path, ranges, size, media_type, boundary),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers
+    )
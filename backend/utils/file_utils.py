@@ -2,12 +2,15 @@
 Utilitaires pour la gestion des fichiers
 """
 import os
+import re
 import uuid
 import shutil
+import hashlib
+import zipfile
 import logging
 from pathlib import Path
-from typing import Tuple, Optional
-from fastapi import UploadFile
+from typing import Iterable, Iterator, Tuple, Optional
+from fastapi import UploadFile, HTTPException
 
 logger = logging.getLogger(__name__)
 
@@ -78,3 +81,139 @@ def get_file_extension(filename: str) -> str:
         Extension du fichier en minuscules (sans le point)
     """
     return os.path.splitext(filename)[1].lower().lstrip('.')
+
+# Formats d'entrée : extensions acceptées et message si le format est refusé
+# (partagés par les routes et le mode serverless)
+PDF_FORMAT = (frozenset({"pdf"}), "Le fichier doit être au format PDF")
+DOCX_FORMAT = (frozenset({"docx", "doc"}), "Le fichier doit être au format DOCX ou DOC")
+
+def check_format(filename: str, file_format: Tuple[frozenset, str]) -> None:
+    """
+    Vérifie l'extension d'un fichier reçu
+    
+    Args:
+        filename: Nom du fichier
+        file_format: Extensions acceptées et message d'erreur (ex: PDF_FORMAT)
+        
+    Raises:
+        HTTPException: 400 si le format n'est pas accepté
+    """
+    extensions, message = file_format
+    if get_file_extension(filename or "") not in extensions:
+        raise HTTPException(status_code=400, detail=message)
+
+# Extension conservée pour une entrée d'archive : le reste du nom n'est jamais utilisé
+_SAFE_EXTENSION = re.compile(r"^\.[A-Za-z0-9]{1,10}$")
+
+def extract_zip_entry(zip_file: zipfile.ZipFile, info: zipfile.ZipInfo, destination_folder: Path,
+                      max_size: Optional[int] = None) -> str:
+    """
+    Extrait une entrée d'archive ZIP sous un nom unique
+
+    Le nom de l'entrée (qui peut contenir "..", un chemin absolu ou des séparateurs
+    Windows) ne sert qu'à en reprendre l'extension : le fichier est toujours créé
+    dans le dossier de destination.
+
+    Args:
+        zip_file: Archive ouverte en lecture
+        info: Entrée à extraire
+        destination_folder: Dossier de destination
+        max_size: Taille décompressée maximale acceptée (octets)
+
+    Returns:
+        str: Chemin du fichier extrait (l'extension d'origine est conservée)
+
+    Raises:
+        ValueError: Si l'entrée dépasse la taille maximale
+    """
+    if max_size is not None and info.file_size > max_size:
+        raise ValueError(f"L'entrée {info.filename} dépasse la taille maximale ({max_size} octets)")
+
+    os.makedirs(destination_folder, exist_ok=True)
+    file_extension = os.path.splitext(info.filename.replace("\\", "/"))[1]
+    if not _SAFE_EXTENSION.match(file_extension):
+        file_extension = ""
+    file_path = os.path.join(destination_folder, f"{uuid.uuid4()}{file_extension}")
+
+    try:
+        with zip_file.open(info) as source, open(file_path, "wb") as target:
+            written = 0
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                written += len(chunk)
+                # La taille déclarée dans l'archive n'est pas vérifiée par tous les décompresseurs
+                if max_size is not None and written > max_size:
+                    raise ValueError(f"L'entrée {info.filename} dépasse la taille maximale ({max_size} octets)")
+                target.write(chunk)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return file_path
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcule l'empreinte SHA-256 d'un fichier, par blocs
+
+    Args:
+        file_path: Chemin du fichier
+        chunk_size: Taille des blocs lus (octets)
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class _ZipOutput:
+    """
+    Destination non positionnable d'une archive ZIP : les octets écrits sont repris par drain()
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(entries: Iterable[Tuple[str, Iterable[bytes]]], compression: int = zipfile.ZIP_DEFLATED) -> Iterator[bytes]:
+    """
+    Produit une archive ZIP au fil de l'eau, sans fichier temporaire
+
+    La destination n'étant pas positionnable, la taille et le CRC de chaque entrée sont
+    écrits après ses données (descripteur de données) ; seul le bloc en cours de
+    compression est conservé en mémoire.
+
+    Args:
+        entries: Couples (nom de l'entrée, blocs d'octets du contenu), consommés dans l'ordre
+        compression: Méthode de compression des entrées
+
+    Returns:
+        Iterator[bytes]: Blocs successifs de l'archive
+    """
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, "w", compression) as archive:
+        for name, chunks in entries:
+            # force_zip64 : la taille de l'entrée n'est pas connue à l'avance
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = output.drain()
+                    if data:
+                        yield data
+            data = output.drain()
+            if data:
+                yield data
+    yield output.drain()
@@ -0,0 +1,125 @@
+"""
+Accès minimal à inotify (Linux) via ctypes, sans dépendance externe
+"""
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def is_available():
+    """
+    Indique si inotify est utilisable sur cette plateforme
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except (OSError, AttributeError):
+        return False
+
+
+class Inotify:
+    """
+    Descripteur inotify : surveillance de dossiers et lecture des événements
+    """
+
+    def __init__(self):
+        libc = _load_libc()
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1: {os.strerror(error)}")
+        self.watches = {}
+
+    def add_watch(self, path, mask):
+        """
+        Surveille un dossier
+
+        Returns:
+            int: Identifiant de la surveillance
+        """
+        wd = _load_libc().inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_add_watch({path}): {os.strerror(error)}")
+        self.watches[wd] = path
+        return wd
+
+    def read(self, timeout=None):
+        """
+        Attend puis lit les événements disponibles
+
+        Args:
+            timeout (float): Attente maximale (secondes), indéfinie si None
+
+        Returns:
+            list: Tuples (dossier surveillé, masque, nom du fichier)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            events.append((self.watches.get(wd), mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,185 @@
+"""
+Métriques de l'application, exposées au format texte Prometheus sur /metrics
+
+Les métriques sont propres à chaque processus : derrière plusieurs workers, chaque
+worker expose les siennes.
+"""
+import threading
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Étiquettes attendues pour {self.name}: {self.labelnames}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """
+    Compteur croissant
+    """
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Valeur instantanée
+    """
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """
+    Distribution de valeurs (durées) par classes cumulées
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def snapshot(self, **labels):
+        """
+        Renvoie le nombre d'observations et leur somme
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (state["count"], state["sum"]) if state else (0, 0.0)
+
+    def _render_value(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+def _register(cls, name, documentation, labelnames=(), **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"La métrique {name} existe déjà avec un autre type")
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """
+    Renvoie le compteur du nom donné, créé au premier appel
+    """
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    """
+    Renvoie la jauge du nom donné, créée au premier appel
+    """
+    return _register(Gauge, name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """
+    Renvoie l'histogramme du nom donné, créé au premier appel
+    """
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def render_metrics():
+    """
+    Renvoie toutes les métriques au format texte Prometheus
+    """
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
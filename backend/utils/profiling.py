@@ -0,0 +1,190 @@
+"""
+Utilitaires pour le profilage à la demande des appels au service de documents
+"""
+import os
+import io
+import re
+import hmac
+import uuid
+import cProfile
+import pstats
+import logging
+import contextvars
+from pathlib import Path
+from typing import Optional
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Session de profilage de la requête en cours (None si la requête n'est pas profilée)
+_current_session = contextvars.ContextVar("profiling_session", default=None)
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ProfileSession:
+    """
+    Regroupe les appels profilés d'une même requête dans un seul profil
+    """
+
+    def __init__(self):
+        self.profile_id = uuid.uuid4().hex
+        self.profiler = None
+        self.active = False
+
+    @property
+    def has_data(self) -> bool:
+        return self.profiler is not None
+
+    def save(self, output_dir: Path) -> str:
+        """
+        Sauvegarde le profil au format pstats
+
+        Args:
+            output_dir: Dossier de stockage des profils
+
+        Returns:
+            str: Chemin du fichier de profil
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        profile_path = os.path.join(output_dir, f"{self.profile_id}.prof")
+        self.profiler.dump_stats(profile_path)
+        logger.info(f"Profil sauvegardé: {profile_path}")
+        return profile_path
+
+
+def is_authorized(header_value: Optional[str], admin_token: str) -> bool:
+    """
+    Vérifie le jeton d'administration transmis dans l'en-tête de profilage
+
+    Args:
+        header_value: Valeur de l'en-tête reçue
+        admin_token: Jeton configuré (le profilage par en-tête est désactivé s'il est vide)
+
+    Returns:
+        bool: True si le jeton est valide
+    """
+    if not header_value or not admin_token:
+        return False
+    return hmac.compare_digest(header_value.encode(), admin_token.encode())
+
+
+def start_session():
+    """
+    Démarre une session de profilage pour la requête en cours
+
+    Returns:
+        tuple: (ProfileSession, jeton du contexte à passer à end_session)
+    """
+    session = ProfileSession()
+    return session, _current_session.set(session)
+
+
+def end_session(token) -> None:
+    """
+    Termine la session de profilage de la requête en cours
+    """
+    _current_session.reset(token)
+
+
+def get_current_session() -> Optional[ProfileSession]:
+    """
+    Renvoie la session de profilage de la requête en cours, s'il y en a une
+    """
+    return _current_session.get()
+
+
+def profiled_call(func, *args, **kwargs):
+    """
+    Appelle une fonction du service de documents, sous profilage si la requête en cours
+    est profilée. Sans session active, la fonction est appelée directement.
+
+    Args:
+        func: Fonction à appeler
+        *args, **kwargs: Arguments de la fonction
+
+    Returns:
+        Le résultat de la fonction
+    """
+    session = _current_session.get()
+    if session is None or session.active:
+        return func(*args, **kwargs)
+
+    if session.profiler is None:
+        session.profiler = cProfile.Profile()
+
+    session.active = True
+    session.profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        session.profiler.disable()
+        session.active = False
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Profile les requêtes portant l'en-tête d'administration avec le bon jeton
+    (ou toutes les requêtes si config["always"]) et renvoie l'identifiant du profil
+    """
+
+    def __init__(self, app, config):
+        super().__init__(app)
+        self.config = config
+
+    async def dispatch(self, request, call_next):
+        header_value = request.headers.get(self.config["request_header"])
+        if not self.config["always"] and not is_authorized(header_value, self.config["admin_token"]):
+            return await call_next(request)
+
+        session, token = start_session()
+        try:
+            response = await call_next(request)
+        finally:
+            end_session(token)
+
+        if session.has_data:
+            try:
+                session.save(self.config["output_dir"])
+                response.headers[self.config["response_header"]] = session.profile_id
+            except Exception as e:
+                logger.error(f"Erreur lors de la sauvegarde du profil: {str(e)}")
+        return response
+
+
+def get_profile_path(profile_id: str, output_dir: Path) -> Optional[str]:
+    """
+    Renvoie le chemin d'un profil sauvegardé
+
+    Args:
+        profile_id: Identifiant du profil
+        output_dir: Dossier de stockage des profils
+
+    Returns:
+        str: Chemin du fichier, ou None si l'identifiant est invalide ou inconnu
+    """
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    profile_path = os.path.join(output_dir, f"{profile_id}.prof")
+    if not os.path.exists(profile_path):
+        return None
+    return profile_path
+
+
+def format_profile(profile_path: str, sort_by: str = "cumulative", limit: int = 50) -> str:
+    """
+    Produit un résumé texte d'un profil pstats
+
+    Args:
+        profile_path: Chemin du fichier de profil
+        sort_by: Clé de tri pstats
+        limit: Nombre de lignes à afficher
+
+    Returns:
+        str: Résumé du profil
+    """
+    buffer = io.StringIO()
+    stats = pstats.Stats(profile_path, stream=buffer)
+    stats.strip_dirs().sort_stats(sort_by).print_stats(limit)
+    return buffer.getvalue()
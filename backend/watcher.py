@@ -0,0 +1,377 @@
+"""
+Surveillance de dossiers de dépôt : extraction ou conversion des fichiers déposés
+
+Utilisation :
+    python -m backend.watcher /srv/depot=extract /srv/pdf=pdf-to-docx --output /srv/resultats
+
+(ou WATCH_FOLDERS="/srv/depot=extract,/srv/pdf=pdf-to-docx", voir WATCH_CONFIG)
+
+Les fichiers sont détectés par inotify (IN_CLOSE_WRITE, IN_MOVED_TO) lorsqu'ils sont
+entièrement écrits ; sans inotify, les dossiers sont scannés périodiquement. Un fichier
+n'est pris qu'après `debounce` secondes sans nouvel événement ni changement de taille.
+
+Traitement au moins une fois : le fichier est d'abord déplacé dans <dossier>/.processing,
+traité par un worker supervisé (sortie dans <sortie>/<nom du dossier>/), puis déplacé
+dans <dossier>/.done (ou supprimé) ; en cas d'erreur, dans <dossier>/.failed avec un
+fichier .error. Un worker arrêté brutalement (plantage, délai ou mémoire dépassés) ne fait
+échouer que son fichier, et il est remplacé. Au démarrage, les fichiers restés dans .processing (arrêt brutal) sont
+remis dans la file, ainsi que les fichiers déposés pendant l'arrêt.
+
+Le nombre de fichiers détectés et non terminés est publié dans la métrique
+watcher_backlog_files, sur http://<hôte>:<WATCH_METRICS_PORT>/metrics.
+"""
+import os
+import sys
+import time
+import signal
+import logging
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.app.config import WATCH_CONFIG
+from backend.cli import OPERATIONS, output_path_for, process_file, remove_partial
+from backend.services.supervisor import SupervisedExecutor, WorkerSupervisor
+from backend.utils import inotify
+from backend.utils.metrics import counter, gauge, histogram, render_metrics
+
+logger = logging.getLogger("backend.watcher")
+
+BACKLOG = gauge("watcher_backlog_files", "Fichiers détectés et non encore traités", ["folder"])
+FILES = counter("watcher_files_total", "Fichiers traités depuis les dossiers surveillés", ["folder", "status"])
+DURATION = histogram("watcher_processing_seconds", "Durée de traitement d'un fichier déposé", ["folder"])
+
+PROCESSING_DIR = ".processing"
+DONE_DIR = ".done"
+FAILED_DIR = ".failed"
+
+# Fichiers en cours d'écriture par les outils de copie usuels
+_TEMPORARY_SUFFIXES = (".part", ".tmp", ".crdownload", ".partial", "~")
+
+_WATCH_MASK = inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO | inotify.IN_ONLYDIR
+
+
+class WatchedFolder:
+    """
+    Dossier surveillé et opération appliquée à ses fichiers
+    """
+
+    def __init__(self, path, operation, output_root):
+        if operation not in OPERATIONS:
+            raise ValueError(f"Opération inconnue pour {path}: {operation}")
+        self.path = os.path.abspath(path)
+        self.operation = operation
+        self.name = os.path.basename(self.path.rstrip(os.sep)) or "racine"
+        self.output_dir = os.path.join(os.path.abspath(output_root), self.name)
+        self.processing_dir = os.path.join(self.path, PROCESSING_DIR)
+        self.done_dir = os.path.join(self.path, DONE_DIR)
+        self.failed_dir = os.path.join(self.path, FAILED_DIR)
+        for directory in (self.path, self.processing_dir, self.done_dir, self.failed_dir, self.output_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def parse(cls, spec, output_root):
+        """
+        Crée un dossier surveillé depuis "chemin=opération" (extraction par défaut)
+        """
+        path, _, operation = spec.rpartition("=") if "=" in spec else (spec, "", "extract")
+        return cls(path, operation or "extract", output_root)
+
+    def accepts(self, name):
+        if name.startswith(".") or name.endswith(_TEMPORARY_SUFFIXES):
+            return False
+        return os.path.splitext(name)[1].lower() in OPERATIONS[self.operation][0]
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _unique_path(directory, name):
+    """
+    Chemin libre dans un dossier (suffixe numérique en cas de collision)
+    """
+    candidate = os.path.join(directory, name)
+    base, extension = os.path.splitext(name)
+    index = 1
+    while os.path.exists(candidate):
+        candidate = os.path.join(directory, f"{base}-{index}{extension}")
+        index += 1
+    return candidate
+
+
+class HotFolderWatcher:
+    """
+    Boucle de surveillance : détection, anti-rebond, répartition sur le pool et finalisation
+    """
+
+    def __init__(self, folders, debounce=None, workers=None, keep_done=None, poll_interval=None,
+                 use_inotify=None, timeout=None):
+        self.folders = list(folders)
+        self.debounce = WATCH_CONFIG["debounce"] if debounce is None else debounce
+        self.workers = workers or WATCH_CONFIG["workers"]
+        self.keep_done = WATCH_CONFIG["keep_done"] if keep_done is None else keep_done
+        self.poll_interval = poll_interval or WATCH_CONFIG["poll_interval"]
+        self.use_inotify = inotify.is_available() if use_inotify is None else use_inotify
+        self.timeout = timeout or WATCH_CONFIG["timeout"]
+
+        # Fichiers détectés : chemin -> [dossier, échéance, signature (taille, date)]
+        self.pending = {}
+        # Fichiers prêts, pas encore soumis : (dossier, chemin)
+        self.ready = deque()
+        # Tâches en cours : future -> (dossier, nom d'origine, chemin dans .processing, sortie, début)
+        self.in_flight = {}
+        self.stopping = threading.Event()
+        self.executor = None
+        self.notifier = None
+
+    def stop(self):
+        self.stopping.set()
+
+    # Détection
+
+    def _notice(self, folder, path, now=None):
+        if path in self.pending or not folder.accepts(os.path.basename(path)):
+            return
+        try:
+            signature = _signature(path)
+        except FileNotFoundError:
+            return
+        self.pending[path] = [folder, (now or time.monotonic()) + self.debounce, signature]
+
+    def scan(self):
+        """
+        Relève les fichiers présents dans les dossiers (démarrage, débordement inotify, mode sans inotify)
+        """
+        queued = {path for _, path in self.ready}
+        now = time.monotonic()
+        for folder in self.folders:
+            for entry in os.scandir(folder.path):
+                if entry.is_file() and entry.path not in queued:
+                    self._notice(folder, entry.path, now)
+
+    def recover(self):
+        """
+        Remet dans la file les fichiers restés dans .processing après un arrêt brutal
+        """
+        for folder in self.folders:
+            for name in sorted(os.listdir(folder.processing_dir)):
+                source = os.path.join(folder.processing_dir, name)
+                if not os.path.isfile(source):
+                    continue
+                target = _unique_path(folder.path, name)
+                os.replace(source, target)
+                logger.warning(f"Reprise du fichier interrompu: {target}")
+
+    def _handle_events(self, events):
+        now = time.monotonic()
+        by_path = {folder.path: folder for folder in self.folders}
+        for watched, mask, name in events:
+            if mask & inotify.IN_Q_OVERFLOW:
+                logger.warning("File d'événements inotify saturée, nouveau scan des dossiers")
+                self.scan()
+                continue
+            folder = by_path.get(watched)
+            if folder is None or mask & inotify.IN_ISDIR:
+                continue
+            path = os.path.join(folder.path, name)
+            entry = self.pending.get(path)
+            if entry:
+                # Nouvel événement : l'anti-rebond repart de zéro
+                entry[1] = now + self.debounce
+            else:
+                self._notice(folder, path, now)
+
+    def _promote(self):
+        """
+        Passe dans la file les fichiers dont l'anti-rebond est écoulé et dont la taille est stable
+        """
+        now = time.monotonic()
+        for path, entry in list(self.pending.items()):
+            folder, deadline, signature = entry
+            if deadline > now:
+                continue
+            try:
+                current = _signature(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            if current != signature:
+                entry[1] = now + self.debounce
+                entry[2] = current
+                continue
+            del self.pending[path]
+            self.ready.append((folder, path))
+
+    # Traitement
+
+    def _dispatch(self):
+        # Fenêtre bornée : les fichiers restent dans le dossier de dépôt tant qu'ils ne sont pas soumis
+        while self.ready and len(self.in_flight) < self.workers * 2 and not self.stopping.is_set():
+            folder, path = self.ready.popleft()
+            name = os.path.basename(path)
+            claimed = _unique_path(folder.processing_dir, name)
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            output = output_path_for(os.path.join(folder.path, name), folder.path, folder.output_dir,
+                                     folder.operation)
+            future = self.executor.submit_task(process_file, (folder.operation, claimed, output),
+                                               timeout=self.timeout)
+            self.in_flight[future] = (folder, name, claimed, output, time.monotonic())
+            logger.info(f"Traitement de {path} ({folder.operation})")
+
+    def _finish(self, future):
+        folder, name, claimed, output, start = self.in_flight.pop(future)
+        try:
+            future.result()
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de {name} ({folder.path}): {str(e)}")
+            remove_partial(output)
+            failed = _unique_path(folder.failed_dir, name)
+            os.replace(claimed, failed)
+            with open(failed + ".error", "w", encoding="utf-8") as f:
+                f.write(str(e))
+            FILES.inc(folder=folder.name, status="error")
+            return
+        DURATION.observe(time.monotonic() - start, folder=folder.name)
+        FILES.inc(folder=folder.name, status="done")
+        if self.keep_done:
+            os.replace(claimed, os.path.join(folder.done_dir, name))
+        else:
+            os.remove(claimed)
+        logger.info(f"Fichier traité: {name} -> {output}")
+
+    def _collect(self):
+        for future in [future for future in self.in_flight if future.done()]:
+            self._finish(future)
+
+    def _update_backlog(self):
+        counts = {folder.name: 0 for folder in self.folders}
+        for folder, *_ in self.pending.values():
+            counts[folder.name] += 1
+        for folder, _ in self.ready:
+            counts[folder.name] += 1
+        for folder, *_ in self.in_flight.values():
+            counts[folder.name] += 1
+        for name, count in counts.items():
+            BACKLOG.set(count, folder=name)
+
+    @property
+    def backlog(self):
+        return len(self.pending) + len(self.ready) + len(self.in_flight)
+
+    def _wait_timeout(self):
+        if self.in_flight or self.ready:
+            return 0.1
+        if self.pending:
+            deadline = min(entry[1] for entry in self.pending.values())
+            return max(0.05, min(1.0, deadline - time.monotonic()))
+        return 1.0
+
+    def run(self):
+        """
+        Boucle principale, jusqu'à l'appel de stop() ; les traitements en cours sont terminés
+        """
+        # Workers supervisés : un worker qui plante n'entraîne pas les autres fichiers en cours
+        self.executor = SupervisedExecutor(WorkerSupervisor(workers=self.workers, timeout=self.timeout))
+        if self.use_inotify:
+            self.notifier = inotify.Inotify()
+            for folder in self.folders:
+                self.notifier.add_watch(folder.path, _WATCH_MASK)
+        mode = "inotify" if self.notifier else f"scan toutes les {self.poll_interval:.0f} s"
+        logger.info(f"Surveillance de {len(self.folders)} dossier(s) ({mode}, {self.workers} workers)")
+
+        # Surveillance installée avant le scan : aucun dépôt n'est manqué entre les deux
+        self.recover()
+        self.scan()
+        last_scan = time.monotonic()
+        try:
+            while not self.stopping.is_set():
+                timeout = self._wait_timeout()
+                if self.notifier:
+                    self._handle_events(self.notifier.read(timeout))
+                else:
+                    self.stopping.wait(timeout)
+                    if time.monotonic() - last_scan >= self.poll_interval:
+                        self.scan()
+                        last_scan = time.monotonic()
+                self._promote()
+                self._collect()
+                self._dispatch()
+                self._update_backlog()
+        finally:
+            logger.info(f"Arrêt : {len(self.in_flight)} traitement(s) en cours à terminer")
+            self.executor.shutdown(wait=True)
+            self._collect()
+            self._update_backlog()
+            if self.notifier:
+                self.notifier.close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """
+    Expose /metrics dans un thread (format Prometheus)
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="watcher-metrics", daemon=True).start()
+    logger.info(f"Métriques sur http://{host}:{port}/metrics")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Surveillance de dossiers de dépôt")
+    parser.add_argument("folders", nargs="*", help="Dossiers à surveiller, sous la forme chemin=opération "
+                                                   f"({', '.join(sorted(OPERATIONS))})")
+    parser.add_argument("--output", default=None, help="Dossier des résultats")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--debounce", type=float, default=None)
+    parser.add_argument("--metrics-port", type=int, default=None)
+    parser.add_argument("--poll", action="store_true", help="Scan périodique au lieu d'inotify")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    specs = args.folders or WATCH_CONFIG["folders"]
+    if not specs:
+        parser.error("Aucun dossier à surveiller (arguments ou WATCH_FOLDERS)")
+    output_root = args.output or WATCH_CONFIG["output_dir"]
+    try:
+        folders = [WatchedFolder.parse(spec, output_root) for spec in specs]
+    except ValueError as e:
+        parser.error(str(e))
+
+    watcher = HotFolderWatcher(folders, args.debounce, args.workers, use_inotify=False if args.poll else None)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: watcher.stop())
+
+    metrics_port = WATCH_CONFIG["metrics_port"] if args.metrics_port is None else args.metrics_port
+    if metrics_port:
+        start_metrics_server(metrics_port)
+
+    watcher.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
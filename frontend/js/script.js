@@ -47,6 +47,24 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     };
     
+    // Fonction pour attendre la fin d'une tâche asynchrone (réponse 202 du serveur)
+    window.waitForJob = async function(statusUrl, interval = 2000) {
+        while (true) {
+            const response = await fetch(statusUrl);
+            if (!response.ok) {
+                throw new Error(`Erreur HTTP: ${response.status}`);
+            }
+            const job = await response.json();
+            if (job.status === 'done') {
+                return job.result;
+            }
+            if (job.status === 'error') {
+                throw new Error(job.error);
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    };
+    
     // Ajouter les styles CSS pour le chargement
     const style = document.createElement('style');
     style.textContent = `